@@ -226,11 +226,17 @@ rst_prolog = """
 
 .. |Taxon| replace:: :class:`~dendropy.datamodel.taxonmodel.Taxon`
 .. |TaxonNamespace| replace:: :class:`~dendropy.datamodel.taxonmodel.TaxonNamespace`
+.. |SlottedTaxon| replace:: :class:`~dendropy.datamodel.taxonmodel.SlottedTaxon`
 .. |TaxonNamespaceMapping| replace:: :class:`~dendropy.datamodel.taxonmodel.TaxonNamespaceMapping`
 .. |Tree| replace:: :class:`~dendropy.datamodel.treemodel.Tree`
 .. |Node| replace:: :class:`~dendropy.datamodel.treemodel.Node`
 .. |Edge| replace:: :class:`~dendropy.datamodel.treemodel.Edge`
 .. |Bipartition| replace:: :class:`~dendropy.datamodel.treemodel.Bipartition`
+.. |SlottedNode| replace:: :class:`~dendropy.datamodel.treemodel.SlottedNode`
+.. |SlottedEdge| replace:: :class:`~dendropy.datamodel.treemodel.SlottedEdge`
+.. |SlottedBipartition| replace:: :class:`~dendropy.datamodel.treemodel.SlottedBipartition`
+.. |FlatTree| replace:: :class:`~dendropy.datamodel.treemodel.FlatTree`
+.. |LcaIndex| replace:: :class:`~dendropy.datamodel.treemodel.LcaIndex`
 .. |TreeList| replace:: :class:`~dendropy.datamodel.treecollectionmodel.TreeList`
 .. |TreeArray| replace:: :class:`~dendropy.datamodel.treecollectionmodel.TreeArray`
 .. |SplitDistribution| replace:: :class:`~dendropy.datamodel.treecollectionmodel.SplitDistribution`
@@ -247,12 +253,15 @@ rst_prolog = """
 .. |StandardCharacterMatrix| replace:: :class:`~dendropy.datamodel.charmatrixmodel.StandardCharacterMatrix`
 .. |ContinuousCharacterMatrix| replace:: :class:`~dendropy.datamodel.charmatrixmodel.ContinuousCharacterMatrix`
 .. |CharacterDataSequence| replace:: :class:`~dendropy.datamodel.charmatrixmodel.CharacterDataSequence`
+.. |CompactCharacterDataSequence| replace:: :class:`~dendropy.datamodel.charmatrixmodel.CompactCharacterDataSequence`
+.. |CharacterValueTable| replace:: :class:`~dendropy.datamodel.charmatrixmodel.CharacterValueTable`
 .. |ContinuousCharacterDataSequence| replace:: :class:`~dendropy.datamodel.charmatrixmodel.ContinuousCharacterDataSequence`
 .. |DnaCharacterDataSequence| replace:: :class:`~dendropy.datamodel.charmatrixmodel.DnaCharacterDataSequence`
 .. |CharacterType| replace:: :class:`~dendropy.datamodel.charmatrixmodel.CharacterType`
 .. |Annotation| replace:: :class:`~dendropy.datamodel.basemodel.Annotation`
 .. |AnnotationSet| replace:: :class:`~dendropy.datamodel.basemodel.AnnotationSet`
 .. |Annotable| replace:: :class:`~dendropy.datamodel.basemodel.Annotable`
+.. |DensePhylogeneticDistanceMatrix| replace:: :class:`~dendropy.calculate.phylogeneticdistance.DensePhylogeneticDistanceMatrix`
 .. |PhylogeneticDistanceMatrix| replace:: :class:`~dendropy.calculate.phylogeneticdistance.PhylogeneticDistanceMatrix`
 .. |AsciiTreePlot| replace:: :class:`~dendropy.datamodel.treemodel.AsciiTreePlot`
 
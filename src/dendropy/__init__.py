@@ -27,15 +27,20 @@ from dendropy.dataio.nexusprocessing import get_rooting_argument
 from dendropy.datamodel.basemodel import Annotation
 from dendropy.datamodel.basemodel import AnnotationSet
 from dendropy.datamodel.taxonmodel import Taxon
+from dendropy.datamodel.taxonmodel import SlottedTaxon
 from dendropy.datamodel.taxonmodel import TaxonNamespace
 from dendropy.datamodel.taxonmodel import TaxonNamespacePartition
 from dendropy.datamodel.taxonmodel import TaxonNamespaceMapping
 from dendropy.datamodel.taxonmodel import TaxonSet # Legacy
 from dendropy.datamodel.treemodel import Bipartition
+from dendropy.datamodel.treemodel import SlottedBipartition
 from dendropy.datamodel.treemodel import Edge
+from dendropy.datamodel.treemodel import SlottedEdge
 from dendropy.datamodel.treemodel import Node
+from dendropy.datamodel.treemodel import SlottedNode
 from dendropy.datamodel.treemodel import Tree
 from dendropy.datamodel.treemodel import AsciiTreePlot
+from dendropy.datamodel.treemodel import FlatTree
 from dendropy.datamodel.treecollectionmodel import TreeList
 from dendropy.datamodel.treecollectionmodel import SplitDistribution
 from dendropy.datamodel.treecollectionmodel import TreeArray
@@ -49,6 +54,8 @@ from dendropy.datamodel.charstatemodel import RESTRICTION_SITES_STATE_ALPHABET
 from dendropy.datamodel.charstatemodel import INFINITE_SITES_STATE_ALPHABET
 from dendropy.datamodel.charstatemodel import new_standard_state_alphabet
 from dendropy.datamodel.charmatrixmodel import CharacterDataSequence
+from dendropy.datamodel.charmatrixmodel import CompactCharacterDataSequence
+from dendropy.datamodel.charmatrixmodel import CharacterValueTable
 from dendropy.datamodel.charmatrixmodel import CharacterMatrix
 from dendropy.datamodel.charmatrixmodel import DnaCharacterDataSequence
 from dendropy.datamodel.charmatrixmodel import DnaCharacterMatrix
@@ -67,6 +74,7 @@ from dendropy.datamodel.charmatrixmodel import StandardCharacterMatrix
 from dendropy.datamodel.charmatrixmodel import ContinuousCharacterDataSequence
 from dendropy.datamodel.charmatrixmodel import ContinuousCharacterMatrix
 from dendropy.calculate.phylogeneticdistance import PhylogeneticDistanceMatrix
+from dendropy.calculate.phylogeneticdistance import DensePhylogeneticDistanceMatrix
 from dendropy.datamodel.datasetmodel import DataSet
 from dendropy.utility.error import ImmutableTaxonNamespaceError
 from dendropy.utility.error import DataParseError
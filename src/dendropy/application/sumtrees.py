@@ -35,11 +35,15 @@ import socket
 import math
 import csv
 import json
+import time
+import shutil
+import tempfile
 
-import queue
 import multiprocessing
 
 import dendropy
+from dendropy import dataio
+from dendropy.dataio import treeindex
 from dendropy.utility import cli
 from dendropy.utility import constants
 from dendropy.utility import deprecate
@@ -82,6 +86,9 @@ def _read_into_tree_array(
         error_message_func,
         log_frequency,
         debug_mode,
+        max_trees=None,
+        use_tree_index=False,
+        tree_index_dir=None,
         ):
     if not log_frequency:
         tree_array.read_from_files(
@@ -89,6 +96,9 @@ def _read_into_tree_array(
             schema=schema,
             rooting=rooting,
             tree_offset=tree_offset,
+            max_trees=max_trees,
+            use_tree_index=use_tree_index,
+            tree_index_dir=tree_index_dir,
             store_tree_weights=use_tree_weights,
             preserve_underscores=preserve_underscores,
             ignore_unrecognized_keyword_arguments=True,
@@ -112,10 +122,22 @@ def _read_into_tree_array(
                     current_tree_offset=current_tree_offset,
                     coda=coda,
                     ), wrap=False)
-        tree_yielder = dendropy.Tree.yield_from_files(
+        if use_tree_index:
+            # burn-in trees are skipped without being read
+            initial_tree_offset = tree_offset
+        else:
+            # burn-in trees are read (and logged) but not analyzed
+            initial_tree_offset = 0
+            if max_trees is not None:
+                max_trees += tree_offset
+        tree_yielder = tree_array.yield_from_files(
                 tree_sources,
                 schema=schema,
                 taxon_namespace=taxon_namespace,
+                tree_offset=initial_tree_offset,
+                max_trees=max_trees,
+                use_tree_index=use_tree_index,
+                tree_index_dir=tree_index_dir,
                 store_tree_weights=use_tree_weights,
                 preserve_underscores=preserve_underscores,
                 rooting=rooting,
@@ -128,7 +150,7 @@ def _read_into_tree_array(
                 current_yielder_index = tree_yielder.current_file_index
                 if current_yielder_index != current_source_index:
                     current_source_index = current_yielder_index
-                    current_tree_offset = 0
+                    current_tree_offset = initial_tree_offset
                     source_name = tree_yielder.current_file_name
                     if source_name is None:
                         source_name = "<stdin>"
@@ -149,6 +171,152 @@ def _read_into_tree_array(
             e.exception_tree_offset = current_tree_offset
             raise e
 
+TreeSourceWorkItem = collections.namedtuple(
+        "TreeSourceWorkItem",
+        ["tree_source", "tree_offset", "max_trees"]
+        )
+TreeSourceWorkItem.__doc__ = """\
+A task for a `TreeAnalysisWorker`: the trees of ``tree_source``, starting with
+the tree at ``tree_offset``. If ``max_trees`` is not |None|, then only this
+many trees are read, and ``tree_offset`` is located using the tree index of the
+source.
+"""
+
+class AnalysisCheckpoint(object):
+    """
+    Periodically saves the state of an analysis to a file, from which the
+    analysis can be resumed (e.g., after the job has been interrupted) without
+    re-reading the trees that have already been analyzed.
+
+    The state saved is the |TreeArray| of the trees analyzed so far (see
+    :meth:`TreeArray.save`), along with the ranges of trees of each source that
+    these are, and the settings of the analysis (which must be the same when
+    resuming). To allow analyses to be checkpointed and resumed part-way
+    through a source, sources are analyzed in chunks of (at most)
+    ``chunk_size`` trees, located using the tree index of the source (see
+    `dendropy.dataio.treeindex`). Sources in a schema that does not support
+    tree indexes are analyzed as a single chunk. The tree indexes are saved
+    in the directory of the checkpoint file (rather than next to the
+    sources), so that they can be re-used when resuming.
+    """
+
+    def __init__(self,
+            path,
+            settings,
+            interval=300,
+            chunk_size=1000):
+        """
+        Parameters
+        ----------
+        path : str
+            Path of the checkpoint file.
+        settings : dict
+            The (JSON-serializable) settings of the analysis.
+        interval : numeric
+            Minimum number of seconds between the saving of checkpoints.
+        chunk_size : int
+            Maximum number of trees in each chunk of a source.
+        """
+        self.path = path
+        self.settings = settings
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.tree_index_dir = os.path.dirname(os.path.abspath(path))
+        # source path => sorted, non-overlapping list of [start, stop] ranges
+        # of the offsets of trees that have been analyzed, with a ``stop`` of
+        # |None| meaning the end of the source
+        self.processed_tree_ranges = {}
+        self.time_last_saved = time.time()
+
+    def _source_key(self, tree_source):
+        return os.path.abspath(tree_source)
+
+    def load_tree_array(self, **kwargs):
+        """
+        Returns the |TreeArray| saved in the checkpoint file, and restores the
+        ranges of trees that have been analyzed. Keyword arguments are passed
+        to :meth:`TreeArray.load`.
+        """
+        metadata = dendropy.TreeArray.load_metadata(self.path)
+        if not metadata or "processed_tree_ranges" not in metadata:
+            raise ValueError("'{}' is not a SumTrees checkpoint file".format(self.path))
+        saved_settings = metadata["settings"]
+        differences = sorted(key for key in set(saved_settings) | set(self.settings)
+                if saved_settings.get(key) != self.settings.get(key))
+        if differences:
+            raise ValueError("Cannot resume from checkpoint '{}', as the analysis settings differ: {}".format(
+                self.path, ", ".join(differences)))
+        self.processed_tree_ranges = metadata["processed_tree_ranges"]
+        return dendropy.TreeArray.load(self.path, **kwargs)
+
+    def pending_work_items(self, tree_sources, schema, tree_offset):
+        """
+        Returns a list of `TreeSourceWorkItem` objects describing the chunks
+        of trees (after the burn-in, ``tree_offset``) of ``tree_sources`` that
+        have not yet been analyzed.
+        """
+        is_tree_index_supported = dataio.is_tree_index_supported(schema)
+        work_items = []
+        for tree_source in tree_sources:
+            tree_ranges = self.processed_tree_ranges.get(self._source_key(tree_source), [])
+            if any(stop is None for start, stop in tree_ranges):
+                continue
+            if not is_tree_index_supported:
+                work_items.append(TreeSourceWorkItem(tree_source, tree_offset, None))
+                continue
+            num_trees = len(treeindex.get_tree_index(tree_source, index_dir=self.tree_index_dir))
+            start = tree_offset
+            for range_start, range_stop in tree_ranges + [[num_trees, num_trees]]:
+                while start < min(range_start, num_trees):
+                    chunk_size = min(self.chunk_size, range_start - start)
+                    work_items.append(TreeSourceWorkItem(tree_source, start, chunk_size))
+                    start += chunk_size
+                start = max(start, range_stop)
+        return work_items
+
+    def record(self, work_item):
+        """
+        Records the trees of ``work_item`` as analyzed.
+        """
+        if work_item.max_trees is None:
+            stop = None
+        else:
+            stop = work_item.tree_offset + work_item.max_trees
+        tree_ranges = self.processed_tree_ranges.setdefault(self._source_key(work_item.tree_source), [])
+        tree_ranges.append([work_item.tree_offset, stop])
+        tree_ranges.sort(key=lambda r: r[0])
+        merged_ranges = [tree_ranges[0]]
+        for start, stop in tree_ranges[1:]:
+            prev_stop = merged_ranges[-1][1]
+            if prev_stop is None:
+                continue
+            if start <= prev_stop:
+                if stop is None or stop > prev_stop:
+                    merged_ranges[-1][1] = stop
+            else:
+                merged_ranges.append([start, stop])
+        tree_ranges[:] = merged_ranges
+
+    def save(self, tree_array, force=False):
+        """
+        Saves ``tree_array``, and the ranges of trees that have been analyzed,
+        to the checkpoint file if at least ``interval`` seconds have passed
+        since the last save (or if ``force`` is |True|).
+
+        Returns
+        -------
+        b : bool
+            |True| if the checkpoint was saved.
+        """
+        if not force and time.time() - self.time_last_saved < self.interval:
+            return False
+        tree_array.save(self.path, metadata={
+            "settings": self.settings,
+            "processed_tree_ranges": self.processed_tree_ranges,
+            })
+        self.time_last_saved = time.time()
+        return True
+
 class TreeAnalysisWorker(multiprocessing.Process):
 
     def __init__(self,
@@ -165,10 +333,12 @@ class TreeAnalysisWorker(multiprocessing.Process):
             use_tree_weights,
             ultrametricity_precision,
             taxon_label_age_map,
+            summary_reservoir_size,
             log_frequency,
             messenger,
             messenger_lock,
             debug_mode,
+            tree_index_dir=None,
             ):
         multiprocessing.Process.__init__(self, name=name)
         self.work_queue = work_queue
@@ -186,11 +356,19 @@ class TreeAnalysisWorker(multiprocessing.Process):
         self.use_tree_weights = use_tree_weights
         self.ultrametricity_precision = ultrametricity_precision
         self.taxon_label_age_map = taxon_label_age_map
+        self.summary_reservoir_size = summary_reservoir_size
         self.log_frequency = log_frequency
         self.messenger = messenger
         self.messenger_lock = messenger_lock
         self.kill_received = False
-        self.tree_array = dendropy.TreeArray(
+        self.tree_array = self.new_tree_array()
+        self.num_tasks_received = 0
+        self.num_tasks_completed = 0
+        self.debug_mode = debug_mode
+        self.tree_index_dir = tree_index_dir
+
+    def new_tree_array(self):
+        tree_array = dendropy.TreeArray(
                 taxon_namespace=self.taxon_namespace,
                 is_rooted_trees=self.is_source_trees_rooted,
                 ignore_edge_lengths=self.ignore_edge_lengths,
@@ -198,11 +376,10 @@ class TreeAnalysisWorker(multiprocessing.Process):
                 use_tree_weights=self.use_tree_weights,
                 ultrametricity_precision=self.ultrametricity_precision,
                 taxon_label_age_map=self.taxon_label_age_map,
+                summary_reservoir_size=self.summary_reservoir_size,
                 )
-        self.tree_array.worker_name = self.name
-        self.num_tasks_received = 0
-        self.num_tasks_completed = 0
-        self.debug_mode = debug_mode
+        tree_array.worker_name = self.name
+        return tree_array
 
     def send_message(self, msg, level, wrap=True):
         if self.messenger is None:
@@ -227,15 +404,23 @@ class TreeAnalysisWorker(multiprocessing.Process):
 
     def run(self):
         while not self.kill_received:
-            try:
-                tree_source = self.work_queue.get_nowait()
-            except queue.Empty:
+            work_item = self.work_queue.get()
+            if work_item is None:
+                # no more tasks
                 break
             self.num_tasks_received += 1
+            tree_source = work_item.tree_source
+            if work_item.max_trees is None:
+                task_name = tree_source
+            else:
+                task_name = "{} (trees {} to {})".format(
+                        tree_source,
+                        work_item.tree_offset + 1,
+                        work_item.tree_offset + work_item.max_trees)
             # self.send_info("Received task {task_count}: '{task_name}'".format(
             self.send_info("Received task: '{task_name}'".format(
                 task_count=self.num_tasks_received,
-                task_name=tree_source), wrap=False)
+                task_name=task_name), wrap=False)
             # self.tree_array.read_from_files(
             #     files=[tree_source],
             #     schema=self.source_schema,
@@ -252,13 +437,16 @@ class TreeAnalysisWorker(multiprocessing.Process):
                         schema=self.source_schema,
                         taxon_namespace=self.taxon_namespace,
                         rooting=self.rooting_interpretation,
-                        tree_offset=self.tree_offset,
+                        tree_offset=work_item.tree_offset,
                         use_tree_weights=self.use_tree_weights,
                         preserve_underscores=self.preserve_underscores,
                         info_message_func=self.send_info,
                         error_message_func=self.send_error,
                         log_frequency=self.log_frequency,
                         debug_mode=self.debug_mode,
+                        max_trees=work_item.max_trees,
+                        use_tree_index=work_item.max_trees is not None,
+                        tree_index_dir=self.tree_index_dir,
                         )
             except (KeyboardInterrupt, Exception) as e:
                 e.worker_name = self.name
@@ -270,11 +458,18 @@ class TreeAnalysisWorker(multiprocessing.Process):
             # self.send_info("Completed task {task_count}: '{task_name}'".format(
             self.send_info("Completed task: '{task_name}'".format(
                 task_count=self.num_tasks_received,
-                task_name=tree_source), wrap=False)
+                task_name=task_name), wrap=False)
+            # results are returned for each task, so that the progress of the
+            # analysis can be checkpointed; the packed representation pickles
+            # as a few raw buffers, and so is far cheaper to transfer than the
+            # |TreeArray| itself
+            result = self.tree_array.pack()
+            result.worker_name = self.name
+            result.work_item = work_item
+            self.tree_array = self.new_tree_array()
+            self.results_queue.put(result)
         if self.kill_received:
             self.send_warning("Terminating in response to kill request")
-        else:
-            self.results_queue.put(self.tree_array)
 
 class TreeProcessor(object):
 
@@ -289,6 +484,7 @@ class TreeProcessor(object):
             log_frequency,
             messenger,
             debug_mode,
+            summary_reservoir_size=None,
             ):
         self.is_source_trees_rooted = is_source_trees_rooted
         self.rooting_interpretation = dendropy.get_rooting_argument(is_rooted=self.is_source_trees_rooted)
@@ -297,6 +493,7 @@ class TreeProcessor(object):
         self.use_tree_weights = use_tree_weights
         self.ultrametricity_precision = ultrametricity_precision
         self.taxon_label_age_map = taxon_label_age_map
+        self.summary_reservoir_size = summary_reservoir_size
         self.num_processes = num_processes
         self.log_frequency = log_frequency
         self.messenger = messenger
@@ -320,7 +517,16 @@ class TreeProcessor(object):
             taxon_namespace=None,
             tree_offset=0,
             preserve_underscores=False,
+            checkpoint=None,
+            resume_from_checkpoint=False,
             ):
+        """
+        Returns a |TreeArray| of the trees (after the first ``tree_offset``
+        trees of each source) of ``tree_sources``. If ``checkpoint`` (an
+        `AnalysisCheckpoint`) is given, then the progress of the analysis is
+        periodically saved, and, if ``resume_from_checkpoint`` is |True|,
+        the analysis continues from the state saved in the checkpoint file.
+        """
         if self.num_processes is None or self.num_processes <= 1:
             tree_array = self.serial_analyze_trees(
                     tree_sources=tree_sources,
@@ -328,6 +534,8 @@ class TreeProcessor(object):
                     taxon_namespace=taxon_namespace,
                     tree_offset=tree_offset,
                     preserve_underscores=preserve_underscores,
+                    checkpoint=checkpoint,
+                    resume_from_checkpoint=resume_from_checkpoint,
                     )
         else:
             tree_array = self.parallel_analyze_trees(
@@ -336,50 +544,105 @@ class TreeProcessor(object):
                     taxon_namespace=taxon_namespace,
                     tree_offset=tree_offset,
                     preserve_underscores=preserve_underscores,
+                    checkpoint=checkpoint,
+                    resume_from_checkpoint=resume_from_checkpoint,
                     )
         return tree_array
 
+    def new_tree_array(self,
+            taxon_namespace,
+            checkpoint=None,
+            resume_from_checkpoint=False):
+        if checkpoint is not None and resume_from_checkpoint:
+            self.info_message("Resuming analysis from checkpoint: '{}'".format(checkpoint.path))
+            tree_array = checkpoint.load_tree_array(
+                    taxon_namespace=taxon_namespace,
+                    ultrametricity_precision=self.ultrametricity_precision,
+                    taxon_label_age_map=self.taxon_label_age_map,
+                    )
+            self.info_message("{} trees analyzed before checkpoint".format(len(tree_array)))
+            return tree_array
+        return dendropy.TreeArray(
+                taxon_namespace=taxon_namespace,
+                is_rooted_trees=self.is_source_trees_rooted,
+                ignore_edge_lengths=self.ignore_edge_lengths,
+                ignore_node_ages=self.ignore_node_ages,
+                use_tree_weights=self.use_tree_weights,
+                ultrametricity_precision=self.ultrametricity_precision,
+                taxon_label_age_map=self.taxon_label_age_map,
+                summary_reservoir_size=self.summary_reservoir_size,
+                )
+
     def serial_analyze_trees(self,
             tree_sources,
             schema,
             taxon_namespace=None,
             tree_offset=0,
             preserve_underscores=False,
+            checkpoint=None,
+            resume_from_checkpoint=False,
             ):
         if taxon_namespace is None:
             taxon_namespace = dendropy.TaxonNamespace()
         self.info_message("Running in serial mode")
-        tree_array = dendropy.TreeArray(
+        tree_array = self.new_tree_array(
                 taxon_namespace=taxon_namespace,
-                is_rooted_trees=self.is_source_trees_rooted,
-                ignore_edge_lengths=self.ignore_edge_lengths,
-                ignore_node_ages=self.ignore_node_ages,
-                use_tree_weights=self.use_tree_weights,
-                ultrametricity_precision=self.ultrametricity_precision,
-                taxon_label_age_map=self.taxon_label_age_map,
-                )
-        _read_into_tree_array(
-                tree_array=tree_array,
+                checkpoint=checkpoint,
+                resume_from_checkpoint=resume_from_checkpoint)
+        if checkpoint is None:
+            _read_into_tree_array(
+                    tree_array=tree_array,
+                    tree_sources=tree_sources,
+                    schema=schema,
+                    taxon_namespace=taxon_namespace,
+                    rooting=self.rooting_interpretation,
+                    tree_offset=tree_offset,
+                    use_tree_weights=self.use_tree_weights,
+                    preserve_underscores=preserve_underscores,
+                    info_message_func=self.info_message,
+                    error_message_func=self.error_message,
+                    log_frequency=self.log_frequency,
+                    debug_mode=self.debug_mode,
+                    )
+            return tree_array
+        for work_item in checkpoint.pending_work_items(
                 tree_sources=tree_sources,
                 schema=schema,
-                taxon_namespace=taxon_namespace,
-                rooting=self.rooting_interpretation,
-                tree_offset=tree_offset,
-                use_tree_weights=self.use_tree_weights,
-                preserve_underscores=preserve_underscores,
-                info_message_func=self.info_message,
-                error_message_func=self.error_message,
-                log_frequency=self.log_frequency,
-                debug_mode=self.debug_mode,
-                )
+                tree_offset=tree_offset):
+            _read_into_tree_array(
+                    tree_array=tree_array,
+                    tree_sources=[work_item.tree_source],
+                    schema=schema,
+                    taxon_namespace=taxon_namespace,
+                    rooting=self.rooting_interpretation,
+                    tree_offset=work_item.tree_offset,
+                    use_tree_weights=self.use_tree_weights,
+                    preserve_underscores=preserve_underscores,
+                    info_message_func=self.info_message,
+                    error_message_func=self.error_message,
+                    log_frequency=self.log_frequency,
+                    debug_mode=self.debug_mode,
+                    max_trees=work_item.max_trees,
+                    use_tree_index=work_item.max_trees is not None,
+                    tree_index_dir=checkpoint.tree_index_dir,
+                    )
+            checkpoint.record(work_item)
+            self.save_checkpoint(checkpoint, tree_array)
+        self.save_checkpoint(checkpoint, tree_array, force=True)
         return tree_array
 
+    def save_checkpoint(self, checkpoint, tree_array, force=False):
+        if checkpoint.save(tree_array, force=force):
+            self.info_message("Checkpoint saved: {} trees analyzed".format(len(tree_array)))
+
     def parallel_analyze_trees(self,
             tree_sources,
             schema,
             tree_offset=0,
             preserve_underscores=False,
             taxon_namespace=None,
+            checkpoint=None,
+            resume_from_checkpoint=False,
             ):
         # describe
         self.info_message("Running in multiprocessing mode (up to {} processes)".format(self.num_processes))
@@ -402,66 +665,148 @@ class TreeProcessor(object):
         #     self.info_message(taxon_label, prefix=index_col)
 
 
-        # load up queue
-        self.info_message("Creating work queue")
-        work_queue = multiprocessing.Queue()
-        for f in tree_sources:
-            work_queue.put(f)
-
-        # launch processes
-        self.info_message("Launching {} worker processes".format(self.num_processes))
-        results_queue = multiprocessing.Queue()
-        messenger_lock = multiprocessing.Lock()
-        workers = []
-        for idx in range(self.num_processes):
-            # self.info_message("Launching {} of {} worker processes".format(idx+1, self.num_processes))
-            tree_analysis_worker = TreeAnalysisWorker(
-                    name="Process-{}".format(idx+1),
-                    work_queue=work_queue,
-                    results_queue=results_queue,
-                    source_schema=schema,
-                    taxon_labels=taxon_labels,
-                    tree_offset=tree_offset,
-                    is_source_trees_rooted=self.is_source_trees_rooted,
-                    preserve_underscores=preserve_underscores,
-                    ignore_edge_lengths=self.ignore_edge_lengths,
-                    ignore_node_ages=self.ignore_node_ages,
-                    use_tree_weights=self.use_tree_weights,
-                    ultrametricity_precision=self.ultrametricity_precision,
-                    taxon_label_age_map=self.taxon_label_age_map,
-                    messenger=self.messenger,
-                    messenger_lock=messenger_lock,
-                    log_frequency=self.log_frequency,
-                    debug_mode=self.debug_mode)
-            tree_analysis_worker.start()
-            workers.append(tree_analysis_worker)
-
-        # collate results
-        result_count = 0
-        master_tree_array = dendropy.TreeArray(
+        # results from a checkpoint
+        master_tree_array = self.new_tree_array(
                 taxon_namespace=taxon_namespace,
-                is_rooted_trees=self.is_source_trees_rooted,
-                ignore_edge_lengths=self.ignore_edge_lengths,
-                ignore_node_ages=self.ignore_node_ages,
-                use_tree_weights=self.use_tree_weights,
-                ultrametricity_precision=self.ultrametricity_precision,
-                )
+                checkpoint=checkpoint,
+                resume_from_checkpoint=resume_from_checkpoint)
+
+        # the indexes used to split sources among the worker processes are
+        # stored with the checkpoint, or in a temporary directory, rather than
+        # next to the sources
+        if checkpoint is None:
+            tree_index_dir = tempfile.mkdtemp(prefix="sumtrees-")
+        else:
+            tree_index_dir = checkpoint.tree_index_dir
         try:
-            while result_count < self.num_processes:
-                result = results_queue.get()
-                if isinstance(result, Exception) or isinstance(result, KeyboardInterrupt):
-                    self.info_message("Exception raised in worker process '{}'".format(result.worker_name))
-                    raise result
-                master_tree_array.update(result)
-                self.info_message("Recovered results from worker process '{}'".format(result.worker_name))
-                result_count += 1
-                # self.info_message("Recovered results from {} of {} worker processes".format(result_count, self.num_processes))
-        except (Exception, KeyboardInterrupt) as e:
+            # load up queue
+            self.info_message("Creating work queue")
+            if checkpoint is None:
+                work_items = self.partition_tree_sources(
+                        tree_sources=tree_sources,
+                        schema=schema,
+                        tree_offset=tree_offset,
+                        tree_index_dir=tree_index_dir)
+            else:
+                work_items = checkpoint.pending_work_items(
+                        tree_sources=tree_sources,
+                        schema=schema,
+                        tree_offset=tree_offset)
+            work_queue = multiprocessing.Queue()
+            for work_item in work_items:
+                work_queue.put(work_item)
+            # sentinels to signal that there are no more tasks: waiting for these
+            # (rather than stopping as soon as the queue is found to be empty)
+            # ensures that workers do not quit before all tasks have been
+            # transferred to the queue
+            for idx in range(self.num_processes):
+                work_queue.put(None)
+
+            # launch processes
+            self.info_message("Launching {} worker processes".format(self.num_processes))
+            results_queue = multiprocessing.Queue()
+            messenger_lock = multiprocessing.Lock()
+            workers = []
+            for idx in range(self.num_processes):
+                # self.info_message("Launching {} of {} worker processes".format(idx+1, self.num_processes))
+                tree_analysis_worker = TreeAnalysisWorker(
+                        name="Process-{}".format(idx+1),
+                        work_queue=work_queue,
+                        results_queue=results_queue,
+                        source_schema=schema,
+                        taxon_labels=taxon_labels,
+                        tree_offset=tree_offset,
+                        is_source_trees_rooted=self.is_source_trees_rooted,
+                        preserve_underscores=preserve_underscores,
+                        ignore_edge_lengths=self.ignore_edge_lengths,
+                        ignore_node_ages=self.ignore_node_ages,
+                        use_tree_weights=self.use_tree_weights,
+                        ultrametricity_precision=self.ultrametricity_precision,
+                        taxon_label_age_map=self.taxon_label_age_map,
+                        summary_reservoir_size=self.summary_reservoir_size,
+                        messenger=self.messenger,
+                        messenger_lock=messenger_lock,
+                        log_frequency=self.log_frequency,
+                        debug_mode=self.debug_mode,
+                        tree_index_dir=tree_index_dir)
+                tree_analysis_worker.start()
+                workers.append(tree_analysis_worker)
+
+            # collate results: one for each task
+            result_count = 0
+            try:
+                while result_count < len(work_items):
+                    result = results_queue.get()
+                    if isinstance(result, Exception) or isinstance(result, KeyboardInterrupt):
+                        self.info_message("Exception raised in worker process '{}'".format(result.worker_name))
+                        raise result
+                    master_tree_array.update_from_packed(result)
+                    result_count += 1
+                    self.info_message("Recovered results of {} of {} tasks from worker process '{}'".format(
+                        result_count, len(work_items), result.worker_name))
+                    if checkpoint is not None:
+                        checkpoint.record(result.work_item)
+                        self.save_checkpoint(checkpoint, master_tree_array)
+            except (Exception, KeyboardInterrupt) as e:
+                for worker in workers:
+                    worker.terminate()
+                raise
             for worker in workers:
-                worker.terminate()
-            raise
-        self.info_message("All {} worker processes terminated".format(self.num_processes))
-        return master_tree_array
+                worker.join()
+            self.info_message("All {} worker processes terminated".format(self.num_processes))
+            if checkpoint is not None:
+                self.save_checkpoint(checkpoint, master_tree_array, force=True)
+            return master_tree_array
+        finally:
+            if checkpoint is None:
+                shutil.rmtree(tree_index_dir, ignore_errors=True)
+
+    def partition_tree_sources(self,
+            tree_sources,
+            schema,
+            tree_offset=0,
+            tree_index_dir=None):
+        """
+        Returns a list of `TreeSourceWorkItem` objects describing the tasks to
+        be distributed to worker processes. If there are fewer sources than
+        processes, then sources that are files in a schema supporting tree
+        indexes are split into contiguous runs of trees (after the burn-in),
+        so that all processes can be kept busy. The trees of each such run are
+        located using the index of tree statement offsets in the file, so
+        that each worker seeks directly to its first tree; the taxa block and
+        translate statements of NEXUS files are processed by each worker as
+        usual. Otherwise, each source is a single task.
+
+        If ``tree_index_dir`` is given, the indexes are saved to files in this
+        directory, from which the workers can load them. Otherwise, they are
+        not saved (and so are rebuilt by each worker).
+        """
+        if (len(tree_sources) >= self.num_processes
+                or not dataio.is_tree_index_supported(schema)):
+            return [TreeSourceWorkItem(f, tree_offset, None) for f in tree_sources]
+        num_parts_per_source = int(math.ceil(float(self.num_processes) / len(tree_sources)))
+        work_items = []
+        for f in tree_sources:
+            if not textprocessing.is_str_type(f):
+                work_items.append(TreeSourceWorkItem(f, tree_offset, None))
+                continue
+            num_trees = len(treeindex.get_tree_index(f,
+                    save=tree_index_dir is not None,
+                    index_dir=tree_index_dir))
+            num_trees_to_analyze = max(0, num_trees - tree_offset)
+            num_parts = min(num_parts_per_source, num_trees_to_analyze)
+            if num_parts <= 1:
+                work_items.append(TreeSourceWorkItem(f, tree_offset, None))
+                continue
+            self.info_message("Splitting {} trees (after burn-in) of '{}' into {} parts".format(
+                num_trees_to_analyze,
+                f,
+                num_parts))
+            for part_idx in range(num_parts):
+                start = (part_idx * num_trees_to_analyze) // num_parts
+                stop = ((part_idx + 1) * num_trees_to_analyze) // num_parts
+                work_items.append(TreeSourceWorkItem(f, tree_offset + start, stop - start))
+        return work_items
 
     def discover_taxa(self,
             treefile,
@@ -954,6 +1299,18 @@ def main():
             dest="summarize_node_ages",
             default=None,
             help="Assume that source trees are ultrametic and summarize node ages (distances from tips).")
+    node_summarization_options.add_argument("--summary-sample-size",
+            type=int,
+            metavar="N",
+            default=None,
+            help=(
+                "Do not store all the edge lengths and node ages of each split, but only running"
+                " summaries of these, with medians, HPDs and quantiles estimated from a random"
+                " sample of (at most) N values per split. This bounds the memory used to"
+                " summarize very large numbers of trees. The means, standard deviations and"
+                " ranges remain exact. Extended output of edge lengths and node ages will"
+                " only report the sampled values."
+                ))
     node_summarization_options.add_argument("-l","--labels",
             dest="node_labels",
             default="support",
@@ -1101,7 +1458,9 @@ def main():
             const="max",
             dest="multiprocess",
             help=(
-                 "Run in parallel mode using as many processors as available, up to the number of sources."
+                 "Run in parallel mode using as many processors as available, up to the number of sources"
+                 " (unless the sources are NEWICK or NEXUS files, in which case the trees of each file"
+                 " may be split between multiple processes)."
                  ))
     multiprocessing_options.add_argument("-m", "--multiprocessing",
             dest="multiprocess",
@@ -1112,6 +1471,39 @@ def main():
                  "local machine; i.e., same as specifying '-M' or '--maximum-multiprocessing')."
                  ))
 
+    checkpoint_options = parser.add_argument_group("Checkpoint Options")
+    checkpoint_options.add_argument("--checkpoint",
+            dest="checkpoint_filepath",
+            metavar="FILEPATH",
+            default=None,
+            help=(
+                 "Periodically save the state of the analysis to FILEPATH, so that it"
+                 " can be resumed (using '--resume') if interrupted. The sources must"
+                 " be files. Sources in NEXUS or NEWICK format are analyzed (and"
+                 " resumed) in chunks of trees located using their tree index; others"
+                 " are only checkpointed once all their trees have been analyzed."
+                 " The checkpoint file is kept once the analysis is complete, so that"
+                 " the trees can be summarized again (e.g., with different target"
+                 " tree options) by resuming from it."
+                 ))
+    checkpoint_options.add_argument("--checkpoint-interval",
+            type=float,
+            metavar="SECONDS",
+            default=300,
+            help=(
+                 "Minimum time between checkpoints, in seconds (default: %(default)s)."
+                 ))
+    checkpoint_options.add_argument("--resume",
+            action="store_true",
+            default=False,
+            help=(
+                 "Resume the analysis from the checkpoint file given by '--checkpoint',"
+                 " without re-reading the trees that have already been analyzed (if the"
+                 " checkpoint file does not exist, the analysis starts from the"
+                 " beginning). The sources and the options affecting the analysis of the"
+                 " trees must be the same as when the checkpoint was saved."
+                 ))
+
     logging_options = parser.add_argument_group("Program Logging Options")
     logging_options.add_argument("-g", "--log-frequency",
             type=int,
@@ -1390,6 +1782,10 @@ def main():
         # API uses 0
         args.ultrametricity_precision = -1
 
+    if args.summary_sample_size is not None and args.summary_sample_size < 1:
+        messenger.error("Summary sample size must be at least 1, but is {}".format(args.summary_sample_size))
+        sys.exit(1)
+
     ######################################################################
     ## Output File Setup
 
@@ -1455,13 +1851,21 @@ def main():
     ## Multiprocessing Setup
 
     num_cpus = multiprocessing.cpu_count()
-    if len(tree_sources) > 1 and args.multiprocess is not None:
+    # files in NEWICK or NEXUS format can be split between processes
+    is_tree_sources_partitionable = (
+            tree_sources[0] is not sys.stdin
+            and dataio.is_tree_index_supported(args.input_format)
+            )
+    if (len(tree_sources) > 1 or is_tree_sources_partitionable) and args.multiprocess is not None:
         if (
                 args.multiprocess.lower() == "max"
                 or args.multiprocess == "#"
                 or args.multiprocess == "*"
             ):
-            num_processes = min(num_cpus, len(tree_sources))
+            if is_tree_sources_partitionable:
+                num_processes = num_cpus
+            else:
+                num_processes = min(num_cpus, len(tree_sources))
         # elif args.multiprocess == "@":
         #     num_processes = len(tree_sources)
         else:
@@ -1502,6 +1906,43 @@ def main():
     else:
         taxon_namespace = None
 
+    ######################################################################
+    ## Checkpoint
+
+    if args.checkpoint_filepath is None:
+        if args.resume:
+            messenger.error("The checkpoint file to resume from must be specified using '--checkpoint'")
+            sys.exit(1)
+        checkpoint = None
+        resume_from_checkpoint = False
+    else:
+        if tree_sources[0] is sys.stdin:
+            messenger.error("Analyses of trees read from standard input cannot be checkpointed")
+            sys.exit(1)
+        checkpoint_fpath = os.path.expanduser(os.path.expandvars(args.checkpoint_filepath))
+        resume_from_checkpoint = args.resume and os.path.exists(checkpoint_fpath)
+        if args.resume and not resume_from_checkpoint:
+            messenger.info("Checkpoint file not found, analysis will start from the beginning: '{}'".format(checkpoint_fpath))
+        elif not args.resume and not cli.confirm_overwrite(
+                filepath=checkpoint_fpath,
+                replace_without_asking=args.replace):
+            sys.exit(1)
+        checkpoint = AnalysisCheckpoint(
+                path=checkpoint_fpath,
+                interval=args.checkpoint_interval,
+                settings={
+                    "tree_sources": [os.path.abspath(f) for f in tree_sources],
+                    "input_format": args.input_format,
+                    "burnin": args.burnin,
+                    "is_source_trees_rooted": args.is_source_trees_rooted,
+                    "weighted_trees": args.weighted_trees,
+                    "preserve_underscores": args.preserve_underscores,
+                    "summarize_node_ages": bool(args.summarize_node_ages),
+                    "ultrametricity_precision": args.ultrametricity_precision,
+                    "taxon_label_age_map": taxon_label_age_map,
+                    "summary_sample_size": args.summary_sample_size,
+                    })
+
     ######################################################################
     ## Main Work
 
@@ -1516,6 +1957,7 @@ def main():
             log_frequency=args.log_frequency if not args.quiet else 0,
             messenger=messenger,
             debug_mode=args.debug_mode,
+            summary_reservoir_size=args.summary_sample_size,
             )
     analysis_time_start = datetime.datetime.now()
     # messenger.info("Processing of source trees starting at {}".format(
@@ -1528,6 +1970,8 @@ def main():
                 taxon_namespace=taxon_namespace,
                 tree_offset=args.burnin,
                 preserve_underscores=args.preserve_underscores,
+                checkpoint=checkpoint,
+                resume_from_checkpoint=resume_from_checkpoint,
                 )
         if tree_array.split_distribution.is_mixed_rootings_counted():
             raise dendropy.TreeArray.IncompatibleRootingTreeArrayUpdate("Mixed rooting states detected in source trees")
@@ -2146,7 +2590,7 @@ def main():
                 except KeyError:
                     value_list = []
                 entry["edgeCount"] = len(value_list)
-                entry["edgeLengths"] = ",".join(str(v) for v in value_list)
+                entry["edgeLengths"] = ",".join(str(v) for v in getattr(value_list, "sample", value_list))
                 rows.append(entry)
             output_path = extended_output_paths["edge-lengths"]
             messenger.info("Writing edge set to: '{}'".format(output_path))
@@ -2172,7 +2616,7 @@ def main():
                 except KeyError:
                     value_list = []
                 entry["nodeCount"] = len(value_list)
-                entry["nodeAges"] = ",".join(str(v) for v in value_list)
+                entry["nodeAges"] = ",".join(str(v) for v in getattr(value_list, "sample", value_list))
                 rows.append(entry)
             output_path = extended_output_paths["node-ages"]
             messenger.info("Writing edge set to: '{}'".format(output_path))
@@ -21,13 +21,18 @@
 Taxon-to-taxon phylogenetic distances.
 """
 
+import array
 import math
 import collections
 import csv
+import itertools
+import operator
+import random
 from dendropy.calculate import statistics
 from dendropy.utility import GLOBAL_RNG
 from dendropy.utility import container
 from dendropy.utility import error
+from dendropy.utility import parallel
 import dendropy
 
 class PhylogeneticDistanceMatrix(object):
@@ -246,6 +251,7 @@ class PhylogeneticDistanceMatrix(object):
         self._taxon_phylogenetic_path_steps = {}
         self._taxon_phylogenetic_path_edges = {}
         self._mrca = {}
+        self._lca_index = None
 
     def compile_from_tree(self, tree):
         """
@@ -317,6 +323,7 @@ class PhylogeneticDistanceMatrix(object):
                                     self._taxon_phylogenetic_path_edges[desc1.taxon][desc2.taxon] = pedges
                     del(c1.desc_paths)
         self._mirror_lookups()
+        self._lca_index = tree.lca_index()
         # assert self._tree_length == tree.length()
 
     def compile_from_dict(self, distances, taxon_namespace):
@@ -382,6 +389,7 @@ class PhylogeneticDistanceMatrix(object):
         o._all_distinct_mapped_taxa_pairs = set(self._all_distinct_mapped_taxa_pairs)
         o._tree_length = self._tree_length
         o._num_edges = self._num_edges
+        o._lca_index = self._lca_index
         for src, dest in (
                 (self._taxon_phylogenetic_distances, o._taxon_phylogenetic_distances,),
                 (self._taxon_phylogenetic_path_steps, o._taxon_phylogenetic_path_steps,),
@@ -669,7 +677,8 @@ class PhylogeneticDistanceMatrix(object):
             is_normalize_by_tree_size=False,
             is_skip_single_taxon_assemblages=False,
             null_model_type="taxa.label",
-            rng=None):
+            rng=None,
+            num_processes=None):
         r"""
         Returns the standardized effect size value for the MPD statistic under
         a null model under various community compositions.
@@ -704,6 +713,14 @@ class PhylogeneticDistanceMatrix(object):
         is_weighted_edge_distances: bool
             If ``True`` then edge lengths will be considered for distances.
             Otherwise, just the number of edges.
+        rng : ``random.Random`` object or None
+            Source of random numbers for the null model. The replicates are
+            generated in batches, each with its own random number generator
+            seeded from this one, so the results for a given state of ``rng``
+            do not depend on the number of processes used.
+        num_processes : int or None
+            If greater than 1, then the null model replicates are spread over
+            a pool of this number of processes.
 
         Returns
         -------
@@ -739,24 +756,23 @@ class PhylogeneticDistanceMatrix(object):
         """
         if assemblage_memberships is None:
             assemblage_memberships = [ set(self._mapped_taxa) ]
-        comparison_regimes = []
+        filtered_assemblage_memberships = []
         for idx, assemblage_membership in enumerate(assemblage_memberships):
             if len(assemblage_membership) == 1:
                 if is_skip_single_taxon_assemblages:
                     continue
                 else:
                     raise error.SingleTaxonAssemblageException("{}: {}".format(idx, assemblage_membership))
-            filter_fn = lambda taxon: taxon in assemblage_membership
-            comparison_regime = list(self.distinct_taxon_pair_iter(filter_fn=filter_fn))
-            comparison_regimes.append(comparison_regime)
+            filtered_assemblage_memberships.append(assemblage_membership)
         results = self._calculate_standardized_effect_size(
-                statisticf_name="_calculate_mean_pairwise_distance",
+                statisticf_name="mean_pairwise_distance",
                 is_weighted_edge_distances=is_weighted_edge_distances,
                 is_normalize_by_tree_size=is_normalize_by_tree_size,
-                comparison_regimes=comparison_regimes,
+                assemblage_memberships=filtered_assemblage_memberships,
                 null_model_type=null_model_type,
                 num_randomization_replicates=num_randomization_replicates,
-                rng=rng)
+                rng=rng,
+                num_processes=num_processes)
         return results
 
     def standardized_effect_size_mean_nearest_taxon_distance(self,
@@ -766,7 +782,8 @@ class PhylogeneticDistanceMatrix(object):
             is_normalize_by_tree_size=False,
             is_skip_single_taxon_assemblages=False,
             null_model_type="taxa.label",
-            rng=None):
+            rng=None,
+            num_processes=None):
         r"""
         Returns the standardized effect size value for the MNTD statistic under
         a null model under various community compositions.
@@ -801,6 +818,14 @@ class PhylogeneticDistanceMatrix(object):
         is_weighted_edge_distances: bool
             If ``True`` then edge lengths will be considered for distances.
             Otherwise, just the number of edges.
+        rng : ``random.Random`` object or None
+            Source of random numbers for the null model. The replicates are
+            generated in batches, each with its own random number generator
+            seeded from this one, so the results for a given state of ``rng``
+            do not depend on the number of processes used.
+        num_processes : int or None
+            If greater than 1, then the null model replicates are spread over
+            a pool of this number of processes.
 
         Returns
         -------
@@ -836,24 +861,23 @@ class PhylogeneticDistanceMatrix(object):
         """
         if assemblage_memberships is None:
             assemblage_memberships = [ set(self._mapped_taxa) ]
-        comparison_regimes = []
+        filtered_assemblage_memberships = []
         for idx, assemblage_membership in enumerate(assemblage_memberships):
             if len(assemblage_membership) == 1:
                 if is_skip_single_taxon_assemblages:
                     continue
                 else:
                     raise error.SingleTaxonAssemblageException("{}: {}".format(idx, assemblage_membership))
-            filter_fn = lambda taxon: taxon in assemblage_membership
-            comparison_regime = self._get_taxon_to_all_other_taxa_comparisons(filter_fn=filter_fn)
-            comparison_regimes.append(comparison_regime)
+            filtered_assemblage_memberships.append(assemblage_membership)
         results = self._calculate_standardized_effect_size(
-                statisticf_name="_calculate_mean_nearest_taxon_distance",
-                comparison_regimes=comparison_regimes,
+                statisticf_name="mean_nearest_taxon_distance",
+                assemblage_memberships=filtered_assemblage_memberships,
                 is_weighted_edge_distances=is_weighted_edge_distances,
                 is_normalize_by_tree_size=is_normalize_by_tree_size,
                 null_model_type=null_model_type,
                 num_randomization_replicates=num_randomization_replicates,
-                rng=rng)
+                rng=rng,
+                num_processes=num_processes)
         return results
 
     def shuffle_taxa(self,
@@ -913,6 +937,7 @@ class PhylogeneticDistanceMatrix(object):
     def nj_tree(self,
             is_weighted_edge_distances=True,
             tree_factory=None,
+            is_bound_pruned_search=None,
             ):
         """
         Returns an Neighbor-Joining (NJ) tree based on the distances in the matrix.
@@ -925,6 +950,17 @@ class PhylogeneticDistanceMatrix(object):
         is_weighted_edge_distances: bool
             If ``True`` then edge lengths will be considered for distances.
             Otherwise, just the number of edges.
+        is_bound_pruned_search: bool or None
+            If |True|, then the pair of nodes to join at each step is found
+            by searching the distances of each node in sorted order, skipping
+            the pairs that cannot be joined based on a lower bound on their
+            Q-values, as described by Simonsen et al. (2008). If |False|, then
+            the Q-values of all pairs of nodes are calculated at each step.
+            The former is much faster for large numbers of taxa. Both build
+            topologically identical trees (unless there are ties between the
+            Q-values of pairs of nodes), though their edge lengths may differ
+            by rounding errors. If |None| (the default), then the former is
+            used if there are more than 64 taxa.
 
         Returns
         -------
@@ -963,106 +999,34 @@ class PhylogeneticDistanceMatrix(object):
         for reconstructing phylogenetic trees. Molecular Biology and Evolution,
         4: 406-425.
 
+        Simonsen, M., Mailund, T. and Pedersen, C.N.S. (2008) Rapid
+        neighbour-joining. In: Algorithms in Bioinformatics, Lecture Notes in
+        Computer Science 5251: 113-122.
+
         """
 
-        if is_weighted_edge_distances:
-            original_dmatrix = self._taxon_phylogenetic_distances
-        else:
-            original_dmatrix = self._taxon_phylogenetic_path_steps
+        taxa, distances = self._get_distance_array(is_weighted_edge_distances=is_weighted_edge_distances)
         if tree_factory is None:
             tree_factory = dendropy.Tree
         tree = tree_factory(taxon_namespace=self.taxon_namespace)
         tree.is_rooted = False
-
-        # initialize node pool
         node_pool = []
-        for t1 in self._mapped_taxa:
+        for t1 in taxa:
             nd = tree.node_factory()
             nd.taxon = t1
-            nd._nj_distances = {}
             node_pool.append(nd)
-
-        # initialize factor
-        n = len(self._mapped_taxa)
-
-        # cache calculations
-        for nd1 in node_pool:
-            nd1._nj_xsub = 0.0
-            for nd2 in node_pool:
-                if nd1 is nd2:
-                    continue
-                d = original_dmatrix[nd1.taxon][nd2.taxon]
-                nd1._nj_distances[nd2] = d
-                nd1._nj_xsub += d
-
-        while n > 1:
-
-            # calculate the Q-matrix
-            min_q = None
-            nodes_to_join = None
-            for idx1, nd1 in enumerate(node_pool[:-1]):
-                for idx2, nd2 in enumerate(node_pool[idx1+1:]):
-                    v1 = (n - 2) * nd1._nj_distances[nd2]
-                    qvalue = v1 - nd1._nj_xsub - nd2._nj_xsub
-                    if min_q is None or qvalue < min_q:
-                        min_q = qvalue
-                        nodes_to_join = (nd1, nd2)
-
-            # create the new node
+        if is_bound_pruned_search is None:
+            is_bound_pruned_search = len(taxa) > 64
+        for idx1, idx2, length1, length2 in _neighbor_joining(
+                distances=distances,
+                num_taxa=len(taxa),
+                is_bound_pruned_search=is_bound_pruned_search):
             new_node = tree.node_factory()
-
-            # attach it to the tree
-            for node_to_join in nodes_to_join:
-                new_node.add_child(node_to_join)
-                node_pool.remove(node_to_join)
-
-            # calculate the distances for the new node
-            new_node._nj_distances = {}
-            new_node._nj_xsub = 0.0
-            for node in node_pool:
-                # actual node-to-node distances
-                v1 = 0.0
-                for node_to_join in nodes_to_join:
-                    v1 += node._nj_distances[node_to_join]
-                v3 = nodes_to_join[0]._nj_distances[nodes_to_join[1]]
-                dist = 0.5 * (v1 - v3)
-                new_node._nj_distances[node] = dist
-                node._nj_distances[new_node] = dist
-
-                # Adjust/recalculate the values needed for the Q-matrix
-                # calculations
-                new_node._nj_xsub += dist
-                node._nj_xsub += dist
-                for node_to_join in nodes_to_join:
-                    node._nj_xsub -= node_to_join._nj_distances[node]
-
-            # calculate the branch lengths
-            if n > 2:
-                v1 = 0.5 * nodes_to_join[0]._nj_distances[nodes_to_join[1]]
-                v4  = 1.0/(2*(n-2)) * (nodes_to_join[0]._nj_xsub - nodes_to_join[1]._nj_xsub)
-                delta_f = v1 + v4
-                delta_g = nodes_to_join[0]._nj_distances[nodes_to_join[1]] - delta_f
-                nodes_to_join[0].edge.length = delta_f
-                nodes_to_join[1].edge.length = delta_g
-            else:
-                d = nodes_to_join[0]._nj_distances[nodes_to_join[1]]
-                nodes_to_join[0].edge.length = d / 2
-                nodes_to_join[1].edge.length = d / 2
-
-            # clean up
-            for node_to_join in nodes_to_join:
-                del node_to_join._nj_distances
-                del node_to_join._nj_xsub
-
-            # add the new node to the pool of nodes
+            for idx, length in ((idx1, length1), (idx2, length2)):
+                new_node.add_child(node_pool[idx])
+                node_pool[idx].edge.length = length
             node_pool.append(new_node)
-
-            # adjust count
-            n -= 1
-
-        tree.seed_node = node_pool[0]
-        del tree.seed_node._nj_distances
-        del tree.seed_node._nj_xsub
+        tree.seed_node = node_pool[-1]
         return tree
 
     def upgma_tree(self,
@@ -1111,66 +1075,107 @@ class PhylogeneticDistanceMatrix(object):
 
         """
 
-        if is_weighted_edge_distances:
-            original_dmatrix = self._taxon_phylogenetic_distances
-        else:
-            original_dmatrix = self._taxon_phylogenetic_path_steps
+        return self.hierarchical_clustering_tree(
+                linkage="upgma",
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                tree_factory=tree_factory)
+
+    def hierarchical_clustering_tree(self,
+            linkage="upgma",
+            is_weighted_edge_distances=True,
+            tree_factory=None,
+            ):
+        """
+        Returns an ultrametric tree built by agglomerative hierarchical
+        clustering of the taxa based on the distances in the matrix.
+
+        At each step, the two closest clusters are joined, and the distances
+        from the new cluster to the other clusters are calculated from those
+        of the two joined clusters under the given linkage criterion. The
+        height of the node joining two clusters is half the distance between
+        them. The clusters are found using the nearest-neighbor chain
+        algorithm, which takes time quadratic in the number of taxa, and gives
+        the same tree as repeatedly joining the closest pair of clusters
+        (unless there are ties between distances).
+
+        Parameters
+        ----------
+        linkage : str
+            The linkage criterion, i.e., the distance between two clusters:
+
+                -   "upgma": the mean of the distances between the taxa of the
+                    two clusters (Unweighted Pair Group Method with Arithmetic
+                    Mean, UPGMA; "average linkage").
+                -   "wpgma": the mean of the distances to the two clusters that
+                    were joined to create a cluster (Weighted Pair Group Method
+                    with Arithmetic Mean, WPGMA).
+                -   "single": the minimum distance between the taxa of the two
+                    clusters ("nearest neighbor").
+                -   "complete": the maximum distance between the taxa of the
+                    two clusters ("farthest neighbor").
+
+        is_weighted_edge_distances: bool
+            If ``True`` then edge lengths will be considered for distances.
+            Otherwise, just the number of edges.
+
+        Returns
+        -------
+        t : |Tree|
+            A rooted |Tree| instance corresponding to the clustering of the
+            taxa.
+
+        Examples
+        --------
+
+        ::
+
+            import dendropy
+
+            with open("distance_matrix.csv") as src:
+                pdm = dendropy.PhylogeneticDistanceMatrix.from_csv(
+                        src,
+                        is_first_row_column_names=True,
+                        is_first_column_row_names=True,
+                        is_allow_new_taxa=True,
+                        delimiter=",",
+                        )
+            wpgma_tree = pdm.hierarchical_clustering_tree(linkage="wpgma")
+            print(wpgma_tree.as_string("nexus"))
+
+        References
+        ----------
+        Murtagh, F. (1983) A survey of recent advances in hierarchical
+        clustering algorithms. The Computer Journal, 26: 354-359.
+
+        """
+        if linkage not in _CLUSTER_DISTANCE_FUNCTIONS:
+            raise ValueError("Unrecognized linkage criterion: '{}' (must be one of: {})".format(
+                linkage,
+                ", ".join("'{}'".format(k) for k in _CLUSTER_DISTANCE_FUNCTIONS)))
+        taxa, distances = self._get_distance_array(is_weighted_edge_distances=is_weighted_edge_distances)
         if tree_factory is None:
             tree_factory = dendropy.Tree
         tree = tree_factory(taxon_namespace=self.taxon_namespace)
         tree.is_rooted = True
         node_pool = []
-        for t1 in self._mapped_taxa:
+        node_heights = []
+        for t1 in taxa:
             nd = tree.node_factory()
             nd.taxon = t1
-            nd._upgma_cluster = set([nd])
-            nd._upgma_distance_from_tip = 0.0
-            nd._upgma_distances = {}
             node_pool.append(nd)
-        for idx1, nd1 in enumerate(node_pool[:-1]):
-            for idx2, nd2 in enumerate(node_pool[idx1+1:]):
-                d = original_dmatrix[nd1.taxon][nd2.taxon]
-                nd1._upgma_distances[nd2] = d
-                nd2._upgma_distances[nd1] = d
-        while len(node_pool) > 1:
-            min_distance = None
-            nodes_to_join = None
-            for idx1, nd1 in enumerate(node_pool[:-1]):
-                for idx2, nd2 in enumerate(node_pool[idx1+1:]):
-                    d = nd1._upgma_distances[nd2]
-                    if min_distance is None or d < min_distance:
-                        nodes_to_join = (nd1, nd2)
-                        min_distance = d
+            node_heights.append(0.0)
+        for idx1, idx2, d in _hierarchical_clustering(
+                distances=distances,
+                num_taxa=len(taxa),
+                cluster_distance_fn=_CLUSTER_DISTANCE_FUNCTIONS[linkage]):
             new_node = tree.node_factory()
-            new_node._upgma_cluster = set()
-            new_node._upgma_distances = {}
-            elen = min_distance / 2.0
-            for node_to_join in nodes_to_join:
-                new_node.add_child(node_to_join)
-                new_node._upgma_cluster.update(node_to_join._upgma_cluster)
-                node_to_join.edge.length = elen - node_to_join._upgma_distance_from_tip
-                node_pool.remove(node_to_join)
-            new_node._upgma_distance_from_tip = nodes_to_join[0].edge.length + nodes_to_join[0]._upgma_distance_from_tip
-            for idx1, nd1 in enumerate(node_pool):
-                d1 = 0.0
-                count = 0.0
-                for node_to_join in nodes_to_join:
-                    d2 = node_to_join._upgma_distances[nd1]
-                    xc = len(node_to_join._upgma_cluster)
-                    d1 += (d2 * xc)
-                    count += xc
-                d = d1 / count
-                nd1._upgma_distances[new_node] = d
-                new_node._upgma_distances[nd1] = d
-            for node_to_join in nodes_to_join:
-                del node_to_join._upgma_cluster
-                del node_to_join._upgma_distance_from_tip
-                del node_to_join._upgma_distances
-            node_pool.append(new_node)
+            elen = d / 2.0
+            for idx in (idx1, idx2):
+                new_node.add_child(node_pool[idx])
+                node_pool[idx].edge.length = elen - node_heights[idx]
+            node_heights[idx1] = node_pool[idx1].edge.length + node_heights[idx1]
+            node_pool[idx1] = new_node
         tree.seed_node = node_pool[0]
-        del tree.seed_node._upgma_cluster
-        del tree.seed_node._upgma_distance_from_tip
-        del tree.seed_node._upgma_distances
         return tree
 
     def as_data_table(self, is_weighted_edge_distances=True):
@@ -1232,15 +1237,210 @@ class PhylogeneticDistanceMatrix(object):
             # dest.write(delimiter.join(row))
             # dest.write("\n")
 
+    def assemblage_statistics(self,
+            assemblage_memberships,
+            is_weighted_edge_distances=True,
+            is_normalize_by_tree_size=False):
+        """
+        Calculates the phylogenetic ecology statistics MPD, MNTD (see
+        :meth:`mean_pairwise_distance` and :meth:`mean_nearest_taxon_distance`)
+        and Faith's phylogenetic diversity (PD) [1] for each of a collection of
+        assemblages (communities).
+
+        The statistics are calculated for all assemblages together, working
+        on the taxon indexes of each assemblage rather than filtering all
+        pairs of taxa for each assemblage, and so this is much faster than
+        calling the methods for each assemblage when there are many
+        assemblages.
+
+        PD is the total length of the edges on the paths from the taxa in
+        the assemblage to the root of the tree (or the number of these edges
+        if ``is_weighted_edge_distances`` is |False|). It is calculated in a
+        single pass over the tree, by tracking the assemblages that include a
+        taxon descending from each edge as a bitmask over the assemblages. It
+        is only available if the matrix was calculated from a tree, and it
+        uses the current lengths of the edges of the tree.
+
+        Parameters
+        ----------
+        assemblage_memberships : dict or iterable
+            The assemblages, either as a dictionary mapping names to
+            assemblages, as returned by
+            :meth:`assemblage_membership_definitions_from_csv`, or as a list
+            of assemblages. Each assemblage is either a collection of |Taxon|
+            objects (incidences), or a dictionary mapping |Taxon| objects to
+            abundances. Taxa that are not in the matrix are ignored.
+        is_weighted_edge_distances : bool
+            If |True| then the edge-weighted distances are used. Otherwise,
+            the number of edges connecting taxa are used.
+        is_normalize_by_tree_size : bool
+            If |True| then the results are normalized by the total tree length
+            or number of edges.
+
+        Returns
+        -------
+        r : dict or list of results
+            The results for the assemblages: a dictionary mapping the names of
+            the assemblages to their results if ``assemblage_memberships`` is a
+            dictionary, or a list of results otherwise. Each result is a named
+            tuple with the following elements:
+
+                -   num_taxa  : the number of taxa in the assemblage
+                -   mpd       : the MPD of the assemblage, or |None| if it has
+                                fewer than two taxa
+                -   mntd      : the MNTD of the assemblage, or |None| if it has
+                                fewer than two taxa
+                -   pd        : the PD of the assemblage, or |None| if the
+                                matrix was not calculated from a tree
+
+            For assemblages given by abundances, the MPD and MNTD are
+            weighted by the abundances, as in the R package "picante": the
+            MPD is the mean of the distances between all pairs of taxa
+            (including each taxon and itself) weighted by the product of the
+            abundances of the taxa, and the MNTD is the mean of the distances
+            to the nearest taxon weighted by the abundance of each taxon.
+
+        Examples
+        --------
+
+        ::
+
+            import dendropy
+            tree = dendropy.Tree.get(path="data/community.tree.newick",
+                    schema="newick",
+                    rooting="force-rooted")
+            pdm = dendropy.DensePhylogeneticDistanceMatrix.from_tree(tree)
+            assemblage_membership_definitions = pdm.assemblage_membership_definitions_from_csv(
+                    "data/community.data.tsv",
+                    delimiter="\t")
+            results = pdm.assemblage_statistics(assemblage_membership_definitions)
+            for name, result in results.items():
+                print(name, result.mpd, result.mntd, result.pd)
+
+        References
+        ----------
+
+        [1] Faith, D.P. 1992. Conservation evaluation and phylogenetic
+        diversity. Biological Conservation 61: 1-10.
+
+        """
+        result_type = collections.namedtuple("PhylogeneticCommunityStatisticsCalculationResult",
+                ["num_taxa", "mpd", "mntd", "pd",])
+        if hasattr(assemblage_memberships, "items"):
+            names = list(assemblage_memberships.keys())
+            assemblage_memberships = list(assemblage_memberships.values())
+        else:
+            names = None
+            assemblage_memberships = list(assemblage_memberships)
+        taxa, distances = self._get_distance_array(is_weighted_edge_distances=is_weighted_edge_distances)
+        __, normalization_factor = self._get_distance_matrix_and_normalization_factor(
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                is_normalize_by_tree_size=is_normalize_by_tree_size,)
+        num_taxa = len(taxa)
+        taxon_indexes = dict((taxon, idx) for idx, taxon in enumerate(taxa))
+        assemblage_taxa = []
+        for assemblage_membership in assemblage_memberships:
+            assemblage_taxa.append([taxon for taxon in assemblage_membership if taxon in taxon_indexes])
+        results = []
+        for assemblage_membership, members in zip(assemblage_memberships, assemblage_taxa):
+            if len(members) < 2:
+                results.append((len(members), None, None))
+                continue
+            indexes = [taxon_indexes[taxon] for taxon in members]
+            get_values = operator.itemgetter(*indexes)
+            if hasattr(assemblage_membership, "items"):
+                weights = [assemblage_membership[taxon] for taxon in members]
+            else:
+                weights = None
+            sum_distances = 0.0
+            sum_nearest_taxon_distances = 0.0
+            for pos, idx in enumerate(indexes):
+                row = get_values(distances[idx * num_taxa:(idx + 1) * num_taxa])
+                if pos == 0:
+                    nearest_taxon_distance = min(row[1:])
+                elif pos == len(row) - 1:
+                    nearest_taxon_distance = min(row[:-1])
+                else:
+                    nearest_taxon_distance = min(min(row[:pos]), min(row[pos+1:]))
+                if weights is None:
+                    sum_distances += sum(row)
+                    sum_nearest_taxon_distances += nearest_taxon_distance
+                else:
+                    sum_distances += weights[pos] * sum(map(operator.mul, row, weights))
+                    sum_nearest_taxon_distances += weights[pos] * nearest_taxon_distance
+            if weights is None:
+                # each distance is counted twice, and distances along the
+                # diagonal are 0
+                mpd = sum_distances / (len(members) * (len(members) - 1))
+                mntd = sum_nearest_taxon_distances / len(members)
+            else:
+                sum_weights = float(sum(weights))
+                mpd = sum_distances / (sum_weights * sum_weights)
+                mntd = sum_nearest_taxon_distances / sum_weights
+            results.append((len(members), mpd / normalization_factor, mntd / normalization_factor))
+        pds = self._calculate_phylogenetic_diversities(
+                assemblage_taxa=assemblage_taxa,
+                is_weighted_edge_distances=is_weighted_edge_distances)
+        results = [result_type(num_members, mpd, mntd, pd if pd is None else pd / normalization_factor)
+                for (num_members, mpd, mntd), pd in zip(results, pds)]
+        if names is None:
+            return results
+        return collections.OrderedDict(zip(names, results))
+
+    def _calculate_phylogenetic_diversities(self,
+            assemblage_taxa,
+            is_weighted_edge_distances):
+        # Returns the total length (or number) of the edges on the paths from
+        # the taxa of each assemblage to the root. The assemblages with taxa
+        # descending from each edge are tracked as a bitmask, in which bit
+        # ``i`` is set if assemblage ``i`` includes a descendant taxon, and
+        # the length of the edge is added to the PD of each of these.
+        if self._lca_index is None:
+            return [None] * len(assemblage_taxa)
+        taxon_assemblage_bitmasks = {}
+        for assemblage_idx, taxa in enumerate(assemblage_taxa):
+            assemblage_bitmask = 1 << assemblage_idx
+            for taxon in taxa:
+                taxon_assemblage_bitmasks[taxon] = taxon_assemblage_bitmasks.get(taxon, 0) | assemblage_bitmask
+        nodes = self._lca_index.nodes
+        parent_indexes = self._lca_index.parent_indexes
+        node_assemblage_bitmasks = [0] * len(nodes)
+        pds = [0.0] * len(assemblage_taxa)
+        for node_idx in range(len(nodes) - 1, 0, -1):
+            node = nodes[node_idx]
+            if not node._child_nodes:
+                node_assemblage_bitmasks[node_idx] = taxon_assemblage_bitmasks.get(node.taxon, 0)
+            assemblage_bitmask = node_assemblage_bitmasks[node_idx]
+            if not assemblage_bitmask:
+                continue
+            node_assemblage_bitmasks[parent_indexes[node_idx]] |= assemblage_bitmask
+            if is_weighted_edge_distances:
+                edge_length = node.edge.length
+                if edge_length is None:
+                    continue
+            else:
+                edge_length = 1
+            while assemblage_bitmask:
+                lowest_bit = assemblage_bitmask & -assemblage_bitmask
+                pds[lowest_bit.bit_length() - 1] += edge_length
+                assemblage_bitmask ^= lowest_bit
+        return pds
+
     def assemblage_membership_definitions_from_csv(
             self,
             src,
             default_data_type=float,
+            is_abundances=False,
             **csv_reader_kwargs):
         """
         Convenience method to return list of community sets from a delimited
         file that lists taxon (labels) in columns and community
         presence/absences or abundances in rows.
+
+        If ``is_abundances`` is |True|, then each community is given by a
+        dictionary mapping the taxa present in it to their abundances rather
+        than by a set. The definitions can be passed directly to
+        :meth:`assemblage_statistics`.
         """
         if isinstance(src, str):
             with open(src) as srcf:
@@ -1260,10 +1460,17 @@ class PhylogeneticDistanceMatrix(object):
             assert column_name in mapped_taxon_labels
         assemblage_memberships = collections.OrderedDict()
         for row_name in data_table.row_name_iter():
-            assemblage_membership = set()
+            if is_abundances:
+                assemblage_membership = {}
+            else:
+                assemblage_membership = set()
             for taxon in self.taxon_iter():
-                if data_table[row_name, taxon.label] > 0:
-                    assemblage_membership.add(taxon)
+                abundance = data_table[row_name, taxon.label]
+                if abundance > 0:
+                    if is_abundances:
+                        assemblage_membership[taxon] = abundance
+                    else:
+                        assemblage_membership.add(taxon)
             assemblage_memberships[row_name] = assemblage_membership
         return assemblage_memberships
 
@@ -1281,6 +1488,20 @@ class PhylogeneticDistanceMatrix(object):
                 permutations[taxon1].append(taxon2)
         return permutations
 
+    def _get_distance_array(self, is_weighted_edge_distances):
+        # returns the mapped taxa and a square array of the distances between
+        # them, in row-major order
+        if is_weighted_edge_distances:
+            dmatrix = self._taxon_phylogenetic_distances
+        else:
+            dmatrix = self._taxon_phylogenetic_path_steps
+        taxa = list(self._mapped_taxa)
+        distances = array.array("d")
+        for t1 in taxa:
+            row = dmatrix[t1]
+            distances.extend(0.0 if t1 is t2 else row[t2] for t2 in taxa)
+        return taxa, distances
+
     def _get_distance_matrix_and_normalization_factor(self,
             is_weighted_edge_distances,
             is_normalize_by_tree_size):
@@ -1337,45 +1558,52 @@ class PhylogeneticDistanceMatrix(object):
 
     def _calculate_standardized_effect_size(self,
             statisticf_name,
-            comparison_regimes,
+            assemblage_memberships,
             is_weighted_edge_distances,
             is_normalize_by_tree_size,
             null_model_type="taxa.label",
             num_randomization_replicates=1000,
-            rng=None):
+            rng=None,
+            num_processes=None):
+        # The null model (shuffling the taxon labels) is represented by
+        # permutations of the indexes of the taxa in the distance array: a
+        # replicate of an assemblage is given by the indexes to which the
+        # indexes of its taxa are mapped.
         result_type = collections.namedtuple("PhylogeneticCommunityStandardizedEffectSizeStatisticCalculationResult",
                 ["obs", "null_model_mean", "null_model_sd", "z", "rank", "p",])
-        statisticf_kwargs={
-            "is_weighted_edge_distances": is_weighted_edge_distances,
-            "is_normalize_by_tree_size": is_normalize_by_tree_size
-        }
-        observed_stat_values = {}
-        null_model_stat_values = {}
-        null_model_matrix = self.clone()
-        assert null_model_matrix == self
-        if is_weighted_edge_distances:
-            is_shuffle_phylogenetic_distances = True
-            is_shuffle_phylogenetic_path_steps = False
-        else:
-            is_shuffle_phylogenetic_distances = False
-            is_shuffle_phylogenetic_path_steps = True
-        for rep_idx in range(num_randomization_replicates):
-            null_model_matrix.shuffle_taxa(
-                    is_shuffle_phylogenetic_distances=is_shuffle_phylogenetic_distances,
-                    is_shuffle_phylogenetic_path_steps=is_shuffle_phylogenetic_distances,
-                    is_shuffle_mrca=False,
-                    rng=rng)
-            for comparison_regime_idx, comparison_regime in enumerate(comparison_regimes):
-                statisticf_kwargs["comparison_regime"] = comparison_regime
-                if rep_idx == 0:
-                    observed_stat_values[comparison_regime_idx] = getattr(self, statisticf_name)(**statisticf_kwargs)
-                    null_model_stat_values[comparison_regime_idx] = []
-                stat_value = getattr(null_model_matrix, statisticf_name)(**statisticf_kwargs)
-                null_model_stat_values[comparison_regime_idx].append(stat_value)
+        if rng is None:
+            rng = GLOBAL_RNG
+        taxa, distances = self._get_distance_array(is_weighted_edge_distances=is_weighted_edge_distances)
+        __, normalization_factor = self._get_distance_matrix_and_normalization_factor(
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                is_normalize_by_tree_size=is_normalize_by_tree_size,)
+        taxon_indexes = dict((taxon, idx) for idx, taxon in enumerate(taxa))
+        assemblages = []
+        for assemblage_membership in assemblage_memberships:
+            assemblages.append([taxon_indexes[taxon] for taxon in assemblage_membership if taxon in taxon_indexes])
+        statistic_fn = _NULL_MODEL_STATISTIC_FUNCTIONS[statisticf_name]
+        if statisticf_name == "mean_nearest_taxon_distance" and taxa:
+            # exclude the distance of each taxon to itself
+            distances[::len(taxa)+1] = array.array("d", [float("inf")]) * len(taxa)
+        observed_stat_values = [
+                statistic_fn(distances, len(taxa), assemblage) / normalization_factor
+                for assemblage in assemblages]
+        batches = []
+        for start in range(0, num_randomization_replicates, _NULL_MODEL_BATCH_SIZE):
+            batches.append((
+                min(_NULL_MODEL_BATCH_SIZE, num_randomization_replicates - start),
+                rng.getrandbits(64)))
+        batch_results = parallel.map_tiles(
+                _calculate_null_model_batch,
+                batches,
+                shared_args=(statisticf_name, distances, len(taxa), assemblages),
+                num_processes=num_processes)
+        null_model_stat_values = [[] for assemblage in assemblages]
+        for batch_result in batch_results:
+            for stat_values, batch_stat_values in zip(null_model_stat_values, batch_result):
+                stat_values.extend(v / normalization_factor for v in batch_stat_values)
         results = []
-        for comparison_regime_idx, comparison_regime in enumerate(comparison_regimes):
-            obs_value = observed_stat_values[comparison_regime_idx]
-            stat_values = null_model_stat_values[comparison_regime_idx]
+        for obs_value, stat_values in zip(observed_stat_values, null_model_stat_values):
             null_model_mean, null_model_var = statistics.mean_and_sample_variance(stat_values)
             rank = statistics.rank(
                     value_to_be_ranked=obs_value,
@@ -1397,6 +1625,483 @@ class PhylogeneticDistanceMatrix(object):
             results.append(result)
         return results
 
+class _DenseDistanceMatrixView(object):
+    # Read-only, dictionary-of-dictionaries style access (``view[taxon1][taxon2]``)
+    # to the values of a |DensePhylogeneticDistanceMatrix|, for the methods
+    # of |PhylogeneticDistanceMatrix| that access the matrix directly.
+
+    def __init__(self, pdm, values_attr_name, taxon_indexes_attr_name):
+        self._pdm = pdm
+        self._values_attr_name = values_attr_name
+        self._taxon_indexes_attr_name = taxon_indexes_attr_name
+
+    def __getitem__(self, taxon1):
+        values = getattr(self._pdm, self._values_attr_name)
+        if values is None:
+            raise KeyError(taxon1)
+        taxon_indexes = getattr(self._pdm, self._taxon_indexes_attr_name)
+        return _DenseDistanceMatrixRowView(
+                values,
+                taxon_indexes[taxon1] * len(taxon_indexes),
+                taxon_indexes)
+
+    def __contains__(self, taxon):
+        return getattr(self._pdm, self._values_attr_name) is not None and taxon in getattr(self._pdm, self._taxon_indexes_attr_name)
+
+    def __iter__(self):
+        if getattr(self._pdm, self._values_attr_name) is None:
+            return iter(())
+        return iter(getattr(self._pdm, self._taxon_indexes_attr_name))
+
+    def __len__(self):
+        if getattr(self._pdm, self._values_attr_name) is None:
+            return 0
+        return len(getattr(self._pdm, self._taxon_indexes_attr_name))
+
+class _DenseDistanceMatrixRowView(object):
+
+    def __init__(self, values, offset, taxon_indexes):
+        self._values = values
+        self._offset = offset
+        self._taxon_indexes = taxon_indexes
+
+    def __getitem__(self, taxon2):
+        return self._values[self._offset + self._taxon_indexes[taxon2]]
+
+    def __contains__(self, taxon):
+        return taxon in self._taxon_indexes
+
+    def __iter__(self):
+        return iter(self._taxon_indexes)
+
+    def __len__(self):
+        return len(self._taxon_indexes)
+
+class DensePhylogeneticDistanceMatrix(PhylogeneticDistanceMatrix):
+    """
+    A |PhylogeneticDistanceMatrix| that stores the distances between taxa in
+    dense arrays rather than in dictionaries.
+
+    Each (mapped) taxon is assigned an index, and the patristic distances
+    and path steps between taxa are stored in square ``array.array`` objects
+    of (double-precision) floating-point and integer values, respectively,
+    in row-major order. MRCAs are looked up using the MRCA index of the tree
+    (see :meth:`Tree.lca_index`). This takes a small fraction of the memory
+    of the dictionaries used by |PhylogeneticDistanceMatrix|, and the
+    statistics computed over many taxa (e.g., :meth:`mean_pairwise_distance`
+    or :meth:`mean_nearest_taxon_distance`) are computed using operations on
+    whole rows of the arrays. Shuffling the taxa (:meth:`shuffle_taxa`) and
+    cloning the matrix (:meth:`clone`) only reassign or copy the indexes of
+    the taxa, not the arrays.
+
+    Path edges (:meth:`path_edges`) are found on demand on the tree, and are
+    available regardless of the value of ``is_store_path_edges``.
+
+    Examples
+    --------
+
+    ::
+
+        import dendropy
+        tree = dendropy.Tree.get(path="tree.nex",
+                schema="nexus")
+        pdm = dendropy.DensePhylogeneticDistanceMatrix.from_tree(tree)
+        mpd = pdm.mean_pairwise_distance()
+
+    """
+
+    def clear(self):
+        self.taxon_namespace = None
+        self._mapped_taxa = []
+        self._tree_length = None
+        self._num_edges = None
+        self._distances = None
+        self._path_steps = None
+        self._taxon_indexes = {}
+        self._path_steps_taxon_indexes = {}
+        self._taxon_nodes = {}
+        self._lca_index = None
+        self._taxon_phylogenetic_distances = _DenseDistanceMatrixView(self, "_distances", "_taxon_indexes")
+        self._taxon_phylogenetic_path_steps = _DenseDistanceMatrixView(self, "_path_steps", "_path_steps_taxon_indexes")
+
+    def compile_from_tree(self, tree):
+        """
+        Calculates the distances. Note that the path length (in number of
+        steps) between taxa that span the root will be off by one if
+        the tree is unrooted.
+        """
+        self.clear()
+        self.taxon_namespace = tree.taxon_namespace
+        self._tree_length = 0.0
+        self._num_edges = 0
+        nodes = list(tree.postorder_node_iter())
+        # leaves are indexed in postorder, so that the leaves of each subtree
+        # have consecutive indexes
+        leaves = [nd for nd in nodes if not nd._child_nodes]
+        num_leaves = len(leaves)
+        distances = array.array("d", [0.0]) * (num_leaves * num_leaves)
+        path_steps = array.array("i", [0]) * (num_leaves * num_leaves)
+        # for each node, the index of the first leaf in its subtree and the
+        # distances and path steps from it to each leaf in its subtree
+        subtree_leaf_paths = {}
+        leaf_idx = 0
+        for node in nodes:
+            try:
+                self._tree_length += node.edge.length
+            except TypeError: # None for edge length
+                pass
+            self._num_edges += 1
+            children = node._child_nodes
+            if not children:
+                assert node.taxon is not None
+                subtree_leaf_paths[node] = (leaf_idx, [0.0], [0])
+                leaf_idx += 1
+                continue
+            child_paths = []
+            for ch in children:
+                ch_start, ch_distances, ch_path_steps = subtree_leaf_paths.pop(ch)
+                elen = ch.edge.length if ch.edge.length is not None else 0.0
+                child_paths.append((
+                    ch_start,
+                    [d + elen for d in ch_distances],
+                    [s + 1 for s in ch_path_steps]))
+            for cidx1, (start1, distances1, path_steps1) in enumerate(child_paths):
+                stop1 = start1 + len(distances1)
+                for start2, distances2, path_steps2 in child_paths[cidx1+1:]:
+                    stop2 = start2 + len(distances2)
+                    for i, (d1, s1) in enumerate(zip(distances1, path_steps1)):
+                        row_offset = (start1 + i) * num_leaves
+                        distances[row_offset + start2:row_offset + stop2] = array.array("d", [d1 + d2 for d2 in distances2])
+                        path_steps[row_offset + start2:row_offset + stop2] = array.array("i", [s1 + s2 for s2 in path_steps2])
+                    for i, (d2, s2) in enumerate(zip(distances2, path_steps2)):
+                        row_offset = (start2 + i) * num_leaves
+                        distances[row_offset + start1:row_offset + stop1] = array.array("d", [d2 + d1 for d1 in distances1])
+                        path_steps[row_offset + start1:row_offset + stop1] = array.array("i", [s2 + s1 for s1 in path_steps1])
+            subtree_leaf_paths[node] = (
+                    child_paths[0][0],
+                    [d for ch_path in child_paths for d in ch_path[1]],
+                    [s for ch_path in child_paths for s in ch_path[2]])
+        self._mapped_taxa = [nd.taxon for nd in leaves]
+        self._taxon_indexes = dict((taxon, idx) for idx, taxon in enumerate(self._mapped_taxa))
+        self._path_steps_taxon_indexes = self._taxon_indexes
+        self._taxon_nodes = dict((nd.taxon, nd) for nd in leaves)
+        self._lca_index = tree.lca_index()
+        self._distances = distances
+        self._path_steps = path_steps
+
+    def compile_from_dict(self, distances, taxon_namespace):
+        self.clear()
+        self.taxon_namespace = taxon_namespace
+        taxon_indexes = self._taxon_indexes
+        for t1 in distances:
+            for taxon in [t1] + list(distances[t1]):
+                if taxon not in taxon_indexes:
+                    taxon_indexes[taxon] = len(self._mapped_taxa)
+                    self._mapped_taxa.append(taxon)
+        num_taxa = len(self._mapped_taxa)
+        self._distances = array.array("d", [0.0]) * (num_taxa * num_taxa)
+        for t1 in distances:
+            idx1 = taxon_indexes[t1]
+            for t2 in distances[t1]:
+                idx2 = taxon_indexes[t2]
+                self._distances[idx1 * num_taxa + idx2] = distances[t1][t2]
+                self._distances[idx2 * num_taxa + idx1] = distances[t1][t2]
+        self._path_steps_taxon_indexes = taxon_indexes
+
+    def __eq__(self, o):
+        if self.taxon_namespace is not o.taxon_namespace:
+            return False
+        if not isinstance(o, DensePhylogeneticDistanceMatrix):
+            return False
+        return (True
+                and (set(self._mapped_taxa) == set(o._mapped_taxa))
+                and self._is_equal_values(o, "_distances", "_taxon_indexes")
+                and self._is_equal_values(o, "_path_steps", "_path_steps_taxon_indexes")
+                and (self._taxon_nodes == o._taxon_nodes)
+                and (self._tree_length == o._tree_length)
+                and (self._num_edges == o._num_edges)
+                )
+
+    def _is_equal_values(self, o, values_attr_name, taxon_indexes_attr_name):
+        values1 = getattr(self, values_attr_name)
+        values2 = getattr(o, values_attr_name)
+        taxon_indexes1 = getattr(self, taxon_indexes_attr_name)
+        taxon_indexes2 = getattr(o, taxon_indexes_attr_name)
+        if values1 is None or values2 is None:
+            return values1 is values2
+        if values1 is values2 and taxon_indexes1 == taxon_indexes2:
+            return True
+        num_taxa = len(self._mapped_taxa)
+        get_values1 = operator.itemgetter(*[taxon_indexes1[taxon] for taxon in self._mapped_taxa])
+        get_values2 = operator.itemgetter(*[taxon_indexes2[taxon] for taxon in self._mapped_taxa])
+        for taxon in self._mapped_taxa:
+            offset1 = taxon_indexes1[taxon] * num_taxa
+            offset2 = taxon_indexes2[taxon] * num_taxa
+            if (get_values1(values1[offset1:offset1 + num_taxa])
+                    != get_values2(values2[offset2:offset2 + num_taxa])):
+                return False
+        return True
+
+    def __hash__(self):
+        return id(self)
+
+    def __iter__(self):
+        return iter(self._mapped_taxa)
+
+    def clone(self):
+        o = self.__class__()
+        o.taxon_namespace = self.taxon_namespace
+        o._mapped_taxa = list(self._mapped_taxa)
+        o._tree_length = self._tree_length
+        o._num_edges = self._num_edges
+        # arrays and indexes are never modified in place, and so can be shared
+        o._distances = self._distances
+        o._path_steps = self._path_steps
+        o._taxon_indexes = self._taxon_indexes
+        o._path_steps_taxon_indexes = self._path_steps_taxon_indexes
+        o._taxon_nodes = self._taxon_nodes
+        o._lca_index = self._lca_index
+        return o
+
+    def mrca(self, taxon1, taxon2):
+        """
+        Returns MRCA of two taxon objects.
+        """
+        return self._lca_index.mrca(self._taxon_nodes[taxon1], self._taxon_nodes[taxon2])
+
+    def patristic_distance(self, taxon1, taxon2, is_normalize_by_tree_size=False):
+        """
+        Returns patristic distance between two taxon objects.
+        """
+        if taxon1 is taxon2:
+            return 0.0
+        taxon_indexes = self._taxon_indexes
+        d = self._distances[taxon_indexes[taxon1] * len(taxon_indexes) + taxon_indexes[taxon2]]
+        if is_normalize_by_tree_size:
+            return d / self._tree_length
+        else:
+            return d
+
+    def path_edge_count(self, taxon1, taxon2, is_normalize_by_tree_size=False):
+        """
+        Returns the number of edges between two taxon objects.
+        """
+        if taxon1 is taxon2:
+            return 0
+        if self._path_steps is None:
+            raise KeyError(taxon1)
+        taxon_indexes = self._path_steps_taxon_indexes
+        d = self._path_steps[taxon_indexes[taxon1] * len(taxon_indexes) + taxon_indexes[taxon2]]
+        if is_normalize_by_tree_size:
+            return float(d) / self._num_edges
+        else:
+            return d
+
+    def path_edges(self, taxon1, taxon2):
+        """
+        Returns the edges between two taxon objects.
+        """
+        lca_index = self._lca_index
+        if lca_index is None:
+            raise KeyError(taxon1)
+        node_indexes = [lca_index._node_indexes[self._taxon_nodes[taxon]] for taxon in (taxon1, taxon2)]
+        mrca_idx = lca_index._mrca_index(min(node_indexes), max(node_indexes))
+        path_edges = []
+        for node_idx in node_indexes:
+            edges = []
+            while node_idx != mrca_idx:
+                edges.append(lca_index.nodes[node_idx].edge)
+                node_idx = lca_index.parent_indexes[node_idx]
+            path_edges.append(edges)
+        return tuple(path_edges[0] + path_edges[1][::-1])
+
+    def _get_values_and_taxon_indexes(self, is_weighted_edge_distances):
+        if is_weighted_edge_distances:
+            return self._distances, self._taxon_indexes
+        elif self._path_steps is None:
+            raise ValueError("Path steps not available for distances not calculated on a tree")
+        else:
+            return self._path_steps, self._path_steps_taxon_indexes
+
+    def _get_distance_array(self, is_weighted_edge_distances):
+        values, taxon_indexes = self._get_values_and_taxon_indexes(is_weighted_edge_distances)
+        taxa = list(self._mapped_taxa)
+        distances = array.array("d")
+        for taxon, row in self._iter_rows(is_weighted_edge_distances=is_weighted_edge_distances):
+            distances.extend(row)
+        return taxa, distances
+
+    def distances(self,
+            is_weighted_edge_distances=True,
+            is_normalize_by_tree_size=False):
+        """
+        Returns list of patristic distances.
+        """
+        values, taxon_indexes = self._get_values_and_taxon_indexes(is_weighted_edge_distances)
+        __, normalization_factor = self._get_distance_matrix_and_normalization_factor(
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                is_normalize_by_tree_size=is_normalize_by_tree_size,
+                )
+        num_taxa = len(taxon_indexes)
+        results = []
+        for idx in range(num_taxa - 1):
+            results.extend(values[idx * num_taxa + idx + 1:(idx + 1) * num_taxa])
+        return [d / normalization_factor for d in results]
+
+    def max_pairwise_distance_taxa(self,
+            is_weighted_edge_distances=True):
+        values, taxon_indexes = self._get_values_and_taxon_indexes(is_weighted_edge_distances)
+        if len(taxon_indexes) < 2:
+            return None
+        num_taxa = len(taxon_indexes)
+        idx1, idx2 = divmod(values.index(max(values)), num_taxa)
+        index_taxa = [None] * num_taxa
+        for taxon, idx in taxon_indexes.items():
+            index_taxa[idx] = taxon
+        return (index_taxa[idx1], index_taxa[idx2])
+
+    def distinct_taxon_pair_iter(self, filter_fn=None):
+        """
+        Iterates over all distinct pairs of taxa in matrix.
+        """
+        taxa = [t for t in self._mapped_taxa if not filter_fn or filter_fn(t)]
+        for idx1, t1 in enumerate(taxa[:-1]):
+            for t2 in taxa[idx1+1:]:
+                yield t1, t2
+
+    def _get_filtered_taxon_indexes(self, filter_fn, is_weighted_edge_distances):
+        values, taxon_indexes = self._get_values_and_taxon_indexes(is_weighted_edge_distances)
+        if filter_fn is None:
+            indexes = list(range(len(taxon_indexes)))
+        else:
+            indexes = sorted(taxon_indexes[t] for t in self._mapped_taxa if filter_fn(t))
+        if len(indexes) < 2:
+            raise error.NullAssemblageException("No taxa in assemblage")
+        return values, len(taxon_indexes), indexes
+
+    def mean_pairwise_distance(self,
+            filter_fn=None,
+            is_weighted_edge_distances=True,
+            is_normalize_by_tree_size=False):
+        values, num_taxa, indexes = self._get_filtered_taxon_indexes(filter_fn, is_weighted_edge_distances)
+        __, normalization_factor = self._get_distance_matrix_and_normalization_factor(
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                is_normalize_by_tree_size=is_normalize_by_tree_size,)
+        if len(indexes) == num_taxa:
+            total = sum(values)
+        else:
+            get_values = operator.itemgetter(*indexes)
+            total = 0.0
+            for idx in indexes:
+                total += sum(get_values(values[idx * num_taxa:(idx + 1) * num_taxa]))
+        # each distance is counted twice, and distances along the diagonal are 0
+        num_pairs = len(indexes) * (len(indexes) - 1)
+        return (total / normalization_factor) / num_pairs
+    mean_pairwise_distance.__doc__ = PhylogeneticDistanceMatrix.mean_pairwise_distance.__doc__
+
+    def mean_nearest_taxon_distance(self,
+            filter_fn=None,
+            is_weighted_edge_distances=True,
+            is_normalize_by_tree_size=False):
+        values, num_taxa, indexes = self._get_filtered_taxon_indexes(filter_fn, is_weighted_edge_distances)
+        __, normalization_factor = self._get_distance_matrix_and_normalization_factor(
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                is_normalize_by_tree_size=is_normalize_by_tree_size,)
+        get_values = operator.itemgetter(*indexes)
+        total = 0.0
+        for pos, idx in enumerate(indexes):
+            row = get_values(values[idx * num_taxa:(idx + 1) * num_taxa])
+            if pos == 0:
+                total += min(row[1:])
+            elif pos == len(row) - 1:
+                total += min(row[:-1])
+            else:
+                total += min(min(row[:pos]), min(row[pos+1:]))
+        return (total / normalization_factor) / len(indexes)
+    mean_nearest_taxon_distance.__doc__ = PhylogeneticDistanceMatrix.mean_nearest_taxon_distance.__doc__
+
+    def shuffle_taxa(self,
+            is_shuffle_phylogenetic_distances=True,
+            is_shuffle_phylogenetic_path_steps=True,
+            is_shuffle_mrca=True,
+            rng=None):
+        """
+        Randomly shuffles taxa in-situ.
+        """
+        if rng is None:
+            rng = GLOBAL_RNG
+        reordered_taxa = list(self._mapped_taxa)
+        rng.shuffle(reordered_taxa)
+        current_to_shuffled_taxon_map = dict(zip(self._mapped_taxa, reordered_taxa))
+        if is_shuffle_phylogenetic_distances:
+            self._taxon_indexes = dict((current_to_shuffled_taxon_map[t], idx) for t, idx in self._taxon_indexes.items())
+        if is_shuffle_phylogenetic_path_steps:
+            self._path_steps_taxon_indexes = dict((current_to_shuffled_taxon_map[t], idx) for t, idx in self._path_steps_taxon_indexes.items())
+        if is_shuffle_mrca:
+            self._taxon_nodes = dict((current_to_shuffled_taxon_map[t], nd) for t, nd in self._taxon_nodes.items())
+        return current_to_shuffled_taxon_map
+
+    def _iter_rows(self, is_weighted_edge_distances):
+        # yields each taxon and its distances to each taxon, in order
+        values, taxon_indexes = self._get_values_and_taxon_indexes(is_weighted_edge_distances)
+        num_taxa = len(taxon_indexes)
+        get_values = operator.itemgetter(*[taxon_indexes[taxon] for taxon in self._mapped_taxa])
+        for taxon in self._mapped_taxa:
+            offset = taxon_indexes[taxon] * num_taxa
+            row = get_values(values[offset:offset + num_taxa])
+            if num_taxa == 1:
+                row = (row,)
+            yield taxon, row
+
+    def as_data_table(self, is_weighted_edge_distances=True):
+        """
+        Returns this as a table.
+        """
+        dt = container.DataTable()
+        for t1 in self._mapped_taxa:
+            dt.add_row(row_name=t1.label)
+            dt.add_column(column_name=t1.label)
+        for t1, row in self._iter_rows(is_weighted_edge_distances=is_weighted_edge_distances):
+            for t2, d in zip(self._mapped_taxa, row):
+                dt[t1.label, t2.label] = d
+        return dt
+
+    def write_csv(self,
+            out,
+            is_first_row_column_names=True,
+            is_first_column_row_names=True,
+            is_weighted_edge_distances=True,
+            is_normalize_by_tree_size=True,
+            label_transform_fn=None,
+            **csv_writer_kwargs
+            ):
+        if isinstance(out, str):
+            dest = open(out, "w")
+        else:
+            dest = out
+        if label_transform_fn is None:
+            label_transform_fn = lambda x: x
+        __, normalization_factor = self._get_distance_matrix_and_normalization_factor(
+                is_weighted_edge_distances=is_weighted_edge_distances,
+                is_normalize_by_tree_size=is_normalize_by_tree_size,
+                )
+        if "delimiter" not in csv_writer_kwargs:
+            csv_writer_kwargs["delimiter"] = ","
+        writer = csv.writer(dest, csv_writer_kwargs)
+        if is_first_row_column_names:
+            row = []
+            if is_first_column_row_names:
+                row.append("")
+            for taxon in self._mapped_taxa:
+                row.append(label_transform_fn(taxon.label))
+            writer.writerow(row)
+        for taxon1, distances in self._iter_rows(is_weighted_edge_distances=is_weighted_edge_distances):
+            row = []
+            if is_first_column_row_names:
+                row.append(label_transform_fn(taxon1.label))
+            row.extend("{}".format(d / normalization_factor) for d in distances)
+            writer.writerow(row)
+
 class NodeDistanceMatrix(object):
 
     @classmethod
@@ -1413,12 +2118,13 @@ class NodeDistanceMatrix(object):
         self._num_edges = None
         self._node_phylogenetic_distances = {}
         self._node_phylogenetic_path_steps = {}
-        self._mrca = {}
+        self._lca_index = None
 
     def compile_from_tree(self, tree):
         self.clear()
         self._tree_length = 0.0
         self._num_edges = 0
+        self._lca_index = tree.lca_index()
         for node1 in tree.postorder_node_iter():
             try:
                 self._tree_length += node1.edge.length
@@ -1428,7 +2134,6 @@ class NodeDistanceMatrix(object):
             if node1 not in self._node_phylogenetic_distances:
                 self._node_phylogenetic_distances[node1] = {node1: 0.0}
                 self._node_phylogenetic_path_steps[node1] = {node1: 0}
-                self._mrca[node1] = {node1: node1}
             children = node1.child_nodes()
             for ch_idx, ch1 in enumerate(children):
                 ch1_elen = ch1.edge.length if ch1.edge.length is not None else 0.0
@@ -1445,8 +2150,6 @@ class NodeDistanceMatrix(object):
                 self._node_phylogenetic_path_steps[node1][ch1] = 1
                 self._node_phylogenetic_path_steps[ch1][node1] = 1
                 for ch2 in children[ch_idx+1:]:
-                    self._mrca[ch1][ch2] = node1
-                    self._mrca[ch2][ch1] = node1
                     ch2_elen = ch2.edge.length if ch2.edge.length is not None else 0.0
                     d = ch1_elen + ch2_elen
                     self._node_phylogenetic_distances[ch1][ch2] = d
@@ -1474,13 +2177,6 @@ class NodeDistanceMatrix(object):
                     if snd1 not in self._node_phylogenetic_distances[snd2]:
                         self._node_phylogenetic_distances[snd2][snd1] = self._node_phylogenetic_distances[node1][snd1] + self._node_phylogenetic_distances[node1][snd2]
                         self._node_phylogenetic_path_steps[snd2][snd1] = self._node_phylogenetic_path_steps[node1][snd1] + self._node_phylogenetic_path_steps[node1][snd2]
-                    if snd1 not in self._mrca:
-                        self._mrca[snd1] = {}
-                    if snd2 not in self._mrca:
-                        self._mrca[snd2] = {}
-                    if snd2 not in self._mrca[snd1]:
-                        self._mrca[snd1][snd2] = node1
-                        self._mrca[snd2][snd1] = node1
 
     def __eq__(self, o):
         if self.node_namespace is not o.node_namespace:
@@ -1488,7 +2184,7 @@ class NodeDistanceMatrix(object):
         return (True
                 and (self._node_phylogenetic_distances == o._node_phylogenetic_distances)
                 and (self._node_phylogenetic_path_steps == o._node_phylogenetic_path_steps)
-                and (self._mrca == o._mrca)
+                and (self._lca_index == o._lca_index)
                 and (self._tree_length == o._tree_length)
                 and (self._num_edges == o._num_edges)
                 )
@@ -1510,10 +2206,10 @@ class NodeDistanceMatrix(object):
         o = self.__class__()
         o._tree_length = self._tree_length
         o._num_edges = self._num_edges
+        o._lca_index = self._lca_index
         for src, dest in (
                 (self._node_phylogenetic_distances, o._node_phylogenetic_distances,),
                 (self._node_phylogenetic_path_steps, o._node_phylogenetic_path_steps,),
-                (self._mrca, o._mrca,),
                 ):
             for t1 in src:
                 dest[t1] = {}
@@ -1525,7 +2221,7 @@ class NodeDistanceMatrix(object):
         """
         Returns MRCA of two node objects.
         """
-        return self._mrca[node1][node2]
+        return self._lca_index.mrca(node1, node2)
 
     def distance(self,
             node1,
@@ -1599,3 +2295,320 @@ class NodeDistanceMatrix(object):
                 normalization_factor = 1.0
         return dmatrix, normalization_factor
 
+###############################################################################
+### Support for distance-based tree construction
+
+def _neighbor_joining(distances, num_taxa, is_bound_pruned_search):
+    # Joins the nodes of the Neighbor-Joining tree for the square matrix
+    # ``distances`` of the distances between ``num_taxa`` taxa, and returns a
+    # list of the joins, ``(idx1, idx2, length1, length2)``, with each giving
+    # the indexes and edge lengths of the two nodes that were joined. The
+    # taxa are nodes 0 to ``num_taxa - 1`` and the node created by the i-th
+    # join is node ``num_taxa + i``. The Q-values, distances and edge lengths
+    # are calculated as in the original implementation of
+    # ``PhylogeneticDistanceMatrix.nj_tree()``, so as to give topologically
+    # identical trees; as the sums of distances are updated incrementally
+    # rather than recalculated, edge lengths (and Q-values) may differ from
+    # those of the original implementation by rounding errors, and so may
+    # the tree when Q-values are (nearly) tied.
+    #
+    # Each node in the pool occupies a row (and column) of ``distances``: a
+    # new node reuses the row of the first of the two nodes joined to create
+    # it. The sum of the distances of each node to all others is updated as
+    # nodes are joined, rather than recalculated.
+    node_rows = array.array("i", range(num_taxa)) + array.array("i", [-1]) * max(num_taxa - 1, 0)
+    node_pool = list(range(num_taxa))
+    row_sums = array.array("d", [
+        sum(distances[row_idx * num_taxa:(row_idx + 1) * num_taxa])
+        for row_idx in range(num_taxa)])
+    if is_bound_pruned_search:
+        # the distances from each node to the other nodes at the time it
+        # was created, in ascending order
+        sorted_distances = {}
+        sorted_nodes = {}
+        for node_idx in range(num_taxa):
+            row_distances = distances[node_idx * num_taxa:(node_idx + 1) * num_taxa]
+            del row_distances[node_idx]
+            _set_sorted_distances(
+                    sorted_distances,
+                    sorted_nodes,
+                    node_idx,
+                    row_distances,
+                    [idx for idx in range(num_taxa) if idx != node_idx])
+    joins = []
+    n = num_taxa
+    while n > 2:
+        if is_bound_pruned_search:
+            idx1, idx2 = _neighbor_joining_bound_pruned_search(
+                    distances=distances,
+                    num_taxa=num_taxa,
+                    n=n,
+                    node_pool=node_pool,
+                    node_rows=node_rows,
+                    row_sums=row_sums,
+                    sorted_distances=sorted_distances,
+                    sorted_nodes=sorted_nodes)
+        else:
+            idx1, idx2 = _neighbor_joining_full_search(
+                    distances=distances,
+                    num_taxa=num_taxa,
+                    n=n,
+                    node_pool=node_pool,
+                    node_rows=node_rows,
+                    row_sums=row_sums)
+        row1 = node_rows[idx1]
+        row2 = node_rows[idx2]
+        offset1 = row1 * num_taxa
+        offset2 = row2 * num_taxa
+        d12 = distances[offset1 + row2]
+        length1 = 0.5 * d12 + 1.0/(2*(n-2)) * (row_sums[row1] - row_sums[row2])
+        joins.append((idx1, idx2, length1, d12 - length1))
+        node_pool.remove(idx1)
+        node_pool.remove(idx2)
+        new_node_idx = num_taxa + len(joins) - 1
+        new_row_sum = 0.0
+        new_distances = []
+        for node_idx in node_pool:
+            row = node_rows[node_idx]
+            d1 = distances[offset1 + row]
+            d2 = distances[offset2 + row]
+            dist = 0.5 * ((d1 + d2) - d12)
+            distances[offset1 + row] = dist
+            distances[row * num_taxa + row1] = dist
+            new_distances.append(dist)
+            new_row_sum += dist
+            row_sum = row_sums[row]
+            row_sum += dist
+            row_sum -= d1
+            row_sum -= d2
+            row_sums[row] = row_sum
+        row_sums[row1] = new_row_sum
+        if is_bound_pruned_search:
+            for node_idx in (idx1, idx2):
+                del sorted_distances[node_idx]
+                del sorted_nodes[node_idx]
+            _set_sorted_distances(
+                    sorted_distances,
+                    sorted_nodes,
+                    new_node_idx,
+                    new_distances,
+                    list(node_pool))
+        node_rows[new_node_idx] = row1
+        node_rows[idx1] = -1
+        node_rows[idx2] = -1
+        node_pool.append(new_node_idx)
+        n -= 1
+    if n == 2:
+        idx1, idx2 = node_pool
+        d12 = distances[node_rows[idx1] * num_taxa + node_rows[idx2]]
+        joins.append((idx1, idx2, d12 / 2, d12 / 2))
+    return joins
+
+def _set_sorted_distances(sorted_distances, sorted_nodes, node_idx, node_distances, other_node_indexes):
+    order = sorted(range(len(other_node_indexes)), key=node_distances.__getitem__)
+    sorted_distances[node_idx] = array.array("d", [node_distances[idx] for idx in order])
+    sorted_nodes[node_idx] = array.array("i", [other_node_indexes[idx] for idx in order])
+
+def _neighbor_joining_full_search(distances, num_taxa, n, node_pool, node_rows, row_sums):
+    # Returns the pair of nodes in the pool with the minimum Q-value (the
+    # first such pair in the order of the pool if there are ties).
+    m = n - 2
+    pool_rows = [node_rows[node_idx] for node_idx in node_pool]
+    min_q = None
+    nodes_to_join = None
+    for pos1, row1 in enumerate(pool_rows[:-1]):
+        offset1 = row1 * num_taxa
+        other_rows = pool_rows[pos1+1:]
+        if len(other_rows) == 1:
+            row_distances = (distances[offset1 + other_rows[0]],)
+            other_row_sums = (row_sums[other_rows[0]],)
+        else:
+            get_values = operator.itemgetter(*other_rows)
+            row_distances = get_values(distances[offset1:offset1 + num_taxa])
+            other_row_sums = get_values(row_sums)
+        qvalues = list(map(operator.sub,
+                map(operator.sub,
+                    map(operator.mul, itertools.repeat(m), row_distances),
+                    itertools.repeat(row_sums[row1])),
+                other_row_sums))
+        row_min_q = min(qvalues)
+        if min_q is None or row_min_q < min_q:
+            min_q = row_min_q
+            nodes_to_join = (node_pool[pos1], node_pool[pos1 + 1 + qvalues.index(row_min_q)])
+    return nodes_to_join
+
+def _neighbor_joining_bound_pruned_search(
+        distances,
+        num_taxa,
+        n,
+        node_pool,
+        node_rows,
+        row_sums,
+        sorted_distances,
+        sorted_nodes):
+    # Returns the pair of nodes in the pool with the minimum Q-value, as in
+    # RapidNJ (Simonsen et al. 2008). The distances of each node are scanned
+    # in ascending order, and the scan stops as soon as the lower bound on the
+    # Q-values given by the current distance and the maximum row sum is not
+    # less than the minimum Q-value found so far. Every pair of nodes in the
+    # pool is in the sorted distances of (at least) the node created later.
+    m = n - 2
+    max_row_sum = max(row_sums[node_rows[node_idx]] for node_idx in node_pool)
+    min_q = float("inf")
+    nodes_to_join = None
+    for node_idx1 in node_pool:
+        row_sum1 = row_sums[node_rows[node_idx1]]
+        node_distances = sorted_distances[node_idx1]
+        node_indexes = sorted_nodes[node_idx1]
+        num_removed = 0
+        for pos, d in enumerate(node_distances):
+            v = m * d - row_sum1
+            if v - max_row_sum >= min_q:
+                break
+            node_idx2 = node_indexes[pos]
+            row2 = node_rows[node_idx2]
+            if row2 < 0:
+                num_removed += 1
+                continue
+            q = v - row_sums[row2]
+            if q < min_q:
+                min_q = q
+                nodes_to_join = (node_idx1, node_idx2)
+        if num_removed > len(node_distances) // 2:
+            # drop the nodes that are no longer in the pool
+            is_in_pool = [node_rows[node_idx] >= 0 for node_idx in node_indexes]
+            sorted_distances[node_idx1] = array.array("d", itertools.compress(node_distances, is_in_pool))
+            sorted_nodes[node_idx1] = array.array("i", itertools.compress(node_indexes, is_in_pool))
+    if nodes_to_join[0] > nodes_to_join[1]:
+        nodes_to_join = (nodes_to_join[1], nodes_to_join[0])
+    return nodes_to_join
+
+def _upgma_cluster_distances(distances1, distances2, size1, size2):
+    # weighted mean of the distances to the taxa of each cluster; the
+    # arithmetic is as in the original implementation of
+    # ``PhylogeneticDistanceMatrix.upgma_tree()``
+    size = 0.0 + size1 + size2
+    return map(operator.truediv,
+            map(operator.add,
+                map(operator.mul, distances1, itertools.repeat(size1)),
+                map(operator.mul, distances2, itertools.repeat(size2))),
+            itertools.repeat(size))
+
+def _wpgma_cluster_distances(distances1, distances2, size1, size2):
+    return map(operator.mul,
+            map(operator.add, distances1, distances2),
+            itertools.repeat(0.5))
+
+def _single_linkage_cluster_distances(distances1, distances2, size1, size2):
+    return map(min, distances1, distances2)
+
+def _complete_linkage_cluster_distances(distances1, distances2, size1, size2):
+    return map(max, distances1, distances2)
+
+_CLUSTER_DISTANCE_FUNCTIONS = collections.OrderedDict([
+    ("upgma", _upgma_cluster_distances),
+    ("wpgma", _wpgma_cluster_distances),
+    ("single", _single_linkage_cluster_distances),
+    ("complete", _complete_linkage_cluster_distances),
+    ])
+
+def _hierarchical_clustering(distances, num_taxa, cluster_distance_fn):
+    # Clusters the taxa given the square matrix ``distances`` of the
+    # distances between ``num_taxa`` taxa using the nearest-neighbor chain
+    # algorithm, and returns a list of the joins, ``(idx1, idx2, distance)``,
+    # with each giving the indexes of the two clusters joined and the
+    # distance between them. The clusters are indexed by the row of the
+    # matrix they occupy: initially, the taxa, and a new cluster replaces
+    # the first of the two clusters joined to create it. ``cluster_distance_fn``
+    # returns the distances from a new cluster to each cluster, given the
+    # distances from the two clusters joined to create it and their sizes.
+    #
+    # Distances of a cluster to itself and to clusters that no longer exist
+    # are set to infinity, so that the nearest neighbor of a cluster can be
+    # found as the minimum of its row.
+    inf = float("inf")
+    n = num_taxa
+    if n > 0:
+        distances[::n+1] = array.array("d", [inf]) * n
+    inf_row = array.array("d", [inf]) * n
+    cluster_sizes = [1] * n
+    joins = []
+    chain = []
+    next_idx = 0
+    while len(joins) < n - 1:
+        if not chain:
+            while cluster_sizes[next_idx] == 0:
+                next_idx += 1
+            chain.append(next_idx)
+        idx1 = chain[-1]
+        row1 = distances[idx1 * n:(idx1 + 1) * n]
+        d = min(row1)
+        idx2 = row1.index(d)
+        if len(chain) > 1 and row1[chain[-2]] == d:
+            # prefer the previous cluster in the chain in case of ties,
+            # so that the chain cannot cycle
+            idx2 = chain[-2]
+        if len(chain) == 1 or idx2 != chain[-2]:
+            chain.append(idx2)
+            continue
+        del chain[-2:]
+        if idx2 < idx1:
+            idx1, idx2 = idx2, idx1
+            row1 = distances[idx1 * n:(idx1 + 1) * n]
+        row2 = distances[idx2 * n:(idx2 + 1) * n]
+        new_row = array.array("d", cluster_distance_fn(row1, row2, cluster_sizes[idx1], cluster_sizes[idx2]))
+        new_row[idx1] = inf
+        new_row[idx2] = inf
+        distances[idx1 * n:(idx1 + 1) * n] = new_row
+        distances[idx1::n] = new_row
+        distances[idx2 * n:(idx2 + 1) * n] = inf_row
+        distances[idx2::n] = inf_row
+        cluster_sizes[idx1] += cluster_sizes[idx2]
+        cluster_sizes[idx2] = 0
+        joins.append((idx1, idx2, d))
+    return joins
+
+###############################################################################
+### Support for null models of community statistics
+
+# number of null model replicates generated with each random number generator
+_NULL_MODEL_BATCH_SIZE = 50
+
+def _null_model_mean_pairwise_distance(distances, num_taxa, indexes):
+    if len(indexes) < 2:
+        raise error.NullAssemblageException("No taxa in assemblage")
+    get_values = operator.itemgetter(*indexes)
+    total = 0.0
+    for idx in indexes:
+        total += sum(get_values(distances[idx * num_taxa:(idx + 1) * num_taxa]))
+    # each distance is counted twice, and distances along the diagonal are 0
+    return total / (len(indexes) * (len(indexes) - 1))
+
+def _null_model_mean_nearest_taxon_distance(distances, num_taxa, indexes):
+    # distances along the diagonal are expected to be infinite
+    if len(indexes) < 2:
+        raise error.NullAssemblageException("No taxa in assemblage")
+    get_values = operator.itemgetter(*indexes)
+    total = 0.0
+    for idx in indexes:
+        total += min(get_values(distances[idx * num_taxa:(idx + 1) * num_taxa]))
+    return total / len(indexes)
+
+_NULL_MODEL_STATISTIC_FUNCTIONS = {
+    "mean_pairwise_distance": _null_model_mean_pairwise_distance,
+    "mean_nearest_taxon_distance": _null_model_mean_nearest_taxon_distance,
+}
+
+def _calculate_null_model_batch(batch, statisticf_name, distances, num_taxa, assemblages):
+    # Returns, for each assemblage, the values of the statistic for a batch
+    # of replicates, given the number of replicates and the random seed.
+    num_replicates, seed = batch
+    statistic_fn = _NULL_MODEL_STATISTIC_FUNCTIONS[statisticf_name]
+    rng = random.Random(seed)
+    permutation = list(range(num_taxa))
+    results = [[] for assemblage in assemblages]
+    for rep_idx in range(num_replicates):
+        rng.shuffle(permutation)
+        for assemblage, stat_values in zip(assemblages, results):
+            stat_values.append(statistic_fn(distances, num_taxa, [permutation[idx] for idx in assemblage]))
+    return results
@@ -24,11 +24,77 @@ Population genetic statistics.
 import math
 import dendropy
 from dendropy.calculate import combinatorics
+from dendropy.utility import bitprocessing
 
 ###############################################################################
 ## internal functions: generally taking lower-level data, such as sequences etc.
 ###############################################################################
 
+def _get_site_state_bitmasks(char_sequences, get_state_code):
+    """
+    Returns, for each sequence, a pair of values: a dictionary with (small
+    integer) codes of the states of the sequence as keys and bitmasks of the
+    sites with each state as values, and a bitmask of the sites with states
+    that are ignored. States are coded by ``get_state_code``, which returns a
+    (hashable) value that is the same for states that are not different, or
+    |None| for states that are ignored.
+
+    This allows differences between sequences to be counted for all sites at
+    once, by intersecting and counting the bits of the bitmasks of each state.
+    """
+    state_indexes = {}
+    code_indexes = {}
+    state_index_sequences = []
+    for sequence in char_sequences:
+        try:
+            state_index_sequences.append([state_indexes[state] for state in sequence])
+            continue
+        except KeyError:
+            pass
+        for state in sequence:
+            if state not in state_indexes:
+                code = get_state_code(state)
+                if code is None:
+                    # ignored
+                    state_indexes[state] = 0
+                else:
+                    state_indexes[state] = code_indexes.setdefault(code, len(code_indexes) + 1)
+        state_index_sequences.append([state_indexes[state] for state in sequence])
+    num_indexes = len(code_indexes) + 1
+    if num_indexes <= 256:
+        translation_tables = [b"0" * idx + b"1" + b"0" * (255 - idx) for idx in range(num_indexes)]
+    site_state_bitmasks = []
+    for state_index_sequence in state_index_sequences:
+        if not state_index_sequence:
+            site_state_bitmasks.append(({}, 0))
+            continue
+        state_index_sequence.reverse() # first site is least significant bit
+        if num_indexes <= 256:
+            state_index_bytes = bytes(state_index_sequence)
+            state_bitmasks = dict((idx, int(state_index_bytes.translate(translation_tables[idx]), 2))
+                    for idx in set(state_index_bytes))
+        else:
+            state_bitmasks = dict((idx, int("".join(["1" if i == idx else "0" for i in state_index_sequence]), 2))
+                    for idx in set(state_index_sequence))
+        ignored_bitmask = state_bitmasks.pop(0, 0)
+        site_state_bitmasks.append((state_bitmasks, ignored_bitmask))
+    return site_state_bitmasks
+
+def _count_same_states(state_bitmasks1, state_bitmasks2):
+    """
+    Returns the number of sites at which two sequences, given by the state
+    bitmasks returned by ``_get_site_state_bitmasks()``, have the same
+    (non-ignored) state.
+    """
+    if len(state_bitmasks2) < len(state_bitmasks1):
+        state_bitmasks1, state_bitmasks2 = state_bitmasks2, state_bitmasks1
+    num_same = 0
+    for idx, bitmask in state_bitmasks1.items():
+        other_bitmask = state_bitmasks2.get(idx, 0)
+        if other_bitmask:
+            num_same += bitprocessing.num_set_bits(bitmask & other_bitmask)
+    return num_same
+
 def _count_differences(char_sequences, state_alphabet, ignore_uncertain=True):
     """
     Returns pair of values: total number of pairwise differences observed between
@@ -42,6 +108,7 @@ def _count_differences(char_sequences, state_alphabet, ignore_uncertain=True):
     #Check that all sequences are the same length
     if len(set([len(seq) for seq in char_sequences])) != 1:
         raise Exception("sequences of unequal length")
+    num_sites = len(char_sequences[0])
 
     if ignore_uncertain:
         attr = "fundamental_indexes_with_gaps_as_missing"
@@ -51,24 +118,20 @@ def _count_differences(char_sequences, state_alphabet, ignore_uncertain=True):
         attr = "fundamental_indexes"
         states_to_ignore = set()
 
-    reduced_char_sequences = []
-    for sequence in char_sequences:
-        seq = [getattr(char, attr) for char in sequence]
-        reduced_char_sequences.append(seq)
-
-    for vidx, i in enumerate(reduced_char_sequences[:-1]):
-        for j in reduced_char_sequences[vidx+1:]:
-            diff = 0
-            counted = 0
+    # states differ if their (cached) fundamental indexes are not the same
+    # object
+    def get_state_code(char):
+        f = getattr(char, attr)
+        if f in states_to_ignore:
+            return None
+        return id(f)
+    site_state_bitmasks = _get_site_state_bitmasks(char_sequences, get_state_code)
+
+    for vidx, (state_bitmasks1, ignored_bitmask1) in enumerate(site_state_bitmasks[:-1]):
+        for state_bitmasks2, ignored_bitmask2 in site_state_bitmasks[vidx+1:]:
             comps += 1
-            for cidx, c in enumerate(i):
-                c1 = c
-                c2 = j[cidx]
-                if c1 in states_to_ignore or c2 in states_to_ignore:
-                    continue
-                counted += 1
-                if c1 is not c2:
-                    diff += 1
+            counted = num_sites - bitprocessing.num_set_bits(ignored_bitmask1 | ignored_bitmask2)
+            diff = counted - _count_same_states(state_bitmasks1, state_bitmasks2)
             sum_diff += float(diff)
             # If counted < 0, this means that there is sites between these sequences
             # in which both are not ignored: i.e., one or the other has a gap
@@ -105,7 +168,6 @@ def _num_segregating_sites(char_sequences, state_alphabet, ignore_uncertain=True
     """
     Returns the raw number of segregating sites (polymorphic sites).
     """
-    s = 0
     if ignore_uncertain:
         attr = "fundamental_indexes_with_gaps_as_missing"
         _states_to_ignore = [state_alphabet.gap_state, state_alphabet.no_data_state]
@@ -113,17 +175,28 @@ def _num_segregating_sites(char_sequences, state_alphabet, ignore_uncertain=True
     else:
         attr = "fundamental_indexes"
         states_to_ignore = set()
-    for i, c1 in enumerate(char_sequences[0]):
-        for v in char_sequences[1:]:
-            c2 = v[i]
-            f1 = getattr(c1, attr)
-            f2 = getattr(c2, attr)
-            if f1 in states_to_ignore or f2 in states_to_ignore:
-                continue
-            if f1 is not f2:
-                s += 1
-                break
-    return s
+    num_sites = len(char_sequences[0])
+    for v in char_sequences[1:]:
+        if len(v) < num_sites:
+            raise IndexError("sequence index out of range")
+    # states differ if their (cached) fundamental indexes are not the same
+    # object
+    def get_state_code(char):
+        f = getattr(char, attr)
+        if f in states_to_ignore:
+            return None
+        return id(f)
+    site_state_bitmasks = _get_site_state_bitmasks(char_sequences, get_state_code)
+    # sites at which any sequence differs from the first (with neither being
+    # ignored)
+    state_bitmasks1, ignored_bitmask1 = site_state_bitmasks[0]
+    segregating_sites_bitmask = 0
+    for state_bitmasks2, ignored_bitmask2 in site_state_bitmasks[1:]:
+        same_bitmask = 0
+        for idx, bitmask in state_bitmasks1.items():
+            same_bitmask |= bitmask & state_bitmasks2.get(idx, 0)
+        segregating_sites_bitmask |= ~(ignored_bitmask1 | ignored_bitmask2 | same_bitmask)
+    return bitprocessing.num_set_bits(segregating_sites_bitmask & ((1 << num_sites) - 1))
 
 def _tajimas_d(num_sequences, avg_num_pairwise_differences, num_segregating_sites):
 
@@ -245,10 +318,11 @@ class PopulationPairSummaryStatistics(object):
         diffs_y, mean_diffs_y, sq_diff_y = _count_differences(self.pop2_seqs, self.state_alphabet, self.ignore_uncertain)
         d_x = diffs_x / combinatorics.choose(len(self.pop1_seqs), 2)
         d_y = diffs_y / combinatorics.choose(len(self.pop2_seqs), 2)
-        d_xy = self._average_number_of_pairwise_differences_between_populations()
+        pairwise_diffs_xy = self._pairwise_differences_between_populations()
+        d_xy = self._average_number_of_pairwise_differences_between_populations(pairwise_diffs_xy)
         s2_x = (float(sq_diff_x) / combinatorics.choose(len(self.pop1_seqs), 2) ) - (d_x ** 2)
         s2_y = (float(sq_diff_y) / combinatorics.choose(len(self.pop2_seqs), 2) ) - (d_y ** 2)
-        s2_xy = self._variance_of_pairwise_differences_between_populations(d_xy)
+        s2_xy = self._variance_of_pairwise_differences_between_populations(d_xy, pairwise_diffs_xy)
         n = len(self.combined_seqs)
         n_x = float(len(self.pop1_seqs))
         n_y = float(len(self.pop2_seqs))
@@ -286,51 +360,62 @@ class PopulationPairSummaryStatistics(object):
         # Tajima's D #
         self.tajimas_d = _tajimas_d(n, self.average_number_of_pairwise_differences, self.num_segregating_sites)
 
-    def _average_number_of_pairwise_differences_between_populations(self):
+    def _pairwise_differences_between_populations(self):
+        """
+        Returns a list of the number of differences between each sequence in
+        the first population and each sequence in the second population.
+        """
+        # states differ if their fundamental indexes are not equal
+        def get_state_code(char):
+            if char in self.states_to_ignore:
+                return None
+            return getattr(char, self.state_attr)
+        site_state_bitmasks = _get_site_state_bitmasks(self.combined_seqs, get_state_code)
+        num_pop1_seqs = len(self.pop1_seqs)
+        diffs = []
+        for sx, (state_bitmasks1, ignored_bitmask1) in zip(self.pop1_seqs, site_state_bitmasks[:num_pop1_seqs]):
+            for sy, (state_bitmasks2, ignored_bitmask2) in zip(self.pop2_seqs, site_state_bitmasks[num_pop1_seqs:]):
+                if len(sy) < len(sx):
+                    raise IndexError("sequence index out of range")
+                # only the sites of ``sx`` are compared
+                sites_bitmask = (1 << len(sx)) - 1
+                counted = bitprocessing.num_set_bits(sites_bitmask & ~(ignored_bitmask1 | ignored_bitmask2))
+                diffs.append(counted - _count_same_states(state_bitmasks1, state_bitmasks2))
+        return diffs
+
+    def _average_number_of_pairwise_differences_between_populations(self, pairwise_diffs=None):
         """
         Implements Eq (3) of:
 
         Wakeley, J. 1996. Distinguishing migration from isolation using the
         variance of pairwise differences. Theoretical Population Biology 49:
         369-386.
+
+        ``pairwise_diffs``, if given, is the result of
+        ``_pairwise_differences_between_populations()``.
         """
-        diffs = 0
-        for sx in self.pop1_seqs:
-            for sy in self.pop2_seqs:
-                for cidx, c in enumerate(sx):
-                    c1 = c
-                    c2 = sy[cidx]
-                    if c1 in self.states_to_ignore or c2 in self.states_to_ignore:
-                        continue
-                    f1 = getattr(c1, self.state_attr)
-                    f2 = getattr(c2, self.state_attr)
-                    if f1 != f2:
-                        diffs += 1
+        if pairwise_diffs is None:
+            pairwise_diffs = self._pairwise_differences_between_populations()
+        diffs = sum(pairwise_diffs)
         dxy = float(1)/(len(self.pop1_seqs) * len(self.pop2_seqs)) * float(diffs)
         return dxy
 
-    def _variance_of_pairwise_differences_between_populations(self, mean_diff):
+    def _variance_of_pairwise_differences_between_populations(self, mean_diff, pairwise_diffs=None):
         """
         Implements Eq (10) of:
 
         Wakeley, J. 1996. Distinguishing migration from isolation using the
         variance of pairwise differences. Theoretical Population Biology 49:
         369-386.
+
+        ``pairwise_diffs``, if given, is the result of
+        ``_pairwise_differences_between_populations()``.
         """
+        if pairwise_diffs is None:
+            pairwise_diffs = self._pairwise_differences_between_populations()
         ss_diffs = 0
-        for sx in self.pop1_seqs:
-            for sy in self.pop2_seqs:
-                diffs = 0
-                for cidx, c in enumerate(sx):
-                    c1 = c
-                    c2 = sy[cidx]
-                    if c1 in self.states_to_ignore or c2 in self.states_to_ignore:
-                        continue
-                    f1 = getattr(c1, self.state_attr)
-                    f2 = getattr(c2, self.state_attr)
-                    if f1 != f2:
-                        diffs += 1
-                ss_diffs += (float(diffs - mean_diff) ** 2)
+        for diffs in pairwise_diffs:
+            ss_diffs += (float(diffs - mean_diff) ** 2)
         return float(ss_diffs)/(len(self.pop1_seqs)*len(self.pop2_seqs))
 
 def derived_state_matrix(
@@ -22,6 +22,7 @@ Functions to calculate some general statistics.
 """
 
 from dendropy.calculate import probability
+from dendropy.utility import GLOBAL_RNG
 from operator import itemgetter
 
 def _mean_and_variance_pop_n(values):
@@ -45,7 +46,11 @@ def mean_and_population_variance(values):
 
 def mean_and_sample_variance(values):
     """Returns the mean and sample variance while only passing over the
-    elements in values once."""
+    elements in values once. ``values`` may also be a `StreamingSummary`."""
+    if isinstance(values, StreamingSummary):
+        if values.count == 1:
+            return values.mean, float('inf')
+        return values.mean, values.m2 / (values.count - 1)
     mean, pop_var, n = _mean_and_variance_pop_n(values)
     if n == 1:
         return mean, float('inf')
@@ -510,3 +515,171 @@ def summarize(values):
     except (ValueError, OverflowError):
         summary['quant_5_95'] = None
     return summary
+
+class StreamingSummary(object):
+    """
+    Summarizes a stream of values in bounded memory, as an alternative to
+    storing all the values and calling :func:`summarize` on them.
+
+    The count, mean and variance (using Welford's online algorithm), and the
+    minimum and maximum, are tracked exactly. The median, HPD and quantiles
+    are estimated from a uniform random sample of (at most)
+    ``reservoir_size`` of the values, maintained by reservoir sampling, and so
+    are exact if no more than ``reservoir_size`` values have been added. The
+    sample is drawn using ``rng``, a random number generator (which defaults
+    to the global random number generator of this package). Instances can be
+    merged (see :meth:`update`), e.g. to combine summaries
+    collected by different processes.
+
+    To stand in for a list of values, ``append()``, ``extend()``, ``+=`` and
+    ``len()`` are supported. |None| values are counted as missing values, in
+    the presence of which :meth:`summarize` fails with a `TypeError`, as
+    :func:`summarize` would.
+    """
+
+    __slots__ = ("reservoir_size", "count", "num_missing", "mean", "m2", "min", "max", "sample", "rng")
+
+    DEFAULT_RESERVOIR_SIZE = 10000
+
+    def __init__(self, reservoir_size=None, rng=None):
+        if reservoir_size is None:
+            reservoir_size = StreamingSummary.DEFAULT_RESERVOIR_SIZE
+        if rng is None:
+            rng = GLOBAL_RNG
+        self.reservoir_size = reservoir_size
+        self.rng = rng
+        self.count = 0
+        self.num_missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.sample = []
+
+    def __getstate__(self):
+        # the global random number generator is not copied along
+        return tuple(None if v is GLOBAL_RNG else v
+                for v in (getattr(self, a) for a in StreamingSummary.__slots__))
+
+    def __setstate__(self, state):
+        for a, v in zip(StreamingSummary.__slots__, state):
+            setattr(self, a, v)
+        if self.rng is None:
+            self.rng = GLOBAL_RNG
+
+    def __len__(self):
+        return self.count + self.num_missing
+
+    def __iadd__(self, other):
+        if isinstance(other, StreamingSummary):
+            self.update(other)
+        else:
+            self.extend(other)
+        return self
+
+    def add(self, value):
+        """
+        Adds ``value`` to the summary.
+        """
+        if value is None:
+            self.num_missing += 1
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if len(self.sample) < self.reservoir_size:
+            self.sample.append(value)
+        else:
+            idx = self.rng.randrange(self.count)
+            if idx < self.reservoir_size:
+                self.sample[idx] = value
+    append = add
+
+    def extend(self, values):
+        """
+        Adds each of ``values`` to the summary.
+        """
+        for value in values:
+            self.add(value)
+
+    def update(self, other):
+        """
+        Merges the summary of another stream of values, ``other``, into this
+        one.
+        """
+        self.num_missing += other.num_missing
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count = other.count
+            self.mean = other.mean
+            self.m2 = other.m2
+            self.min = other.min
+            self.max = other.max
+            self.sample = self._subsample(other.sample, self.reservoir_size)
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if (len(self.sample) + len(other.sample) <= self.reservoir_size
+                and len(self.sample) == self.count
+                and len(other.sample) == other.count):
+            # all values of both streams are in the samples
+            self.sample.extend(other.sample)
+        else:
+            # each stream contributes to the merged sample in proportion to
+            # its number of values
+            sample_size = min(self.reservoir_size, len(self.sample) + len(other.sample))
+            num_from_other = min(len(other.sample), int(round(sample_size * float(other.count) / count)))
+            num_from_self = min(len(self.sample), sample_size - num_from_other)
+            num_from_other = min(len(other.sample), sample_size - num_from_self)
+            self.sample = self._subsample(self.sample, num_from_self) \
+                    + self._subsample(other.sample, num_from_other)
+        self.count = count
+
+    def _subsample(self, sample, size):
+        if size >= len(sample):
+            return list(sample)
+        return self.rng.sample(sample, size)
+
+    def summarize(self):
+        """
+        Returns a summary of the values, with the same fields as that returned
+        by :func:`summarize`.
+        """
+        if self.num_missing:
+            raise TypeError("Missing values in data")
+        if self.count == 0:
+            raise ValueError("No values in data")
+        summary = {}
+        summary['range'] = (self.min, self.max)
+        summary['mean'] = self.mean
+        if self.count == 1:
+            summary['var'] = float('inf')
+        else:
+            summary['var'] = self.m2 / (self.count - 1)
+        try:
+            summary['sd'] = summary['var'] ** 0.5
+        except OverflowError:
+            summary['sd'] = None
+        try:
+            summary['median'] = median(self.sample)
+        except (ValueError, OverflowError):
+            summary['median'] = None
+        try:
+            summary['hpd95'] = empirical_hpd(self.sample, conf=0.95)
+        except (ValueError, OverflowError):
+            summary['hpd95'] = None
+        try:
+            summary['quant_5_95'] = quantile_5_95(self.sample)
+        except (ValueError, OverflowError):
+            summary['quant_5_95'] = None
+        return summary
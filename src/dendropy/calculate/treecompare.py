@@ -24,7 +24,9 @@ Statistics, metrics, measurements, and values calculated *between* *two* trees.
 import math
 import collections
 import itertools
+import operator
 from dendropy.utility import error
+from dendropy.utility import parallel
 
 ###############################################################################
 ## Public Functions
@@ -33,9 +35,20 @@ def symmetric_difference(tree1, tree2, is_bipartitions_updated=False):
     """
     Returns *unweighted* Robinson-Foulds distance between two trees.
 
-    Trees need to share the same |TaxonNamespace| reference. The
-    bipartition bitmasks of the trees must be correct for the current tree
-    structures (by calling :meth:`Tree.encode_bipartitions()` method) or the
+    Trees need to share the same |TaxonNamespace| reference. If both trees
+    have the same rooting state and the same set of taxa associated with
+    their leaves (and no taxa associated with their internal nodes), then the
+    distance is calculated from the tree structures in time linear in the
+    number of leaves, using the cluster table of Day (1985), without encoding
+    the bipartitions of the trees. Note that, unlike in earlier versions, the
+    trees are then left as they are: ``tree.bipartition_encoding`` is not set
+    (or updated), and the basal bifurcations of unrooted trees are not
+    collapsed, as they would be by :meth:`Tree.encode_bipartitions()`; call
+    this method explicitly if these side effects are needed. Otherwise, the
+    distance is calculated by comparing the bipartitions of the trees (see
+    :func:`false_positives_and_negatives`), in which case the bipartition
+    bitmasks of the trees must be correct for the current tree structures (by
+    calling :meth:`Tree.encode_bipartitions()` method) or the
     ``is_bipartitions_updated`` argument must be |False| to force recalculation
     of bipartitions.
 
@@ -82,6 +95,11 @@ def symmetric_difference(tree1, tree2, is_bipartitions_updated=False):
         print(treecompare.symmetric_difference(tree1, tree2))
 
     """
+    if tree1.taxon_namespace is not tree2.taxon_namespace:
+        raise error.TaxonNamespaceIdentityError(tree1, tree2)
+    d = _cluster_table_symmetric_difference(tree1, tree2)
+    if d is not None:
+        return d
     t = false_positives_and_negatives(
             tree1,
             tree2,
@@ -360,8 +378,13 @@ def find_missing_bipartitions(reference_tree, comparison_tree, is_bipartitions_u
 
 class TreeShapeKernel(object):
 
-    _TreeShapeKernelNodeCache = collections.namedtuple("_TreeShapeKernelNodeCache",
-            ["production", "index", "edge_lengths", "sum_of_square_edge_lengths"])
+    # The internal nodes of a tree in postorder, each represented by its
+    # production (one more than its number of leaf children), the postorder
+    # indexes of its children (-1 for leaves), the lengths of the edges
+    # subtending its children and the sum of their squares; and the indexes
+    # of the nodes of each production.
+    _TreeShapeKernelTreeTable = collections.namedtuple("_TreeShapeKernelTreeTable",
+            ["productions", "child_indexes", "edge_lengths", "sum_of_square_edge_lengths", "production_node_indexes"])
 
     def __init__(self, **kwargs):
         """
@@ -387,6 +410,21 @@ class TreeShapeKernel(object):
         application to HIV epidemiology. Molecular biology and evolution,
         msv123.
 
+        Parameters
+        ----------
+        sigma : float
+            The offset added to the kernel values of matched pairs of
+            children.
+        gauss_factor : float
+            The variance of the Gaussian radial basis function comparing the
+            edge lengths of matched nodes.
+        decay_factor : float
+            The factor penalizing large matched subtrees.
+        max_cache_size : int or None
+            The maximum number of trees for which pre-computed values are
+            cached; if more trees are seen, the values of the least recently
+            used trees are evicted from the cache. If |None| [default], the
+            cache is unbounded.
         """
 
         # kernel function
@@ -398,41 +436,109 @@ class TreeShapeKernel(object):
         self.decay_factor = kwargs.pop("decay_factor", 0.1)
 
         # cache management
-        self._tree_cache = {}
+        self.max_cache_size = kwargs.pop("max_cache_size", None)
+        self._tree_cache = collections.OrderedDict()
 
     def remove_from_cache(self, tree):
-        del self._tree_cache[tree]
+        self._tree_cache.pop(tree, None)
 
     def update_cache(self, tree):
         """
         Pre-computes values needed for the kernel trick with this tree and
         caches them.
         """
-        current_tree_cache = {}
-        for nd in tree.leaf_node_iter():
-            current_tree_cache[nd] = TreeShapeKernel._TreeShapeKernelNodeCache(
-                    production=0,
-                    index=0,
-                    edge_lengths=None,
-                    sum_of_square_edge_lengths=0)
-            nd.production = 0
+        productions = []
+        child_indexes = []
+        edge_lengths = []
+        sum_of_square_edge_lengths = []
+        production_node_indexes = {}
+        node_indexes = {}
         for nd_idx, nd in enumerate(tree.postorder_internal_node_iter()):
-            nterms = 0
-            edge_lengths = []
-            for ch in nd.child_node_iter():
-                if current_tree_cache[ch].production == 0:
-                    nterms += 1
-                edge_lengths.append(ch.edge.length)
-            production = nterms + 1
-            index = nd_idx
-            sum_of_square_edge_lengths = sum([elen**2 for elen in edge_lengths])
-            current_tree_cache[nd] = TreeShapeKernel._TreeShapeKernelNodeCache(
-                    production=production,
-                    index=index,
-                    edge_lengths=edge_lengths,
-                    sum_of_square_edge_lengths=sum_of_square_edge_lengths)
-        self._tree_cache[tree] = current_tree_cache
-        return current_tree_cache
+            node_indexes[nd] = nd_idx
+            nd_child_indexes = tuple(node_indexes.get(ch, -1) for ch in nd._child_nodes)
+            nd_edge_lengths = tuple(ch.edge.length for ch in nd._child_nodes)
+            production = nd_child_indexes.count(-1) + 1
+            productions.append(production)
+            child_indexes.append(nd_child_indexes)
+            edge_lengths.append(nd_edge_lengths)
+            sum_of_square_edge_lengths.append(sum([elen**2 for elen in nd_edge_lengths]))
+            production_node_indexes.setdefault(production, []).append(nd_idx)
+        tree_table = TreeShapeKernel._TreeShapeKernelTreeTable(
+                productions=tuple(productions),
+                child_indexes=tuple(child_indexes),
+                edge_lengths=tuple(edge_lengths),
+                sum_of_square_edge_lengths=tuple(sum_of_square_edge_lengths),
+                production_node_indexes=production_node_indexes)
+        self._tree_cache[tree] = tree_table
+        self._tree_cache.move_to_end(tree)
+        if self.max_cache_size is not None:
+            while len(self._tree_cache) > self.max_cache_size:
+                self._tree_cache.popitem(last=False)
+        return tree_table
+
+    def _get_tree_table(self, tree, is_cache_updated):
+        if is_cache_updated:
+            try:
+                tree_table = self._tree_cache[tree]
+            except KeyError:
+                pass
+            else:
+                self._tree_cache.move_to_end(tree)
+                return tree_table
+        return self.update_cache(tree)
+
+    def gram_matrix(self,
+            trees,
+            is_cache_updated=False,
+            num_processes=None):
+        """
+        Returns the values of the kernel for all pairs of trees in ``trees``.
+
+        The values needed for the kernel trick are computed (or looked up in
+        the cache) once for each tree, after which the kernel values of the
+        pairs are calculated from these alone; as the kernel is symmetric,
+        only one of each pair of trees is calculated.
+
+        Parameters
+        ----------
+        trees : iterable of |Tree| instances
+            The trees to be compared.
+        is_cache_updated : bool
+            If |True|, then the cached values of trees that have already been
+            seen by self are used. Otherwise [default], the values are
+            re-computed for all trees.
+        num_processes : int or None
+            If greater than 1, then the rows of the matrix are calculated in
+            tiles of rows distributed over a pool of this number of
+            processes. Otherwise [default] all rows are calculated in this
+            process.
+
+        Returns
+        -------
+        k : list[list[float]]
+            A square matrix, as a list of lists, with the value of the kernel
+            for the ``i``-th and ``j``-th trees of ``trees`` as its ``(i, j)``
+            element.
+        """
+        tree_tables = [self._get_tree_table(tree, is_cache_updated) for tree in trees]
+        num_trees = len(tree_tables)
+        tiles = []
+        for start in range(0, num_trees, _TREE_SHAPE_KERNEL_TILE_SIZE):
+            tiles.append((start, min(start + _TREE_SHAPE_KERNEL_TILE_SIZE, num_trees)))
+        tile_rows = parallel.map_tiles(
+                _calculate_tree_shape_kernel_tile,
+                tiles,
+                shared_args=(tree_tables, self.sigma, self.gauss_factor, self.decay_factor),
+                num_processes=num_processes)
+        gram_matrix = [[0.0] * num_trees for idx in range(num_trees)]
+        idx1 = 0
+        for rows in tile_rows:
+            for row in rows:
+                gram_matrix[idx1][idx1:] = row
+                for idx2, k in enumerate(row[1:], idx1 + 1):
+                    gram_matrix[idx2][idx1] = k
+                idx1 += 1
+        return gram_matrix
 
     def __call__(self,
             tree1,
@@ -488,52 +594,14 @@ class TreeShapeKernel(object):
         11th Conference of the European Chapter of the Association
         for Computational Linguistics.
         """
-        internal_nodes2 = list(tree2.postorder_internal_node_iter())
-        k = 0
-        if not is_tree1_cache_updated:
-            tree1_cache = self.update_cache(tree1)
-        else:
-            try:
-                tree1_cache = self._tree_cache[tree1]
-            except KeyError:
-                tree1_cache = self.update_cache(tree1)
-        if not is_tree2_cache_updated:
-            tree2_cache = self.update_cache(tree2)
-        else:
-            try:
-                tree2_cache = self._tree_cache[tree2]
-            except KeyError:
-                tree2_cache = self.update_cache(tree2)
-        dp_matrix = {}
-        for ni, tree1_node in enumerate(tree1.postorder_internal_node_iter()):
-            tree1_cache_node = tree1_cache[tree1_node]
-            for tree2_node in internal_nodes2:
-                tree2_cache_node = tree2_cache[tree2_node]
-                if tree1_cache_node.production != tree2_cache_node.production:
-                    continue
-                res = self.decay_factor * math.exp( -1. / self.gauss_factor
-                    * (tree1_cache_node.sum_of_square_edge_lengths + tree2_cache_node.sum_of_square_edge_lengths - 2*sum([(tree1_cache_node.edge_lengths[i]*tree2_cache_node.edge_lengths[i]) for i in range(len(tree1_cache_node.edge_lengths))])))
-                ## TODO:
-                ##  - (check and) handles cases where unequal number of children
-                ##  - how to handle rotation mismatch problems? or do we assume
-                ##    trees have equal rotations
-                # for node_idx in range(2):
-                #     c1 = tree1_node.clades[node_idx]
-                #     c2 = tree2_node.clades[node_idx]
-                for c1, c2 in zip(tree1_node.child_node_iter(), tree2_node.child_node_iter()):
-                    if tree1_cache[c1].production != tree2_cache[c2].production:
-                        continue
-                    if tree1_cache[c1].production == 0:
-                        # branches are terminal
-                        res *= self.sigma + self.decay_factor
-                    else:
-                        try:
-                            res *= self.sigma + dp_matrix[(tree1_cache[c1].index, tree2_cache[c2].index)]
-                        except KeyError:
-                            res *= self.sigma
-                dp_matrix[(tree1_cache[tree1_node].index, tree2_cache[tree2_node].index)] = res
-                k += res
-        return k
+        tree1_table = self._get_tree_table(tree1, is_tree1_cache_updated)
+        tree2_table = self._get_tree_table(tree2, is_tree2_cache_updated)
+        return _calculate_tree_shape_kernel(
+                tree1_table,
+                tree2_table,
+                self.sigma,
+                self.gauss_factor,
+                self.decay_factor)
 
 ##############################################################################
 ### AssemblageInducedTree
@@ -733,6 +801,194 @@ def mason_gamer_kellogg_score(tree1, tree2, is_bipartitions_updated=False):
 ###############################################################################
 ## Supporting
 
+def _calculate_tree_shape_kernel(tree1_table, tree2_table, sigma, gauss_factor, decay_factor):
+    # Returns the value of the tree shape kernel for two trees, given their
+    # ``TreeShapeKernel._TreeShapeKernelTreeTable`` tables. The kernel values
+    # of the matched pairs of nodes are memoized in a dictionary for each
+    # node of the first tree, keyed by the index of the node of the second
+    # tree: as the nodes are in postorder, the values of the children of a
+    # pair are always calculated before that of the pair itself.
+    child_indexes2 = tree2_table.child_indexes
+    edge_lengths2 = tree2_table.edge_lengths
+    sum_of_square_edge_lengths2 = tree2_table.sum_of_square_edge_lengths
+    production_node_indexes2 = tree2_table.production_node_indexes
+    leaf_factor = sigma + decay_factor
+    exp_factor = -1. / gauss_factor
+    dp_rows = []
+    k = 0
+    for production1, child_indexes1, edge_lengths1, sum_of_square_edge_lengths1 in zip(
+            tree1_table.productions,
+            tree1_table.child_indexes,
+            tree1_table.edge_lengths,
+            tree1_table.sum_of_square_edge_lengths):
+        dp_row = {}
+        dp_rows.append(dp_row)
+        node_indexes2 = production_node_indexes2.get(production1, None)
+        if node_indexes2 is None:
+            continue
+        # children that are leaves are matched by leaves; other children by
+        # nodes with the same production, for which values are memoized
+        child_dp_rows1 = [None if ch_idx < 0 else dp_rows[ch_idx] for ch_idx in child_indexes1]
+        for nd_idx2 in node_indexes2:
+            res = decay_factor * math.exp(exp_factor
+                    * (sum_of_square_edge_lengths1 + sum_of_square_edge_lengths2[nd_idx2]
+                        - 2*sum(map(operator.mul, edge_lengths1, edge_lengths2[nd_idx2]))))
+            ## TODO:
+            ##  - (check and) handles cases where unequal number of children
+            ##  - how to handle rotation mismatch problems? or do we assume
+            ##    trees have equal rotations
+            for child_dp_row1, ch_idx2 in zip(child_dp_rows1, child_indexes2[nd_idx2]):
+                if child_dp_row1 is None:
+                    if ch_idx2 < 0:
+                        # branches are terminal
+                        res *= leaf_factor
+                elif ch_idx2 >= 0:
+                    child_res = child_dp_row1.get(ch_idx2, None)
+                    if child_res is not None:
+                        res *= sigma + child_res
+            dp_row[nd_idx2] = res
+            k += res
+    return k
+
+_TREE_SHAPE_KERNEL_TILE_SIZE = 16
+
+def _calculate_tree_shape_kernel_tile(tile, tree_tables, sigma, gauss_factor, decay_factor):
+    # Returns, for each tree in a tile of trees given by a range of indexes,
+    # the list of kernel values for the tree and each tree from it onwards.
+    start, stop = tile
+    rows = []
+    for idx in range(start, stop):
+        tree1_table = tree_tables[idx]
+        rows.append([_calculate_tree_shape_kernel(tree1_table, tree2_table, sigma, gauss_factor, decay_factor)
+            for tree2_table in itertools.islice(tree_tables, idx, None)])
+    return rows
+
+def _cluster_table_symmetric_difference(tree1, tree2):
+    """
+    Returns the symmetric difference between the bipartitions of two trees
+    using Day's (1985) algorithm, or |None| if the trees differ in rooting
+    state or in the taxa associated with their leaves, or have taxa
+    associated with internal nodes.
+
+    The leaves of ``tree1`` are numbered in postorder, so that the cluster
+    of leaves subtended by each node of ``tree1`` is an interval of leaf
+    numbers, stored in a table of intervals. A cluster of ``tree2`` is then
+    found in ``tree1`` if it is an interval (i.e., its size is the
+    difference between its smallest and largest leaf numbers, plus one) in
+    the table. The bipartitions of unrooted trees are the clusters of the
+    trees oriented away from the leaf of a common taxon. Trivial bipartitions
+    (those separating a single leaf from the rest of the tree, or the tree
+    from nothing), which are shared by both trees, are not counted.
+    """
+    is_rooted = bool(tree1.is_rooted)
+    if bool(tree2.is_rooted) != is_rooted:
+        return None
+    if is_rooted:
+        outgroup_taxon = None
+    else:
+        outgroup_taxon = next(tree1.leaf_node_iter()).taxon
+        if outgroup_taxon is None:
+            return None
+    postorder_entries1 = _get_postorder_cluster_entries(tree1, outgroup_taxon)
+    if postorder_entries1 is None:
+        return None
+    postorder_entries2 = _get_postorder_cluster_entries(tree2, outgroup_taxon)
+    if postorder_entries2 is None:
+        return None
+    child_counts1, taxa1 = postorder_entries1
+    child_counts2, taxa2 = postorder_entries2
+    num_leaves = len(taxa1)
+    taxon_leaf_numbers = dict(zip(taxa1, range(num_leaves)))
+    if (len(taxon_leaf_numbers) != num_leaves
+            or len(taxa2) != num_leaves
+            or taxon_leaf_numbers.keys() != set(taxa2)):
+        return None
+    clusters1 = _get_nontrivial_clusters(child_counts1, range(num_leaves), num_leaves)
+    clusters2 = _get_nontrivial_clusters(
+            child_counts2,
+            map(taxon_leaf_numbers.__getitem__, taxa2),
+            num_leaves)
+    cluster_table = set(min_number * num_leaves + max_number for min_number, max_number, count in clusters1)
+    num_shared_clusters = 0
+    for min_number, max_number, count in clusters2:
+        if (count == max_number - min_number + 1
+                and (min_number * num_leaves + max_number) in cluster_table):
+            num_shared_clusters += 1
+    return len(clusters1) + len(clusters2) - 2 * num_shared_clusters
+
+def _get_postorder_cluster_entries(tree, outgroup_taxon=None):
+    # Returns the number of children of each node of ``tree`` in postorder,
+    # with -1 for leaves, and the taxa of the leaves in postorder. If
+    # ``outgroup_taxon`` is given, then the tree is traversed as if rooted at
+    # the leaf of this taxon, which is itself skipped. Returns |None| if an
+    # internal node has a taxon, a leaf has no taxon, or there is no leaf
+    # of ``outgroup_taxon``.
+    if outgroup_taxon is None:
+        start_node = tree.seed_node
+        from_node = None
+    else:
+        for nd in tree.leaf_node_iter():
+            if nd.taxon is outgroup_taxon:
+                break
+        else:
+            return None
+        if nd._parent_node is None:
+            return None
+        start_node = nd._parent_node
+        from_node = nd
+    child_counts = []
+    taxa = []
+    to_visit = [(start_node, from_node, None)]
+    while to_visit:
+        nd, from_node, num_children = to_visit.pop()
+        if num_children is not None:
+            child_counts.append(num_children)
+            continue
+        neighbors = [ch for ch in nd._child_nodes if ch is not from_node]
+        parent_node = nd._parent_node
+        if parent_node is not None and parent_node is not from_node:
+            neighbors.append(parent_node)
+        if nd.taxon is not None:
+            if nd._child_nodes:
+                return None
+            child_counts.append(-1)
+            taxa.append(nd.taxon)
+        elif not nd._child_nodes:
+            return None
+        else:
+            # (the seed node has no neighbors left if the tree is traversed
+            # from its only child, and then subtends an empty cluster)
+            to_visit.append((nd, from_node, len(neighbors)))
+            to_visit.extend((ch, nd, None) for ch in reversed(neighbors))
+    return child_counts, taxa
+
+def _get_nontrivial_clusters(child_counts, leaf_numbers, num_leaves):
+    # Returns the smallest and largest leaf numbers and the number of leaves
+    # of the clusters of more than one but fewer than ``num_leaves`` leaves
+    # subtended by the nodes given in postorder by ``child_counts`` (as
+    # returned by ``_get_postorder_cluster_entries()``), with each distinct
+    # cluster listed only once.
+    leaf_numbers = iter(leaf_numbers)
+    empty_cluster = (num_leaves, -1, 0)
+    node_clusters = []
+    nontrivial_clusters = []
+    for num_children in child_counts:
+        if num_children < 0:
+            leaf_number = next(leaf_numbers)
+            node_clusters.append((leaf_number, leaf_number, 1))
+        elif num_children == 0:
+            node_clusters.append(empty_cluster)
+        elif num_children > 1:
+            # nodes with a single child subtend the same cluster as the child
+            min_numbers, max_numbers, counts = zip(*node_clusters[-num_children:])
+            del node_clusters[-num_children:]
+            cluster = (min(min_numbers), max(max_numbers), sum(counts))
+            node_clusters.append(cluster)
+            if (1 < cluster[2] < num_leaves
+                    and num_children - counts.count(0) > 1):
+                nontrivial_clusters.append(cluster)
+    return nontrivial_clusters
+
 def _get_length_diffs(
         tree1,
         tree2,
@@ -23,6 +23,7 @@ Statistics, metrics, measurements, and values calculated on (single) trees.
 
 import math
 from dendropy.calculate import phylogeneticdistance
+from dendropy.datamodel import treemodel
 from dendropy.utility import deprecate
 
 EULERS_CONSTANT = 0.5772156649015328606065120900824024310421
@@ -43,7 +44,12 @@ def patristic_distance(tree, taxon1, taxon2, is_bipartitions_updated=False):
     Given a tree with bipartitions encoded, and two taxa on that tree, returns the
     patristic distance between the two. Much more inefficient than constructing
     a PhylogeneticDistanceMatrix object.
+
+    ``tree`` may also be a |FlatTree|, in which case
+    ``is_bipartitions_updated`` is ignored.
     """
+    if isinstance(tree, treemodel.FlatTree):
+        return _flat_tree_patristic_distance(tree, taxon1, taxon2)
     mrca = tree.mrca(taxa=[taxon1, taxon2], is_bipartitions_updated=is_bipartitions_updated)
     dist = 0
     n = tree.find_node(lambda x: x.taxon == taxon1)
@@ -67,6 +73,8 @@ def B1(tree):
     number of nodes between each interior node and tip over all internal
     nodes excluding root.
     """
+    if isinstance(tree, treemodel.FlatTree):
+        return _flat_tree_B1(tree)
     b1 = 0.0
     nd_mi = {}
     for nd in tree.postorder_node_iter():
@@ -100,6 +108,9 @@ def colless_tree_imbalance(tree, normalize="max"):
             no normalization
 
     """
+    if isinstance(tree, treemodel.FlatTree):
+        colless, num_leaves = _flat_tree_colless(tree)
+        return _normalize_colless(colless, num_leaves, normalize)
     colless = 0.0
     num_leaves = 0
     subtree_leaves = {}
@@ -115,6 +126,9 @@ def colless_tree_imbalance(tree, normalize="max"):
             right = subtree_leaves[nd._child_nodes[1]]
             colless += abs(right-left)
             subtree_leaves[nd] = right + left
+    return _normalize_colless(colless, num_leaves, normalize)
+
+def _normalize_colless(colless, num_leaves, normalize):
     if normalize == "yule":
         colless = float(colless - (num_leaves * math.log(num_leaves)) - (num_leaves * (EULERS_CONSTANT - 1.0 - math.log(2))))/num_leaves
     elif normalize == "pda":
@@ -155,15 +169,25 @@ def pybus_harvey_gamma(tree, prec=0.00001):
     node = None
     speciation_ages = []
     n = 0
-    if tree.seed_node.age is None:
-        tree.calc_node_ages(ultrametricity_precision=prec)
-    for node in tree.postorder_node_iter():
-        if len(node.child_nodes()) == 2:
-            speciation_ages.append(node.age)
-        else:
-            n += 1
-    if node is None:
-        raise ValueError("Empty tree encountered")
+    if isinstance(tree, treemodel.FlatTree):
+        if len(tree) == 0:
+            raise ValueError("Empty tree encountered")
+        ages = tree.node_ages(ultrametricity_precision=prec)
+        for idx in tree.preorder_indexes():
+            if len(tree.child_indexes(idx)) == 2:
+                speciation_ages.append(ages[idx])
+            else:
+                n += 1
+    else:
+        if tree.seed_node.age is None:
+            tree.calc_node_ages(ultrametricity_precision=prec)
+        for node in tree.postorder_node_iter():
+            if len(node.child_nodes()) == 2:
+                speciation_ages.append(node.age)
+            else:
+                n += 1
+        if node is None:
+            raise ValueError("Empty tree encountered")
     speciation_ages.sort(reverse=True)
     g = []
     older = speciation_ages[0]
@@ -192,6 +216,9 @@ def N_bar(tree):
     Returns the $\bar{N}$ statistic: the average number of nodes above a
     terminal node.
     """
+    if isinstance(tree, treemodel.FlatTree):
+        leaf_count, nbar = _flat_tree_leaf_depths(tree)
+        return float(nbar) / leaf_count
     leaf_count = 0
     nbar = 0
     for leaf_node in tree.leaf_node_iter():
@@ -218,12 +245,15 @@ def sackin_index(tree, normalize=True):
             no normalization
 
     """
-    leaf_count = 0
-    num_anc = 0
-    for leaf_node in tree.leaf_node_iter():
-        leaf_count += 1
-        for parent in leaf_node.ancestor_iter(inclusive=False):
-            num_anc += 1
+    if isinstance(tree, treemodel.FlatTree):
+        leaf_count, num_anc = _flat_tree_leaf_depths(tree)
+    else:
+        leaf_count = 0
+        num_anc = 0
+        for leaf_node in tree.leaf_node_iter():
+            leaf_count += 1
+            for parent in leaf_node.ancestor_iter(inclusive=False):
+                num_anc += 1
     if normalize == "yule":
         x = sum(1.0/j for j in range(2, leaf_count+1))
         s = float(num_anc - (2 * leaf_count * x))/leaf_count
@@ -244,6 +274,15 @@ def treeness(tree):
     """
     internal = 0.0
     external = 0.0
+    if isinstance(tree, treemodel.FlatTree):
+        first_child_indexes = tree.first_child_indexes
+        edge_lengths = tree.edge_lengths
+        for idx in range(1, len(tree)):
+            if first_child_indexes[idx] < 0:
+                external += edge_lengths[idx]
+            else:
+                internal += edge_lengths[idx]
+        return internal/(external + internal)
     for nd in tree.postorder_node_iter():
         if not nd._parent_node:
             continue
@@ -253,3 +292,60 @@ def treeness(tree):
             internal += nd.edge.length
     return internal/(external + internal)
 
+###########################################################################
+### Support for FlatTree
+
+def _flat_tree_patristic_distance(tree, taxon1, taxon2):
+    idx1 = tree.taxon_node_index(taxon1)
+    idx2 = tree.taxon_node_index(taxon2)
+    mrca = tree.mrca(node_indexes=[idx1, idx2])
+    parent_indexes = tree.parent_indexes
+    edge_lengths = tree.edge_lengths
+    dist = 0
+    for idx in (idx1, idx2):
+        while idx != mrca:
+            if edge_lengths[idx] == edge_lengths[idx]:
+                dist += edge_lengths[idx]
+            idx = parent_indexes[idx]
+    return dist
+
+def _flat_tree_B1(tree):
+    parent_indexes = tree.parent_indexes
+    first_child_indexes = tree.first_child_indexes
+    b1 = 0.0
+    nd_mi = [0] * len(parent_indexes)
+    for idx in range(len(parent_indexes) - 1, 0, -1):
+        mi = nd_mi[idx]
+        if first_child_indexes[idx] >= 0:
+            b1 += 1.0/mi
+        parent_idx = parent_indexes[idx]
+        if mi + 1 > nd_mi[parent_idx]:
+            nd_mi[parent_idx] = mi + 1
+    return b1
+
+def _flat_tree_colless(tree):
+    first_child_indexes = tree.first_child_indexes
+    next_sibling_indexes = tree.next_sibling_indexes
+    subtree_leaves = tree.node_leaf_counts()
+    colless = 0.0
+    num_leaves = 0
+    for idx, left_idx in enumerate(first_child_indexes):
+        if left_idx < 0:
+            num_leaves += 1
+            continue
+        right_idx = next_sibling_indexes[left_idx]
+        if right_idx < 0 or next_sibling_indexes[right_idx] >= 0:
+            raise TypeError("Colless' tree imbalance statistic requires strictly bifurcating trees")
+        colless += abs(subtree_leaves[right_idx] - subtree_leaves[left_idx])
+    return colless, num_leaves
+
+def _flat_tree_leaf_depths(tree):
+    first_child_indexes = tree.first_child_indexes
+    depths = tree.node_depths()
+    leaf_count = 0
+    total_depth = 0
+    for idx, first_child_idx in enumerate(first_child_indexes):
+        if first_child_idx < 0:
+            leaf_count += 1
+            total_depth += depths[idx]
+    return leaf_count, total_depth
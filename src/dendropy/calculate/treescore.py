@@ -22,6 +22,7 @@ Statistics, metrics, measurements, and values calculated on a tree with
 reference to external data of some kind under various criteria.
 """
 
+from dendropy.model.parsimony import FitchParsimonyScorer
 from dendropy.model.parsimony import fitch_down_pass
 from dendropy.model.parsimony import fitch_up_pass
 from dendropy.model.parsimony import parsimony_score
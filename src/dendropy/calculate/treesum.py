@@ -25,6 +25,21 @@ import copy
 import collections
 import dendropy
 from dendropy.calculate.statistics import mean_and_sample_variance
+from dendropy.calculate.statistics import StreamingSummary
+
+def _mean(values):
+    return float(sum(values))/len(values)
+
+def _summarize_values(summarization_fn, values):
+    # values summarized in a ``SplitDistribution`` with a
+    # ``summary_reservoir_size`` are given by a ``StreamingSummary``: the mean
+    # is exact, while other summarization functions are applied to the sample
+    # of the values it holds
+    if isinstance(values, StreamingSummary):
+        if summarization_fn is _mean:
+            return values.mean
+        return summarization_fn(values.sample)
+    return summarization_fn(values)
 
 ##############################################################################
 ## TreeSummarizer
@@ -241,7 +256,7 @@ class TreeSummarizer(object):
         If ``allow_negative_edges`` is True, then no error will be raised if edges have negative lengths.
         """
         if summarization_fn is None:
-            summarization_fn = lambda x: float(sum(x))/len(x)
+            summarization_fn = _mean
         if is_bipartitions_updated:
             tree.encode_splits()
         #'height',
@@ -257,7 +272,7 @@ class TreeSummarizer(object):
             nd = edge.head_node
             if split in split_distribution.split_node_ages:
                 ages = split_distribution.split_node_ages[split]
-                nd.age = summarization_fn(ages)
+                nd.age = _summarize_values(summarization_fn, ages)
             elif nd.parent_node is not None:
                 # default to age of parent if split not found
                 nd.age = nd.parent_node.age
@@ -286,7 +301,7 @@ class TreeSummarizer(object):
         defaults to calculating the mean (``lambda x: float(sum(x))/len(x)``).
         """
         if summarization_fn is None:
-            summarization_fn = lambda x: float(sum(x))/len(x)
+            summarization_fn = _mean
         if not is_bipartitions_updated:
             tree.encode_bipartitions()
         for edge in tree.postorder_edge_iter():
@@ -294,7 +309,7 @@ class TreeSummarizer(object):
             if (split in split_distribution.split_edge_lengths
                     and split_distribution.split_edge_lengths[split]):
                 lengths = split_distribution.split_edge_lengths[split]
-                edge.length = summarization_fn(lengths)
+                edge.length = _summarize_values(summarization_fn, lengths)
             elif (split in split_distribution.split_edge_lengths
                     and not split_distribution.split_edge_lengths[split]):
                 # no input trees had any edge lengths for this split
@@ -51,6 +51,11 @@ _IO_SERVICE_REGISTRY["proteinfasta"] = _IOServices(fastareader.ProteinFastaReade
 _IO_SERVICE_REGISTRY["phylip"] = _IOServices(phylipreader.PhylipReader, phylipwriter.PhylipWriter, None)
 _IO_SERVICE_REGISTRY["multiphylip"] = _IOServices(multiphylipreader.MultiPhylipReader, None, None)
 
+_SPLIT_ENCODING_YIELDER_REGISTRY = container.CaseInsensitiveDict()
+_SPLIT_ENCODING_YIELDER_REGISTRY["newick"] = newickyielder.NewickSplitEncodingYielder
+_SPLIT_ENCODING_YIELDER_REGISTRY["nexus"] = nexusyielder.NexusSplitEncodingYielder
+_SPLIT_ENCODING_YIELDER_REGISTRY["nexus/newick"] = nexusyielder.NexusNewickSplitEncodingYielder
+
 def get_reader(schema, **kwargs):
     try:
         reader_type =_IO_SERVICE_REGISTRY[schema].reader
@@ -92,6 +97,30 @@ def get_tree_yielder(
     except KeyError:
         raise NotImplementedError("'{}' is not a supported data yielding schema".format(schema))
 
+# schemas for which tree yielders can use a `treeindex.TreeIndex`
+_TREE_INDEX_SCHEMAS = frozenset(["newick", "nexus", "nexus/newick"])
+
+def is_tree_index_supported(schema):
+    return schema is not None and schema.lower() in _TREE_INDEX_SCHEMAS
+
+def is_split_encoding_yielder_supported(schema):
+    return schema in _SPLIT_ENCODING_YIELDER_REGISTRY
+
+def get_split_encoding_yielder(
+        files,
+        schema,
+        taxon_namespace,
+        **kwargs):
+    try:
+        yielder_type = _SPLIT_ENCODING_YIELDER_REGISTRY[schema]
+    except KeyError:
+        raise NotImplementedError("'{}' is not a supported split encoding yielding schema".format(schema))
+    yielder = yielder_type(
+            files=files,
+            taxon_namespace=taxon_namespace,
+            **kwargs)
+    return yielder
+
 def register_service(schema, reader=None, writer=None, tree_yielder=None):
     global _IO_SERVICE_REGISTRY
     _IO_SERVICE_REGISTRY[schema] = _IOServices(reader, writer, tree_yielder)
@@ -18,6 +18,7 @@
 ##############################################################################
 
 import collections
+from dendropy.dataio import treeindex
 from dendropy.datamodel import taxonmodel
 from dendropy.utility import deprecate
 from dendropy.utility import textprocessing
@@ -533,6 +534,7 @@ class DataYielder(IOService):
         self._current_file_index = None
         self._current_file = None
         self._current_file_name = None
+        self._current_file_path = None
 
     def reset(self):
         self.current_file_index = None
@@ -561,11 +563,14 @@ class DataYielder(IOService):
         if textprocessing.is_str_type(current_file):
             self._current_file = open(current_file, "r")
             self._current_file_name = current_file
+            self._current_file_path = current_file
         elif _is_pathlib_path(current_file):
             self._current_file = current_file.open()
             self._current_file_name = current_file
+            self._current_file_path = current_file
         else:
             self._current_file = current_file
+            self._current_file_path = None
             try:
                 self._current_file_name = self.current_file.name
             except AttributeError:
@@ -588,14 +593,103 @@ class TreeDataYielder(DataYielder):
     def __init__(self,
             files=None,
             taxon_namespace=None,
-            tree_type=None):
+            tree_type=None,
+            tree_offset=0,
+            max_trees=None,
+            use_tree_index=False,
+            tree_index_dir=None):
+        """
+        Parameters
+        ----------
+        files : iterable of sources
+            Iterable of sources, which can either be strings specifying file
+            paths or file-like objects open for reading.
+        taxon_namespace : |TaxonNamespace| instance
+            The operational taxonomic unit concept namespace to use to manage
+            taxon definitions.
+        tree_type : type
+            The class of the tree objects to be instantiated.
+        tree_offset : integer
+            Number of trees to skip at the beginning of each source (e.g.,
+            the burn-in of an MCMC sample).
+        max_trees : integer or |None|
+            If not |None|, then no more than this number of trees will be
+            yielded from each source.
+        use_tree_index : bool
+            If |True|, then sources that are given as paths and whose schema
+            supports it will be skipped over by seeking to the beginning of the
+            first tree to be yielded, using a `treeindex.TreeIndex` (loaded
+            from, or saved to, a sidecar file) rather than by parsing and
+            discarding the preceding trees. As the skipped trees of NEWICK
+            sources are then not parsed, taxa that only occur in them are not
+            added to the taxon namespace, and the order of the taxa in the
+            namespace may differ from that obtained without the index (the
+            NEXUS taxa blocks and translate statements are still read).
+        tree_index_dir : str or |None|
+            If not |None|, then the tree indexes used (see ``use_tree_index``)
+            are loaded from, or saved to, files in this directory instead of
+            sidecar files next to the sources.
+        """
         DataYielder.__init__(self, files=files)
         self.taxon_namespace = taxon_namespace
         assert self.taxon_namespace is not None
         self.attached_taxon_namespace = self.taxon_namespace
         self.tree_type = tree_type
+        self.tree_offset = tree_offset if tree_offset else 0
+        self.max_trees = max_trees
+        self.use_tree_index = use_tree_index
+        self.tree_index_dir = tree_index_dir
+        self._num_trees_to_skip = 0
 
     def tree_factory(self):
         return self.tree_type(taxon_namespace=self.taxon_namespace)
 
+    def iterate_over_file(self, current_file):
+        self._num_trees_to_skip = self.tree_offset
+        if self.max_trees is not None and self.max_trees <= 0:
+            return
+        items = DataYielder.iterate_over_file(self, current_file)
+        num_trees_yielded = 0
+        try:
+            for item in items:
+                # derived classes that can seek past trees will have already
+                # decremented the count of trees to skip accordingly
+                if self._num_trees_to_skip > 0:
+                    self._num_trees_to_skip -= 1
+                    continue
+                yield item
+                num_trees_yielded += 1
+                if self.max_trees is not None and num_trees_yielded >= self.max_trees:
+                    break
+        finally:
+            items.close()
+
+    def _get_tree_index(self):
+        """
+        Returns the `treeindex.TreeIndex` for the current source if one has
+        been requested and there are trees to skip over, or |None| otherwise.
+        """
+        if (not self.use_tree_index
+                or self._num_trees_to_skip <= 0
+                or self._current_file_path is None):
+            return None
+        return treeindex.get_tree_index(self._current_file_path,
+                index_dir=self.tree_index_dir)
+
+    def _seek_past_indexed_newick_trees(self, tokenizer, tree_index):
+        """
+        Positions ``tokenizer`` at the beginning of the first tree statement
+        that is not to be skipped, given a `treeindex.TreeIndex` for a NEWICK
+        source. Returns |False| if all the trees in the source are to be
+        skipped, and |True| otherwise.
+        """
+        if tree_index is None or tree_index.schema != "newick":
+            return True
+        num_trees = min(self._num_trees_to_skip, len(tree_index))
+        self._num_trees_to_skip -= num_trees
+        if num_trees == len(tree_index):
+            return False
+        tokenizer.seek(*tree_index.tree_location(num_trees))
+        return True
+
 
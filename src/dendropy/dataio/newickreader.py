@@ -22,6 +22,7 @@ Parsing of NEWICK-format tree from a stream.
 """
 
 from io import StringIO
+import collections
 import itertools as it
 from dendropy.utility import error
 from dendropy.utility import deprecate
@@ -29,6 +30,23 @@ from dendropy.dataio import tokenizer
 from dendropy.dataio import nexusprocessing
 from dendropy.dataio import ioservice
 
+##############################################################################
+## SplitEncodedTree
+
+SplitEncodedTree = collections.namedtuple(
+        "SplitEncodedTree",
+        ["split_bitmasks", "edge_lengths", "leafset_bitmask", "weight", "is_rooted"]
+        )
+SplitEncodedTree.__doc__ = """\
+Minimal structural representation of a tree, as yielded by the
+split-encoding tree yielders and accepted by :meth:`TreeArray.add_tree`.
+
+The split bitmasks and edge lengths are given in the same order, and have the
+same values, as the splits and edge lengths of the corresponding |Tree| after
+:meth:`Tree.encode_bipartitions` has been called on it (with default
+arguments). The weight is |None| unless tree weights are being stored.
+"""
+
 ##############################################################################
 ## NewickReader
 
@@ -395,6 +413,330 @@ class NewickReader(ioservice.DataReader):
             current_token = nexus_tokenizer.next_token()
         return tree
 
+    def _parse_tree_statement_split_encoding(self,
+            nexus_tokenizer,
+            taxon_symbol_map_fn,
+            taxon_namespace):
+        """
+        Parses a single tree statement from a token stream and returns a
+        |SplitEncodedTree| representing it, without constructing any |Tree|,
+        |Node|, |Edge| or |Bipartition| objects. Expectations with respect
+        to the token stream are the same as for ``_parse_tree_statement()``.
+        Returns |None| if there are no more tree statements in the stream.
+
+        The splits and edge lengths are those that would be obtained by
+        calling ``encode_bipartitions()`` (with default arguments) on the tree
+        constructed by ``_parse_tree_statement()``: i.e., with unifurcations
+        suppressed and, if the tree is not rooted, a basal bifurcation
+        collapsed. Comments within the tree statement are ignored, except for
+        those specifying the rooting state or (if ``store_tree_weights`` is
+        |True|) the weight of the tree.
+        """
+        current_token = nexus_tokenizer.current_token
+        tree_comments = nexus_tokenizer.pull_captured_comments()
+        while (current_token == ";" or current_token is None) and not nexus_tokenizer.is_eof():
+            current_token = nexus_tokenizer.require_next_token()
+            tree_comments = nexus_tokenizer.pull_captured_comments()
+        if nexus_tokenizer.is_eof():
+            return None
+        is_rooted = None
+        weight = None
+        if tree_comments:
+            for comment in tree_comments:
+                stripped_comment = comment.strip()
+                if stripped_comment in ["&u", "&U", "&r", "&R"]:
+                    is_rooted = self._parse_tree_rooting_state(stripped_comment)
+                elif (self.store_tree_weights
+                        and (stripped_comment.startswith("&W ") or stripped_comment.startswith("&w "))
+                        ):
+                    weight = self._parse_tree_weight_comment(stripped_comment, nexus_tokenizer)
+        if is_rooted is None:
+            is_rooted = self._parse_tree_rooting_state("")
+        if self.store_tree_weights and weight is None:
+            weight = self.default_tree_weight
+
+        # Nodes are "finished" in postorder; each finished node that would
+        # not be suppressed as a unifurcation contributes one leafset bitmask
+        # and one edge length entry. Node information that might be modified
+        # by collapsing an unrooted basal bifurcation (i.e., the edge lengths
+        # of the children of the seed node) is held back until the seed node
+        # is finished.
+        leafsets = []
+        edge_lengths = []
+        seed_child_info = []
+        seen_taxa = set()
+        node_stack = []  # [child entry indexes, is first child token, is node created]
+        is_internal_node = None
+        child_entries = None
+        if current_token == "(":
+            parenthesis_nesting_level = 1
+            node_stack.append([[], True, False])
+            nexus_tokenizer.require_next_token()
+            is_in_child_list = True
+        else:
+            # allow for possibility of single node tree, e.g.: T0:10;
+            parenthesis_nesting_level = 0
+            is_in_child_list = False
+        edge_length_type = self.edge_length_type
+        suppress_edge_lengths = self.suppress_edge_lengths
+        taxon_bitmask = taxon_namespace.taxon_bitmask
+        require_next_token = nexus_tokenizer.require_next_token
+        is_tree_statement_complete = False
+        capture_comments = nexus_tokenizer.capture_comments
+        nexus_tokenizer.capture_comments = False
+        try:
+            while True:
+                if is_in_child_list:
+                    frame = node_stack[-1]
+                    current_token = nexus_tokenizer.current_token
+                    if current_token == ",":
+                        depth = len(node_stack)
+                        if not frame[2]:
+                            frame[0].append(self._finish_split_encoding_node(
+                                leafsets, edge_lengths, seed_child_info, depth, None, 0, None))
+                        require_next_token()
+                        while nexus_tokenizer.current_token == ",":
+                            frame[0].append(self._finish_split_encoding_node(
+                                leafsets, edge_lengths, seed_child_info, depth, None, 0, None))
+                            require_next_token()
+                        if not frame[2] and nexus_tokenizer.current_token == ")":
+                            frame[0].append(self._finish_split_encoding_node(
+                                leafsets, edge_lengths, seed_child_info, depth, None, 0, None))
+                            frame[2] = True
+                        frame[1] = False
+                        continue
+                    elif current_token == ")":
+                        if frame[1]:
+                            # handle terminating unnamed unifurcation
+                            frame[0].append(self._finish_split_encoding_node(
+                                leafsets, edge_lengths, seed_child_info, len(node_stack), None, 0, None))
+                        parenthesis_nesting_level -= 1
+                        require_next_token()
+                        child_entries = frame[0]
+                        node_stack.pop()
+                        is_internal_node = True
+                    else:
+                        frame[1] = False
+                        if current_token == "(":
+                            parenthesis_nesting_level += 1
+                            node_stack.append([[], True, False])
+                            require_next_token()
+                            continue
+                        child_entries = None
+                        is_internal_node = False
+                    is_in_child_list = False
+
+                # label, edge length, etc. of node
+                label_parsed = False
+                edge_length = None
+                leafset_bitmask = 0
+                while True:
+                    current_token = nexus_tokenizer.current_token
+                    if current_token == ":":
+                        require_next_token()
+                        if not suppress_edge_lengths:
+                            try:
+                                edge_length = edge_length_type(nexus_tokenizer.current_token)
+                            except ValueError:
+                                raise NewickReader.NewickReaderMalformedStatementError(
+                                        message="Invalid edge length: '{}'".format(nexus_tokenizer.current_token),
+                                        line_num=nexus_tokenizer.token_line_num,
+                                        col_num=nexus_tokenizer.token_column_num,
+                                        stream=nexus_tokenizer.src)
+                        try:
+                            require_next_token()
+                        except tokenizer.Tokenizer.UnexpectedEndOfStreamError as e:
+                            if self.terminating_semicolon_required:
+                                message = e.message + ". (Perhaps the terminating semicolon for the tree statement is missing? If so, add a semicolon to the tree statement or specify 'terminating_semicolon_required=False' to allow for missing semicolons)"
+                                raise tokenizer.Tokenizer.UnexpectedEndOfStreamError(
+                                        message=message,
+                                        line_num=e.line_num,
+                                        col_num=e.col_num,
+                                        stream=e.stream)
+                            else:
+                                is_tree_statement_complete = True
+                                break
+                    elif current_token == ")" or current_token == ",":
+                        if not node_stack:
+                            break
+                        frame = node_stack[-1]
+                        frame[0].append(self._finish_split_encoding_node(
+                            leafsets, edge_lengths, seed_child_info, len(node_stack),
+                            child_entries, leafset_bitmask, edge_length))
+                        frame[2] = True
+                        is_in_child_list = True
+                        break
+                    elif current_token == ";":
+                        # end of tree statement
+                        is_tree_statement_complete = True
+                        nexus_tokenizer.capture_comments = capture_comments
+                        nexus_tokenizer.next_token()
+                        break
+                    elif current_token == "(":
+                        parenthesis_nesting_level += 1
+                        raise NewickReader.NewickReaderMalformedStatementError(
+                                message="Malformed tree statement",
+                                line_num=nexus_tokenizer.token_line_num,
+                                col_num=nexus_tokenizer.token_column_num,
+                                stream=nexus_tokenizer.src)
+                    elif self.is_parse_jplace_tokens and current_token == '{':
+                        require_next_token()
+                        int(nexus_tokenizer.current_token)
+                        require_next_token() # for closing '}'
+                        require_next_token()
+                    else:
+                        if label_parsed:
+                            msg = "Expecting ':'"
+                            if self.is_parse_jplace_tokens:
+                                msg += ", '{'"
+                            msg += ", ')', ',' or ';' after reading label but found '{}'".format(current_token)
+                            raise NewickReader.NewickReaderMalformedStatementError(
+                                    message=msg,
+                                    line_num=nexus_tokenizer.token_line_num,
+                                    col_num=nexus_tokenizer.token_column_num,
+                                    stream=nexus_tokenizer.src)
+                        if is_internal_node is None:
+                            is_internal_node = bool(child_entries)
+                        if not ( (is_internal_node and self.suppress_internal_node_taxa)
+                                or ((not is_internal_node) and self.suppress_leaf_node_taxa) ):
+                            node_taxon = taxon_symbol_map_fn(current_token)
+                            if node_taxon in seen_taxa:
+                                raise NewickReader.NewickReaderDuplicateTaxonError(
+                                        message=node_taxon.label,
+                                        line_num=nexus_tokenizer.token_line_num,
+                                        col_num=nexus_tokenizer.token_column_num,
+                                        stream=nexus_tokenizer.src)
+                            seen_taxa.add(node_taxon)
+                            if not is_internal_node:
+                                leafset_bitmask = taxon_bitmask(node_taxon)
+                        label_parsed = True
+                        try:
+                            require_next_token()
+                        except tokenizer.Tokenizer.UnexpectedEndOfStreamError:
+                            if self.terminating_semicolon_required:
+                                raise
+                            else:
+                                break
+                if is_in_child_list:
+                    continue
+                ## if we are here, we have reached the end of the tree
+                break
+        finally:
+            nexus_tokenizer.capture_comments = capture_comments
+        if parenthesis_nesting_level != 0:
+            raise NewickReader.NewickReaderMalformedStatementError(
+                    message="Unbalanced parentheses at tree statement termination: balance index = {}".format(parenthesis_nesting_level),
+                    line_num=nexus_tokenizer.token_line_num,
+                    col_num=nexus_tokenizer.token_column_num,
+                    stream=nexus_tokenizer.src)
+        if not is_tree_statement_complete:
+            raise NewickReader.NewickReaderIncompleteTreeStatementError(
+                    message="Incomplete or improperly-terminated tree statement (last character read was '{}' instead of a semi-colon ';')".format(nexus_tokenizer.current_token),
+                    line_num=nexus_tokenizer.token_line_num,
+                    col_num=nexus_tokenizer.token_column_num,
+                    stream=nexus_tokenizer.src)
+
+        # finish seed node
+        if not child_entries:
+            seed_entry = len(leafsets)
+            leafsets.append(leafset_bitmask)
+            edge_lengths.append(edge_length)
+        else:
+            num_seed_children = len(child_entries)
+            collapsed_entry = None
+            if not is_rooted and num_seed_children == 2:
+                # collapse basal bifurcation
+                if seed_child_info[1][2] >= 2:
+                    to_keep, to_del = seed_child_info
+                elif seed_child_info[0][2] >= 2:
+                    to_del, to_keep = seed_child_info
+                else:
+                    to_keep, to_del = None, None
+                if to_del is not None:
+                    if to_keep[1] is not None and to_del[1] is not None:
+                        to_keep[1] += to_del[1]
+                    collapsed_entry = to_del[0]
+                    num_seed_children = 1 + to_del[2]
+            for entry, child_edge_length, num_children in seed_child_info:
+                if entry == collapsed_entry:
+                    continue
+                if num_children == 1:
+                    self._merge_split_encoding_edge_length(edge_lengths, entry, child_edge_length)
+                else:
+                    edge_lengths[entry] = child_edge_length
+            if num_seed_children == 1:
+                seed_entry = child_entries[0]
+                self._merge_split_encoding_edge_length(edge_lengths, seed_entry, edge_length)
+            else:
+                seed_entry = len(leafsets)
+                seed_leafset_bitmask = 0
+                for entry in child_entries:
+                    seed_leafset_bitmask |= leafsets[entry]
+                leafsets.append(seed_leafset_bitmask)
+                edge_lengths.append(edge_length)
+            if collapsed_entry is not None:
+                if seed_entry > collapsed_entry:
+                    seed_entry -= 1
+                del leafsets[collapsed_entry]
+                del edge_lengths[collapsed_entry]
+        tree_leafset_bitmask = leafsets[seed_entry]
+        if is_rooted:
+            split_bitmasks = leafsets
+        else:
+            lowest_relevant_bit = tree_leafset_bitmask & -tree_leafset_bitmask
+            split_bitmasks = [
+                    ((~b) & tree_leafset_bitmask) if (b & lowest_relevant_bit) else (b & tree_leafset_bitmask)
+                    for b in leafsets]
+
+        current_token = nexus_tokenizer.current_token
+        while current_token == ";" and not nexus_tokenizer.is_eof():
+            nexus_tokenizer.clear_captured_comments()
+            current_token = nexus_tokenizer.next_token()
+        return SplitEncodedTree(
+                split_bitmasks=split_bitmasks,
+                edge_lengths=edge_lengths,
+                leafset_bitmask=tree_leafset_bitmask,
+                weight=weight,
+                is_rooted=is_rooted)
+
+    def _finish_split_encoding_node(self,
+            leafsets,
+            edge_lengths,
+            seed_child_info,
+            depth,
+            child_entries,
+            leafset_bitmask,
+            edge_length):
+        # Returns the index of the entry representing the node, after
+        # suppressing unifurcations. Edge lengths of children of the seed node
+        # (depth 1) are not applied here, but in the calling code.
+        if depth == 1:
+            seed_child_edge_length = edge_length
+            edge_length = None
+        if not child_entries:
+            entry = len(leafsets)
+            leafsets.append(leafset_bitmask)
+            edge_lengths.append(edge_length)
+        elif len(child_entries) == 1:
+            entry = child_entries[0]
+            self._merge_split_encoding_edge_length(edge_lengths, entry, edge_length)
+        else:
+            entry = len(leafsets)
+            for child_entry in child_entries:
+                leafset_bitmask |= leafsets[child_entry]
+            leafsets.append(leafset_bitmask)
+            edge_lengths.append(edge_length)
+        if depth == 1:
+            seed_child_info.append([entry, seed_child_edge_length, len(child_entries) if child_entries else 0])
+        return entry
+
+    def _merge_split_encoding_edge_length(self, edge_lengths, entry, edge_length):
+        if edge_length is not None:
+            if edge_lengths[entry] is None:
+                edge_lengths[entry] = edge_length
+            else:
+                edge_lengths[entry] += edge_length
+
     def _process_tree_comments(self, tree, tree_comments, nexus_tokenizer):
         # NOTE: this also unconditionally sets the tree rootedness and
         # weighting if no comment indicating these are found; for this to work
@@ -415,34 +757,8 @@ class NewickReader(ioservice.DataReader):
             elif (self.store_tree_weights
                     and (stripped_comment.startswith("&W ") or stripped_comment.startswith("&w "))
                     ):
-                try:
-                    weight_expression = stripped_comment[2:]
-                    if not weight_expression:
-                        raise ValueError
-                    we_parts = weight_expression.split("/")
-                    if len(we_parts) > 2:
-                        raise ValueError
-                        # raise NewickReader.NewickReaderInvalidValueError(
-                        #         message="Invalid tree weight expression: '{}'".format(weight_expression),
-                        #         line_num=nexus_tokenizer.token_line_num,
-                        #         col_num=nexus_tokenizer.token_column_num,
-                        #         stream=nexus_tokenizer.src)
-                    elif len(we_parts) == 2:
-                        x = float(we_parts[0])
-                        y = float(we_parts[1])
-                        tree.weight = x/y
-                    else:
-                        tree.weight = float(we_parts[0])
-                    weighting_token_found = True
-                except ValueError:
-                    exc = NewickReader.NewickReaderInvalidValueError(
-                            message="Invalid tree weight expression: '{}'".format(stripped_comment),
-                            line_num=nexus_tokenizer.token_line_num,
-                            col_num=nexus_tokenizer.token_column_num,
-                            stream=nexus_tokenizer.src)
-                    exc.__context__ = None # Python 3.0, 3.1, 3.2
-                    exc.__cause__ = None # Python 3.3, 3.4
-                    raise exc
+                tree.weight = self._parse_tree_weight_comment(stripped_comment, nexus_tokenizer)
+                weighting_token_found = True
             elif self.extract_comment_metadata and comment.startswith("&"):
                 annotations = nexusprocessing.parse_comment_metadata_to_annotations(
                     comment=comment)
@@ -457,6 +773,38 @@ class NewickReader(ioservice.DataReader):
         if self.store_tree_weights and not weighting_token_found:
             tree.weight = self.default_tree_weight
 
+    def _parse_tree_weight_comment(self, stripped_comment, nexus_tokenizer):
+        """
+        Returns tree weight given by a tree weight comment (e.g., "&W 1/2").
+        """
+        try:
+            weight_expression = stripped_comment[2:]
+            if not weight_expression:
+                raise ValueError
+            we_parts = weight_expression.split("/")
+            if len(we_parts) > 2:
+                raise ValueError
+                # raise NewickReader.NewickReaderInvalidValueError(
+                #         message="Invalid tree weight expression: '{}'".format(weight_expression),
+                #         line_num=nexus_tokenizer.token_line_num,
+                #         col_num=nexus_tokenizer.token_column_num,
+                #         stream=nexus_tokenizer.src)
+            elif len(we_parts) == 2:
+                x = float(we_parts[0])
+                y = float(we_parts[1])
+                return x/y
+            else:
+                return float(we_parts[0])
+        except ValueError:
+            exc = NewickReader.NewickReaderInvalidValueError(
+                    message="Invalid tree weight expression: '{}'".format(stripped_comment),
+                    line_num=nexus_tokenizer.token_line_num,
+                    col_num=nexus_tokenizer.token_column_num,
+                    stream=nexus_tokenizer.src)
+            exc.__context__ = None # Python 3.0, 3.1, 3.2
+            exc.__cause__ = None # Python 3.3, 3.4
+            raise exc
+
     def _parse_tree_rooting_state(self, rooting_comment=None):
         """
         Returns rooting state for tree with given rooting comment token, taking
@@ -18,7 +18,7 @@
 ##############################################################################
 
 """
-Implementation of NEWICK-schema tree iterator.
+Implementation of NEWICK-schema tree iterators.
 """
 
 from dendropy.dataio import ioservice
@@ -47,11 +47,18 @@ class NewickTreeDataYielder(ioservice.TreeDataYielder):
         \*\*kwargs : keyword arguments
             These will be passed directly to the base `newickreader.NexusReader`
             class. See `newickreader.NexusReader` for details.
+            The ``tree_offset``, ``max_trees``, ``use_tree_index``, and
+            ``tree_index_dir`` keyword arguments are handled by
+            `ioservice.TreeDataYielder`.
         """
         ioservice.TreeDataYielder.__init__(self,
                 files=files,
                 taxon_namespace=taxon_namespace,
-                tree_type=tree_type)
+                tree_type=tree_type,
+                tree_offset=kwargs.pop("tree_offset", 0),
+                max_trees=kwargs.pop("max_trees", None),
+                use_tree_index=kwargs.pop("use_tree_index", False),
+                tree_index_dir=kwargs.pop("tree_index_dir", None))
         self.newick_reader = newickreader.NewickReader(**kwargs)
 
     ###########################################################################
@@ -64,6 +71,8 @@ class NewickTreeDataYielder(ioservice.TreeDataYielder):
                 taxon_namespace=self.attached_taxon_namespace,
                 enable_lookup_by_taxon_number=False,
                 case_sensitive=self.newick_reader.case_sensitive_taxon_labels)
+        if not self._seek_past_indexed_newick_trees(nexus_tokenizer, self._get_tree_index()):
+            return
         while True:
             tree = self.newick_reader._parse_tree_statement(
                     nexus_tokenizer=nexus_tokenizer,
@@ -72,3 +81,41 @@ class NewickTreeDataYielder(ioservice.TreeDataYielder):
             if tree is None:
                 break
             yield tree
+
+class NewickSplitEncodingYielder(NewickTreeDataYielder):
+    """
+    Iterates over the trees in NEWICK-formatted sources, yielding a
+    `newickreader.SplitEncodedTree` for each tree rather than a |Tree|.
+    """
+
+    def __init__(self,
+            files=None,
+            taxon_namespace=None,
+            tree_type=None,
+            **kwargs):
+        NewickTreeDataYielder.__init__(self,
+                files=files,
+                taxon_namespace=taxon_namespace,
+                tree_type=tree_type,
+                **kwargs)
+
+    ###########################################################################
+    ## Implementation of DataYielder interface
+
+    def _yield_items_from_stream(self, stream):
+        nexus_tokenizer = nexusprocessing.NexusTokenizer(stream,
+                preserve_unquoted_underscores=self.newick_reader.preserve_unquoted_underscores)
+        taxon_symbol_mapper = nexusprocessing.NexusTaxonSymbolMapper(
+                taxon_namespace=self.attached_taxon_namespace,
+                enable_lookup_by_taxon_number=False,
+                case_sensitive=self.newick_reader.case_sensitive_taxon_labels)
+        if not self._seek_past_indexed_newick_trees(nexus_tokenizer, self._get_tree_index()):
+            return
+        while True:
+            split_encoded_tree = self.newick_reader._parse_tree_statement_split_encoding(
+                    nexus_tokenizer=nexus_tokenizer,
+                    taxon_symbol_map_fn=taxon_symbol_mapper.require_taxon_for_symbol,
+                    taxon_namespace=self.attached_taxon_namespace)
+            if split_encoded_tree is None:
+                break
+            yield split_encoded_tree
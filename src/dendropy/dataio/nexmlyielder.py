@@ -49,11 +49,18 @@ class NexmlTreeDataYielder(
         \*\*kwargs : keyword arguments
             These will be passed directly to the base `nexmlreader.NexusReader`
             class. See `nexmlreader.NexusReader` for details.
+            The ``tree_offset``, ``max_trees``, ``use_tree_index``, and
+            ``tree_index_dir`` keyword arguments are handled by
+            `ioservice.TreeDataYielder`.
         """
         ioservice.TreeDataYielder.__init__(self,
                 files=files,
                 taxon_namespace=taxon_namespace,
-                tree_type=tree_type)
+                tree_type=tree_type,
+                tree_offset=kwargs.pop("tree_offset", 0),
+                max_trees=kwargs.pop("max_trees", None),
+                use_tree_index=kwargs.pop("use_tree_index", False),
+                tree_index_dir=kwargs.pop("tree_index_dir", None))
         nexmlreader.NexmlReader.__init__(self,
                 **kwargs)
         self.attached_taxon_namespace = self.taxon_namespace
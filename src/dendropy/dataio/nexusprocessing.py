@@ -34,8 +34,11 @@ from dendropy.datamodel import basemodel
 
 class NexusTokenizer(Tokenizer):
 
+    DEFAULT_BUFFER_SIZE = 65536
+
     def __init__(self, src,
-            preserve_unquoted_underscores=False):
+            preserve_unquoted_underscores=False,
+            buffer_size=DEFAULT_BUFFER_SIZE):
         Tokenizer.__init__(self,
             src=src,
             uncaptured_delimiters=set(" \t\n\r"),
@@ -46,7 +49,8 @@ class NexusTokenizer(Tokenizer):
             comment_begin=set("["),
             comment_end=set("]"),
             capture_comments=True,
-            preserve_unquoted_underscores=preserve_unquoted_underscores)
+            preserve_unquoted_underscores=preserve_unquoted_underscores,
+            buffer_size=buffer_size)
         # self.preserve_unquoted_underscores = preserve_unquoted_underscores
 
     # def __next__(self):
@@ -83,6 +87,7 @@ class NexusTokenizer(Tokenizer):
                 self.uncaptured_delimiters.add("\n")
             if "\r" not in self.uncaptured_delimiters:
                 self.uncaptured_delimiters.add("\r")
+        self.refresh_delimiters()
 
     def set_hyphens_as_captured_delimiters(self, hyphens_as_captured_delimiters):
         if hyphens_as_captured_delimiters:
@@ -93,6 +98,7 @@ class NexusTokenizer(Tokenizer):
                 self.captured_delimiters.discard("-")
             except ValueError:
                 pass
+        self.refresh_delimiters()
 
     def require_next_token_ucase(self):
         t = self.require_next_token()
@@ -659,44 +659,13 @@ class NexusReader(ioservice.DataReader):
             taxon_namespace = self._get_taxon_namespace()
         token = self._nexus_tokenizer.next_token()
 
-        # Construct label lookup set
-        # The get_taxon call is expensive for large taxon namespaces as it requires
-        # a linear search. This causes significant performance penalties for loading
-        # very large trees into an empty taxon namespace as each new taxon requires
-        # a worst case search of the existing namespace before it can be inserted.
-        # To alleviate this, we build a temporary one-time set of all the labels
-        # in the taxon namespace. Now we can determine in constant-time whether
-        # a label token corresponds to a new taxon that requires insertion,
-        # or if an existing taxon can be fetched with get_taxon.
-        label_set = set([])
-        for taxon in taxon_namespace._taxa:
-            if taxon_namespace.is_case_sensitive:
-                label_set.add(taxon.label)
-            else:
-                label_set.add(taxon.lower_cased_label)
-
         while token != ';':
             label = token
-
-            # Convert the token to the appropriate case to check against label set
-            if taxon_namespace.is_case_sensitive:
-                check_label = label
-            else:
-                check_label = label.lower()
-
-            if check_label in label_set:
-                taxon = taxon_namespace.get_taxon(label=label)
-            else:
+            taxon = taxon_namespace.get_taxon(label=label)
+            if taxon is None:
                 if len(taxon_namespace) >= self._file_specified_ntax and not self.attached_taxon_namespace and not self.unconstrained_taxa_accumulation_mode:
                     raise self._too_many_taxa_error(taxon_namespace=taxon_namespace, label=label)
                 taxon = taxon_namespace.new_taxon(label=label)
-
-                # Add the new label to the label lookup set too
-                if taxon_namespace.is_case_sensitive:
-                    label_set.add(taxon.label)
-                else:
-                    label_set.add(taxon.lower_cased_label)
-
             token = self._nexus_tokenizer.next_token()
             self._nexus_tokenizer.process_and_clear_comments_for_item(taxon,
                     self.extract_comment_metadata)
@@ -1286,12 +1255,10 @@ class NexusReader(ioservice.DataReader):
         if token:
             token = token.upper()
         block = ["BEGIN", token]
-        old_uncaptured_delimiters = self._nexus_tokenizer.uncaptured_delimiters
-        old_captured_delimiters = self._nexus_tokenizer.captured_delimiters
-        to_switch = "\n\r"
-        for ch in to_switch:
-            self._nexus_tokenizer.uncaptured_delimiters.discard(ch)
-            self._nexus_tokenizer.captured_delimiters.add(ch)
+        # copies, as the delimiter sets are modified in place
+        old_uncaptured_delimiters = set(self._nexus_tokenizer.uncaptured_delimiters)
+        old_captured_delimiters = set(self._nexus_tokenizer.captured_delimiters)
+        self._nexus_tokenizer.set_capture_eol(True)
         while not (token == 'END' or token == 'ENDBLOCK') \
                 and not self._nexus_tokenizer.is_eof() \
                 and not token==None:
@@ -1302,6 +1269,7 @@ class NexusReader(ioservice.DataReader):
             block.append(token)
         self._nexus_tokenizer.uncaptured_delimiters = old_uncaptured_delimiters
         self._nexus_tokenizer.captured_delimiters = old_captured_delimiters
+        self._nexus_tokenizer.refresh_delimiters()
         self._nexus_tokenizer.skip_to_semicolon() # move past end
         block.append(";")
         return " ".join(block)
@@ -18,7 +18,7 @@
 ##############################################################################
 
 """
-Implementation of NEXUS-schema tree iterator.
+Implementation of NEXUS-schema tree iterators.
 """
 
 from dendropy.dataio import ioservice
@@ -49,16 +49,25 @@ class NexusTreeDataYielder(
         \*\*kwargs : keyword arguments
             These will be passed directly to the base `nexusreader.NexusReader`
             class. See `nexusreader.NexusReader` for details.
+            The ``tree_offset``, ``max_trees``, ``use_tree_index``, and
+            ``tree_index_dir`` keyword arguments are handled by
+            `ioservice.TreeDataYielder`.
         """
         ioservice.TreeDataYielder.__init__(self,
                 files=files,
                 taxon_namespace=taxon_namespace,
-                tree_type=tree_type)
+                tree_type=tree_type,
+                tree_offset=kwargs.pop("tree_offset", 0),
+                max_trees=kwargs.pop("max_trees", None),
+                use_tree_index=kwargs.pop("use_tree_index", False),
+                tree_index_dir=kwargs.pop("tree_index_dir", None))
         self.assume_newick_if_not_nexus = kwargs.pop("assume_newick_if_not_nexus", False)
         kwargs["attached_taxon_namespace"] = self.attached_taxon_namespace
         nexusreader.NexusReader.__init__(self, **kwargs)
         self.exclude_chars = True
         self.exclude_trees = False
+        self._tree_index = None
+        self._trees_block_index = 0
 
     ###########################################################################
     ## Implementation of DataYielder interface
@@ -69,6 +78,8 @@ class NexusTreeDataYielder(
                 preserve_unquoted_underscores=self.preserve_underscores)
         else:
             self._nexus_tokenizer.set_stream(stream)
+        self._tree_index = self._get_tree_index()
+        self._trees_block_index = 0
         token = self._nexus_tokenizer.next_token()
         if token.upper() != "#NEXUS":
             if self.assume_newick_if_not_nexus:
@@ -76,6 +87,8 @@ class NexusTreeDataYielder(
                         taxon_namespace=self.attached_taxon_namespace,
                         enable_lookup_by_taxon_number=False,
                         )
+                if not self._seek_past_indexed_newick_trees(self._nexus_tokenizer, self._tree_index):
+                    return
                 while True:
                     tree = self._build_tree_from_newick_tree_string(
                             tree_factory=self.tree_factory,
@@ -121,6 +134,8 @@ class NexusTreeDataYielder(
             self._consume_to_end_of_block(self._nexus_tokenizer.current_token)
             return
         self._nexus_tokenizer.skip_to_semicolon() # move past "BEGIN TREES" command
+        trees_block_index = self._trees_block_index
+        self._trees_block_index += 1
         link_title = None
         taxon_namespace = None
         taxon_symbol_mapper = None
@@ -147,6 +162,10 @@ class NexusTreeDataYielder(
                 if taxon_symbol_mapper is None:
                     taxon_symbol_mapper = self._get_taxon_symbol_mapper(taxon_namespace=taxon_namespace)
                 pre_tree_comments = self._nexus_tokenizer.pull_captured_comments()
+                token = self._seek_past_indexed_nexus_trees(trees_block_index)
+                if token != "TREE":
+                    # all trees in block skipped: now at end of block
+                    continue
                 tree_factory = self.tree_factory
                 while True:
                     ## After the following, the current token
@@ -170,6 +189,34 @@ class NexusTreeDataYielder(
         self._nexus_tokenizer.skip_to_semicolon() # move past END command
         return
 
+    def _seek_past_indexed_nexus_trees(self, trees_block_index):
+        """
+        Expectations:
+            - current token: "TREE" [first tree statement of a trees block]
+
+        If there are trees to skip and a tree index is available, positions
+        the tokenizer at the beginning of the first tree statement in the
+        current trees block that is not to be skipped or, if all of them
+        are to be skipped, at the "END" statement of the block. Returns the
+        current token (in upper case).
+        """
+        tree_index = self._tree_index
+        if (tree_index is None
+                or tree_index.schema != "nexus"
+                or self._num_trees_to_skip <= 0
+                or trees_block_index >= len(tree_index.trees_blocks)):
+            return self._nexus_tokenizer.cast_current_token_to_ucase()
+        first_tree_idx, num_trees_in_block, end_location = tree_index.trees_blocks[trees_block_index]
+        num_trees = min(self._num_trees_to_skip, num_trees_in_block)
+        if num_trees == 0:
+            return self._nexus_tokenizer.cast_current_token_to_ucase()
+        if num_trees == num_trees_in_block:
+            self._nexus_tokenizer.seek(*end_location)
+        else:
+            self._nexus_tokenizer.seek(*tree_index.tree_location(first_tree_idx + num_trees))
+        self._num_trees_to_skip -= num_trees
+        return self._nexus_tokenizer.next_token_ucase()
+
 class NexusNewickTreeDataYielder(NexusTreeDataYielder):
 
     def __init__(self,
@@ -183,3 +230,50 @@ class NexusNewickTreeDataYielder(NexusTreeDataYielder):
                 taxon_namespace=taxon_namespace,
                 tree_type=tree_type,
                 **kwargs)
+
+class NexusSplitEncodingYielder(NexusTreeDataYielder):
+    """
+    Iterates over the trees in NEXUS-formatted sources, yielding a
+    `newickreader.SplitEncodedTree` for each tree rather than a |Tree|.
+    Taxa and translate blocks are processed as usual.
+    """
+
+    ###########################################################################
+    ## Supporting Functions
+
+    def _parse_tree_statement(self, tree_factory, taxon_symbol_mapper):
+        """
+        Processes a TREE command. Assumes that the file reader is
+        positioned right after the "TREE" token in a TREE command.
+        """
+        token = self._nexus_tokenizer.next_token()
+        if token == '*':
+            token = self._nexus_tokenizer.next_token()
+        tree_name = token
+        token = self._nexus_tokenizer.next_token()
+        if token != '=':
+            raise self._nexus_error("Expecting '=' in definition of Tree '%s' but found '%s'" % (tree_name, token))
+        self._nexus_tokenizer.clear_captured_comments()
+        # advance to '('; comments will be processed by newick reader
+        self._nexus_tokenizer.next_token()
+        return self._build_tree_from_newick_tree_string(tree_factory, taxon_symbol_mapper)
+
+    def _build_tree_from_newick_tree_string(self, tree_factory, taxon_symbol_mapper):
+        return self.newick_reader._parse_tree_statement_split_encoding(
+                nexus_tokenizer=self._nexus_tokenizer,
+                taxon_symbol_map_fn=taxon_symbol_mapper.require_taxon_for_symbol,
+                taxon_namespace=taxon_symbol_mapper.taxon_namespace)
+
+class NexusNewickSplitEncodingYielder(NexusSplitEncodingYielder):
+
+    def __init__(self,
+            files=None,
+            taxon_namespace=None,
+            tree_type=None,
+            **kwargs):
+        kwargs["assume_newick_if_not_nexus"] = kwargs.get("assume_newick_if_not_nexus", True)
+        NexusSplitEncodingYielder.__init__(self,
+                files=files,
+                taxon_namespace=taxon_namespace,
+                tree_type=tree_type,
+                **kwargs)
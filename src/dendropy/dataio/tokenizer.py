@@ -17,6 +17,7 @@
 ##
 ##############################################################################
 
+import re
 from dendropy.utility import error
 
 ##############################################################################
@@ -25,6 +26,19 @@ from dendropy.utility import error
 class Tokenizer(object):
     """
     Stream tokenizer.
+
+    If ``buffer_size`` is given, the source stream is read in blocks of
+    (up to) that many characters at a time, and runs of ordinary token
+    characters, quoted literals, and comments are located using compiled
+    regular expressions and ``str.find`` rather than by stepping through the
+    source one character at a time. Otherwise, the source is read one
+    character at a time. Both modes yield identical tokens, comments, and
+    line/column numbers. Note that, in buffered mode, the source stream will
+    be consumed beyond the last token returned.
+
+    Code that modifies the delimiter, quote, or comment character sets
+    after construction must call :meth:`refresh_delimiters` before
+    requesting the next token.
     """
 
     class TokenizerError(error.DataParseError):
@@ -77,6 +91,7 @@ class Tokenizer(object):
             comment_end,                # string indicating end of comment
             capture_comments,           # are comments to be stored?
             preserve_unquoted_underscores,       # are unquoted underscores to be preserved
+            buffer_size=None,           # if given, read source in blocks of this size
             ):
         # Tokenizer behavior customization
         self.uncaptured_delimiters = uncaptured_delimiters
@@ -88,10 +103,14 @@ class Tokenizer(object):
         self.comment_end = comment_end
         self.capture_comments = capture_comments
         self.preserve_unquoted_underscores = preserve_unquoted_underscores
+        self.buffer_size = buffer_size
 
         # State (internals)
         self.src = src
         self._cur_char = None
+        self._buffer = ""
+        self._buffer_pos = -1
+        self._scanners = None
         self.current_token = None
         self.is_token_quoted = False
 
@@ -108,6 +127,8 @@ class Tokenizer(object):
     def set_stream(self, src=None):
         self.src = src
         self._cur_char = None
+        self._buffer = ""
+        self._buffer_pos = -1
         self.current_token = None
         self.is_token_quoted = False
         self.captured_comments = []
@@ -116,6 +137,22 @@ class Tokenizer(object):
         self.token_line_num = 0
         self.token_column_num = 0
 
+    def seek(self, offset, line_num=1, column_num=0):
+        """
+        Repositions the tokenizer at ``offset`` (as understood by the
+        ``seek()`` method of the source stream, e.g. a byte offset for a file
+        opened in text mode), discarding any buffered characters, the current
+        token, and captured comments. ``line_num`` and ``column_num`` give the
+        line number of the character at ``offset`` and the column number of the
+        character preceding it, so that subsequent positions are reported as
+        if the source had been read from the beginning.
+        """
+        src = self.src
+        src.seek(offset)
+        self.set_stream(src)
+        self.current_line_num = line_num
+        self.current_column_num = column_num
+
     def is_eof(self):
         return self._cur_char == ""
 
@@ -151,10 +188,19 @@ class Tokenizer(object):
         del self.captured_comments[:]
         return c
 
+    def refresh_delimiters(self):
+        """
+        Notifies the tokenizer that its delimiter, quote, or comment
+        character sets have been modified.
+        """
+        self._scanners = None
+
     def __iter__(self):
         return self
 
     def __next__(self):
+        if self.buffer_size:
+            return self._buffered_next()
         self.is_token_quoted = False
         if self._cur_char is None:
             self._get_next_char()
@@ -242,6 +288,19 @@ class Tokenizer(object):
         return
 
     def _get_next_char(self):
+        if self.buffer_size:
+            pos = self._buffer_pos + 1
+            if pos < len(self._buffer):
+                self._buffer_pos = pos
+                self._cur_char = self._buffer[pos]
+                if self._cur_char == "\n":
+                    self.current_line_num += 1
+                    self.current_column_num = 1
+                else:
+                    self.current_column_num += 1
+            else:
+                self._advance_buffer_to(pos)
+            return self._cur_char
         self._cur_char = self.src.read(1)
         if self._cur_char != "":
             if self._cur_char == "\n":
@@ -253,6 +312,8 @@ class Tokenizer(object):
         return self._cur_char
 
     def _handle_comment(self):
+        if self.buffer_size:
+            return self._buffered_handle_comment()
         dest = []
         nesting = 0
         comment_complete = False
@@ -273,3 +334,174 @@ class Tokenizer(object):
             # self.captured_comments.append(dest.getvalue())
             self.captured_comments.append("".join(dest))
 
+
+    ###########################################################################
+    ## Buffered Mode Support
+
+    def _compile_scanners(self):
+        def _char_run_pattern(chars, negate):
+            if not chars:
+                if negate:
+                    return re.compile(r"[\s\S]*")
+                return re.compile(r"")
+            char_class = "".join(re.escape(c) for c in sorted(chars))
+            if negate:
+                return re.compile("[^{}]*".format(char_class))
+            return re.compile("[{}]*".format(char_class))
+        stop_chars = set(self.uncaptured_delimiters)
+        stop_chars.update(self.captured_delimiters)
+        stop_chars.update(self.comment_begin)
+        comment_chars = set(self.comment_begin)
+        comment_chars.update(self.comment_end)
+        self._scanners = (
+                _char_run_pattern(self.uncaptured_delimiters, False).match,
+                _char_run_pattern(stop_chars, True).match,
+                _char_run_pattern(comment_chars, True).match,
+                )
+        return self._scanners
+
+    def _fill_buffer(self):
+        self._buffer = self.src.read(self.buffer_size)
+        self._buffer_pos = 0
+        if self._buffer:
+            self._cur_char = self._buffer[0]
+            self._update_position(0, 1)
+        else:
+            self._cur_char = ""
+
+    def _update_position(self, start, end):
+        # Updates line and column numbers to reflect consumption of
+        # ``self._buffer[start:end]``.
+        if end <= start:
+            return
+        buf = self._buffer
+        num_newlines = buf.count("\n", start, end)
+        if num_newlines:
+            self.current_line_num += num_newlines
+            self.current_column_num = end - buf.rfind("\n", start, end)
+        else:
+            self.current_column_num += end - start
+
+    def _advance_buffer_to(self, pos):
+        # Makes the character at ``pos`` in the buffer the current character,
+        # refilling the buffer if ``pos`` is past its end.
+        if self._cur_char == "":
+            return
+        buf_len = len(self._buffer)
+        if pos < buf_len:
+            self._update_position(self._buffer_pos + 1, pos + 1)
+            self._buffer_pos = pos
+            self._cur_char = self._buffer[pos]
+        else:
+            self._update_position(self._buffer_pos + 1, buf_len)
+            self._fill_buffer()
+
+    def _buffered_next(self):
+        self.is_token_quoted = False
+        scanners = self._scanners
+        if scanners is None:
+            scanners = self._compile_scanners()
+        skip_match, token_match, _ = scanners
+        if self._cur_char is None:
+            self._get_next_char()
+        while self._cur_char != "" and self._cur_char in self.uncaptured_delimiters:
+            self._advance_buffer_to(skip_match(self._buffer, self._buffer_pos).end())
+        if self._cur_char == "":
+            raise StopIteration
+        if self._cur_char in self.captured_delimiters:
+            self.current_token = self._cur_char
+            self.token_line_num = self.current_line_num
+            self.token_column_num = self.current_column_num
+            self._get_next_char()
+            return self.current_token
+        elif self._cur_char in self.quote_chars:
+            self.token_line_num = self.current_line_num
+            self.token_column_num = self.current_column_num
+            dest = []
+            self.is_token_quoted = True
+            cur_quote_char = self._cur_char
+            self._get_next_char()
+            while True:
+                if self._cur_char == "":
+                    raise Tokenizer.UnterminatedQuoteError(
+                            quote_char=cur_quote_char,
+                            line_num=self.current_line_num,
+                            col_num=self.current_column_num,
+                            stream=self.src)
+                start = self._buffer_pos
+                end = self._buffer.find(cur_quote_char, start)
+                if end < 0:
+                    dest.append(self._buffer[start:])
+                    self._advance_buffer_to(len(self._buffer))
+                    continue
+                dest.append(self._buffer[start:end])
+                self._advance_buffer_to(end)
+                self._get_next_char()
+                if self.escape_quote_by_doubling:
+                    if self._cur_char == cur_quote_char:
+                        dest.append(cur_quote_char)
+                        self._get_next_char()
+                    else:
+                        break
+                else:
+                    self._get_next_char()
+                    break
+            self.current_token = "".join(dest)
+            return self.current_token
+        else:
+            # unquoted
+            self.token_line_num = self.current_line_num
+            self.token_column_num = self.current_column_num
+            dest = []
+            self.is_token_quoted = False
+            while self._cur_char != "":
+                if self._cur_char in self.uncaptured_delimiters:
+                    self._get_next_char()
+                    break
+                elif self._cur_char in self.captured_delimiters:
+                    break
+                elif self._cur_char in self.comment_begin:
+                    self._buffered_handle_comment()
+                    if self._cur_char == "":
+                        break
+                else:
+                    start = self._buffer_pos
+                    end = token_match(self._buffer, start).end()
+                    segment = self._buffer[start:end]
+                    if not self.preserve_unquoted_underscores:
+                        segment = segment.replace("_", " ")
+                    dest.append(segment)
+                    self._advance_buffer_to(end)
+            self.current_token = "".join(dest)
+            if self.current_token == "":
+                if self._cur_char != "":
+                    self._buffered_next()
+                else:
+                    raise StopIteration
+            return self.current_token
+
+    def _buffered_handle_comment(self):
+        scanners = self._scanners
+        if scanners is None:
+            scanners = self._compile_scanners()
+        comment_match = scanners[2]
+        dest = []
+        nesting = 0
+        while self._cur_char != "":
+            if self._cur_char in self.comment_end:
+                nesting -= 1
+                if nesting <= 0:
+                    self._get_next_char()
+                    break
+            elif self._cur_char in self.comment_begin:
+                nesting += 1
+            else:
+                start = self._buffer_pos
+                end = comment_match(self._buffer, start).end()
+                if self.capture_comments:
+                    dest.append(self._buffer[start:end])
+                self._advance_buffer_to(end)
+                continue
+            self._get_next_char()
+        if self.capture_comments:
+            self.captured_comments.append("".join(dest))
@@ -0,0 +1,243 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Binary file format used by :meth:`TreeArray.save` and :meth:`TreeArray.load`
+to store the (columnar) contents of a |TreeArray|, so that these can be
+reloaded (optionally memory-mapped) without re-parsing the source trees.
+
+The layout of a file is:
+
+    ======  =====================================================================
+    Bytes   Content
+    ======  =====================================================================
+    0-7     The magic bytes ``b"DPTARRAY"``.
+    8-11    The format version (currently 1), as an unsigned 32-bit
+            little-endian integer.
+    12-15   Reserved (0).
+    16-23   The length, ``H``, of the header, as an unsigned 64-bit
+            little-endian integer.
+    24-     The header: ``H`` bytes of UTF-8 encoded JSON (see below), followed
+            by padding to a multiple of 8 bytes.
+    ...     The sections: raw ``array.array`` data, each section starting at
+            an offset that is a multiple of 8 bytes.
+    ======  =====================================================================
+
+The header is a JSON object with the following keys:
+
+    - "byteorder": the byte order ("little" or "big") of the section data.
+    - "sections": a list of objects describing the sections, each with the
+      keys "name", "typecode" (the ``array.array`` type code of the data),
+      "itemsize" (the size of each item in bytes), "offset" (the offset of
+      the section from the start of the file), and "length" (the number of
+      items).
+    - "tree_array": the non-array data of the |TreeArray|: the list of taxon
+      labels, in taxon namespace order (so that bit ``i`` of a split bitmask
+      corresponds to ``taxon_labels[i]``), the rooting state of the trees, the
+      ``ignore_edge_lengths``, ``ignore_node_ages``, and ``use_tree_weights``
+      settings, the width (in bytes) of the packed split bitmasks, and the
+      tree counts and weights of the split distribution, and any
+      (JSON-serializable) "metadata" given when the file was saved.
+
+The sections of a |TreeArray| are:
+
+    - "split_bitmasks" ("B"): the distinct split (and leafset) bitmasks of
+      the trees, each stored as a little-endian unsigned integer of the
+      width given in the header.
+    - "tree_split_offsets" ("q") and "tree_split_ids" ("i"): the splits of
+      tree ``i`` are given by the indexes (into "split_bitmasks")
+      ``tree_split_ids[tree_split_offsets[i]:tree_split_offsets[i+1]]``.
+    - "tree_edge_lengths" ("d"): the edge lengths corresponding to
+      "tree_split_ids" (empty if edge lengths are ignored), with missing
+      values stored as NaN.
+    - "tree_leafset_split_ids" ("i"): the index (into "split_bitmasks") of the
+      leafset bitmask of each tree.
+    - "tree_weights" ("d"): the weight of each tree.
+    - "split_distribution_split_bitmasks" ("B") and
+      "split_distribution_split_counts" ("d"): the (packed) bitmasks of the
+      splits in the split distribution, and the corresponding (weighted)
+      counts.
+    - "split_distribution_edge_length_offsets" ("q") and
+      "split_distribution_edge_lengths" ("d"): the edge lengths collected for
+      split ``i`` of the split distribution are given by
+      ``edge_lengths[edge_length_offsets[i]:edge_length_offsets[i+1]]``.
+      "split_distribution_edge_length_int_indexes" and
+      "split_distribution_edge_length_missing_indexes" ("q") give the
+      indexes into "split_distribution_edge_lengths" of values that are
+      integers or missing (stored as NaN), respectively.
+    - "split_distribution_node_age_offsets",
+      "split_distribution_node_ages",
+      "split_distribution_node_age_int_indexes", and
+      "split_distribution_node_age_missing_indexes": as above, for the
+      node ages collected for each split.
+
+As each section is stored contiguously, a file cannot be extended in place:
+adding trees to a saved collection (``TreeArray.save(..., append=True)``)
+rewrites the whole file.
+"""
+
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+MAGIC = b"DPTARRAY"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sIIQ")
+_ALIGNMENT = 8
+
+def _aligned(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+def write_tree_array_file(path, tree_array_header, sections):
+    """
+    Writes a file with the given header data and sections to ``path``.
+
+    The file is written to a temporary file in the same directory that then
+    replaces any existing file at ``path``, so that memory-mapped views of the
+    existing file remain valid.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file to write.
+    tree_array_header : dict
+        JSON-serializable data, stored under the "tree_array" key of the
+        header.
+    sections : iterable of (str, str, buffer) tuples
+        The name, ``array.array`` type code, and data (an ``array.array`` or a
+        ``memoryview`` cast to the type code) of each section.
+    """
+    sections = [(name, typecode, memoryview(data)) for name, typecode, data in sections]
+    # section offsets depend on the length of the header, which depends on the
+    # section offsets: so the header length is found by iteration
+    header_size = 0
+    while True:
+        offset = _aligned(_PREAMBLE.size + header_size)
+        section_infos = []
+        for name, typecode, data in sections:
+            section_infos.append({
+                "name": name,
+                "typecode": typecode,
+                "itemsize": data.itemsize,
+                "offset": offset,
+                "length": len(data),
+                })
+            offset = _aligned(offset + data.nbytes)
+        header = json.dumps({
+            "byteorder": sys.byteorder,
+            "sections": section_infos,
+            "tree_array": tree_array_header,
+            }, separators=(",", ":")).encode("utf-8")
+        if len(header) == header_size:
+            break
+        header_size = len(header)
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=dirname, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as dest:
+            dest.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, 0, len(header)))
+            dest.write(header)
+            for section_info, (name, typecode, data) in zip(section_infos, sections):
+                dest.write(b"\0" * (section_info["offset"] - dest.tell()))
+                dest.write(data.cast("B"))
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def _read_header(src, path):
+    preamble = src.read(_PREAMBLE.size)
+    if len(preamble) < _PREAMBLE.size:
+        raise ValueError("'{}' is not a TreeArray file".format(path))
+    magic, version, reserved, header_size = _PREAMBLE.unpack(preamble)
+    if magic != MAGIC:
+        raise ValueError("'{}' is not a TreeArray file".format(path))
+    if version != FORMAT_VERSION:
+        raise ValueError("'{}': unsupported TreeArray file format version: {}".format(path, version))
+    try:
+        return json.loads(src.read(header_size).decode("utf-8"))
+    except ValueError:
+        raise ValueError("'{}' is not a valid TreeArray file".format(path))
+
+def read_tree_array_file_header(path):
+    """
+    Returns the data stored under the "tree_array" key of the header of a file
+    written by :func:`write_tree_array_file`, without reading the sections.
+    """
+    with open(path, "rb") as src:
+        return _read_header(src, path)["tree_array"]
+
+def read_tree_array_file(path, use_mmap=True):
+    """
+    Reads a file written by :func:`write_tree_array_file`.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file to read.
+    use_mmap : bool
+        If |True|, then the sections are returned as read-only ``memoryview``
+        objects over a memory map of the file (unless the byte order of the
+        file is not that of this machine, in which case they are read into
+        arrays). Otherwise they are read into ``array.array`` objects.
+
+    Returns
+    -------
+    h : dict
+        The data stored under the "tree_array" key of the header.
+    s : dict
+        The section data, keyed by section name.
+    """
+    with open(path, "rb") as src:
+        header = _read_header(src, path)
+        is_swapped = header["byteorder"] != sys.byteorder
+        if use_mmap and not is_swapped:
+            buf = memoryview(mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            buf = None
+        sections = {}
+        for section_info in header["sections"]:
+            typecode = section_info["typecode"]
+            if array.array(typecode).itemsize != section_info["itemsize"]:
+                raise ValueError("'{}': unsupported item size for section '{}': {}".format(
+                    path, section_info["name"], section_info["itemsize"]))
+            offset = section_info["offset"]
+            nbytes = section_info["length"] * section_info["itemsize"]
+            if buf is not None:
+                if offset + nbytes > len(buf):
+                    raise ValueError("'{}' is truncated".format(path))
+                data = buf[offset:offset+nbytes].cast(typecode)
+            else:
+                src.seek(offset)
+                raw = src.read(nbytes)
+                if len(raw) < nbytes:
+                    raise ValueError("'{}' is truncated".format(path))
+                data = array.array(typecode)
+                data.frombytes(raw)
+                if is_swapped:
+                    data.byteswap()
+            sections[section_info["name"]] = data
+    return header["tree_array"], sections
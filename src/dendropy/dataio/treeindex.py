@@ -0,0 +1,407 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Byte-offset indexes of the tree statements in NEWICK and NEXUS files, allowing
+tree yielders to seek directly to a particular tree instead of parsing (and
+discarding) all the trees that precede it.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+
+##############################################################################
+## Scanning support
+
+_WHITESPACE = frozenset(b" \t\n\r")
+# characters after which a quote character opens a quoted token, i.e., the
+# uncaptured and captured delimiters of `nexusprocessing.NexusTokenizer`
+_TOKEN_DELIMITERS = frozenset(b" \t\n\r{}(),;:=\"")
+_STATEMENT_SCANNER = re.compile(rb"[;\[']")
+_COMMENT_SCANNER = re.compile(rb"[\[\]]")
+_QUOTE_SCANNER = re.compile(rb"'")
+_NON_WHITESPACE_SCANNER = re.compile(rb"[^ \t\n\r]")
+_WORD_SCANNER = re.compile(rb"[^ \t\n\r{}(),;:=\"\[]*")
+
+def _skip_comment(buf, pos):
+    # ``pos`` is the position of the opening '['; comments may be nested
+    nesting = 0
+    while True:
+        m = _COMMENT_SCANNER.search(buf, pos)
+        if m is None:
+            return len(buf)
+        pos = m.end()
+        if buf[m.start()] == 0x5B: # '['
+            nesting += 1
+        else:
+            nesting -= 1
+            if nesting <= 0:
+                return pos
+
+def _skip_quoted(buf, pos):
+    # ``pos`` is the position of the opening quote; quotes within are escaped
+    # by doubling
+    pos += 1
+    while True:
+        m = _QUOTE_SCANNER.search(buf, pos)
+        if m is None:
+            return len(buf)
+        pos = m.end()
+        if pos < len(buf) and buf[pos] == 0x27: # "'"
+            pos += 1
+        else:
+            return pos
+
+def _is_quote_opening(buf, pos):
+    # A quote only opens a quoted token if it is the first character of
+    # the token; elsewhere it is treated as an ordinary character.
+    return pos == 0 or buf[pos-1] in _TOKEN_DELIMITERS
+
+def _skip_whitespace(buf, pos):
+    m = _NON_WHITESPACE_SCANNER.search(buf, pos)
+    if m is None:
+        return len(buf)
+    return m.start()
+
+def _skip_insignificant(buf, pos):
+    # skips whitespace and comments
+    while True:
+        pos = _skip_whitespace(buf, pos)
+        if pos < len(buf) and buf[pos] == 0x5B: # '['
+            pos = _skip_comment(buf, pos)
+        else:
+            return pos
+
+def _find_statement_end(buf, pos):
+    # returns the position immediately following the next semi-colon that is
+    # not in a comment or quoted token
+    while True:
+        m = _STATEMENT_SCANNER.search(buf, pos)
+        if m is None:
+            return len(buf)
+        ch = buf[m.start()]
+        if ch == 0x3B: # ';'
+            return m.end()
+        elif ch == 0x5B: # '['
+            pos = _skip_comment(buf, m.start())
+        elif _is_quote_opening(buf, m.start()):
+            pos = _skip_quoted(buf, m.start())
+        else:
+            pos = m.end()
+
+def _read_word(buf, pos):
+    # ``pos`` is the position of the first character of a token; returns
+    # the token in upper case and the position following it
+    ch = buf[pos]
+    if ch == 0x27 and _is_quote_opening(buf, pos):
+        end = _skip_quoted(buf, pos)
+        return bytes(buf[pos+1:end-1]).replace(b"''", b"'").upper(), end
+    if ch in _TOKEN_DELIMITERS:
+        return bytes(buf[pos:pos+1]), pos + 1
+    parts = []
+    while True:
+        m = _WORD_SCANNER.match(buf, pos)
+        parts.append(m.group(0))
+        pos = m.end()
+        if pos < len(buf) and buf[pos] == 0x5B: # '['
+            pos = _skip_comment(buf, pos)
+        else:
+            break
+    return b"".join(parts).upper(), pos
+
+##############################################################################
+## TreeIndex
+
+class TreeIndex(object):
+    """
+    The locations of the tree statements in a NEWICK or NEXUS file.
+
+    For each tree, the byte offset at which its statement begins is recorded,
+    together with the corresponding line and column numbers. For NEWICK
+    sources this is the first character of the statement (including any
+    leading comments); for NEXUS sources this is the beginning of the "TREE"
+    command. For NEXUS sources, each "TREES" block is also recorded, as the
+    index of its first tree, the number of trees that it contains, and the
+    location of its "END" command.
+
+    Quoted tokens and (nested) comments are recognized following the same
+    rules as `nexusprocessing.NexusTokenizer`, so semi-colons within them are
+    not mistaken for statement terminators.
+
+    Indexes can be saved to and loaded from a "sidecar" file (by default,
+    the path of the source with the suffix `TreeIndex.SIDECAR_SUFFIX`
+    appended), which also stores the size and modification time of the source
+    so that stale indexes can be detected. See :func:`get_tree_index`.
+    """
+
+    SIDECAR_SUFFIX = ".treeidx"
+    FORMAT_NAME = "dendropy-tree-index"
+    FORMAT_VERSION = 1
+
+    @classmethod
+    def build(cls, path):
+        """
+        Scans the file at ``path`` and returns a |TreeIndex| of its tree
+        statements. The file is taken to be in NEXUS format if its first token
+        is "#NEXUS", and in NEWICK format otherwise.
+        """
+        tree_index = cls()
+        st = os.stat(path)
+        tree_index.source_size = st.st_size
+        tree_index.source_mtime_ns = st.st_mtime_ns
+        with open(path, "rb") as src:
+            if st.st_size == 0:
+                buf = b""
+                tree_index._scan_newick(buf)
+            else:
+                buf = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    pos = _skip_insignificant(buf, 0)
+                    if (pos < len(buf)
+                            and _read_word(buf, pos)[0] == b"#NEXUS"):
+                        tree_index._scan_nexus(buf, _read_word(buf, pos)[1])
+                    else:
+                        tree_index._scan_newick(buf)
+                finally:
+                    buf.close()
+        return tree_index
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a |TreeIndex| from the sidecar file at ``path``. Raises
+        `ValueError` if the file is not a valid tree index.
+        """
+        with open(path, "r") as src:
+            try:
+                d = json.load(src)
+            except ValueError:
+                raise ValueError("'{}' is not a valid tree index".format(path))
+        if (not isinstance(d, dict)
+                or d.get("format") != cls.FORMAT_NAME
+                or d.get("version") != cls.FORMAT_VERSION):
+            raise ValueError("'{}' is not a valid tree index".format(path))
+        tree_index = cls()
+        try:
+            tree_index.schema = d["schema"]
+            tree_index.source_size = d["source_size"]
+            tree_index.source_mtime_ns = d["source_mtime_ns"]
+            tree_index.tree_offsets = d["tree_offsets"]
+            tree_index.tree_line_nums = d["tree_line_nums"]
+            tree_index.tree_column_nums = d["tree_column_nums"]
+            tree_index.trees_blocks = [(b[0], b[1], tuple(b[2])) for b in d["trees_blocks"]]
+            tree_index.end_location = tuple(d["end_location"])
+        except (KeyError, IndexError, TypeError):
+            raise ValueError("'{}' is not a valid tree index".format(path))
+        if not (len(tree_index.tree_offsets)
+                == len(tree_index.tree_line_nums)
+                == len(tree_index.tree_column_nums)):
+            raise ValueError("'{}' is not a valid tree index".format(path))
+        return tree_index
+
+    def __init__(self):
+        self.schema = "newick"
+        self.source_size = None
+        self.source_mtime_ns = None
+        self.tree_offsets = []
+        self.tree_line_nums = []
+        self.tree_column_nums = []
+        self.trees_blocks = []
+        self.end_location = (0, 1, 0)
+        self._locate_pos = 0
+        self._locate_line_num = 1
+        self._locate_line_start = None
+
+    def __len__(self):
+        return len(self.tree_offsets)
+
+    def save(self, path):
+        """
+        Writes this index to the sidecar file at ``path``.
+        """
+        d = {
+            "format": self.FORMAT_NAME,
+            "version": self.FORMAT_VERSION,
+            "schema": self.schema,
+            "source_size": self.source_size,
+            "source_mtime_ns": self.source_mtime_ns,
+            "tree_offsets": self.tree_offsets,
+            "tree_line_nums": self.tree_line_nums,
+            "tree_column_nums": self.tree_column_nums,
+            "trees_blocks": self.trees_blocks,
+            "end_location": self.end_location,
+        }
+        with open(path, "w") as dest:
+            json.dump(d, dest, separators=(",", ":"))
+
+    def is_current_for(self, path):
+        """
+        Returns |True| if the size and modification time of the file at
+        ``path`` are those of the file from which this index was built.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return (st.st_size == self.source_size
+                and st.st_mtime_ns == self.source_mtime_ns)
+
+    def tree_location(self, tree_idx):
+        """
+        Returns a tuple, (offset, line number, column number), that can be
+        passed to `Tokenizer.seek` to position a tokenizer at the beginning of
+        the tree statement with index ``tree_idx``. If ``tree_idx`` is equal
+        to the number of trees, the location of the end of the file is
+        returned.
+        """
+        if tree_idx == len(self.tree_offsets):
+            return self.end_location
+        return (self.tree_offsets[tree_idx],
+                self.tree_line_nums[tree_idx],
+                self.tree_column_nums[tree_idx])
+
+    def _locate(self, buf, pos):
+        # line number of the character at ``pos`` and column number of the
+        # character before it, following `Tokenizer` conventions; must be
+        # called with non-decreasing values of ``pos``
+        self._locate_line_num += buf[self._locate_pos:pos].count(b"\n")
+        nl = buf.rfind(b"\n", self._locate_pos, pos)
+        if nl >= 0:
+            self._locate_line_start = nl
+        self._locate_pos = pos
+        if self._locate_line_start is None:
+            return self._locate_line_num, pos
+        return self._locate_line_num, pos - self._locate_line_start
+
+    def _add_tree(self, buf, pos):
+        line_num, column_num = self._locate(buf, pos)
+        self.tree_offsets.append(pos)
+        self.tree_line_nums.append(line_num)
+        self.tree_column_nums.append(column_num)
+
+    def _scan_newick(self, buf):
+        self.schema = "newick"
+        pos = 0
+        while pos < len(buf):
+            statement_start = _skip_whitespace(buf, pos)
+            pos = _skip_insignificant(buf, statement_start)
+            if pos >= len(buf):
+                break
+            if buf[pos] == 0x3B: # ';': empty statement
+                pos += 1
+                continue
+            self._add_tree(buf, statement_start)
+            pos = _find_statement_end(buf, pos)
+        self.end_location = (len(buf),) + self._locate(buf, len(buf))
+
+    def _scan_nexus(self, buf, pos):
+        self.schema = "nexus"
+        while pos < len(buf):
+            pos = _skip_insignificant(buf, pos)
+            if pos >= len(buf):
+                break
+            token, pos = _read_word(buf, pos)
+            if token != b"BEGIN":
+                continue
+            pos = _skip_insignificant(buf, pos)
+            if pos >= len(buf):
+                break
+            block_name, pos = _read_word(buf, pos)
+            pos = _find_statement_end(buf, pos)
+            is_trees_block = block_name == b"TREES"
+            first_tree_idx = len(self.tree_offsets)
+            while pos < len(buf):
+                statement_start = _skip_whitespace(buf, pos)
+                pos = _skip_insignificant(buf, statement_start)
+                if pos >= len(buf):
+                    break
+                token, pos = _read_word(buf, pos)
+                if token == b"END" or token == b"ENDBLOCK":
+                    if is_trees_block:
+                        self.trees_blocks.append((
+                            first_tree_idx,
+                            len(self.tree_offsets) - first_tree_idx,
+                            (statement_start,) + self._locate(buf, statement_start),
+                            ))
+                        is_trees_block = False
+                    pos = _find_statement_end(buf, pos)
+                    break
+                if is_trees_block and token == b"TREE":
+                    self._add_tree(buf, statement_start)
+                if token != b";":
+                    pos = _find_statement_end(buf, pos)
+            if is_trees_block:
+                # unterminated block
+                self.trees_blocks.append((
+                    first_tree_idx,
+                    len(self.tree_offsets) - first_tree_idx,
+                    (len(buf),) + self._locate(buf, len(buf)),
+                    ))
+        self.end_location = (len(buf),) + self._locate(buf, len(buf))
+
+def get_sidecar_path(path, index_dir=None):
+    """
+    Returns the path of the sidecar index file for the file at ``path``. If
+    ``index_dir`` is |None|, this is the path of the source with
+    `TreeIndex.SIDECAR_SUFFIX` appended. Otherwise, it is a file in
+    ``index_dir`` named after the source and a digest of its absolute path,
+    so that sources with the same name in different directories do not
+    collide.
+    """
+    path = os.fspath(path)
+    if index_dir is None:
+        return path + TreeIndex.SIDECAR_SUFFIX
+    abspath = os.path.abspath(path)
+    digest = hashlib.sha1(os.fsencode(abspath)).hexdigest()[:16]
+    return os.path.join(os.fspath(index_dir), "{}.{}{}".format(
+        os.path.basename(abspath),
+        digest,
+        TreeIndex.SIDECAR_SUFFIX))
+
+def get_tree_index(path, rebuild=False, save=True, index_dir=None):
+    """
+    Returns a |TreeIndex| for the file at ``path``.
+
+    If a sidecar index file (see :func:`get_sidecar_path`; by default, the
+    path of the source with `TreeIndex.SIDECAR_SUFFIX` appended, or, if
+    ``index_dir`` is given, a file in that directory) exists and is current,
+    the index is loaded from it. Otherwise (or if ``rebuild`` is |True|), the
+    source is scanned to build the index and, if ``save`` is |True|, the
+    index is written to the sidecar file. Failure to write the sidecar file
+    (e.g., due to the directory not being writable) is not an error.
+    """
+    path = os.fspath(path)
+    sidecar_path = get_sidecar_path(path, index_dir=index_dir)
+    if not rebuild and os.path.exists(sidecar_path):
+        try:
+            tree_index = TreeIndex.load(sidecar_path)
+        except (ValueError, OSError):
+            tree_index = None
+        if tree_index is not None and tree_index.is_current_for(path):
+            return tree_index
+    tree_index = TreeIndex.build(path)
+    if save:
+        try:
+            tree_index.save(sidecar_path)
+        except OSError:
+            pass
+    return tree_index
@@ -620,6 +620,107 @@ class Serializable(object):
         self._format_and_write_to_stream(stream=s, schema=schema, **kwargs)
         return s.getvalue()
 
+##############################################################################
+## Slotted Data Objects
+
+def get_slot_names(cls):
+    """
+    Returns the names of the attributes declared by the ``__slots__`` of
+    ``cls`` and its base classes (other than ``__dict__`` and
+    ``__weakref__``).
+    """
+    try:
+        return _SLOT_NAMES[cls]
+    except KeyError:
+        pass
+    slot_names = []
+    for c in reversed(cls.__mro__):
+        slots = c.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name.startswith("__") and not name.endswith("__"):
+                name = "_{}{}".format(c.__name__.lstrip("_"), name)
+            if name not in ("__dict__", "__weakref__") and name not in slot_names:
+                slot_names.append(name)
+    slot_names = tuple(slot_names)
+    _SLOT_NAMES[cls] = slot_names
+    return slot_names
+_SLOT_NAMES = {}
+
+def get_instance_state(obj):
+    """
+    Returns the attributes set on ``obj``.
+
+    Parameters
+    ----------
+    obj : object
+        The object.
+
+    Returns
+    -------
+    d : dict or |None|
+        The instance dictionary of ``obj``, or |None| if it is empty (or
+        ``obj`` does not have one).
+    s : dict or |None|
+        The values of the ``__slots__`` attributes that are set on ``obj``,
+        keyed by attribute name, or |None| if there are none.
+
+    Notes
+    -----
+    Where supported (Python 3.11 and later), this does not create the
+    instance dictionary of slotted objects that have not needed one, which
+    accessing ``obj.__dict__`` would do.
+    """
+    if _object_getstate is not None:
+        state = _object_getstate(obj)
+        if isinstance(state, tuple):
+            return state[0] or None, state[1] or None
+        return state or None, None
+    slot_values = {}
+    for name in get_slot_names(obj.__class__):
+        try:
+            slot_values[name] = getattr(obj, name)
+        except AttributeError:
+            pass
+    return getattr(obj, "__dict__", None) or None, slot_values or None
+_object_getstate = getattr(object, "__getstate__", None)
+
+class SlottedAnnotable(object):
+    """
+    Mixin class for variants of |Annotable| data object classes that store
+    their attributes in ``__slots__`` (declared by the derived class) rather
+    than in a per-instance dictionary, to reduce memory use when there are
+    very many instances (e.g., the nodes and edges of large collections of
+    large trees).
+
+    Classes deriving from this must declare ``_annotations`` and
+    ``_comments`` slots. As with |Annotable|, the |AnnotationSet| holding
+    the annotations of an object is only created when first accessed; the
+    same is true of the list of ``comments``. Attributes not declared in the
+    ``__slots__`` (e.g., set by client code) are stored in the instance
+    dictionary inherited from the non-slotted base class, which is only
+    created when first needed.
+    """
+
+    __slots__ = ()
+
+    def _get_comments(self):
+        try:
+            return self._comments
+        except AttributeError:
+            self._comments = []
+            return self._comments
+    def _set_comments(self, comments):
+        self._comments = comments
+    comments = property(_get_comments, _set_comments)
+
+    def _release_comments(self):
+        # discard the (empty) comments list created by the base class
+        # constructor: it will be recreated if and when needed
+        if not self._comments:
+            del self._comments
+
 ##############################################################################
 ## Annotable
 
@@ -777,14 +878,25 @@ class Annotable(object):
             # store
             memo[id(self)] = other
         # copy other attributes first, skipping annotations
-        for k in self.__dict__:
-            if k == "_annotations":
-                continue
-            if k in other.__dict__:
-                continue
-            other.__dict__[k] = copy.deepcopy(self.__dict__[k], memo)
-            memo[id(self.__dict__[k])] = other.__dict__[k]
-            # assert id(self.__dict__[k]) in memo
+        self_dict, self_slots = get_instance_state(self)
+        if self_dict is not None:
+            for k in self_dict:
+                if k == "_annotations":
+                    continue
+                if k in other.__dict__:
+                    continue
+                other.__dict__[k] = copy.deepcopy(self_dict[k], memo)
+                memo[id(self_dict[k])] = other.__dict__[k]
+                # assert id(self.__dict__[k]) in memo
+        if self_slots is not None:
+            for k in self_slots:
+                if k == "_annotations":
+                    continue
+                if hasattr(other, k):
+                    continue
+                value = copy.deepcopy(self_slots[k], memo)
+                setattr(other, k, value)
+                memo[id(self_slots[k])] = value
         # create annotations
         other.deep_copy_annotations_from(self, memo)
         # return
@@ -22,6 +22,7 @@ Character and character-sequence data structures.
 """
 
 import warnings
+import array
 import copy
 from io import StringIO
 import math
@@ -180,7 +181,7 @@ class CharacterDataSequence(
         v : list
             List of string representation of values making up this vector.
         """
-        return list(str(cs) for cs in self._character_values)
+        return list(str(cs) for cs in self.values())
 
     def symbols_as_string(self, sep=""):
         """
@@ -192,7 +193,7 @@ class CharacterDataSequence(
         s : string
             String representation of values making up this vector.
         """
-        return sep.join(str(cs) for cs in self._character_values)
+        return sep.join(str(cs) for cs in self.values())
 
     def __str__(self):
         return self.symbols_as_string()
@@ -401,6 +402,396 @@ class CharacterDataSequence(
         """
         self._character_annotations[idx] = annotations
 
+class CharacterValueTable(object):
+    """
+    A list of distinct character values (typically, |StateIdentity|
+    objects), with each value identified by its index in the list. A table is
+    shared by the `CompactCharacterDataSequence` objects of a matrix, so that
+    the same value has the same index in all sequences.
+    """
+
+    def __init__(self, values=None):
+        """
+        Parameters
+        ----------
+        values : iterable of values
+            An initial set of (distinct) values.
+        """
+        self.values = []
+        self._value_indexes = {}
+        if values is not None:
+            for value in values:
+                self.index(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def index(self, value):
+        """
+        Returns the index of ``value``, adding it to the table if it is not
+        already in it.
+        """
+        try:
+            return self._value_indexes[value]
+        except KeyError:
+            idx = len(self.values)
+            self._value_indexes[value] = idx
+            self.values.append(value)
+            return idx
+
+    def indexes(self, values):
+        """
+        Returns a list of the indexes of ``values``, adding any values that
+        are not already in the table.
+        """
+        value_indexes = self._value_indexes
+        try:
+            return [value_indexes[value] for value in values]
+        except KeyError:
+            return [self.index(value) for value in values]
+
+# type codes of arrays of indexes, with the maximum index they can hold
+_VALUE_INDEX_TYPECODES = (("B", 0xFF), ("H", 0xFFFF), ("L", 0xFFFFFFFF))
+
+def _get_value_index_typecode(max_index):
+    for typecode, max_typecode_index in _VALUE_INDEX_TYPECODES:
+        if max_index <= max_typecode_index:
+            return typecode, max_typecode_index
+    raise ValueError("Too many distinct character values: {}".format(max_index + 1))
+
+class CompactCharacterDataSequence(CharacterDataSequence):
+    """
+    A sequence of character values that stores each value as an index into a
+    (shared) |CharacterValueTable| of distinct values, packed into an array of
+    unsigned bytes (or larger unsigned integers, if the table grows to more
+    than 256 values), rather than as a reference to the value itself.
+
+    Character type data and metadata annotations are stored in parallel lists
+    that are only created when the type or annotations of any character are
+    set.
+
+    Objects of this class can be used in place of (and have the same interface
+    as) `CharacterDataSequence` objects, except that the list returned by
+    ``values()`` is a new list of the values rather than the internal storage
+    of the sequence. This is used by matrices of discrete characters that are
+    compact (see :meth:`DiscreteCharacterMatrix.compact()`).
+    """
+
+    def __init__(self,
+            character_values=None,
+            character_types=None,
+            character_annotations=None,
+            value_table=None):
+        """
+        Parameters
+        ----------
+        character_values : iterable of values
+            A set of values for this sequence.
+        value_table : |CharacterValueTable|
+            The table of distinct values indexed by this sequence. If |None|, a
+            new table is created.
+        """
+        if value_table is None:
+            value_table = CharacterValueTable()
+        self._value_table = value_table
+        self._value_indexes = array.array("B")
+        self._max_value_index = 0xFF
+        self._character_types = None
+        self._character_annotations = None
+        if character_values:
+            self.extend(
+                    character_values=character_values,
+                    character_types=character_types,
+                    character_annotations=character_annotations)
+
+    def _get_value_table(self):
+        return self._value_table
+    value_table = property(_get_value_table)
+
+    def _widen_value_indexes(self, max_index):
+        # replaces the array of indexes with one of a type that can hold
+        # ``max_index``
+        typecode, self._max_value_index = _get_value_index_typecode(max_index)
+        self._value_indexes = array.array(typecode, self._value_indexes)
+
+    def _require_character_types(self):
+        if self._character_types is None:
+            self._character_types = [None] * len(self._value_indexes)
+        return self._character_types
+
+    def _require_character_annotations(self):
+        if self._character_annotations is None:
+            self._character_annotations = [None] * len(self._value_indexes)
+        return self._character_annotations
+
+    def value_indexes(self):
+        """
+        Returns the indexes of the values of this vector in ``value_table``.
+
+        Returns
+        -------
+        v : memoryview
+            A view of the array of indexes of the values of this vector (not a
+            copy).
+        """
+        return memoryview(self._value_indexes)
+
+    def values(self):
+        """
+        Returns list of values of this vector.
+
+        Returns
+        -------
+        v : list
+            List of values making up this vector.
+        """
+        return list(map(self._value_table.values.__getitem__, self._value_indexes))
+
+    def append(self, character_value, character_type=None, character_annotations=None):
+        """
+        Adds a value to ``self``.
+
+        Parameters
+        ----------
+        character_value : object
+            Value to be stored.
+        character_type : |CharacterType|
+            Description of character value.
+        character_annotations : |AnnotationSet|
+            Metadata annotations associated with this character.
+        """
+        if self._character_types is not None or character_type is not None:
+            self._require_character_types().append(character_type)
+        if self._character_annotations is not None or character_annotations is not None:
+            self._require_character_annotations().append(character_annotations)
+        value_index = self._value_table.index(character_value)
+        if value_index > self._max_value_index:
+            self._widen_value_indexes(value_index)
+        self._value_indexes.append(value_index)
+
+    def extend(self, character_values, character_types=None, character_annotations=None):
+        """
+        Extends ``self`` with values.
+
+        Parameters
+        ----------
+        character_values : iterable of objects
+            Values to be stored.
+        character_types : iterable of |CharacterType| objects
+            Descriptions of character values.
+        character_annotations : iterable |AnnotationSet| objects
+            Metadata annotations associated with characters.
+        """
+        if character_types is None:
+            if self._character_types is not None:
+                self._character_types.extend( [None] * len(character_values) )
+        else:
+            assert len(character_types) == len(character_values)
+            self._require_character_types().extend(character_types)
+        if character_annotations is None:
+            if self._character_annotations is not None:
+                self._character_annotations.extend( [None] * len(character_values) )
+        else:
+            assert len(character_annotations) == len(character_values)
+            self._require_character_annotations().extend(character_annotations)
+        value_indexes = self._value_table.indexes(character_values)
+        if value_indexes and max(value_indexes) > self._max_value_index:
+            self._widen_value_indexes(max(value_indexes))
+        self._value_indexes.extend(value_indexes)
+
+    def __len__(self):
+        return len(self._value_indexes)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return list(map(self._value_table.values.__getitem__, self._value_indexes[idx]))
+        return self._value_table.values[self._value_indexes[idx]]
+
+    def __setitem__(self, idx, value):
+        if isinstance(idx, slice):
+            value_indexes = self._value_table.indexes(value)
+            if value_indexes and max(value_indexes) > self._max_value_index:
+                self._widen_value_indexes(max(value_indexes))
+            self._value_indexes[idx] = array.array(self._value_indexes.typecode, value_indexes)
+        else:
+            value_index = self._value_table.index(value)
+            if value_index > self._max_value_index:
+                self._widen_value_indexes(value_index)
+            self._value_indexes[idx] = value_index
+
+    def __next__(self):
+        values = self._value_table.values
+        for v in self._value_indexes:
+            yield values[v]
+
+    def cell_iter(self):
+        """
+        Iterate over triplets of character values and associated
+        |CharacterType| and |AnnotationSet| instances.
+        """
+        values = self._value_table.values
+        character_types = self._character_types
+        character_annotations = self._character_annotations
+        for idx, v in enumerate(self._value_indexes):
+            yield (values[v],
+                    None if character_types is None else character_types[idx],
+                    None if character_annotations is None else character_annotations[idx])
+
+    def __delitem__(self, idx):
+        del self._value_indexes[idx]
+        if self._character_types is not None:
+            del self._character_types[idx]
+        if self._character_annotations is not None:
+            del self._character_annotations[idx]
+
+    def set_at(self, idx, character_value, character_type=None, character_annotations=None):
+        """
+        Set value and associated character type and metadata annotations for
+        element at ``idx``.
+
+        Parameters
+        ----------
+        idx : integer
+            Index of element to set.
+        character_value : object
+            Value to be stored.
+        character_type : |CharacterType|
+            Description of character value.
+        character_annotations : |AnnotationSet|
+            Metadata annotations associated with this character.
+        """
+        to_add = (idx+1) - len(self._value_indexes)
+        while to_add > 0:
+            self.append(None)
+            to_add -= 1
+        self[idx] = character_value
+        self.set_character_type_at(idx, character_type)
+        self.set_annotations_at(idx, character_annotations)
+
+    def insert(self, idx, character_value, character_type=None, character_annotations=None):
+        """
+        Insert value and associated character type and metadata annotations for
+        element at ``idx``.
+
+        Parameters
+        ----------
+        idx : integer
+            Index of element to set.
+        character_value : object
+            Value to be stored.
+        character_type : |CharacterType|
+            Description of character value.
+        character_annotations : |AnnotationSet|
+            Metadata annotations associated with this character.
+        """
+        if self._character_types is not None or character_type is not None:
+            self._require_character_types().insert(idx, character_type)
+        if self._character_annotations is not None or character_annotations is not None:
+            self._require_character_annotations().insert(idx, character_annotations)
+        value_index = self._value_table.index(character_value)
+        if value_index > self._max_value_index:
+            self._widen_value_indexes(value_index)
+        self._value_indexes.insert(idx, value_index)
+
+    def value_at(self, idx):
+        """
+        Return value of character at ``idx``.
+
+        Parameters
+        ----------
+        idx : integer
+            Index of element value to return.
+
+        Returns
+        -------
+        c : object
+            Value of character at index ``idx``.
+        """
+        return self[idx]
+
+    def character_type_at(self, idx):
+        """
+        Return type of character at ``idx``.
+
+        Parameters
+        ----------
+        idx : integer
+            Index of element character type to return.
+
+        Returns
+        -------
+        c : |CharacterType|
+            |CharacterType| associated with character index ``idx``.
+        """
+        self._value_indexes[idx]
+        if self._character_types is None:
+            return None
+        return self._character_types[idx]
+
+    def annotations_at(self, idx):
+        """
+        Return metadata annotations of character at ``idx``.
+
+        Parameters
+        ----------
+        idx : integer
+            Index of element annotations to return.
+
+        Returns
+        -------
+        c : |AnnotationSet|
+            |AnnotationSet| representing metadata annotations of character at index ``idx``.
+        """
+        if not self.has_annotations_at(idx):
+            self._require_character_annotations()[idx] = basemodel.AnnotationSet(self.character_type_at(idx))
+        return self._character_annotations[idx]
+
+    def has_annotations_at(self, idx):
+        """
+        Return |True| if character at ``idx`` has metadata annotations.
+
+        Parameters
+        ----------
+        idx : integer
+            Index of element annotations to check.
+
+        Returns
+        -------
+        b : bool
+            |True| if character at ``idx`` has metadata annotations, |False|
+            otherwise.
+        """
+        self._value_indexes[idx]
+        if self._character_annotations is None:
+            return False
+        return not self._character_annotations[idx] is None
+
+    def set_character_type_at(self, idx, character_type):
+        """
+        Set type of character at ``idx``.
+
+        Parameters
+        ----------
+        idx : integer
+            Index of element character type to set.
+        """
+        self._value_indexes[idx]
+        if self._character_types is not None or character_type is not None:
+            self._require_character_types()[idx] = character_type
+
+    def set_annotations_at(self, idx, annotations):
+        """
+        Set metadata annotations of character at ``idx``.
+
+        Parameters
+        ----------
+        idx : integer
+            Index of element annotations to set.
+        """
+        self._value_indexes[idx]
+        if self._character_annotations is not None or annotations is not None:
+            self._require_character_annotations()[idx] = annotations
+
 ###############################################################################
 ## Subset of Character (Columns)
 
@@ -813,6 +1204,9 @@ class CharacterMatrix(
     def __copy__(self):
         other = self.__class__(label=self.label,
             taxon_namespace=self.taxon_namespace)
+        if getattr(self, "_compact_value_table", None) is not None:
+            # the (shared) sequences of a compact matrix index into its table
+            other._compact_value_table = self._compact_value_table
         for taxon in self._taxon_sequence_map:
             # other._taxon_sequence_map[taxon] = self.__class__.character_sequence_type(self._taxon_sequence_map[taxon])
             other._taxon_sequence_map[taxon] = self._taxon_sequence_map[taxon]
@@ -994,10 +1388,24 @@ class CharacterMatrix(
             raise ValueError("Character values vector for taxon {} already exists".format(repr(taxon)))
         if taxon not in self.taxon_namespace:
             raise ValueError("Taxon {} is not in object taxon namespace".format(repr(taxon)))
-        cv = self.__class__.character_sequence_type(values)
+        cv = self._new_character_sequence(values)
         self._taxon_sequence_map[taxon] = cv
         return cv
 
+    def _new_character_sequence(self, values=None):
+        """
+        Returns a new `CharacterDataSequence` (of the type used by ``self``)
+        populated with values in ``values``.
+        """
+        return self.__class__.character_sequence_type(values)
+
+    def _is_character_sequence(self, values):
+        """
+        Returns |True| if ``values`` is a `CharacterDataSequence` of the type
+        used by ``self``, and can be added to ``self`` as-is.
+        """
+        return isinstance(values, self.__class__.character_sequence_type)
+
     def __getitem__(self, key):
         """
         Retrieves sequence for ``key``, which can be a index or a label of a
@@ -1056,8 +1464,8 @@ class CharacterMatrix(
         taxon = self._resolve_key(key)
         if taxon not in self.taxon_namespace:
             raise ValueError(repr(key))
-        if not isinstance(values, self.__class__.character_sequence_type):
-            values = self.__class__.character_sequence_type(values)
+        if not self._is_character_sequence(values):
+            values = self._new_character_sequence(values)
         self._taxon_sequence_map[taxon] = values
 
     def __contains__(self, key):
@@ -1351,7 +1759,7 @@ class CharacterMatrix(
             raise error.TaxonNamespaceIdentityError(self, other_matrix)
         for taxon in other_matrix._taxon_sequence_map:
             if taxon not in self._taxon_sequence_map:
-                self._taxon_sequence_map[taxon] = self.__class__.character_sequence_type(other_matrix._taxon_sequence_map[taxon])
+                self._taxon_sequence_map[taxon] = self._new_character_sequence(other_matrix._taxon_sequence_map[taxon])
 
     def replace_sequences(self, other_matrix):
         """
@@ -1376,7 +1784,7 @@ class CharacterMatrix(
             raise error.TaxonNamespaceIdentityError(self, other_matrix)
         for taxon in other_matrix._taxon_sequence_map:
             if taxon in self._taxon_sequence_map:
-                self._taxon_sequence_map[taxon] = self.__class__.character_sequence_type(other_matrix._taxon_sequence_map[taxon])
+                self._taxon_sequence_map[taxon] = self._new_character_sequence(other_matrix._taxon_sequence_map[taxon])
 
     def update_sequences(self, other_matrix):
         """
@@ -1402,7 +1810,7 @@ class CharacterMatrix(
         if other_matrix.taxon_namespace is not self.taxon_namespace:
             raise error.TaxonNamespaceIdentityError(self, other_matrix)
         for taxon in other_matrix._taxon_sequence_map:
-            self._taxon_sequence_map[taxon] = self.__class__.character_sequence_type(other_matrix._taxon_sequence_map[taxon])
+            self._taxon_sequence_map[taxon] = self._new_character_sequence(other_matrix._taxon_sequence_map[taxon])
 
     def extend_sequences(self, other_matrix, is_add_new_sequences=False):
         """
@@ -1430,7 +1838,7 @@ class CharacterMatrix(
             if taxon not in self._taxon_sequence_map:
                 if not is_add_new_sequences:
                     continue
-                self._taxon_sequence_map[taxon] = self.__class__.character_sequence_type(other_matrix._taxon_sequence_map[taxon])
+                self._taxon_sequence_map[taxon] = self._new_character_sequence(other_matrix._taxon_sequence_map[taxon])
             else:
                 self._taxon_sequence_map[taxon].extend(other_matrix._taxon_sequence_map[taxon])
 
@@ -1464,7 +1872,7 @@ class CharacterMatrix(
             if taxon in self._taxon_sequence_map:
                 self._taxon_sequence_map[taxon].extend(other_matrix._taxon_sequence_map[taxon])
             else:
-                self._taxon_sequence_map[taxon]= self.__class__.character_sequence_type(other_matrix._taxon_sequence_map[taxon])
+                self._taxon_sequence_map[taxon]= self._new_character_sequence(other_matrix._taxon_sequence_map[taxon])
 
     def remove_sequences(self, taxa):
         """
@@ -1730,10 +2138,177 @@ class DiscreteCharacterMatrix(CharacterMatrix):
 
     data_type = "discrete"
 
+    @classmethod
+    def from_value_index_array(cls,
+            taxa,
+            values,
+            value_indexes,
+            case_sensitive_taxon_labels=False,
+            **kwargs):
+        r"""
+        Creates and returns a compact matrix of the type of ``cls`` (see
+        :meth:`DiscreteCharacterMatrix.compact()`) from the values of its
+        characters given as indexes into a list of distinct values, in a single
+        array (the inverse of
+        :meth:`DiscreteCharacterMatrix.as_value_index_array()`).
+
+        Parameters
+        ----------
+        taxa : iterable
+            The labels of |Taxon| objects or |Taxon| objects, one for each
+            sequence.
+        values : iterable
+            The distinct values (typically, |StateIdentity| objects) of the
+            characters.
+        value_indexes : array.array, memoryview or other sequence of integers
+            The index (in ``values``) of the value of each character of each
+            sequence, in order of the sequences (in ``taxa``) and then
+            characters. Must be divisible into sequences of the same length.
+        case_sensitive_taxon_labels : boolean
+            If |True|, matching of string labels specified in ``taxa`` will
+            be matched to |Taxon| objects in current taxon namespace
+            with case being respected. If |False|, then case will be ignored.
+        \*\*kwargs : keyword arguments, optional
+            Keyword arguments to be passed to constructor of
+            |CharacterMatrix|.
+
+        Returns
+        -------
+        char_matrix : |DiscreteCharacterMatrix|
+            A compact matrix populated by the sequences of ``value_indexes``.
+        """
+        char_matrix = cls(**kwargs)
+        char_matrix.compact()
+        value_table = char_matrix._compact_value_table
+        values = list(values)
+        for value in values:
+            value_table.index(value)
+        if len(value_table) != len(values):
+            raise ValueError("Character values are not distinct")
+        taxa = list(taxa)
+        if taxa:
+            sequence_size, remainder = divmod(len(value_indexes), len(taxa))
+        else:
+            sequence_size, remainder = 0, len(value_indexes)
+        if remainder:
+            raise ValueError("{} values cannot be divided into {} sequences of the same length".format(len(value_indexes), len(taxa)))
+        if len(value_indexes) and max(value_indexes) >= len(value_table):
+            raise IndexError("Character value index out of range: {}".format(max(value_indexes)))
+        typecode, max_value_index = _get_value_index_typecode(max(len(value_table) - 1, 0))
+        for idx, taxon in enumerate(taxa):
+            if textprocessing.is_str_type(taxon):
+                taxon = char_matrix.taxon_namespace.require_taxon(taxon,
+                        is_case_sensitive=case_sensitive_taxon_labels)
+            elif taxon not in char_matrix.taxon_namespace:
+                char_matrix.taxon_namespace.add_taxon(taxon)
+            cv = char_matrix._new_character_sequence()
+            cv._value_indexes = array.array(typecode, value_indexes[idx * sequence_size:(idx + 1) * sequence_size])
+            cv._max_value_index = max_value_index
+            char_matrix[taxon] = cv
+        return char_matrix
+
     def __init__(self, *args, **kwargs):
+        is_compact = kwargs.pop("is_compact", False)
+        self._compact_value_table = None
         CharacterMatrix.__init__(self, *args, **kwargs)
         self.state_alphabets = []
         self._default_state_alphabet = None
+        if is_compact:
+            self.compact()
+
+    def _new_character_sequence(self, values=None):
+        if self._compact_value_table is None:
+            return CharacterMatrix._new_character_sequence(self, values)
+        return CompactCharacterDataSequence(values, value_table=self._compact_value_table)
+
+    def _is_character_sequence(self, values):
+        if self._compact_value_table is None:
+            return CharacterMatrix._is_character_sequence(self, values)
+        return (isinstance(values, CompactCharacterDataSequence)
+                and values.value_table is self._compact_value_table)
+
+    def _get_is_compact(self):
+        return self._compact_value_table is not None
+    is_compact = property(_get_is_compact)
+
+    def compact(self):
+        """
+        Converts all sequences in ``self`` to `CompactCharacterDataSequence`
+        objects, which store each character value as an index (of one byte,
+        for most data types) into a table of the distinct values in ``self``,
+        and only allocate storage for character types or metadata annotations
+        if these are set. All sequences added to ``self`` after this are also
+        converted. Has no effect if ``self`` is already compact.
+
+        This can reduce the memory used by large matrices several-fold, at the
+        cost of slower access to individual characters.
+        """
+        if self._compact_value_table is not None:
+            return
+        self._compact_value_table = CharacterValueTable()
+        for taxon, cv in self._taxon_sequence_map.items():
+            character_values = []
+            character_types = []
+            character_annotations = []
+            for v, t, a in cv.cell_iter():
+                character_values.append(v)
+                character_types.append(t)
+                character_annotations.append(a)
+            if all(t is None for t in character_types):
+                character_types = None
+            if all(a is None for a in character_annotations):
+                character_annotations = None
+            compact_cv = CompactCharacterDataSequence(
+                    character_values,
+                    character_types=character_types,
+                    character_annotations=character_annotations,
+                    value_table=self._compact_value_table)
+            compact_cv.copy_annotations_from(cv)
+            self._taxon_sequence_map[taxon] = compact_cv
+
+    def as_value_index_array(self):
+        """
+        Returns the values of the characters in ``self`` as indexes into a list
+        of distinct values, in a single array.
+
+        Returns
+        -------
+        values : list
+            The distinct values (typically, |StateIdentity| objects) of the
+            characters.
+        value_indexes : array.array
+            The index (in ``values``) of the value of each character of each
+            sequence, in order of the sequences (in the order of their taxa in
+            the taxon namespace, as iterated over by ``self``) and then
+            characters.
+
+        Raises
+        ------
+        ValueError
+            If the sequences are not all of the same length.
+        """
+        if self._compact_value_table is None:
+            value_table = CharacterValueTable()
+        else:
+            value_table = self._compact_value_table
+        sequences = list(self.values())
+        sequence_size = len(sequences[0]) if sequences else 0
+        for cv in sequences:
+            if len(cv) != sequence_size:
+                raise ValueError("Sequences are not all of the same length")
+            if not (isinstance(cv, CompactCharacterDataSequence) and cv.value_table is value_table):
+                value_table.indexes(cv)
+        typecode = _get_value_index_typecode(max(len(value_table) - 1, 0))[0]
+        value_indexes = array.array(typecode)
+        for cv in sequences:
+            if isinstance(cv, CompactCharacterDataSequence) and cv.value_table is value_table:
+                if cv._value_indexes.typecode == typecode:
+                    value_indexes.extend(cv._value_indexes)
+                else:
+                    value_indexes.extend(array.array(typecode, cv._value_indexes))
+            else:
+                value_indexes.extend(value_table.indexes(cv))
+        return list(value_table.values), value_indexes
 
     def _get_default_state_alphabet(self):
         if self._default_state_alphabet is not None:
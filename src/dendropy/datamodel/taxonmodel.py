@@ -77,6 +77,7 @@ be related through correct interpretation of their taxon labels.
 
 
 import copy
+import weakref
 from io import StringIO
 from dendropy.datamodel import basemodel
 from dendropy.utility import bitprocessing
@@ -436,6 +437,29 @@ class TaxonNamespace(
     can be related.
     """
 
+    @classmethod
+    def taxon_factory(cls, **kwargs):
+        """
+        Creates and returns a |Taxon| object.
+
+        Derived classes can override this method to provide support for
+        specialized or different types of taxa in the namespace (e.g.,
+        |SlottedTaxon|).
+
+        Parameters
+        ----------
+
+        kwargs : keyword arguments
+            Passed directly to constructor of |Taxon|.
+
+        Returns
+        -------
+        |Taxon|
+            A new |Taxon| object.
+
+        """
+        return Taxon(**kwargs)
+
     ### Life-cycle
 
     def __init__(self, *args, **kwargs):
@@ -542,6 +566,9 @@ class TaxonNamespace(
         self._taxon_bitmask_map = {}
         # self._split_bitmask_taxon_map = {}
         self._current_accession_count = 0
+        # (label => taxa, lower-cased label => taxa), built on demand by
+        # ``_get_label_index()``
+        self._label_index = None
         if len(args) > 1:
             raise TypeError("TaxonNamespace() takes at most 1 non-keyword argument ({} given)".format(len(args)))
         elif len(args) == 1:
@@ -558,7 +585,7 @@ class TaxonNamespace(
                 for t1, t2 in zip(self._taxa, other._taxa):
                     memo[id(t2)] = t1
                 for k in other.__dict__:
-                    if k == "_annotations" or k == "_taxa":
+                    if k == "_annotations" or k == "_taxa" or k == "_label_index":
                         continue
                     self.__dict__[k] = copy.deepcopy(other.__dict__[k], memo)
                 self.deep_copy_annotations_from(other, memo=memo)
@@ -574,6 +601,13 @@ class TaxonNamespace(
     def __copy__(self):
         return TaxonNamespace(self)
 
+    def __getstate__(self):
+        # the label index is rebuilt when needed, as the taxa do not keep
+        # their references to it when pickled
+        state = dict(self.__dict__)
+        state["_label_index"] = None
+        return state
+
     def taxon_namespace_scoped_copy(self, memo=None):
         self.populate_memo_for_taxon_namespace_scoped_copy(memo=memo)
         return self
@@ -588,9 +622,10 @@ class TaxonNamespace(
         for t in self._taxa:
             o._taxa.append(copy.deepcopy(t, memo))
         for k in self.__dict__:
-            if k == "_annotations" or k == "_taxa":
+            if k == "_annotations" or k == "_taxa" or k == "_label_index":
                 continue
             o.__dict__[k] = copy.deepcopy(self.__dict__[k], memo)
+        o._label_index = None
         o.deep_copy_annotations_from(self, memo=memo)
         # o.copy_annotations_from(self, attribute_object_mapper=memo)
         return o
@@ -706,28 +741,75 @@ class TaxonNamespace(
             `first_match_only==False`, a list of one or more |Taxon|
             instances with a ``label`` attribute matching the ``label`` argument.
         """
-        taxa = []
+        label_taxa_map, lower_cased_label_taxa_map = self._get_label_index()
         if is_case_sensitive is True or (is_case_sensitive is None and self.is_case_sensitive):
-            for taxon in self._taxa:
-                if label == taxon.label:
-                    if first_match_only:
-                        return taxon
-                    else:
-                        taxa.append(taxon)
+            taxa = label_taxa_map.get(label)
         else:
             label = str(label).lower()
-            for taxon in self._taxa:
-                if label == taxon.lower_cased_label:
-                    if first_match_only:
-                        return taxon
-                    else:
-                        taxa.append(taxon)
-        if len(taxa) == 0:
+            taxa = lower_cased_label_taxa_map.get(label)
+        if not taxa:
             if error_if_not_found:
                 raise LookupError(label)
             else:
                 return None
-        return taxa
+        if first_match_only:
+            return taxa[0]
+        return list(taxa)
+
+    def _get_label_index(self):
+        """
+        Returns dictionaries mapping labels and lower-cased labels to lists of
+        the |Taxon| objects with those labels, in the order of the taxa in
+        this namespace. The index is built if there is none; it is updated as
+        taxa are added, removed or relabeled, and discarded if the taxa are
+        reordered.
+        """
+        label_index = self._label_index
+        if label_index is not None:
+            return label_index
+        label_taxa_map = {}
+        lower_cased_label_taxa_map = {}
+        for taxon in self._taxa:
+            self._index_taxon_label(taxon, label_taxa_map, lower_cased_label_taxa_map)
+        self._label_index = (label_taxa_map, lower_cased_label_taxa_map)
+        return self._label_index
+
+    def _index_taxon_label(self, taxon, label_taxa_map, lower_cased_label_taxa_map):
+        taxon._add_label_index_namespace(self)
+        try:
+            label_taxa_map[taxon.label].append(taxon)
+        except KeyError:
+            label_taxa_map[taxon.label] = [taxon]
+        try:
+            lower_cased_label_taxa_map[taxon.lower_cased_label].append(taxon)
+        except KeyError:
+            lower_cased_label_taxa_map[taxon.lower_cased_label] = [taxon]
+
+    def _reindex_taxon_label(self, taxon, old_label, old_lower_cased_label):
+        """
+        Updates the label index for a change in the label of ``taxon``, from
+        ``old_label``. Called by the |Taxon| object, for each namespace whose
+        index includes it.
+        """
+        label_index = self._label_index
+        if label_index is None:
+            return
+        for label_taxa_map, old, new in (
+                (label_index[0], old_label, taxon.label),
+                (label_index[1], old_lower_cased_label, taxon.lower_cased_label)):
+            taxa = label_taxa_map.get(old)
+            if not taxa or taxon not in taxa:
+                # removed from this namespace
+                return
+            taxa.remove(taxon)
+            if not taxa:
+                del label_taxa_map[old]
+            if new in label_taxa_map:
+                # the taxa with the new label are kept in the order of the
+                # namespace, so let the index be rebuilt
+                self._label_index = None
+                return
+            label_taxa_map[new] = [taxon]
 
     ### Adding Taxa
 
@@ -769,6 +851,9 @@ class TaxonNamespace(
         self._accession_index_taxon_map[self._current_accession_count] = taxon
         self._taxon_accession_index_map[taxon] = self._current_accession_count
         self._current_accession_count += 1
+        label_index = self._label_index
+        if label_index is not None:
+            self._index_taxon_label(taxon, label_index[0], label_index[1])
 
     def append(self, taxon):
         """
@@ -819,7 +904,7 @@ class TaxonNamespace(
         """
         if not self.is_mutable:
             raise error.ImmutableTaxonNamespaceError("Taxon '{}' cannot be added to an immutable TaxonNamespace".format(label))
-        taxon = Taxon(label=label)
+        taxon = self.taxon_factory(label=label)
         self.add_taxon(taxon)
         return taxon
 
@@ -875,6 +960,15 @@ class TaxonNamespace(
         # assert taxon not in self._taxa
         while taxon in self._taxa:
             self._taxa.remove(taxon)
+        label_index = self._label_index
+        if label_index is not None:
+            for label_taxa_map, label in (
+                    (label_index[0], taxon.label),
+                    (label_index[1], taxon.lower_cased_label)):
+                taxa = label_taxa_map[label]
+                taxa.remove(taxon)
+                if not taxa:
+                    del label_taxa_map[label]
         idx = self._taxon_accession_index_map.pop(taxon, None)
         if idx is not None:
             self._accession_index_taxon_map.pop(idx, None)
@@ -991,6 +1085,7 @@ class TaxonNamespace(
         self._taxon_accession_index_map.clear()
         self._taxon_bitmask_map.clear()
         # self._split_bitmask_taxon_map.clear()
+        self._label_index = None
 
     ### Look-up and Retrieval of Taxa
 
@@ -1252,12 +1347,14 @@ class TaxonNamespace(
         if key is None:
             key = lambda x: x.label
         self._taxa.sort(key=key, reverse=reverse)
+        self._label_index = None
 
     def reverse(self):
         """
         Reverses order of |Taxon| objects in collection.
         """
         self._taxa.reverse()
+        self._label_index = None
 
     ### Summarization of Collection
 
@@ -1662,27 +1759,55 @@ class Taxon(
             set to the same value as the ``label`` attribute the other
             |Taxon| object and all annotations/metadata are copied.
         """
+        # weak references to the |TaxonNamespace| objects whose label indexes
+        # include this taxon (see :meth:`TaxonNamespace._get_label_index`),
+        # which are updated when the label changes
+        self._label_index_namespaces = None
         if isinstance(label, Taxon):
             other_taxon = label
             label = other_taxon.label
             memo={id(other_taxon):self}
-            for k in other_taxon.__dict__:
-                if k != "_annotations":
-                    self.__dict__[k] = copy.deepcopy(other_taxon.__dict__[k], memo=memo)
+            for attributes in basemodel.get_instance_state(other_taxon):
+                if attributes is None:
+                    continue
+                for k in attributes:
+                    if k != "_annotations" and k != "_label_index_namespaces":
+                        setattr(self, k, copy.deepcopy(attributes[k], memo=memo))
             self.deep_copy_annotations_from(other_taxon, memo=memo)
             # self.copy_annotations_from(other_taxon, attribute_object_mapper=memo)
         else:
-            basemodel.DataObject.__init__(self, label=label)
+            basemodel.DataObject.__init__(self)
+            self._label = label
             self._lower_cased_label = None
         self.comments = []
 
     def _get_label(self):
         return self._label
     def _set_label(self, v):
+        old_label = self._label
+        if (not self._label_index_namespaces
+                or (type(v) is type(old_label) and v == old_label)):
+            self._label = v
+            self._lower_cased_label = None
+            return
+        old_lower_cased_label = self.lower_cased_label
         self._label = v
         self._lower_cased_label = None
+        for namespace_ref in list(self._label_index_namespaces):
+            taxon_namespace = namespace_ref()
+            if taxon_namespace is None:
+                self._label_index_namespaces.remove(namespace_ref)
+            else:
+                taxon_namespace._reindex_taxon_label(self, old_label, old_lower_cased_label)
     label = property(_get_label, _set_label)
 
+    def _add_label_index_namespace(self, taxon_namespace):
+        namespace_ref = weakref.ref(taxon_namespace)
+        if self._label_index_namespaces is None:
+            self._label_index_namespaces = [namespace_ref]
+        elif namespace_ref not in self._label_index_namespaces:
+            self._label_index_namespaces.append(namespace_ref)
+
     def _get_lower_cased_label(self):
         if self._label is None:
             return None
@@ -1709,13 +1834,31 @@ class Taxon(
             # o = type(self).__new__(self.__class__)
             o = self.__class__.__new__(self.__class__)
             memo[id(self)] = o
-        for k in self.__dict__:
-            if k != "_annotations":
-                o.__dict__[k] = copy.deepcopy(self.__dict__[k], memo)
+        for attributes in basemodel.get_instance_state(self):
+            if attributes is None:
+                continue
+            for k in attributes:
+                if k != "_annotations" and k != "_label_index_namespaces":
+                    setattr(o, k, copy.deepcopy(attributes[k], memo))
+        o._label_index_namespaces = None
         o.deep_copy_annotations_from(self, memo)
         # o.copy_annotations_from(self, attribute_object_mapper=memo)
         return o
 
+    def __getstate__(self):
+        # weak references cannot be pickled, and the namespaces are not
+        # necessarily pickled with the taxon
+        state, slot_state = basemodel.get_instance_state(self)
+        if slot_state is not None and "_label_index_namespaces" in slot_state:
+            slot_state = dict(slot_state)
+            slot_state["_label_index_namespaces"] = None
+        elif state is not None and "_label_index_namespaces" in state:
+            state = dict(state)
+            state["_label_index_namespaces"] = None
+        if slot_state is None:
+            return state
+        return state, slot_state
+
     def __hash__(self):
         return id(self)
 
@@ -1749,6 +1892,29 @@ class Taxon(
             output.write(s)
         return s
 
+class SlottedTaxon(
+        basemodel.SlottedAnnotable,
+        Taxon):
+    """
+    A |Taxon| that stores its attributes in ``__slots__`` rather than in a
+    per-instance dictionary, and only creates its list of comments and set of
+    annotations when these are needed, reducing its memory footprint.
+    Created by :meth:`TaxonNamespace.new_taxon` if the
+    :meth:`TaxonNamespace.taxon_factory` of the namespace creates them.
+    """
+
+    __slots__ = (
+        "_label",
+        "_lower_cased_label",
+        "_label_index_namespaces",
+        "_annotations",
+        "_comments",
+    )
+
+    def __init__(self, label=None):
+        Taxon.__init__(self, label=label)
+        self._release_comments()
+
 ##############################################################################
 ## TaxonNamespacePartition
 
@@ -22,18 +22,25 @@ This module handles the core definition of classes that model collections of
 trees.
 """
 
+import array
 import collections
+import functools
+import itertools
 import math
+import operator
+import os
 import copy
 from dendropy.utility import error
 from dendropy.utility import bitprocessing
 from dendropy.utility import deprecate
 from dendropy.utility import constants
+from dendropy.utility import parallel
 from dendropy.calculate import statistics
 from dendropy.datamodel import basemodel
 from dendropy.datamodel import taxonmodel
 from dendropy.datamodel import treemodel
 from dendropy import dataio
+from dendropy.dataio import treearrayfile
 
 ##############################################################################
 ### TreeList
@@ -1045,7 +1052,8 @@ class TreeList(
                 ultrametricity_precision=kwargs_dict.pop("ultrametricity_precision", constants.DEFAULT_ULTRAMETRICITY_PRECISION),
                 is_force_max_age=kwargs_dict.pop("is_force_max_age", None),
                 taxon_label_age_map=kwargs_dict.pop("taxon_label_age_map", None),
-                is_bipartitions_updated=kwargs_dict.pop("is_bipartitions_updated", False)
+                is_bipartitions_updated=kwargs_dict.pop("is_bipartitions_updated", False),
+                summary_reservoir_size=kwargs_dict.pop("summary_reservoir_size", None),
                 )
         return ta
 
@@ -1093,6 +1101,51 @@ class TreeList(
                 summarize_splits=summarize_splits,
                 **kwargs)
 
+    def robinson_foulds_distance_matrix(self,
+            is_weighted=False,
+            is_condensed=False,
+            num_processes=None,
+            is_bipartitions_updated=False):
+        """
+        Returns the Robinson-Foulds distances between all pairs of trees in
+        self, calculated from a |TreeArray| of the trees (see
+        :meth:`TreeArray.robinson_foulds_distance_matrix`), so that the
+        bipartitions of each tree are encoded only once.
+
+        Parameters
+        ----------
+        is_weighted : bool
+            If |True|, then the weighted Robinson-Foulds distances (as given by
+            :func:`treecompare.weighted_robinson_foulds_distance`) are
+            calculated. Otherwise [default], the unweighted Robinson-Foulds
+            distances (as given by :func:`treecompare.symmetric_difference`)
+            are calculated.
+        is_condensed : bool
+            If |True|, then the distances are returned as a condensed distance
+            matrix (a flat ``array.array`` of the distances between trees ``i``
+            and ``j`` for all ``i < j``, in row-major order). Otherwise
+            [default], a list of lists is returned.
+        num_processes : int or None
+            If greater than 1, then the matrix is calculated using a pool of
+            this number of processes.
+        is_bipartitions_updated : bool
+            If |True|, then the trees are assumed to have their bipartitions
+            already encoded and updated.
+
+        Returns
+        -------
+        d : list[list[numeric]] or ``array.array``
+            The distances between all pairs of trees in self.
+        """
+        ta = self._get_tree_array({
+            "ignore_edge_lengths": not is_weighted,
+            "is_bipartitions_updated": is_bipartitions_updated,
+            })
+        return ta.robinson_foulds_distance_matrix(
+                is_weighted=is_weighted,
+                is_condensed=is_condensed,
+                num_processes=num_processes)
+
     def maximum_product_of_split_support_tree(
             self,
             include_external_splits=False,
@@ -1222,6 +1275,15 @@ class TreeList(
 class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
     """
     Collects information regarding splits over multiple trees.
+
+    By default, every edge length and node age collected for each split is
+    stored (in ``split_edge_lengths`` and ``split_node_ages``). If
+    ``summary_reservoir_size`` is given, then, instead, a
+    :class:`~dendropy.calculate.statistics.StreamingSummary` is kept for each
+    split, which tracks the count, mean, variance, and range of the values
+    exactly, and the median, HPD and quantiles from a random sample of (at
+    most) ``summary_reservoir_size`` of the values, so that memory use does
+    not grow with the number of trees counted.
     """
 
     SUMMARY_STATS_FIELDNAMES = ('mean', 'median', 'sd', 'hpd95', 'quant_5_95', 'range')
@@ -1233,7 +1295,8 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             use_tree_weights=True,
             ultrametricity_precision=constants.DEFAULT_ULTRAMETRICITY_PRECISION,
             is_force_max_age=False,
-            taxon_label_age_map=None):
+            taxon_label_age_map=None,
+            summary_reservoir_size=None):
 
         # Taxon Namespace
         taxonmodel.TaxonNamespaceAssociated.__init__(self,
@@ -1244,14 +1307,19 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
         self.ignore_node_ages = ignore_node_ages
         self.use_tree_weights = use_tree_weights
         self.ultrametricity_precision = ultrametricity_precision
+        self.summary_reservoir_size = summary_reservoir_size
 
         # storage/function
         self.total_trees_counted = 0
         self.sum_of_tree_weights = 0.0
         self.tree_rooting_types_counted = set()
         self.split_counts = collections.defaultdict(float)
-        self.split_edge_lengths = collections.defaultdict(list)
-        self.split_node_ages = collections.defaultdict(list)
+        if summary_reservoir_size is None:
+            value_factory = list
+        else:
+            value_factory = functools.partial(statistics.StreamingSummary, summary_reservoir_size)
+        self.split_edge_lengths = collections.defaultdict(value_factory)
+        self.split_node_ages = collections.defaultdict(value_factory)
         self.is_force_max_age = is_force_max_age
         self.is_force_min_age = False
         self.taxon_label_age_map = taxon_label_age_map
@@ -1388,7 +1456,7 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             splits.append(split)
             self.split_counts[split] += weight_to_use
             if not self.ignore_edge_lengths:
-                sel = self.split_edge_lengths.setdefault(split,[])
+                sel = self.split_edge_lengths[split]
                 if edge.length is None:
                     elen = default_edge_length_value
                 else:
@@ -1398,7 +1466,7 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             else:
                 sel = None
             if not self.ignore_node_ages:
-                sna = self.split_node_ages.setdefault(split, [])
+                sna = self.split_node_ages[split]
                 if edge.head_node is not None:
                     nage = edge.head_node.age
                 else:
@@ -1409,6 +1477,77 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
                 sna = None
         return splits, edge_lengths, node_ages
 
+    def count_split_bitmasks(self,
+            split_bitmasks,
+            edge_lengths=None,
+            weight=None,
+            is_rooted=None,
+            default_edge_length_value=None):
+        """
+        Counts splits given directly as split bitmasks (e.g., the
+        ``split_bitmasks`` of a `SplitEncodedTree`) and add to totals. As no
+        tree is available, node ages cannot be collected: this may only be
+        used if ``ignore_node_ages`` is |True|.
+
+        Parameters
+        ----------
+        split_bitmasks : iterable of integers
+            The split bitmasks of a tree.
+        edge_lengths : iterable of numeric values
+            The lengths of the edges subtending the splits in
+            ``split_bitmasks``, in the same order. Ignored if
+            ``ignore_edge_lengths`` is |True|.
+        weight : numeric
+            The weight of the tree. If |None| (or ``use_tree_weights`` is
+            |False|), then a weight of 1.0 is used.
+        is_rooted : bool
+            The rooting state of the tree.
+        default_edge_length_value : numeric
+            Value to use for edge lengths of |None|.
+
+        Returns
+        --------
+        s : iterable of splits
+            A list of split bitmasks.
+        e :
+            A list of edge length values.
+        a :
+            An empty list (node ages are not collected).
+        """
+        if not self.ignore_node_ages:
+            raise ValueError("Node ages cannot be collected from split bitmasks: use 'count_splits_on_tree()' instead")
+        self.total_trees_counted += 1
+        if weight is not None and self.use_tree_weights:
+            weight_to_use = float(weight)
+        else:
+            weight_to_use = 1.0
+        self.sum_of_tree_weights += weight_to_use
+        if is_rooted:
+            self.tree_rooting_types_counted.add(True)
+        else:
+            self.tree_rooting_types_counted.add(False)
+        splits = list(split_bitmasks)
+        split_counts = self.split_counts
+        for split in splits:
+            split_counts[split] += weight_to_use
+        counted_edge_lengths = []
+        if not self.ignore_edge_lengths:
+            split_edge_lengths = self.split_edge_lengths
+            edge_lengths = list(edge_lengths)
+            if len(set(splits)) < len(splits):
+                # as with ``count_splits_on_tree()``, which looks up edges
+                # through ``Tree.bipartition_edge_map``, the last edge with a
+                # given split provides the edge length for all occurrences of
+                # that split
+                split_edge_length_map = dict(zip(splits, edge_lengths))
+                edge_lengths = [split_edge_length_map[split] for split in splits]
+            for split, elen in zip(splits, edge_lengths):
+                if elen is None:
+                    elen = default_edge_length_value
+                split_edge_lengths[split].append(elen)
+                counted_edge_lengths.append(elen)
+        return splits, counted_edge_lengths, []
+
     def splits_considered(self):
         """
         Returns 4 values:
@@ -1454,7 +1593,12 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
         else:
             return float(self.sum_of_tree_weights)
 
+    def _validate_update_source(self, summary_reservoir_size):
+        if self.summary_reservoir_size is None and summary_reservoir_size is not None:
+            raise ValueError("Cannot add summarized edge lengths and node ages to a SplitDistribution that stores all values: specify 'summary_reservoir_size' to summarize these")
+
     def update(self, split_dist):
+        self._validate_update_source(split_dist.summary_reservoir_size)
         self.total_trees_counted += split_dist.total_trees_counted
         self.sum_of_tree_weights += split_dist.sum_of_tree_weights
         self._split_edge_length_summaries = None
@@ -1466,6 +1610,52 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             self.split_edge_lengths[split] += split_dist.split_edge_lengths[split]
             self.split_node_ages[split] += split_dist.split_node_ages[split]
 
+    def pack(self):
+        """
+        Returns a compact, columnar representation of the split counts, edge
+        lengths and node ages collected by this instance.
+
+        Returns
+        -------
+        p : `PackedSplitDistribution`
+            A `PackedSplitDistribution` instance, which can be merged into
+            another |SplitDistribution| using :meth:`update_from_packed`.
+        """
+        return PackedSplitDistribution(self)
+
+    def update_from_packed(self, packed_split_dist):
+        """
+        Adds the data in a `PackedSplitDistribution` (as returned by
+        :meth:`pack`) to this instance. This is equivalent to, but faster than,
+        calling :meth:`update` with the |SplitDistribution| from which
+        ``packed_split_dist`` was created.
+
+        Parameters
+        ----------
+        packed_split_dist : `PackedSplitDistribution`
+            The data to be added.
+        """
+        self._validate_update_source(packed_split_dist.summary_reservoir_size)
+        self.total_trees_counted += packed_split_dist.total_trees_counted
+        self.sum_of_tree_weights += packed_split_dist.sum_of_tree_weights
+        self._split_edge_length_summaries = None
+        self._split_node_age_summaries = None
+        self._trees_counted_for_summaries = 0
+        self.tree_rooting_types_counted.update(packed_split_dist.tree_rooting_types_counted)
+        split_counts = self.split_counts
+        split_edge_lengths = self.split_edge_lengths
+        split_node_ages = self.split_node_ages
+        edge_length_values = packed_split_dist.edge_lengths
+        node_age_values = packed_split_dist.node_ages
+        for split, count, edge_lengths, node_ages in zip(
+                packed_split_dist.split_bitmasks(),
+                packed_split_dist.split_counts,
+                edge_length_values.value_lists(),
+                node_age_values.value_lists()):
+            split_counts[split] += count
+            split_edge_lengths[split] += edge_lengths
+            split_node_ages[split] += node_ages
+
     ###########################################################################
     ### Basic Information Access
 
@@ -1567,7 +1757,10 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             if not elens:
                 continue
             try:
-                self._split_edge_length_summaries[split] = statistics.summarize(elens)
+                if self.summary_reservoir_size is None:
+                    self._split_edge_length_summaries[split] = statistics.summarize(elens)
+                else:
+                    self._split_edge_length_summaries[split] = elens.summarize()
             except (ValueError, TypeError):
                 pass
         return self._split_edge_length_summaries
@@ -1578,7 +1771,10 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
             if not ages:
                 continue
             try:
-                self._split_node_age_summaries[split] = statistics.summarize(ages)
+                if self.summary_reservoir_size is None:
+                    self._split_node_age_summaries[split] = statistics.summarize(ages)
+                else:
+                    self._split_node_age_summaries[split] = ages.summarize()
             except (ValueError, TypeError):
                 pass
         return self._split_node_age_summaries
@@ -1821,6 +2017,233 @@ class SplitDistribution(taxonmodel.TaxonNamespaceAssociated):
 
     taxon_set = property(_get_taxon_set, _set_taxon_set, _del_taxon_set)
 
+###############################################################################
+### PackedSplitDistribution
+
+def _copy_array(typecode, values):
+    # copies an ``array.array`` or (typed) ``memoryview`` into a new array
+    a = array.array(typecode)
+    a.frombytes(memoryview(values).cast("B"))
+    return a
+
+class _PackedValueLists(object):
+    """
+    A sequence of lists of numeric values (e.g., the edge lengths collected
+    for each split), stored as a flat ``array.array`` of doubles, with the
+    values of the list at index ``i`` being
+    ``values[offsets[i]:offsets[i+1]]``. The (flat) indexes of any integer or
+    |None| values are recorded so that these are restored as such.
+    """
+
+    def __init__(self, value_lists):
+        self.offsets = array.array("q", [0])
+        self.offsets.extend(itertools.accumulate(map(len, value_lists)))
+        values = list(itertools.chain.from_iterable(value_lists))
+        value_types = list(map(type, values))
+        self.int_value_indexes = self._find_indexes(value_types, int)
+        self.missing_value_indexes = self._find_indexes(value_types, type(None))
+        for idx in self.missing_value_indexes:
+            values[idx] = float("nan")
+        self.values = array.array("d", values)
+
+    def _find_indexes(self, items, item):
+        indexes = array.array("q")
+        idx = -1
+        try:
+            while True:
+                idx = items.index(item, idx + 1)
+                indexes.append(idx)
+        except ValueError:
+            pass
+        return indexes
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _get_file_sections(self, name):
+        return [
+            (name + "_offsets", "q", self.offsets),
+            (name + "s", "d", self.values),
+            (name + "_int_indexes", "q", self.int_value_indexes),
+            (name + "_missing_indexes", "q", self.missing_value_indexes),
+            ]
+
+    @classmethod
+    def _from_file_sections(cls, name, sections):
+        packed = cls.__new__(cls)
+        packed.offsets = sections[name + "_offsets"]
+        packed.values = sections[name + "s"]
+        packed.int_value_indexes = sections[name + "_int_indexes"]
+        packed.missing_value_indexes = sections[name + "_missing_indexes"]
+        return packed
+
+    def value_lists(self):
+        """
+        Yields the lists of values, in the order in which they were packed.
+        """
+        values = self.values.tolist()
+        for idx in self.int_value_indexes:
+            values[idx] = int(values[idx])
+        for idx in self.missing_value_indexes:
+            values[idx] = None
+        offsets = self.offsets
+        for start, stop in zip(offsets, itertools.islice(offsets, 1, None)):
+            yield values[start:stop]
+
+class _PackedStreamingSummaries(object):
+    """
+    A sequence of :class:`~dendropy.calculate.statistics.StreamingSummary`
+    objects (e.g., summarizing the edge lengths collected for each split),
+    stored as flat ``array.array`` buffers of their accumulators, with the
+    value samples stored as `_PackedValueLists`. A |None| minimum or maximum
+    (of an empty summary) is stored as NaN.
+    """
+
+    def __init__(self, summaries, reservoir_size):
+        self.reservoir_size = reservoir_size
+        self.counts = array.array("q", [s.count for s in summaries])
+        self.num_missing = array.array("q", [s.num_missing for s in summaries])
+        self.means = array.array("d", [s.mean for s in summaries])
+        self.m2s = array.array("d", [s.m2 for s in summaries])
+        nan = float("nan")
+        self.mins = array.array("d", [nan if s.min is None else s.min for s in summaries])
+        self.maxs = array.array("d", [nan if s.max is None else s.max for s in summaries])
+        self.samples = _PackedValueLists([s.sample for s in summaries])
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _get_file_sections(self, name):
+        return [
+            (name + "_counts", "q", self.counts),
+            (name + "_missing_counts", "q", self.num_missing),
+            (name + "_means", "d", self.means),
+            (name + "_m2s", "d", self.m2s),
+            (name + "_mins", "d", self.mins),
+            (name + "_maxs", "d", self.maxs),
+            ] + self.samples._get_file_sections(name + "_sample")
+
+    @classmethod
+    def _from_file_sections(cls, name, sections, reservoir_size):
+        packed = cls.__new__(cls)
+        packed.reservoir_size = reservoir_size
+        packed.counts = sections[name + "_counts"]
+        packed.num_missing = sections[name + "_missing_counts"]
+        packed.means = sections[name + "_means"]
+        packed.m2s = sections[name + "_m2s"]
+        packed.mins = sections[name + "_mins"]
+        packed.maxs = sections[name + "_maxs"]
+        packed.samples = _PackedValueLists._from_file_sections(name + "_sample", sections)
+        return packed
+
+    def value_lists(self):
+        """
+        Yields the summaries, in the order in which they were packed.
+        """
+        for count, num_missing, mean, m2, min_value, max_value, sample in zip(
+                self.counts,
+                self.num_missing,
+                self.means,
+                self.m2s,
+                self.mins,
+                self.maxs,
+                self.samples.value_lists()):
+            summary = statistics.StreamingSummary(self.reservoir_size)
+            summary.count = count
+            summary.num_missing = num_missing
+            summary.mean = mean
+            summary.m2 = m2
+            if count:
+                summary.min = min_value
+                summary.max = max_value
+            summary.sample = sample
+            yield summary
+
+class PackedSplitDistribution(object):
+    """
+    Compact, columnar representation of the contents of a
+    |SplitDistribution|, as returned by :meth:`SplitDistribution.pack`.
+
+    The split bitmasks are packed into a single block of bytes (see
+    :func:`bitprocessing.pack_bitmasks`), while the split counts and the edge
+    lengths and node ages collected for each split are stored in flat
+    ``array.array`` buffers. Instances thus pickle as a handful of raw byte
+    buffers rather than as dictionaries of lists of Python objects, making them
+    cheap to transfer between processes. The data can be merged into a
+    |SplitDistribution| using :meth:`SplitDistribution.update_from_packed`.
+    If the edge lengths and node ages are summarized (i.e., the
+    ``summary_reservoir_size`` of the |SplitDistribution| is not |None|), then
+    the summaries are stored as `_PackedStreamingSummaries`.
+    """
+
+    def __init__(self, split_distribution):
+        self.total_trees_counted = split_distribution.total_trees_counted
+        self.sum_of_tree_weights = split_distribution.sum_of_tree_weights
+        self.tree_rooting_types_counted = set(split_distribution.tree_rooting_types_counted)
+        splits = list(split_distribution.split_counts)
+        self.bitmask_width, self.packed_split_bitmasks = bitprocessing.pack_bitmasks(splits)
+        self.split_counts = array.array("d", [split_distribution.split_counts[s] for s in splits])
+        split_edge_lengths = split_distribution.split_edge_lengths
+        split_node_ages = split_distribution.split_node_ages
+        self.summary_reservoir_size = split_distribution.summary_reservoir_size
+        if self.summary_reservoir_size is None:
+            self.edge_lengths = _PackedValueLists([split_edge_lengths.get(s, ()) for s in splits])
+            self.node_ages = _PackedValueLists([split_node_ages.get(s, ()) for s in splits])
+        else:
+            empty = statistics.StreamingSummary(self.summary_reservoir_size)
+            self.edge_lengths = _PackedStreamingSummaries(
+                    [split_edge_lengths.get(s, empty) for s in splits],
+                    self.summary_reservoir_size)
+            self.node_ages = _PackedStreamingSummaries(
+                    [split_node_ages.get(s, empty) for s in splits],
+                    self.summary_reservoir_size)
+
+    def __len__(self):
+        return len(self.split_counts)
+
+    def _get_file_header(self):
+        return {
+            "total_trees_counted": self.total_trees_counted,
+            "sum_of_tree_weights": self.sum_of_tree_weights,
+            "tree_rooting_types_counted": sorted(self.tree_rooting_types_counted),
+            "split_bitmask_width": self.bitmask_width,
+            "summary_reservoir_size": self.summary_reservoir_size,
+            }
+
+    def _get_file_sections(self):
+        return [
+            ("split_distribution_split_bitmasks", "B", self.packed_split_bitmasks),
+            ("split_distribution_split_counts", "d", self.split_counts),
+            ] + self.edge_lengths._get_file_sections("split_distribution_edge_length") \
+              + self.node_ages._get_file_sections("split_distribution_node_age")
+
+    @classmethod
+    def _from_file_data(cls, header, sections):
+        packed = cls.__new__(cls)
+        packed.total_trees_counted = header["total_trees_counted"]
+        packed.sum_of_tree_weights = header["sum_of_tree_weights"]
+        packed.tree_rooting_types_counted = set(header["tree_rooting_types_counted"])
+        packed.bitmask_width = header["split_bitmask_width"]
+        packed.packed_split_bitmasks = sections["split_distribution_split_bitmasks"]
+        packed.split_counts = sections["split_distribution_split_counts"]
+        packed.summary_reservoir_size = header.get("summary_reservoir_size")
+        if packed.summary_reservoir_size is None:
+            packed.edge_lengths = _PackedValueLists._from_file_sections("split_distribution_edge_length", sections)
+            packed.node_ages = _PackedValueLists._from_file_sections("split_distribution_node_age", sections)
+        else:
+            packed.edge_lengths = _PackedStreamingSummaries._from_file_sections(
+                    "split_distribution_edge_length", sections, packed.summary_reservoir_size)
+            packed.node_ages = _PackedStreamingSummaries._from_file_sections(
+                    "split_distribution_node_age", sections, packed.summary_reservoir_size)
+        return packed
+
+    def split_bitmasks(self):
+        """
+        Returns a list of the split bitmasks, in the order of
+        ``split_counts``.
+        """
+        return bitprocessing.unpack_bitmasks(self.bitmask_width, self.packed_split_bitmasks)
+
 ###############################################################################
 ### SplitDistributionSummarizer
 
@@ -2116,6 +2539,13 @@ class TreeArray(
     discarded. A full |Tree| instance can be reconstructed as needed
     from the structural information stored by this class, at the cost of
     computation time.
+
+    Storage is columnar: each distinct split bitmask is stored once, in a
+    table of splits, and each tree is represented by a run of (32-bit)
+    indexes into this table in a single flat ``array.array``, with the edge
+    lengths of the splits in a parallel flat array of doubles, and the tree
+    weights in another. Edge lengths are thus always stored (and returned) as
+    floating-point values (or |None|).
     """
 
     class IncompatibleTreeArrayUpdate(Exception):
@@ -2143,6 +2573,7 @@ class TreeArray(
             is_force_max_age=None,
             taxon_label_age_map=None,
             is_bipartitions_updated=False,
+            summary_reservoir_size=None,
             ):
         taxon_namespace = trees.taxon_namespace
         ta = cls(
@@ -2154,6 +2585,7 @@ class TreeArray(
             ultrametricity_precision=ultrametricity_precision,
             is_force_max_age=is_force_max_age,
             taxon_label_age_map=taxon_label_age_map,
+            summary_reservoir_size=summary_reservoir_size,
             )
         ta.add_trees(
                 trees=trees,
@@ -2172,6 +2604,7 @@ class TreeArray(
             ultrametricity_precision=constants.DEFAULT_ULTRAMETRICITY_PRECISION,
             is_force_max_age=None,
             taxon_label_age_map=None,
+            summary_reservoir_size=None,
             ):
         """
         Parameters
@@ -2192,6 +2625,12 @@ class TreeArray(
             |False|, then node ages will be stored.
         use_tree_weights : bool
             If |False|, then tree weights will not be used to weight splits.
+        summary_reservoir_size : int
+            If given, then, rather than storing every edge length and node age
+            of each split, the split distribution keeps running summaries of
+            them, with medians, HPDs and quantiles estimated from a random
+            sample of (at most) this many values per split (see
+            `SplitDistribution`).
         """
         taxonmodel.TaxonNamespaceAssociated.__init__(self,
                 taxon_namespace=taxon_namespace)
@@ -2206,10 +2645,21 @@ class TreeArray(
         self.taxon_label_age_map = taxon_label_age_map
 
         # Storage
-        self._tree_split_bitmasks = []
-        self._tree_edge_lengths = []
-        self._tree_leafset_bitmasks = []
-        self._tree_weights = []
+        # split bitmask => split id (i.e., index into ``_split_bitmask_table``)
+        self._split_bitmask_ids = {}
+        # split id => split bitmask; built on demand from ``_split_bitmask_ids``
+        self._split_bitmask_table = []
+        # the split ids and edge lengths of tree ``i`` are
+        # ``_tree_split_ids[_tree_split_offsets[i]:_tree_split_offsets[i+1]]``
+        # and the corresponding slice of ``_tree_edge_lengths`` (which is
+        # empty if ``ignore_edge_lengths`` is |True|), with |None| edge
+        # lengths stored as NaN
+        self._tree_split_offsets = array.array("q", [0])
+        self._tree_split_ids = array.array("i")
+        self._tree_edge_lengths = array.array("d")
+        self._has_missing_edge_lengths = False
+        self._tree_leafset_split_ids = array.array("i")
+        self._tree_weights = array.array("d")
         self._split_distribution = SplitDistribution(
                 taxon_namespace=self.taxon_namespace,
                 ignore_edge_lengths=self.ignore_edge_lengths,
@@ -2217,6 +2667,7 @@ class TreeArray(
                 ultrametricity_precision=ultrametricity_precision,
                 is_force_max_age=is_force_max_age,
                 taxon_label_age_map=self.taxon_label_age_map,
+                summary_reservoir_size=summary_reservoir_size,
                 )
 
     ##############################################################################
@@ -2244,31 +2695,155 @@ class TreeArray(
                 tree_rooting=t,
                 tree_array_rooting=ta))
 
+    ##############################################################################
+    ## Storage
+
+    def _ensure_mutable_storage(self):
+        # storage loaded from a memory-mapped file (see :meth:`load`) consists
+        # of read-only views of the file, which are copied into arrays when
+        # first modified
+        if isinstance(self._tree_weights, memoryview):
+            self._tree_split_offsets = _copy_array("q", self._tree_split_offsets)
+            self._tree_split_ids = _copy_array("i", self._tree_split_ids)
+            self._tree_edge_lengths = _copy_array("d", self._tree_edge_lengths)
+            self._tree_leafset_split_ids = _copy_array("i", self._tree_leafset_split_ids)
+            self._tree_weights = _copy_array("d", self._tree_weights)
+
+    def _get_split_ids(self, split_bitmasks):
+        split_bitmask_ids = self._split_bitmask_ids
+        try:
+            # most splits of most trees will already be known
+            return array.array("i", map(split_bitmask_ids.__getitem__, split_bitmasks))
+        except KeyError:
+            return array.array("i", [split_bitmask_ids.setdefault(s, len(split_bitmask_ids)) for s in split_bitmasks])
+
+    def _get_split_bitmask_table(self):
+        table = self._split_bitmask_table
+        if len(table) < len(self._split_bitmask_ids):
+            table.extend(itertools.islice(self._split_bitmask_ids, len(table), None))
+        return table
+
+    def _get_tree_slice(self, index):
+        num_trees = len(self._tree_split_offsets) - 1
+        if index < 0:
+            index += num_trees
+        if index < 0 or index >= num_trees:
+            raise IndexError("TreeArray index out of range")
+        return self._tree_split_offsets[index], self._tree_split_offsets[index+1]
+
+    def _edge_length_tuple(self, start, stop):
+        if self.ignore_edge_lengths:
+            return tuple(None for x in range(stop - start))
+        edge_lengths = self._tree_edge_lengths[start:stop].tolist()
+        if self._has_missing_edge_lengths:
+            edge_lengths = [e if e == e else None for e in edge_lengths]
+        return tuple(edge_lengths)
+
+    def _extend_storage(self,
+            split_bitmask_table,
+            tree_split_offsets,
+            tree_split_ids,
+            tree_edge_lengths,
+            has_missing_edge_lengths,
+            tree_leafset_split_ids,
+            tree_weights):
+        self._ensure_mutable_storage()
+        # maps split ids of the source to split ids of self
+        split_id_map = self._get_split_ids(split_bitmask_table)
+        base_offset = self._tree_split_offsets[-1]
+        self._tree_split_offsets.extend(o + base_offset for o in itertools.islice(tree_split_offsets, 1, None))
+        self._tree_split_ids.extend(map(split_id_map.__getitem__, tree_split_ids))
+        if not self.ignore_edge_lengths:
+            self._tree_edge_lengths.extend(tree_edge_lengths)
+            self._has_missing_edge_lengths = self._has_missing_edge_lengths or has_missing_edge_lengths
+        self._tree_leafset_split_ids.extend(map(split_id_map.__getitem__, tree_leafset_split_ids))
+        self._tree_weights.extend(tree_weights)
+
+    def _extend_storage_from_tree_array(self, other):
+        self._extend_storage(
+                split_bitmask_table=other._get_split_bitmask_table(),
+                tree_split_offsets=other._tree_split_offsets,
+                tree_split_ids=other._tree_split_ids,
+                tree_edge_lengths=other._tree_edge_lengths,
+                has_missing_edge_lengths=other._has_missing_edge_lengths,
+                tree_leafset_split_ids=other._tree_leafset_split_ids,
+                tree_weights=other._tree_weights)
+
     ##############################################################################
     ## Updating from Another TreeArray
 
-    def update(self, other):
+    def _validate_update_source(self,
+            is_rooted_trees,
+            ignore_edge_lengths,
+            ignore_node_ages,
+            use_tree_weights):
         if len(self) > 0:
-            # self.validate_rooting(other._is_rooted_trees)
-            if self._is_rooted_trees is not other._is_rooted_trees:
-                raise TreeArray.IncompatibleRootingTreeArrayUpdate("Updating from incompatible TreeArray: 'is_rooted_trees' should be '{}', but is instead '{}'".format(other._is_rooted_trees, self._is_rooted_trees, ))
-            if self.ignore_edge_lengths is not other.ignore_edge_lengths:
-                raise TreeArray.IncompatibleEdgeLengthsTreeArrayUpdate("Updating from incompatible TreeArray: 'ignore_edge_lengths' is not: {} ".format(other.ignore_edge_lengths, self.ignore_edge_lengths, ))
-            if self.ignore_node_ages is not other.ignore_node_ages:
-                raise TreeArray.IncompatibleNodeAgesTreeArrayUpdate("Updating from incompatible TreeArray: 'ignore_node_ages' should be '{}', but is instead '{}'".format(other.ignore_node_ages, self.ignore_node_ages))
-            if self.use_tree_weights is not other.use_tree_weights:
-                raise TreeArray.IncompatibleTreeWeightsTreeArrayUpdate("Updating from incompatible TreeArray: 'use_tree_weights' should be '{}', but is instead '{}'".format(other.use_tree_weights, self.use_tree_weights))
+            # self.validate_rooting(is_rooted_trees)
+            if self._is_rooted_trees is not is_rooted_trees:
+                raise TreeArray.IncompatibleRootingTreeArrayUpdate("Updating from incompatible TreeArray: 'is_rooted_trees' should be '{}', but is instead '{}'".format(is_rooted_trees, self._is_rooted_trees, ))
+            if self.ignore_edge_lengths is not ignore_edge_lengths:
+                raise TreeArray.IncompatibleEdgeLengthsTreeArrayUpdate("Updating from incompatible TreeArray: 'ignore_edge_lengths' is not: {} ".format(ignore_edge_lengths, self.ignore_edge_lengths, ))
+            if self.ignore_node_ages is not ignore_node_ages:
+                raise TreeArray.IncompatibleNodeAgesTreeArrayUpdate("Updating from incompatible TreeArray: 'ignore_node_ages' should be '{}', but is instead '{}'".format(ignore_node_ages, self.ignore_node_ages))
+            if self.use_tree_weights is not use_tree_weights:
+                raise TreeArray.IncompatibleTreeWeightsTreeArrayUpdate("Updating from incompatible TreeArray: 'use_tree_weights' should be '{}', but is instead '{}'".format(use_tree_weights, self.use_tree_weights))
         else:
-            self._is_rooted_trees = other._is_rooted_trees
-            self.ignore_edge_lengths = other.ignore_edge_lengths
-            self.ignore_node_ages = other.ignore_node_ages
-            self.use_tree_weights = other.use_tree_weights
-        self._tree_split_bitmasks.extend(other._tree_split_bitmasks)
-        self._tree_edge_lengths.extend(other._tree_edge_lengths)
-        self._tree_leafset_bitmasks.extend(other._tree_leafset_bitmasks)
-        self._tree_weights.extend(other._tree_weights)
+            self._is_rooted_trees = is_rooted_trees
+            self.ignore_edge_lengths = ignore_edge_lengths
+            self.ignore_node_ages = ignore_node_ages
+            self.use_tree_weights = use_tree_weights
+
+    def update(self, other):
+        self._validate_update_source(
+                is_rooted_trees=other._is_rooted_trees,
+                ignore_edge_lengths=other.ignore_edge_lengths,
+                ignore_node_ages=other.ignore_node_ages,
+                use_tree_weights=other.use_tree_weights)
+        self._extend_storage_from_tree_array(other)
         self._split_distribution.update(other._split_distribution)
 
+    def pack(self):
+        """
+        Returns a compact, columnar representation of the trees and split
+        distribution of this instance, suitable for efficient transfer between
+        processes (e.g., from the worker processes of a parallelized
+        analysis).
+
+        Returns
+        -------
+        p : `PackedTreeArray`
+            A `PackedTreeArray` instance, which can be merged into another
+            |TreeArray| using :meth:`update_from_packed`.
+        """
+        return PackedTreeArray(self)
+
+    def update_from_packed(self, packed_tree_array):
+        """
+        Adds the data in a `PackedTreeArray` (as returned by :meth:`pack`) to
+        this instance. This is equivalent to, but faster than, calling
+        :meth:`update` with the |TreeArray| from which ``packed_tree_array``
+        was created.
+
+        Parameters
+        ----------
+        packed_tree_array : `PackedTreeArray`
+            The data to be added.
+        """
+        self._validate_update_source(
+                is_rooted_trees=packed_tree_array.is_rooted_trees,
+                ignore_edge_lengths=packed_tree_array.ignore_edge_lengths,
+                ignore_node_ages=packed_tree_array.ignore_node_ages,
+                use_tree_weights=packed_tree_array.use_tree_weights)
+        self._extend_storage(
+                split_bitmask_table=packed_tree_array.split_bitmasks(),
+                tree_split_offsets=packed_tree_array.tree_split_offsets,
+                tree_split_ids=packed_tree_array.tree_split_ids,
+                tree_edge_lengths=packed_tree_array.tree_edge_lengths,
+                has_missing_edge_lengths=packed_tree_array.has_missing_edge_lengths,
+                tree_leafset_split_ids=packed_tree_array.tree_leafset_split_ids,
+                tree_weights=packed_tree_array.tree_weights)
+        self._split_distribution.update_from_packed(packed_tree_array.split_distribution)
+
     ##############################################################################
     ## Fundamental Tree Accession
 
@@ -2282,10 +2857,12 @@ class TreeArray(
 
         Parameters
         ----------
-        tree : |Tree|
-            A |Tree| instance. This must have the same rooting state as
-            all the other trees accessioned into this collection as well as
-            that of ``self.is_rooted_trees``.
+        tree : |Tree| or `SplitEncodedTree`
+            A |Tree| instance, or a `SplitEncodedTree` (as yielded by
+            :meth:`yield_from_files`) giving the split bitmasks, edge lengths,
+            leafset bitmask, weight and rooting state of a tree directly. This
+            must have the same rooting state as all the other trees accessioned
+            into this collection as well as that of ``self.is_rooted_trees``.
         is_bipartitions_updated : bool
             If |False| [default], then the tree will have its splits encoded or
             updated. Otherwise, if |True|, then the tree is assumed to have its
@@ -2302,43 +2879,71 @@ class TreeArray(
         e :
             A list of edge length values from ``tree``.
         """
-        if self.taxon_namespace is not tree.taxon_namespace:
-            raise error.TaxonNamespaceIdentityError(self, tree)
-        self.validate_rooting(tree.is_rooted)
-        splits, edge_lengths, node_ages = self._split_distribution.count_splits_on_tree(
-                tree=tree,
-                is_bipartitions_updated=is_bipartitions_updated,
-                default_edge_length_value=self.default_edge_length_value)
+        if isinstance(tree, tuple):
+            split_bitmasks, edge_lengths, tree_leafset_bitmask, tree_weight, is_rooted = tree
+            self.validate_rooting(is_rooted)
+            splits, edge_lengths, node_ages = self._split_distribution.count_split_bitmasks(
+                    split_bitmasks=split_bitmasks,
+                    edge_lengths=edge_lengths,
+                    weight=tree_weight,
+                    is_rooted=is_rooted,
+                    default_edge_length_value=self.default_edge_length_value)
+        else:
+            if self.taxon_namespace is not tree.taxon_namespace:
+                raise error.TaxonNamespaceIdentityError(self, tree)
+            self.validate_rooting(tree.is_rooted)
+            splits, edge_lengths, node_ages = self._split_distribution.count_splits_on_tree(
+                    tree=tree,
+                    is_bipartitions_updated=is_bipartitions_updated,
+                    default_edge_length_value=self.default_edge_length_value)
+            tree_leafset_bitmask = tree.seed_node.edge.bipartition.leafset_bitmask
+            tree_weight = tree.weight
 
         # pre-process splits
         splits = tuple(splits)
+        split_ids = self._get_split_ids(splits)
+        leafset_split_id = self._split_bitmask_ids.setdefault(tree_leafset_bitmask, len(self._split_bitmask_ids))
 
         # pre-process edge lengths
         if self.ignore_edge_lengths:
             # edge_lengths = tuple( [None] * len(splits) )
             edge_lengths = tuple( None for x in range(len(splits)) )
+            edge_length_values = array.array("d")
         else:
             assert len(splits) == len(edge_lengths), "Unequal vectors:\n    Splits: {}\n    Edges: {}\n".format(splits, edge_lengths)
             edge_lengths = tuple(edge_lengths)
+            try:
+                edge_length_values = array.array("d", edge_lengths)
+            except TypeError:
+                edge_length_values = array.array("d", [float("nan") if e is None else e for e in edge_lengths])
+                self._has_missing_edge_lengths = True
 
         # pre-process weights
-        if tree.weight is not None and self.use_tree_weights:
-            weight_to_use = float(tree.weight)
+        if tree_weight is not None and self.use_tree_weights:
+            weight_to_use = float(tree_weight)
         else:
             weight_to_use = 1.0
 
         # accession info
-        if index is None:
-            index = len(self._tree_split_bitmasks)
-            self._tree_split_bitmasks.append(splits)
-            self._tree_leafset_bitmasks.append(tree.seed_node.edge.bipartition.leafset_bitmask)
-            self._tree_edge_lengths.append(edge_lengths)
+        self._ensure_mutable_storage()
+        num_trees = len(self._tree_weights)
+        if index is not None and index < 0:
+            index = max(0, index + num_trees)
+        if index is None or index >= num_trees:
+            index = num_trees
+            self._tree_split_ids.extend(split_ids)
+            self._tree_edge_lengths.extend(edge_length_values)
+            self._tree_split_offsets.append(len(self._tree_split_ids))
+            self._tree_leafset_split_ids.append(leafset_split_id)
             self._tree_weights.append(weight_to_use)
         else:
-            self._tree_split_bitmasks.insert(index, splits)
-            self._tree_leafset_bitmasks.insert(index,
-                    tree.seed_node.edge.bipartition.leafset_bitmask)
-            self._tree_edge_lengths.insert(index, edge_lengths)
+            start = self._tree_split_offsets[index]
+            self._tree_split_ids[start:start] = split_ids
+            self._tree_edge_lengths[start:start] = edge_length_values
+            num_splits = len(split_ids)
+            self._tree_split_offsets[index+1:] = array.array("q",
+                    [start + num_splits] + [o + num_splits for o in self._tree_split_offsets[index+1:]])
+            self._tree_leafset_split_ids.insert(index, leafset_split_id)
             self._tree_weights.insert(index, weight_to_use)
         return index, splits, edge_lengths, weight_to_use
 
@@ -2375,6 +2980,53 @@ class TreeArray(
         Adds multiple structures from one or more external file sources to the
         collection.
 
+        Parameters
+        ----------
+        files : iterable of strings and/or file objects
+            A list or some other iterable of file paths or file-like objects
+            (string elements will be assumed to be paths to files, while all
+            other types of elements will be assumed to be file-like
+            objects opened for reading).
+        schema : string
+            The data format of the source. E.g., "nexus", "newick", "nexml".
+        \*\*kwargs : keyword arguments
+            These will be passed directly to the underlying schema-specific
+            reader implementation. In addition, ``tree_offset`` specifies the
+            number of trees to skip at the beginning of each source (e.g., the
+            burn-in) and, if ``use_tree_index`` is |True|, these will be
+            skipped by seeking to the first tree to be read using a
+            `treeindex.TreeIndex` of the source rather than by parsing them
+            (so that taxa only found in the skipped trees of NEWICK sources
+            are not added to the taxon namespace).
+        """
+        if "taxon_namespace" in kwargs:
+            if kwargs["taxon_namespace"] is not self.taxon_namespace:
+                raise ValueError("TaxonNamespace object passed as keyword argument is not the same as self's TaxonNamespace reference")
+            kwargs.pop("taxon_namespace")
+        tree_yielder = self.yield_from_files(
+                files=files,
+                schema=schema,
+                **kwargs)
+        for tree in tree_yielder:
+            self.add_tree(tree=tree, is_bipartitions_updated=False)
+
+    def yield_from_files(self,
+            files,
+            schema,
+            **kwargs):
+        r"""
+        Returns an iterator over the trees in one or more external file
+        sources, in a form that can be passed to :meth:`add_tree`. As with
+        :meth:`Tree.yield_from_files`, the ``current_file_index`` and
+        ``current_file_name`` attributes of the iterator report the source
+        currently being read.
+
+        If the schema supports it ("newick", "nexus", or "nexus/newick"),
+        node ages are not being collected, and no ``finish_node_fn`` is
+        given, then the trees are yielded as `SplitEncodedTree` instances,
+        which are parsed directly into split bitmasks without constructing
+        |Tree| objects. Otherwise, |Tree| objects are yielded.
+
         Parameters
         ----------
         files : iterable of strings and/or file objects
@@ -2392,30 +3044,28 @@ class TreeArray(
             if kwargs["taxon_namespace"] is not self.taxon_namespace:
                 raise ValueError("TaxonNamespace object passed as keyword argument is not the same as self's TaxonNamespace reference")
             kwargs.pop("taxon_namespace")
-        target_tree_offset = kwargs.pop("tree_offset", 0)
-        tree_yielder = self.tree_type.yield_from_files(
+        if (self.ignore_node_ages
+                and self.tree_type is treemodel.Tree
+                and kwargs.get("finish_node_fn", None) is None
+                and dataio.is_split_encoding_yielder_supported(schema)):
+            return dataio.get_split_encoding_yielder(
+                    files=files,
+                    schema=schema,
+                    taxon_namespace=self.taxon_namespace,
+                    **kwargs)
+        return self.tree_type.yield_from_files(
                 files=files,
                 schema=schema,
                 taxon_namespace=self.taxon_namespace,
                 **kwargs)
-        current_source_index = None
-        current_tree_offset = None
-        for tree_idx, tree in enumerate(tree_yielder):
-            current_yielder_index = tree_yielder.current_file_index
-            if current_source_index != current_yielder_index:
-                current_source_index = current_yielder_index
-                current_tree_offset = 0
-            if current_tree_offset >= target_tree_offset:
-                self.add_tree(tree=tree, is_bipartitions_updated=False)
-            current_tree_offset += 1
 
     def _parse_and_add_from_stream(self,
             stream,
             schema,
             **kwargs):
-        cur_size = len(self._tree_split_bitmasks)
+        cur_size = len(self)
         self.read_from_files(files=[stream], schema=schema, **kwargs)
-        new_size = len(self._tree_split_bitmasks)
+        new_size = len(self)
         return new_size - cur_size
 
     def read(self, **kwargs):
@@ -2485,6 +3135,123 @@ class TreeArray(
         """
         return basemodel.MultiReadable._read_from(self, **kwargs)
 
+    def save(self, path, append=False, metadata=None):
+        """
+        Writes the contents of this collection (the trees as well as the split
+        distribution) to ``path``, in a binary format that can be read back
+        by :meth:`load` far faster than the source trees can be parsed. See
+        `dendropy.dataio.treearrayfile` for a description of the format.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file to write.
+        append : bool
+            If |True| and ``path`` exists, then the contents of this collection
+            are added to those already saved in ``path`` (e.g., the trees
+            sampled by a continuing MCMC run since the file was last saved).
+            The taxa of the saved collection must be the first taxa (in the
+            same order) of the taxon namespace of this collection, and the
+            other settings (rooting state, ``ignore_edge_lengths``, etc.) must
+            be the same. Note that, as the trees and the split distribution
+            are each stored as contiguous sections, the saved collection is
+            loaded, merged with this one and written out again in full: the
+            time taken by each append grows with the size of the file, so
+            repeatedly appending a few trees to a large file is slow. Append
+            larger batches of trees instead (or save each batch to a separate
+            file, and combine them with :meth:`load` and :meth:`update` when
+            needed).
+        metadata : dict
+            Any other (JSON-serializable) data to store with the collection,
+            which can be retrieved using :meth:`load_metadata`.
+        """
+        taxon_labels = [t.label for t in self.taxon_namespace]
+        tree_array = self
+        if append and os.path.exists(path):
+            tree_array = TreeArray.load(path, mmap=True)
+            saved_taxon_labels = [t.label for t in tree_array.taxon_namespace]
+            if saved_taxon_labels != taxon_labels[:len(saved_taxon_labels)]:
+                raise ValueError("The taxa of the trees saved in '{}' are not the first taxa of the taxon namespace: {}".format(
+                    path, saved_taxon_labels))
+            tree_array.update(self)
+        packed = tree_array.pack()
+        header = packed._get_file_header()
+        header["taxon_labels"] = taxon_labels
+        header["metadata"] = metadata
+        treearrayfile.write_tree_array_file(path, header, packed._get_file_sections())
+
+    @staticmethod
+    def load_metadata(path):
+        """
+        Returns the ``metadata`` given when the collection in ``path`` was
+        saved using :meth:`save` (or |None| if none was given).
+        """
+        return treearrayfile.read_tree_array_file_header(path).get("metadata")
+
+    @classmethod
+    def load(cls, path, mmap=True, taxon_namespace=None, **kwargs):
+        r"""
+        Returns a |TreeArray| with the contents of a file written by
+        :meth:`save`.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file to read.
+        mmap : bool
+            If |True| (default), then the per-tree data are not read, but
+            are used directly from a read-only memory map of the file (being
+            copied into memory only if the collection is modified). Loading is
+            then almost instantaneous, and the memory is shared by all
+            processes loading the same file. Otherwise, the data are read into
+            memory.
+        taxon_namespace : |TaxonNamespace|
+            The taxon namespace to use. The taxa of the saved collection must
+            be the first taxa (in the same order) of this namespace, or will
+            be added to it. If not given, a new namespace is created.
+        \*\*kwargs : keyword arguments
+            Other arguments (e.g., ``ultrametricity_precision`` or
+            ``taxon_label_age_map``) passed to the |TreeArray| constructor.
+            Unless given, ``summary_reservoir_size`` is that of the saved
+            collection.
+
+        Returns
+        -------
+        t : |TreeArray|
+            The loaded collection.
+        """
+        header, sections = treearrayfile.read_tree_array_file(path, use_mmap=mmap)
+        taxon_labels = header["taxon_labels"]
+        if taxon_namespace is None:
+            taxon_namespace = taxonmodel.TaxonNamespace(taxon_labels)
+        else:
+            for idx, label in enumerate(taxon_labels):
+                if idx >= len(taxon_namespace):
+                    taxon_namespace.new_taxon(label=label)
+                elif taxon_namespace[idx].label != label:
+                    raise ValueError("Taxon {} of '{}' is '{}', but taxon {} of the taxon namespace is '{}'".format(
+                        idx, path, label, idx, taxon_namespace[idx].label))
+        packed = PackedTreeArray._from_file_data(header, sections)
+        kwargs.setdefault("summary_reservoir_size", packed.split_distribution.summary_reservoir_size)
+        tree_array = cls(
+                taxon_namespace=taxon_namespace,
+                is_rooted_trees=packed.is_rooted_trees,
+                ignore_edge_lengths=packed.ignore_edge_lengths,
+                ignore_node_ages=packed.ignore_node_ages,
+                use_tree_weights=packed.use_tree_weights,
+                **kwargs)
+        split_bitmask_table = packed.split_bitmasks()
+        tree_array._split_bitmask_table = split_bitmask_table
+        tree_array._split_bitmask_ids = dict(zip(split_bitmask_table, range(len(split_bitmask_table))))
+        tree_array._tree_split_offsets = packed.tree_split_offsets
+        tree_array._tree_split_ids = packed.tree_split_ids
+        tree_array._tree_edge_lengths = packed.tree_edge_lengths
+        tree_array._has_missing_edge_lengths = packed.has_missing_edge_lengths
+        tree_array._tree_leafset_split_ids = packed.tree_leafset_split_ids
+        tree_array._tree_weights = packed.tree_weights
+        tree_array._split_distribution.update_from_packed(packed.split_distribution)
+        return tree_array
+
     ##############################################################################
     ## Container (List) Interface
 
@@ -2554,9 +3321,7 @@ class TreeArray(
         assert self.ignore_edge_lengths is tree_array.ignore_edge_lengths
         assert self.ignore_node_ages is tree_array.ignore_node_ages
         assert self.use_tree_weights is tree_array.use_tree_weights
-        self._tree_split_bitmasks.extend(tree_array._tree_split_bitmasks)
-        self._tree_edge_lengths.extend(tree_array._tree_edge_lengths)
-        self._tree_weights.extend(tree_array._tree_weights)
+        self._extend_storage_from_tree_array(tree_array)
         self._split_distribution.update(tree_array._split_distribution)
         return self
 
@@ -2593,6 +3358,7 @@ class TreeArray(
                 ignore_node_ages=self.ignore_node_ages,
                 use_tree_weights=self.use_tree_weights,
                 ultrametricity_precision=self._split_distribution.ultrametricity_precision,
+                summary_reservoir_size=self._split_distribution.summary_reservoir_size,
                 )
         ta.default_edge_length_value = self.default_edge_length_value
         ta.tree_type = self.tree_type
@@ -2602,7 +3368,16 @@ class TreeArray(
 
     def __contains__(self, splits):
         # expensive!!
-        return tuple(splits) in self._tree_split_bitmasks
+        split_bitmask_ids = self._split_bitmask_ids
+        try:
+            split_ids = array.array("i", [split_bitmask_ids[s] for s in splits])
+        except KeyError:
+            return False
+        offsets = self._tree_split_offsets
+        for start, stop in zip(offsets, itertools.islice(offsets, 1, None)):
+            if stop - start == len(split_ids) and self._tree_split_ids[start:stop] == split_ids:
+                return True
+        return False
 
     def __delitem__(self, index):
         raise NotImplementedError
@@ -2621,14 +3396,14 @@ class TreeArray(
         """
         Yields pairs of (split, edge_length) from the store.
         """
-        for split, edge_length in zip(self._tree_split_bitmasks, self._tree_edge_lengths):
-            yield split, edge_length
+        for index in range(len(self)):
+            yield self.get_split_bitmask_and_edge_tuple(index)
 
     def __reversed__(self):
         raise NotImplementedError
 
     def __len__(self):
-        return len(self._tree_split_bitmasks)
+        return len(self._tree_weights)
 
     def __getitem__(self, index):
         raise NotImplementedError
@@ -2643,14 +3418,15 @@ class TreeArray(
 
     def clear(self):
         raise NotImplementedError
-        self._tree_split_bitmasks = []
-        self._tree_edge_lengths = []
-        self._tree_leafset_bitmasks = []
+        self._tree_split_offsets = array.array("q", [0])
+        self._tree_split_ids = array.array("i")
+        self._tree_edge_lengths = array.array("d")
+        self._tree_leafset_split_ids = array.array("i")
+        self._tree_weights = array.array("d")
         self._split_distribution.clear()
 
     def index(self, splits):
         raise NotImplementedError
-        return self._tree_split_bitmasks.index(splits)
 
     def pop(self, index=-1):
         raise NotImplementedError
@@ -2672,7 +3448,10 @@ class TreeArray(
         Returns a pair of tuples, ( (splits...), (lengths...) ), corresponding
         to the "tree" at ``index``.
         """
-        return self._tree_split_bitmasks[index], self._tree_edge_lengths[index]
+        start, stop = self._get_tree_slice(index)
+        split_bitmask_table = self._get_split_bitmask_table()
+        split_bitmasks = tuple(map(split_bitmask_table.__getitem__, self._tree_split_ids[start:stop]))
+        return split_bitmasks, self._edge_length_tuple(start, stop)
 
     ##############################################################################
     ## Calculations
@@ -2699,26 +3478,9 @@ class TreeArray(
             and the second being the index of the highest score. The element order
             corresponds to the trees accessioned in the collection.
         """
-        assert len(self._tree_leafset_bitmasks) == len(self._tree_split_bitmasks)
-        scores = []
-        max_score = None
-        max_score_tree_idx = None
-        split_frequencies = self._split_distribution.split_frequencies
-        for tree_idx, (tree_leafset_bitmask, split_bitmasks) in enumerate(zip(self._tree_leafset_bitmasks, self._tree_split_bitmasks)):
-            log_product_of_split_support = 0.0
-            for split_bitmask in split_bitmasks:
-                if (include_external_splits
-                        or split_bitmask == tree_leafset_bitmask # count root edge (following BEAST)
-                        or not treemodel.Bipartition.is_trivial_bitmask(split_bitmask, tree_leafset_bitmask)
-                        ):
-                    split_support = split_frequencies.get(split_bitmask, 0.0)
-                    if split_support:
-                        log_product_of_split_support += math.log(split_support)
-            if max_score is None or max_score < log_product_of_split_support:
-                max_score = log_product_of_split_support
-                max_score_tree_idx = tree_idx
-            scores.append(log_product_of_split_support)
-        return scores, max_score_tree_idx
+        return self._calculate_split_support_scores(
+                split_score_fn=lambda split_support: math.log(split_support) if split_support else 0.0,
+                include_external_splits=include_external_splits)
 
     def maximum_product_of_split_support_tree(self,
             include_external_splits=False,
@@ -2779,24 +3541,49 @@ class TreeArray(
             and the second being the index of the highest score. The element order
             corresponds to the trees accessioned in the collection.
         """
-        assert len(self._tree_leafset_bitmasks) == len(self._tree_split_bitmasks)
-        scores = []
-        max_score = None
-        max_score_tree_idx = None
+        return self._calculate_split_support_scores(
+                split_score_fn=lambda split_support: split_support,
+                include_external_splits=include_external_splits)
+
+    def _calculate_split_support_scores(self,
+            split_score_fn,
+            include_external_splits):
+        # Scores each tree as the sum of ``split_score_fn(split_support)``
+        # over its splits. The score of each distinct split is calculated
+        # once, into a table indexed by split id (one for each distinct tree
+        # leafset, in which the splits that do not count toward the score of
+        # trees with that leafset are given a score of 0), so that the score
+        # of each tree is just a sum over lookups of its split ids.
         split_frequencies = self._split_distribution.split_frequencies
-        for tree_idx, (tree_leafset_bitmask, split_bitmasks) in enumerate(zip(self._tree_leafset_bitmasks, self._tree_split_bitmasks)):
-            sum_of_support = 0.0
-            for split_bitmask in split_bitmasks:
-                if (include_external_splits
-                        or split_bitmask == tree_leafset_bitmask # count root edge (following BEAST)
-                        or not treemodel.Bipartition.is_trivial_bitmask(split_bitmask, tree_leafset_bitmask)
-                        ):
-                    split_support = split_frequencies.get(split_bitmask, 0.0)
-                    sum_of_support += split_support
-            if max_score is None or max_score < sum_of_support:
-                max_score = sum_of_support
-                max_score_tree_idx = tree_idx
-            scores.append(sum_of_support)
+        split_bitmask_table = self._get_split_bitmask_table()
+        split_scores = [split_score_fn(split_frequencies.get(split_bitmask, 0.0))
+                for split_bitmask in split_bitmask_table]
+        leafset_split_scores = {}
+        scores = []
+        offsets = self._tree_split_offsets
+        tree_split_ids = self._tree_split_ids
+        for leafset_split_id, start, stop in zip(
+                self._tree_leafset_split_ids,
+                offsets,
+                itertools.islice(offsets, 1, None)):
+            try:
+                tree_split_scores = leafset_split_scores[leafset_split_id]
+            except KeyError:
+                if include_external_splits:
+                    tree_split_scores = split_scores
+                else:
+                    tree_leafset_bitmask = split_bitmask_table[leafset_split_id]
+                    tree_split_scores = [
+                            score if (split_bitmask == tree_leafset_bitmask # count root edge (following BEAST)
+                                or not treemodel.Bipartition.is_trivial_bitmask(split_bitmask, tree_leafset_bitmask))
+                            else 0.0
+                            for split_bitmask, score in zip(split_bitmask_table, split_scores)]
+                leafset_split_scores[leafset_split_id] = tree_split_scores
+            scores.append(sum(map(tree_split_scores.__getitem__, tree_split_ids[start:stop]), 0.0))
+        if scores:
+            max_score_tree_idx = scores.index(max(scores))
+        else:
+            max_score_tree_idx = None
         return scores, max_score_tree_idx
 
     def maximum_sum_of_split_support_tree(self,
@@ -2836,6 +3623,107 @@ class TreeArray(
                 )
         return tree
 
+    def robinson_foulds_distance_matrix(self,
+            is_weighted=False,
+            is_condensed=False,
+            num_processes=None):
+        """
+        Calculates the Robinson-Foulds distances between all pairs of trees in
+        the collection.
+
+        The (unweighted) Robinson-Foulds distance between two trees is the
+        number of splits found in one of the trees but not the other, as given
+        by :func:`treecompare.symmetric_difference`. The weighted
+        Robinson-Foulds distance is the sum of the absolute differences between
+        the lengths of the edges subtending each split found in either tree,
+        with a split missing from a tree taken to have a length of 0, as given
+        by :func:`treecompare.weighted_robinson_foulds_distance`.
+
+        As the splits of the trees are stored as integer ids into a table of
+        distinct splits, each tree is represented by the set of its split ids
+        (or a dictionary mapping these to edge lengths), and the distances of
+        each tree to all subsequent trees are calculated as a batch of set
+        operations. Splits found in every tree are dropped from the sets for
+        the unweighted distances, and identical trees are compared only once.
+
+        Parameters
+        ----------
+        is_weighted : bool
+            If |True|, then the weighted Robinson-Foulds distances are
+            calculated. This requires the edge lengths of the trees to have
+            been stored (i.e., ``ignore_edge_lengths`` to be |False|). If
+            |False| [default], the unweighted Robinson-Foulds distances are
+            calculated.
+        is_condensed : bool
+            If |True|, then the distances are returned as a condensed distance
+            matrix: a flat ``array.array`` of the distances between trees ``i``
+            and ``j`` for all ``i < j``, in row-major order (as used by
+            ``scipy.spatial.distance``). If |False| [default], the distances
+            are returned as a full square matrix, i.e., a list of lists.
+        num_processes : int or None
+            If greater than 1, then the rows of the matrix are calculated in
+            tiles of rows distributed over a pool of this number of processes.
+            Otherwise [default] all rows are calculated in this process.
+
+        Returns
+        -------
+        d : list[list[numeric]] or ``array.array``
+            The distances between all pairs of trees in the collection, as
+            integers (unweighted distances) or floating-point values
+            (weighted distances).
+        """
+        if is_weighted and self.ignore_edge_lengths:
+            raise ValueError("Weighted Robinson-Foulds distances require edge lengths, but edge lengths are ignored by this TreeArray")
+        offsets = self._tree_split_offsets
+        tree_split_ids = self._tree_split_ids
+        tree_slices = list(zip(offsets, itertools.islice(offsets, 1, None)))
+        if is_weighted:
+            tree_edge_lengths = self._tree_edge_lengths
+            tree_splits = []
+            for start, stop in tree_slices:
+                edge_lengths = tree_edge_lengths[start:stop].tolist()
+                if self._has_missing_edge_lengths:
+                    edge_lengths = [e if e == e else 0.0 for e in edge_lengths]
+                tree_splits.append(dict(zip(tree_split_ids[start:stop], edge_lengths)))
+            tree_keys = [frozenset(splits.items()) for splits in tree_splits]
+        else:
+            tree_splits = [frozenset(tree_split_ids[start:stop]) for start, stop in tree_slices]
+            if tree_splits:
+                common_splits = frozenset.intersection(*tree_splits)
+                tree_splits = [splits - common_splits for splits in tree_splits]
+            tree_keys = tree_splits
+        # distinct trees, and the index of each tree in these
+        distinct_tree_indexes = {}
+        tree_indexes = [distinct_tree_indexes.setdefault(key, len(distinct_tree_indexes)) for key in tree_keys]
+        distinct_tree_splits = [None] * len(distinct_tree_indexes)
+        for tree_idx, splits in zip(tree_indexes, tree_splits):
+            distinct_tree_splits[tree_idx] = splits
+        num_distinct_trees = len(distinct_tree_splits)
+        tiles = []
+        for start in range(0, num_distinct_trees, _ROBINSON_FOULDS_DISTANCE_TILE_SIZE):
+            tiles.append((start, min(start + _ROBINSON_FOULDS_DISTANCE_TILE_SIZE, num_distinct_trees)))
+        tile_rows = parallel.map_tiles(
+                _calculate_robinson_foulds_distance_tile,
+                tiles,
+                shared_args=(is_weighted, distinct_tree_splits),
+                num_processes=num_processes)
+        # square matrix of the distances between distinct trees
+        zero = 0.0 if is_weighted else 0
+        distinct_distances = [[zero] * num_distinct_trees for idx in range(num_distinct_trees)]
+        idx1 = 0
+        for rows in tile_rows:
+            for row in rows:
+                distinct_distances[idx1][idx1+1:] = row
+                for idx2, d in enumerate(row, idx1 + 1):
+                    distinct_distances[idx2][idx1] = d
+                idx1 += 1
+        if is_condensed:
+            distances = array.array("d" if is_weighted else "q")
+            for idx, tree_idx in enumerate(tree_indexes):
+                distances.extend(map(distinct_distances[tree_idx].__getitem__, tree_indexes[idx+1:]))
+            return distances
+        return [list(map(distinct_distances[tree_idx].__getitem__, tree_indexes)) for tree_idx in tree_indexes]
+
     def collapse_edges_with_less_than_minimum_support(self,
             tree,
             min_freq=constants.GREATER_THAN_HALF,
@@ -2906,12 +3794,10 @@ class TreeArray(
             summarize_splits_on_tree=False,
             **split_summarization_kwargs
             ):
-        split_bitmasks = self._tree_split_bitmasks[index]
+        split_bitmasks, edge_lengths = self.get_split_bitmask_and_edge_tuple(index)
         if self.ignore_edge_lengths:
             split_edge_lengths = None
         else:
-            assert len(self._tree_split_bitmasks) == len(self._tree_edge_lengths)
-            edge_lengths = self._tree_edge_lengths[index]
             split_edge_lengths = dict(zip(split_bitmasks, edge_lengths))
         tree = self.tree_type.from_split_bitmasks(
                 split_bitmasks=split_bitmasks,
@@ -2937,15 +3823,18 @@ class TreeArray(
         being the frequency of occurrence of trees represented by those split
         bitmask sets in the collection.
         """
-        split_bitmask_set_count_map = collections.Counter()
-        assert len(self._tree_split_bitmasks) == len(self._tree_weights)
-        for split_bitmask_set, weight in zip(self._tree_split_bitmasks, self._tree_weights):
-            split_bitmask_set_count_map[frozenset(split_bitmask_set)] += (1.0 * weight)
+        split_id_set_count_map = collections.Counter()
+        offsets = self._tree_split_offsets
+        tree_split_ids = self._tree_split_ids
+        for start, stop, weight in zip(offsets, itertools.islice(offsets, 1, None), self._tree_weights):
+            split_id_set_count_map[frozenset(tree_split_ids[start:stop])] += (1.0 * weight)
+        split_bitmask_table = self._get_split_bitmask_table()
         split_bitmask_set_freqs = {}
         normalization_weight = self._split_distribution.calc_normalization_weight()
         # print("===> {}".format(normalization_weight))
-        for split_bitmask_set in split_bitmask_set_count_map:
-            split_bitmask_set_freqs[split_bitmask_set] = split_bitmask_set_count_map[split_bitmask_set] / normalization_weight
+        for split_id_set in split_id_set_count_map:
+            split_bitmask_set = frozenset(map(split_bitmask_table.__getitem__, split_id_set))
+            split_bitmask_set_freqs[split_bitmask_set] = split_id_set_count_map[split_id_set] / normalization_weight
         return split_bitmask_set_freqs
 
     def bipartition_encoding_frequencies(self):
@@ -3033,5 +3922,126 @@ class TreeArray(
             topologies.sort(key=lambda t: getattr(t, frequency_attr_name), reverse=sort_descending)
         return topologies
 
+###############################################################################
+### Support for Robinson-Foulds distance matrices
+
+_ROBINSON_FOULDS_DISTANCE_TILE_SIZE = 64
+
+def _calculate_robinson_foulds_distance_tile(tile, is_weighted, tree_splits):
+    # Returns, for each tree in a tile of trees given by a range of indexes,
+    # the list of distances between the tree and each subsequent tree.
+    start, stop = tile
+    rows = []
+    if is_weighted:
+        # the absolute edge length differences are summed over the union of
+        # the splits of the two trees, with a length of 0 for the splits
+        # absent from one of them (rather than correcting the totals of both
+        # trees for the splits they share, which loses precision)
+        for idx in range(start, stop):
+            splits1 = tree_splits[idx]
+            get1 = splits1.get
+            keys1 = splits1.keys()
+            row = []
+            for splits2 in itertools.islice(tree_splits, idx + 1, None):
+                get2 = splits2.get
+                keys2 = splits2.keys()
+                shared_splits = keys1 & keys2
+                row.append(sum(map(abs, map(operator.sub,
+                            map(get1, shared_splits),
+                            map(get2, shared_splits))))
+                        + sum(map(abs, map(get1, keys1 - shared_splits)))
+                        + sum(map(abs, map(get2, keys2 - shared_splits))))
+            rows.append(row)
+    else:
+        num_splits = list(map(len, tree_splits))
+        for idx in range(start, stop):
+            splits1 = tree_splits[idx]
+            num_splits1 = num_splits[idx]
+            num_shared_splits = map(len, map(splits1.intersection, itertools.islice(tree_splits, idx + 1, None)))
+            rows.append([num_splits1 + n2 - 2 * n12 for n2, n12 in zip(itertools.islice(num_splits, idx + 1, None), num_shared_splits)])
+    return rows
+
+###############################################################################
+### PackedTreeArray
+
+class PackedTreeArray(object):
+    """
+    Compact, columnar representation of the contents of a |TreeArray|, as
+    returned by :meth:`TreeArray.pack`.
+
+    This holds copies of the (columnar) storage of the |TreeArray|: the
+    distinct split (and leafset) bitmasks of all the trees packed into a
+    single table of bytes (see :func:`bitprocessing.pack_bitmasks`), the
+    flat ``tree_split_ids`` array of indexes into this table, with the splits
+    of the tree at index ``i`` given by
+    ``tree_split_ids[tree_split_offsets[i]:tree_split_offsets[i+1]]``, and
+    parallel ``array.array`` buffers of edge lengths and tree weights. The
+    split distribution is held as a `PackedSplitDistribution`. Instances thus
+    pickle as a handful of raw byte buffers. The data can be merged into a
+    |TreeArray| using :meth:`TreeArray.update_from_packed`.
+    """
+
+    def __init__(self, tree_array):
+        self.is_rooted_trees = tree_array._is_rooted_trees
+        self.ignore_edge_lengths = tree_array.ignore_edge_lengths
+        self.ignore_node_ages = tree_array.ignore_node_ages
+        self.use_tree_weights = tree_array.use_tree_weights
+        self.bitmask_width, self.packed_split_bitmasks = bitprocessing.pack_bitmasks(
+                tree_array._get_split_bitmask_table())
+        self.tree_split_offsets = _copy_array("q", tree_array._tree_split_offsets)
+        self.tree_split_ids = _copy_array("i", tree_array._tree_split_ids)
+        self.tree_edge_lengths = _copy_array("d", tree_array._tree_edge_lengths)
+        self.has_missing_edge_lengths = tree_array._has_missing_edge_lengths
+        self.tree_leafset_split_ids = _copy_array("i", tree_array._tree_leafset_split_ids)
+        self.tree_weights = _copy_array("d", tree_array._tree_weights)
+        self.split_distribution = tree_array._split_distribution.pack()
+
+    def __len__(self):
+        return len(self.tree_weights)
+
+    def _get_file_header(self):
+        return {
+            "is_rooted_trees": self.is_rooted_trees,
+            "ignore_edge_lengths": self.ignore_edge_lengths,
+            "ignore_node_ages": self.ignore_node_ages,
+            "use_tree_weights": self.use_tree_weights,
+            "split_bitmask_width": self.bitmask_width,
+            "has_missing_edge_lengths": self.has_missing_edge_lengths,
+            "split_distribution": self.split_distribution._get_file_header(),
+            }
 
+    def _get_file_sections(self):
+        return [
+            ("split_bitmasks", "B", self.packed_split_bitmasks),
+            ("tree_split_offsets", "q", self.tree_split_offsets),
+            ("tree_split_ids", "i", self.tree_split_ids),
+            ("tree_edge_lengths", "d", self.tree_edge_lengths),
+            ("tree_leafset_split_ids", "i", self.tree_leafset_split_ids),
+            ("tree_weights", "d", self.tree_weights),
+            ] + self.split_distribution._get_file_sections()
 
+    @classmethod
+    def _from_file_data(cls, header, sections):
+        packed = cls.__new__(cls)
+        packed.is_rooted_trees = header["is_rooted_trees"]
+        packed.ignore_edge_lengths = header["ignore_edge_lengths"]
+        packed.ignore_node_ages = header["ignore_node_ages"]
+        packed.use_tree_weights = header["use_tree_weights"]
+        packed.bitmask_width = header["split_bitmask_width"]
+        packed.has_missing_edge_lengths = header["has_missing_edge_lengths"]
+        packed.packed_split_bitmasks = sections["split_bitmasks"]
+        packed.tree_split_offsets = sections["tree_split_offsets"]
+        packed.tree_split_ids = sections["tree_split_ids"]
+        packed.tree_edge_lengths = sections["tree_edge_lengths"]
+        packed.tree_leafset_split_ids = sections["tree_leafset_split_ids"]
+        packed.tree_weights = sections["tree_weights"]
+        packed.split_distribution = PackedSplitDistribution._from_file_data(
+                header["split_distribution"], sections)
+        return packed
+
+    def split_bitmasks(self):
+        """
+        Returns the table of distinct split bitmasks indexed by
+        ``tree_split_ids`` and ``tree_leafset_split_ids``.
+        """
+        return bitprocessing.unpack_bitmasks(self.bitmask_width, self.packed_split_bitmasks)
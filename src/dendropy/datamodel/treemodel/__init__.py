@@ -23,7 +23,12 @@ as well as all the structural classes that make up a tree.
 """
 
 from dendropy.datamodel.treemodel._bipartition import Bipartition
+from dendropy.datamodel.treemodel._bipartition import SlottedBipartition
 from dendropy.datamodel.treemodel._edge import Edge
+from dendropy.datamodel.treemodel._edge import SlottedEdge
 from dendropy.datamodel.treemodel._node import Node
+from dendropy.datamodel.treemodel._node import SlottedNode
 from dendropy.datamodel.treemodel._tree import Tree
 from dendropy.datamodel.treemodel._tree import AsciiTreePlot
+from dendropy.datamodel.treemodel._flattree import FlatTree
+from dendropy.datamodel.treemodel._lca import LcaIndex
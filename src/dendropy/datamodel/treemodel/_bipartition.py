@@ -700,3 +700,20 @@ class Bipartition(object):
     # def leafset_hash
     # def leafset_as_bitstring
     # def is_compatible
+
+class SlottedBipartition(Bipartition):
+    """
+    A |Bipartition| that stores its attributes in ``__slots__`` rather than
+    in a per-instance dictionary, reducing its memory footprint. Created for
+    the edges of trees composed of |SlottedNode| objects, through
+    :meth:`SlottedEdge.bipartition_factory`.
+    """
+
+    __slots__ = (
+        "_split_bitmask",
+        "_leafset_bitmask",
+        "_tree_leafset_bitmask",
+        "_lowest_relevant_bit",
+        "_is_rooted",
+        "is_mutable",
+    )
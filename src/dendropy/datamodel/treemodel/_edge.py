@@ -10,6 +10,28 @@ class Edge(basemodel.DataObject, basemodel.Annotable):
     An :term:``edge`` on a :term:``tree``.
     """
 
+    @classmethod
+    def bipartition_factory(cls, **kwargs):
+        """
+        Creates and returns a |Bipartition| object.
+
+        Derived classes can override this method to provide support for
+        specialized or different types of bipartitions on the tree.
+
+        Parameters
+        ----------
+
+        kwargs : keyword arguments
+            Passed directly to constructor of |Bipartition|.
+
+        Returns
+        -------
+        |Bipartition|
+            A new |Bipartition| object.
+
+        """
+        return _bipartition.Bipartition(**kwargs)
+
     def __init__(self, **kwargs):
         """
         Keyword Arguments
@@ -167,7 +189,7 @@ class Edge(basemodel.DataObject, basemodel.Annotable):
 
     def _get_bipartition(self):
         if self._bipartition is None:
-            self._bipartition = _bipartition.Bipartition(
+            self._bipartition = self.bipartition_factory(
                 edge=self,
                 is_mutable=True,
             )
@@ -254,4 +276,30 @@ class Edge(basemodel.DataObject, basemodel.Annotable):
             return ef(self)
         return str(self)
 
+class SlottedEdge(basemodel.SlottedAnnotable, Edge):
+    """
+    An |Edge| that stores its attributes in ``__slots__`` rather than in a
+    per-instance dictionary, and only creates its list of comments and set
+    of annotations when these are needed, reducing its memory footprint.
+    Created for |SlottedNode| objects, through
+    :meth:`SlottedNode.edge_factory`; its bipartition is a
+    |SlottedBipartition|.
+    """
 
+    __slots__ = (
+        "_label",
+        "_annotations",
+        "_comments",
+        "_head_node",
+        "rootedge",
+        "length",
+        "_bipartition",
+    )
+
+    @classmethod
+    def bipartition_factory(cls, **kwargs):
+        return _bipartition.SlottedBipartition(**kwargs)
+
+    def __init__(self, **kwargs):
+        Edge.__init__(self, **kwargs)
+        self._release_comments()
@@ -0,0 +1,797 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import array
+import re
+from io import StringIO
+from dendropy.utility import constants
+from dendropy.utility import error
+from dendropy.datamodel import taxonmodel
+from dendropy.dataio import nexusprocessing
+from dendropy.dataio import newickreader
+
+_NAN = float("nan")
+
+# As with `nexusprocessing.NexusTokenizer`, a quote only opens a quoted token
+# if it is the first character of the token; elsewhere it is treated as an
+# ordinary character.
+_NEWICK_TOKEN_PATTERN = re.compile(r"""
+      (?P<space>\s+)
+    | (?P<comment>\[[^\]]*\])
+    | '(?P<quoted>(?:[^']|'')*)'
+    | (?P<punctuation>[(),:;])
+    | (?P<unquoted>[^\s()\[\],:;'][^\s()\[\],:;]*)
+    | (?P<invalid>.)
+    """, re.VERBOSE | re.DOTALL)
+
+class FlatTree(taxonmodel.TaxonNamespaceAssociated):
+    """
+    An immutable, array-based representation of the structure of a tree, for
+    read-only analyses of very large trees.
+
+    The nodes of a |FlatTree| are identified by integer indexes, assigned in
+    preorder: the root (seed) node has index 0, every node precedes its
+    descendants, and the descendants of node ``i`` are the nodes ``i+1``,
+    ..., ``subtree_end_indexes[i]-1``. The preorder permutation of the nodes
+    is thus the identity, and the tree is described by the following
+    parallel arrays (``array.array`` objects), indexed by node:
+
+        - ``parent_indexes``: the index of the parent node (-1 for the root).
+        - ``first_child_indexes`` and ``next_sibling_indexes``: the index of
+          the first child and of the next sibling of the node (-1 if none).
+        - ``subtree_end_indexes``: one past the index of the last node of the
+          subtree rooted at the node.
+        - ``edge_lengths``: the length of the edge subtending the node (NaN
+          if the edge has no length).
+        - ``taxon_indexes``: the accession index of the |Taxon| associated
+          with the node in :attr:`FlatTree.taxon_namespace` (-1 if none).
+
+    Node labels, if any, are stored in the list ``node_labels`` (otherwise
+    |None|). Annotations, comments and other attributes of nodes and edges
+    are not represented.
+
+    Compared to a |Tree|, a |FlatTree| takes a small fraction of the memory
+    and time to construct, and all of its operations (traversals, node ages
+    and distances, MRCA queries, bipartition encoding, writing) are
+    non-recursive. Functions in :mod:`dendropy.calculate.treemeasure` accept
+    |FlatTree| objects as well as |Tree| objects.
+
+    A |FlatTree| can be created from a |Tree| using :meth:`FlatTree.from_tree`
+    (and converted back using :meth:`FlatTree.to_tree`), or read directly from
+    a Newick source using :meth:`FlatTree.get`.
+    """
+
+    @classmethod
+    def from_tree(cls, tree):
+        """
+        Creates and returns a |FlatTree| representation of ``tree``.
+
+        Parameters
+        ----------
+        tree : |Tree|
+            The tree to represent. The |FlatTree| will reference the same
+            |TaxonNamespace| as ``tree``.
+
+        Returns
+        -------
+        t : |FlatTree|
+            A new |FlatTree|.
+        """
+        taxon_namespace = tree.taxon_namespace
+        parent_indexes = array.array("i")
+        edge_lengths = array.array("d")
+        taxon_indexes = array.array("i")
+        node_labels = []
+        node_indexes = {}
+        for nd in tree.preorder_node_iter():
+            node_indexes[nd] = len(parent_indexes)
+            if nd._parent_node is None:
+                parent_indexes.append(-1)
+            else:
+                parent_indexes.append(node_indexes[nd._parent_node])
+            length = nd.edge.length
+            edge_lengths.append(_NAN if length is None else length)
+            if nd.taxon is None:
+                taxon_indexes.append(-1)
+            else:
+                taxon_indexes.append(taxon_namespace.accession_index(nd.taxon))
+            node_labels.append(nd.label)
+        if all(label is None for label in node_labels):
+            node_labels = None
+        return cls(
+                parent_indexes=parent_indexes,
+                edge_lengths=edge_lengths,
+                taxon_indexes=taxon_indexes,
+                node_labels=node_labels,
+                is_rooted=tree.is_rooted,
+                taxon_namespace=taxon_namespace)
+
+    @classmethod
+    def get(cls, **kwargs):
+        r"""
+        Reads and returns a |FlatTree| from a data source.
+
+        Newick data given by the ``path``, ``file``, or ``data`` keyword
+        arguments are read directly into a |FlatTree|, without constructing a
+        |Tree|: leaf node labels are mapped to taxa, internal node labels are
+        stored as node labels, "[&R]" and "[&U]" comments preceding the tree
+        set its rooting state, and all other comments are ignored. Data in
+        any other schema (or from any other source), and Newick data that
+        cannot be read directly (e.g., due to constructs, such as comments
+        within labels, that are not supported by the direct reader), are read
+        into a |Tree| using :meth:`Tree.get`, which is then converted.
+
+        Parameters
+        ----------
+        path : str
+            Path to the file to read.
+        file : file-like object
+            File-like object to read.
+        data : str
+            String to read.
+        schema : str
+            Identifier of the format of the data.
+        taxon_namespace : |TaxonNamespace|
+            The |TaxonNamespace| to use to manage taxa; a new one is created
+            if not given.
+        preserve_underscores : bool
+            If |True|, unquoted underscores in labels are preserved;
+            otherwise (default) they are converted to spaces.
+        tree_offset : int
+            The number of trees in the source to skip before the tree to
+            read (default: 0).
+        \*\*kwargs : keyword arguments
+            Other keyword arguments are passed to :meth:`Tree.get` if the
+            data are not read directly.
+
+        Returns
+        -------
+        t : |FlatTree|
+            A new |FlatTree|.
+        """
+        schema = kwargs.get("schema", None)
+        if schema == "newick" and not set(kwargs) - set(["path", "file", "data", "schema", "taxon_namespace", "preserve_underscores", "tree_offset"]):
+            sources = [k for k in ("path", "file", "data") if k in kwargs]
+            if len(sources) != 1:
+                raise TypeError("Exactly one of the following keyword arguments required to be specified: ['path', 'file', 'data']")
+            if sources[0] == "path":
+                with open(kwargs["path"], "r") as src:
+                    newick = src.read()
+            elif sources[0] == "file":
+                newick = kwargs["file"].read()
+            else:
+                newick = kwargs["data"]
+            try:
+                return cls._parse_newick(
+                        newick,
+                        taxon_namespace=kwargs.get("taxon_namespace", None),
+                        preserve_underscores=kwargs.get("preserve_underscores", False),
+                        tree_offset=kwargs.get("tree_offset", 0))
+            except newickreader.NewickReader.NewickReaderError:
+                # the full reader would raise the same error
+                raise
+            except error.DataParseError:
+                # no taxa have been created yet: leave it to the full reader
+                # to parse the data or report the error
+                del kwargs[sources[0]]
+                kwargs["data"] = newick
+        from dendropy.datamodel.treemodel._tree import Tree
+        return cls.from_tree(Tree.get(**kwargs))
+
+    @classmethod
+    def _parse_newick(cls, newick, taxon_namespace, preserve_underscores, tree_offset):
+        def _parse_error(message, pos, error_type=error.DataParseError):
+            line_num = newick.count("\n", 0, pos) + 1
+            col_num = pos - newick.rfind("\n", 0, pos)
+            return error_type(message=message, line_num=line_num, col_num=col_num)
+        tokens = _NEWICK_TOKEN_PATTERN.finditer(newick)
+        num_trees_to_skip = tree_offset
+        is_rooted = None
+        parent_indexes = array.array("i")
+        edge_lengths = array.array("d")
+        labels = []
+        label_positions = {}
+        current = -1
+        depth = 0
+        is_node_open = False # ``current`` is a new node, with no children, label or length
+        for m in tokens:
+            token_type = m.lastgroup
+            if token_type == "space":
+                continue
+            if num_trees_to_skip:
+                if token_type == "punctuation" and m.group() == ";":
+                    num_trees_to_skip -= 1
+                elif token_type == "invalid":
+                    raise _parse_error("Unexpected character: '{}'".format(m.group()), m.start())
+                continue
+            if token_type == "comment":
+                if current < 0:
+                    comment = m.group().upper()
+                    if comment == "[&R]":
+                        is_rooted = True
+                    elif comment == "[&U]":
+                        is_rooted = False
+                continue
+            if current < 0:
+                parent_indexes.append(-1)
+                edge_lengths.append(_NAN)
+                labels.append(None)
+                current = 0
+                is_node_open = True
+            if token_type == "punctuation":
+                token = m.group()
+                if token == "(":
+                    if not is_node_open:
+                        raise _parse_error("Unexpected '('", m.start())
+                    parent_indexes.append(current)
+                    edge_lengths.append(_NAN)
+                    labels.append(None)
+                    current = len(parent_indexes) - 1
+                    depth += 1
+                elif token == ",":
+                    if depth == 0:
+                        raise _parse_error("Unexpected ','", m.start())
+                    parent_indexes.append(parent_indexes[current])
+                    edge_lengths.append(_NAN)
+                    labels.append(None)
+                    current = len(parent_indexes) - 1
+                    is_node_open = True
+                elif token == ")":
+                    if depth == 0:
+                        raise _parse_error("Unexpected ')'", m.start())
+                    current = parent_indexes[current]
+                    depth -= 1
+                    is_node_open = False
+                elif token == ":":
+                    for m in tokens:
+                        if m.lastgroup != "space" and m.lastgroup != "comment":
+                            break
+                    else:
+                        raise _parse_error("Expecting edge length", len(newick))
+                    try:
+                        edge_lengths[current] = float(m.group())
+                    except ValueError:
+                        raise _parse_error("Invalid edge length: '{}'".format(m.group()), m.start())
+                    is_node_open = False
+                else:
+                    if depth != 0:
+                        raise _parse_error("Unexpected ';'", m.start())
+                    break
+            elif token_type == "invalid":
+                raise _parse_error("Unexpected character: '{}'".format(m.group()), m.start())
+            else:
+                if labels[current] is not None:
+                    raise _parse_error("Unexpected label: '{}'".format(m.group()), m.start())
+                if token_type == "quoted":
+                    labels[current] = m.group("quoted").replace("''", "'")
+                else:
+                    label = m.group()
+                    if not preserve_underscores:
+                        label = label.replace("_", " ")
+                    labels[current] = label
+                label_positions[current] = m.start()
+                is_node_open = False
+        else:
+            if current < 0:
+                raise ValueError("No tree found in source")
+            if depth != 0:
+                raise _parse_error("Unexpected end of data", len(newick))
+            raise _parse_error(
+                    "Incomplete or improperly-terminated tree statement (no terminating semi-colon ';')",
+                    len(newick),
+                    newickreader.NewickReader.NewickReaderIncompleteTreeStatementError)
+        flat_tree = cls(
+                parent_indexes=parent_indexes,
+                edge_lengths=edge_lengths,
+                is_rooted=is_rooted,
+                taxon_namespace=taxon_namespace)
+        taxon_namespace = flat_tree.taxon_namespace
+        taxon_indexes = flat_tree.taxon_indexes
+        first_child_indexes = flat_tree.first_child_indexes
+        seen_taxa = set()
+        for idx, label in enumerate(labels):
+            if label is not None and first_child_indexes[idx] < 0:
+                taxon = taxon_namespace.require_taxon(label=label)
+                if taxon in seen_taxa:
+                    raise _parse_error(
+                            taxon.label,
+                            label_positions[idx],
+                            newickreader.NewickReader.NewickReaderDuplicateTaxonError)
+                seen_taxa.add(taxon)
+                taxon_indexes[idx] = taxon_namespace.accession_index(taxon)
+                labels[idx] = None
+        if any(label is not None for label in labels):
+            flat_tree.node_labels = labels
+        return flat_tree
+
+    def __init__(self,
+            parent_indexes=(),
+            edge_lengths=None,
+            taxon_indexes=None,
+            node_labels=None,
+            is_rooted=None,
+            taxon_namespace=None):
+        """
+        Parameters
+        ----------
+        parent_indexes : iterable[int]
+            The index of the parent of each node, with the nodes in preorder
+            (i.e., -1 for the first node, the root, and, for each subsequent
+            node, the index of the previous node or of one of its ancestors).
+            Children are ordered by index.
+        edge_lengths : iterable[float]
+            The length of the edge subtending each node (NaN or |None| if the
+            edge has no length). If not given, no edges have lengths.
+        taxon_indexes : iterable[int]
+            The accession index, in ``taxon_namespace``, of the |Taxon|
+            associated with each node (-1 if none). If not given, no nodes
+            are associated with taxa.
+        node_labels : list
+            The label of each node (or |None|).
+        is_rooted : bool
+            The rooting state of the tree: |True| if rooted, |False| if
+            unrooted, |None| if undefined.
+        taxon_namespace : |TaxonNamespace|
+            The |TaxonNamespace| of the taxa referenced by
+            ``taxon_indexes``; a new one is created if not given.
+        """
+        taxonmodel.TaxonNamespaceAssociated.__init__(self, taxon_namespace=taxon_namespace)
+        self.parent_indexes = array.array("i", parent_indexes)
+        num_nodes = len(self.parent_indexes)
+        if edge_lengths is None:
+            self.edge_lengths = array.array("d", [_NAN]) * num_nodes
+        else:
+            self.edge_lengths = array.array("d", [_NAN if v is None else v for v in edge_lengths])
+        if taxon_indexes is None:
+            self.taxon_indexes = array.array("i", [-1]) * num_nodes
+        else:
+            self.taxon_indexes = array.array("i", taxon_indexes)
+        if node_labels is not None:
+            node_labels = list(node_labels)
+            if len(node_labels) != num_nodes:
+                raise ValueError("Expecting {} node labels but found {}".format(num_nodes, len(node_labels)))
+        self.node_labels = node_labels
+        if len(self.edge_lengths) != num_nodes or len(self.taxon_indexes) != num_nodes:
+            raise ValueError("Node arrays are of different lengths")
+        self.is_rooted = is_rooted
+        self.first_child_indexes = array.array("i", [-1]) * num_nodes
+        self.next_sibling_indexes = array.array("i", [-1]) * num_nodes
+        self.subtree_end_indexes = array.array("i", [num_nodes]) * num_nodes
+        first_child_indexes = self.first_child_indexes
+        next_sibling_indexes = self.next_sibling_indexes
+        subtree_end_indexes = self.subtree_end_indexes
+        last_child_indexes = array.array("i", [-1]) * num_nodes
+        path = []
+        for idx, parent_idx in enumerate(self.parent_indexes):
+            if idx == 0:
+                if parent_idx != -1:
+                    raise ValueError("First node is not the root")
+            else:
+                while path and path[-1] != parent_idx:
+                    subtree_end_indexes[path.pop()] = idx
+                if not path:
+                    raise ValueError("Nodes are not in preorder: node {} has parent {}".format(idx, parent_idx))
+                if first_child_indexes[parent_idx] < 0:
+                    first_child_indexes[parent_idx] = idx
+                else:
+                    next_sibling_indexes[last_child_indexes[parent_idx]] = idx
+                last_child_indexes[parent_idx] = idx
+            path.append(idx)
+        self._taxon_node_indexes = None
+
+    def to_tree(self, tree_factory=None):
+        """
+        Creates and returns a |Tree| with the structure, edge lengths, taxa,
+        and node labels of this tree.
+
+        Parameters
+        ----------
+        tree_factory : function
+            If not |None|, a function that takes a |TaxonNamespace| as the
+            keyword argument ``taxon_namespace`` and returns a new |Tree| (or
+            equivalent) object. Defaults to the |Tree| constructor.
+
+        Returns
+        -------
+        t : |Tree|
+            A new |Tree|, referencing the |TaxonNamespace| of this tree.
+        """
+        if tree_factory is None:
+            from dendropy.datamodel.treemodel._tree import Tree
+            tree_factory = Tree
+        tree = tree_factory(taxon_namespace=self.taxon_namespace)
+        tree.is_rooted = self.is_rooted
+        nodes = []
+        edge_lengths = self.edge_lengths
+        taxon_indexes = self.taxon_indexes
+        node_labels = self.node_labels
+        for idx, parent_idx in enumerate(self.parent_indexes):
+            if parent_idx < 0:
+                nd = tree.seed_node
+            else:
+                nd = tree.node_factory()
+                nodes[parent_idx].add_child(nd)
+            length = edge_lengths[idx]
+            if length == length:
+                nd.edge.length = length
+            if taxon_indexes[idx] >= 0:
+                nd.taxon = self._get_taxon(taxon_indexes[idx])
+            if node_labels is not None:
+                nd.label = node_labels[idx]
+            nodes.append(nd)
+        return tree
+
+    def _get_taxon(self, taxon_index):
+        return self.taxon_namespace._accession_index_taxon_map[taxon_index]
+
+    ###########################################################################
+    ### Structure and Traversal
+
+    def __len__(self):
+        """
+        Returns the number of nodes in this tree.
+        """
+        return len(self.parent_indexes)
+
+    def is_leaf(self, node_index):
+        """
+        Returns |True| if the node with index ``node_index`` has no children.
+        """
+        return self.first_child_indexes[node_index] < 0
+
+    def child_indexes(self, node_index):
+        """
+        Returns a list of the indexes of the children of the node with index
+        ``node_index``.
+        """
+        next_sibling_indexes = self.next_sibling_indexes
+        children = []
+        idx = self.first_child_indexes[node_index]
+        while idx >= 0:
+            children.append(idx)
+            idx = next_sibling_indexes[idx]
+        return children
+
+    def ancestor_indexes(self, node_index, inclusive=False):
+        """
+        Returns a list of the indexes of the ancestors of the node with index
+        ``node_index``, starting with its parent (or itself, if ``inclusive``
+        is |True|) and ending with the root.
+        """
+        parent_indexes = self.parent_indexes
+        ancestors = []
+        idx = node_index if inclusive else parent_indexes[node_index]
+        while idx >= 0:
+            ancestors.append(idx)
+            idx = parent_indexes[idx]
+        return ancestors
+
+    def preorder_indexes(self):
+        """
+        Returns the indexes of the nodes in preorder, i.e., ``range(len(self))``.
+        """
+        return range(len(self.parent_indexes))
+
+    def postorder_indexes(self):
+        """
+        Returns an array of the indexes of the nodes in postorder: each node
+        after its descendants, and the subtrees of the children of a node in
+        order.
+        """
+        subtree_end_indexes = self.subtree_end_indexes
+        postorder = array.array("i")
+        path = []
+        for idx in range(len(self.parent_indexes)):
+            while path and subtree_end_indexes[path[-1]] <= idx:
+                postorder.append(path.pop())
+            path.append(idx)
+        while path:
+            postorder.append(path.pop())
+        return postorder
+
+    def leaf_indexes(self):
+        """
+        Returns an array of the indexes of the leaf nodes, in preorder.
+        """
+        return array.array("i", [idx for idx, first_child_idx in enumerate(self.first_child_indexes) if first_child_idx < 0])
+
+    def num_leaves(self):
+        """
+        Returns the number of leaf nodes in this tree.
+        """
+        return sum(1 for first_child_idx in self.first_child_indexes if first_child_idx < 0)
+
+    ###########################################################################
+    ### Node Metrics
+
+    def node_leaf_counts(self):
+        """
+        Returns an array of the number of leaves in the subtree of each node.
+        """
+        parent_indexes = self.parent_indexes
+        first_child_indexes = self.first_child_indexes
+        counts = array.array("i", [0]) * len(parent_indexes)
+        for idx in range(len(parent_indexes) - 1, -1, -1):
+            if first_child_indexes[idx] < 0:
+                counts[idx] = 1
+            if idx > 0:
+                counts[parent_indexes[idx]] += counts[idx]
+        return counts
+
+    def node_depths(self):
+        """
+        Returns an array of the number of ancestors of each node.
+        """
+        parent_indexes = self.parent_indexes
+        depths = array.array("i", [0]) * len(parent_indexes)
+        for idx in range(1, len(parent_indexes)):
+            depths[idx] = depths[parent_indexes[idx]] + 1
+        return depths
+
+    def node_root_distances(self):
+        """
+        Returns an array of the sum of the edge lengths from each node to the
+        root (with edges without lengths treated as having length 0).
+        """
+        parent_indexes = self.parent_indexes
+        edge_lengths = self.edge_lengths
+        distances = array.array("d", [0.0]) * len(parent_indexes)
+        for idx in range(1, len(parent_indexes)):
+            length = edge_lengths[idx]
+            if length == length:
+                distances[idx] = distances[parent_indexes[idx]] + length
+            else:
+                distances[idx] = distances[parent_indexes[idx]]
+        return distances
+
+    def node_ages(self,
+            ultrametricity_precision=constants.DEFAULT_ULTRAMETRICITY_PRECISION,
+            is_force_max_age=False,
+            is_force_min_age=False):
+        """
+        Returns an array of the age of each node: the sum of edge lengths from
+        the node to the tips (with edges without lengths treated as having
+        length 0).
+
+        The ages are calculated as by :meth:`Tree.calc_node_ages`: leaves
+        have an age of 0, and internal nodes the age implied by their first
+        child, unless ``is_force_max_age`` or ``is_force_min_age`` is |True|.
+
+        Parameters
+        ----------
+        ultrametricity_precision : numeric or bool or None
+            If the ages implied by different children of a node differ by
+            more than ``ultrametricity_precision``, then an
+            :class:`~dendropy.utility.error.UltrametricityError` is raised. If
+            ``ultrametricity_precision`` is negative, |None|, or |False|, then
+            this check is skipped.
+        is_force_max_age: bool
+            If |True|, then each node is given the maximum age implied by its
+            children (and the ultrametricity check is skipped).
+        is_force_min_age: bool
+            If |True|, then each node is given the minimum age implied by its
+            children (and the ultrametricity check is skipped).
+
+        Returns
+        -------
+        a : ``array.array``
+            The age of each node.
+        """
+        if is_force_max_age and is_force_min_age:
+            raise ValueError("Cannot specify both 'is_force_max_age' and 'is_force_min_age'")
+        is_check_ultrametricity = not (
+                is_force_max_age
+                or is_force_min_age
+                or ultrametricity_precision is None
+                or ultrametricity_precision is False
+                or ultrametricity_precision < 0)
+        first_child_indexes = self.first_child_indexes
+        next_sibling_indexes = self.next_sibling_indexes
+        edge_lengths = self.edge_lengths
+        ages = array.array("d", [0.0]) * len(first_child_indexes)
+        for idx in range(len(first_child_indexes) - 1, -1, -1):
+            child_idx = first_child_indexes[idx]
+            if child_idx < 0:
+                continue
+            length = edge_lengths[child_idx]
+            age = ages[child_idx] + (length if length == length else 0.0)
+            child_idx = next_sibling_indexes[child_idx]
+            while child_idx >= 0:
+                length = edge_lengths[child_idx]
+                child_age = ages[child_idx] + (length if length == length else 0.0)
+                if is_force_max_age:
+                    if child_age > age:
+                        age = child_age
+                elif is_force_min_age:
+                    if child_age < age:
+                        age = child_age
+                elif is_check_ultrametricity and abs(age - child_age) > ultrametricity_precision:
+                    raise error.UltrametricityError(
+                            "Tree is not ultrametric within threshold of {threshold}: {deviance}."
+                            " Encountered in subtree of node {node}".format(
+                                threshold=ultrametricity_precision,
+                                deviance=abs(age - child_age),
+                                node=idx))
+                child_idx = next_sibling_indexes[child_idx]
+            ages[idx] = age
+        return ages
+
+    ###########################################################################
+    ### Taxa, MRCA and Bipartitions
+
+    def taxon_node_index(self, taxon):
+        """
+        Returns the index of the node associated with ``taxon`` (or |None| if
+        there is none).
+        """
+        if self._taxon_node_indexes is None:
+            self._taxon_node_indexes = {}
+            for idx, taxon_index in enumerate(self.taxon_indexes):
+                if taxon_index >= 0:
+                    self._taxon_node_indexes[taxon_index] = idx
+        try:
+            taxon_index = self.taxon_namespace.accession_index(taxon)
+        except KeyError:
+            return None
+        return self._taxon_node_indexes.get(taxon_index, None)
+
+    def mrca(self, taxa=None, taxon_labels=None, node_indexes=None):
+        """
+        Returns the index of the most recent common ancestor node of the
+        nodes associated with the given taxa (or with the given indexes).
+
+        Parameters
+        ----------
+        taxa : iterable[|Taxon|]
+            The taxa.
+        taxon_labels : iterable[str]
+            The labels of the taxa.
+        node_indexes : iterable[int]
+            The indexes of the nodes.
+
+        Returns
+        -------
+        idx : int or |None|
+            The index of the most recent common ancestor, or |None| if any of
+            the taxa is not associated with a node of this tree.
+        """
+        if taxon_labels is not None:
+            taxa = self.taxon_namespace.get_taxa(labels=taxon_labels)
+        if taxa is not None:
+            node_indexes = [self.taxon_node_index(taxon) for taxon in taxa]
+            if None in node_indexes:
+                return None
+        node_indexes = list(node_indexes)
+        if not node_indexes:
+            raise TypeError("Need to specify one or more taxa or nodes")
+        idx = min(node_indexes)
+        last_idx = max(node_indexes)
+        subtree_end_indexes = self.subtree_end_indexes
+        parent_indexes = self.parent_indexes
+        while subtree_end_indexes[idx] <= last_idx:
+            idx = parent_indexes[idx]
+        return idx
+
+    def leafset_bitmasks(self):
+        """
+        Returns a list of the leafset bitmask of each node: the bitmask of the
+        taxa associated with the leaves of its subtree (see
+        :meth:`TaxonNamespace.taxon_bitmask`).
+        """
+        parent_indexes = self.parent_indexes
+        first_child_indexes = self.first_child_indexes
+        taxon_indexes = self.taxon_indexes
+        bitmasks = [0] * len(parent_indexes)
+        for idx in range(len(parent_indexes) - 1, -1, -1):
+            if first_child_indexes[idx] < 0 and taxon_indexes[idx] >= 0:
+                bitmasks[idx] = 1 << taxon_indexes[idx]
+            if idx > 0:
+                bitmasks[parent_indexes[idx]] |= bitmasks[idx]
+        return bitmasks
+
+    def split_bitmasks(self):
+        """
+        Returns a list of the split bitmask of each node (i.e., of the
+        bipartition of its edge), as encoded by
+        :meth:`Tree.encode_bipartitions`: the leafset bitmask if the tree is
+        rooted, or otherwise the leafset bitmask normalized such that the bit
+        of the first taxon on the tree is unset.
+        """
+        bitmasks = self.leafset_bitmasks()
+        if self.is_rooted or not bitmasks:
+            return bitmasks
+        tree_leafset_bitmask = bitmasks[0]
+        lowest_relevant_bit = tree_leafset_bitmask & -tree_leafset_bitmask
+        return [((~b) & tree_leafset_bitmask) if (b & lowest_relevant_bit) else b for b in bitmasks]
+
+    ###########################################################################
+    ### Writing
+
+    def as_string(self, schema, **kwargs):
+        """
+        Returns a string representation of this tree in the given schema.
+
+        If ``schema`` is "newick", then the tree is written directly, and the
+        following keyword arguments (as for writing |Tree| objects) are
+        supported: ``suppress_leaf_taxon_labels``,
+        ``suppress_leaf_node_labels`` (default: |True|),
+        ``suppress_internal_taxon_labels``, ``suppress_internal_node_labels``,
+        ``suppress_rooting``, ``suppress_edge_lengths``, ``unquoted_underscores``,
+        ``preserve_spaces``, and ``real_value_format_specifier``. Otherwise,
+        the tree is written by converting it to a |Tree| (see
+        :meth:`FlatTree.to_tree`).
+        """
+        if schema != "newick":
+            return self.to_tree().as_string(schema=schema, **kwargs)
+        s = StringIO()
+        self._write_newick(s, **kwargs)
+        s.write("\n")
+        return s.getvalue()
+
+    def _write_newick(self,
+            stream,
+            suppress_leaf_taxon_labels=False,
+            suppress_leaf_node_labels=True,
+            suppress_internal_taxon_labels=False,
+            suppress_internal_node_labels=False,
+            suppress_rooting=False,
+            suppress_edge_lengths=False,
+            unquoted_underscores=False,
+            preserve_spaces=False,
+            real_value_format_specifier=""):
+        first_child_indexes = self.first_child_indexes
+        subtree_end_indexes = self.subtree_end_indexes
+        parent_indexes = self.parent_indexes
+        edge_lengths = self.edge_lengths
+        taxon_indexes = self.taxon_indexes
+        node_labels = self.node_labels
+        format_edge_length = ("{:" + real_value_format_specifier + "}").format
+        taxon_labels = {}
+        def _compose_node(idx):
+            is_leaf = first_child_indexes[idx] < 0
+            tag_parts = []
+            if taxon_indexes[idx] >= 0 and not (suppress_leaf_taxon_labels if is_leaf else suppress_internal_taxon_labels):
+                taxon_index = taxon_indexes[idx]
+                try:
+                    taxon_label = taxon_labels[taxon_index]
+                except KeyError:
+                    taxon_label = self._get_taxon(taxon_index).label
+                    taxon_labels[taxon_index] = taxon_label
+                if taxon_label is not None:
+                    tag_parts.append(str(taxon_label))
+            if node_labels is not None and node_labels[idx] and not (suppress_leaf_node_labels if is_leaf else suppress_internal_node_labels):
+                tag_parts.append(str(node_labels[idx]))
+            if tag_parts:
+                tag = nexusprocessing.escape_nexus_token(" ".join(tag_parts),
+                        preserve_spaces=preserve_spaces,
+                        quote_underscores=not unquoted_underscores,
+                        protect_regex=r'''[()[\]{},;:'"\0\t\n]''')
+            else:
+                tag = ""
+            length = edge_lengths[idx]
+            if length == length and not suppress_edge_lengths:
+                return "{}:{}".format(tag, format_edge_length(length))
+            return tag
+        if not suppress_rooting:
+            if self.is_rooted:
+                stream.write("[&R] ")
+            elif self.is_rooted is not None:
+                stream.write("[&U] ")
+        parts = []
+        path = []
+        for idx in range(len(parent_indexes)):
+            while path and subtree_end_indexes[path[-1]] <= idx:
+                parts.append(")")
+                parts.append(_compose_node(path.pop()))
+            if idx > 0 and first_child_indexes[parent_indexes[idx]] != idx:
+                parts.append(",")
+            if first_child_indexes[idx] >= 0:
+                parts.append("(")
+                path.append(idx)
+            else:
+                parts.append(_compose_node(idx))
+        while path:
+            parts.append(")")
+            parts.append(_compose_node(path.pop()))
+        parts.append(";")
+        stream.write("".join(parts))
@@ -0,0 +1,181 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import array
+
+_BLOCK_SIZE = 32
+_INDEX_MASK = (1 << 32) - 1
+
+class LcaIndex(object):
+    """
+    An index of the structure of a |Tree| that answers queries for the most
+    recent common ancestor (lowest common ancestor, LCA) of any number of
+    nodes in time independent of the size of the tree.
+
+    Nodes are numbered in preorder; the MRCA of a set of nodes is then the
+    MRCA of the first and last of them, which is the parent of the shallowest
+    node between these two in preorder. The latter is found by a range
+    minimum query over the node depths, using a sparse table of the minima
+    of fixed-size blocks of nodes. The index takes time and space (nearly)
+    linear in the number of nodes to build.
+
+    An index reflects the structure of the tree at the time it was built.
+    Use :meth:`Tree.lca_index` to obtain an index of the current structure of
+    a tree: this is rebuilt automatically if the tree was restructured since
+    the index was last built, through the methods of |Node| or |Tree| that
+    add, remove or move nodes or reseed the tree.
+    """
+
+    def __init__(self, tree):
+        """
+        Parameters
+        ----------
+        tree : |Tree|
+            The tree to index.
+        """
+        self.tree = tree
+        self.seed_node = tree.seed_node
+        # set on every node of the tree, and cleared from a node and its
+        # ancestors when any of its children are added, removed or moved
+        self._token = object()
+        self.nodes = []
+        self.parent_indexes = array.array("i")
+        self._node_indexes = {}
+        self._taxon_leaf_index_ranges = {}
+        nodes = self.nodes
+        parent_indexes = self.parent_indexes
+        node_indexes = self._node_indexes
+        taxon_leaf_index_ranges = self._taxon_leaf_index_ranges
+        depths = array.array("i")
+        token = self._token
+        for idx, nd in enumerate(tree.preorder_node_iter()):
+            nd._lca_index_token = token
+            nodes.append(nd)
+            node_indexes[nd] = idx
+            if idx == 0:
+                parent_indexes.append(-1)
+                depths.append(0)
+            else:
+                parent_idx = node_indexes[nd._parent_node]
+                parent_indexes.append(parent_idx)
+                depths.append(depths[parent_idx] + 1)
+            if not nd._child_nodes and nd.taxon is not None:
+                index_range = taxon_leaf_index_ranges.get(nd.taxon, None)
+                if index_range is None:
+                    taxon_leaf_index_ranges[nd.taxon] = (idx, idx)
+                else:
+                    taxon_leaf_index_ranges[nd.taxon] = (index_range[0], idx)
+        # depth and index of each node, packed so that the minimum key of a
+        # range of nodes identifies the shallowest of them
+        self._keys = array.array("q", [(depth << 32) | idx for idx, depth in enumerate(depths)])
+        keys = self._keys
+        block_minima = array.array("q", [min(keys[i:i+_BLOCK_SIZE]) for i in range(0, len(keys), _BLOCK_SIZE)])
+        self._block_minima_table = [block_minima]
+        step = 1
+        while 2 * step <= len(block_minima):
+            level = self._block_minima_table[-1]
+            self._block_minima_table.append(array.array("q", map(min, level[:-step], level[step:])))
+            step *= 2
+
+    def is_current(self):
+        """
+        Returns |True| if the structure of the tree has not been changed since
+        this index was built.
+        """
+        return (self.seed_node is self.tree.seed_node
+                and self.seed_node._lca_index_token is self._token)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __eq__(self, other):
+        return (self.nodes == other.nodes
+                and self.parent_indexes == other.parent_indexes)
+
+    def __hash__(self):
+        return id(self)
+
+    def _min_key(self, start, stop):
+        # minimum of ``self._keys[start:stop]``
+        keys = self._keys
+        start_block = start // _BLOCK_SIZE
+        stop_block = (stop - 1) // _BLOCK_SIZE
+        if stop_block - start_block <= 1:
+            return min(keys[start:stop])
+        min_key = min(
+                min(keys[start:(start_block + 1) * _BLOCK_SIZE]),
+                min(keys[stop_block * _BLOCK_SIZE:stop]))
+        start_block += 1
+        level_idx = (stop_block - start_block).bit_length() - 1
+        level = self._block_minima_table[level_idx]
+        return min(min_key,
+                level[start_block],
+                level[stop_block - (1 << level_idx)])
+
+    def _mrca_index(self, first_idx, last_idx):
+        if first_idx == last_idx:
+            return first_idx
+        return self.parent_indexes[self._min_key(first_idx + 1, last_idx + 1) & _INDEX_MASK]
+
+    def mrca(self, *nodes):
+        r"""
+        Returns the most recent common ancestor of the given nodes.
+
+        Parameters
+        ----------
+        \*nodes : |Node|
+            One or more nodes of the tree.
+
+        Returns
+        -------
+        |Node|
+            The most recent common ancestor of the nodes.
+        """
+        if not nodes:
+            raise TypeError("Need to specify one or more nodes")
+        node_indexes = self._node_indexes
+        if len(nodes) == 2:
+            first_idx = node_indexes[nodes[0]]
+            last_idx = node_indexes[nodes[1]]
+            if first_idx > last_idx:
+                first_idx, last_idx = last_idx, first_idx
+        else:
+            indexes = [node_indexes[nd] for nd in nodes]
+            first_idx = min(indexes)
+            last_idx = max(indexes)
+        return self.nodes[self._mrca_index(first_idx, last_idx)]
+
+    def taxa_mrca(self, taxa):
+        """
+        Returns the most recent common ancestor of the leaves associated
+        with the given taxa.
+
+        Parameters
+        ----------
+        taxa : collections.Iterable [|Taxon|]
+            One or more taxa.
+
+        Returns
+        -------
+        |Node| or |None|
+            The most recent common ancestor of the leaves associated with the
+            taxa, or |None| if any of the taxa is not associated with a leaf of
+            the tree.
+        """
+        taxon_leaf_index_ranges = self._taxon_leaf_index_ranges
+        first_idx = None
+        last_idx = None
+        for taxon in taxa:
+            index_range = taxon_leaf_index_ranges.get(taxon, None)
+            if index_range is None:
+                return None
+            if first_idx is None:
+                first_idx, last_idx = index_range
+            else:
+                if index_range[0] < first_idx:
+                    first_idx = index_range[0]
+                if index_range[1] > last_idx:
+                    last_idx = index_range[1]
+        if first_idx is None:
+            raise TypeError("Need to specify one or more taxa")
+        return self.nodes[self._mrca_index(first_idx, last_idx)]
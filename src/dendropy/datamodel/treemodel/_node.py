@@ -53,6 +53,7 @@ class Node(basemodel.DataObject, basemodel.Annotable):
         self._edge = None
         self._child_nodes = []
         self._parent_node = None
+        self._lca_index_token = None
         self.edge = self.edge_factory(
             head_node=self, length=kwargs.pop("edge_length", None)
         )
@@ -672,6 +673,9 @@ class Node(basemodel.DataObject, basemodel.Annotable):
             "Cannot add a node's parent as its child: remove the node from its parent's"
             " child set first"
         )
+        self._invalidate_lca_indexes()
+        if node._parent_node is not None:
+            node._parent_node._invalidate_lca_indexes()
         node._parent_node = self
         if node not in self._child_nodes:
             self._child_nodes.append(node)
@@ -698,6 +702,9 @@ class Node(basemodel.DataObject, basemodel.Annotable):
         |Node|
             The node that was added.
         """
+        self._invalidate_lca_indexes()
+        if node._parent_node is not None:
+            node._parent_node._invalidate_lca_indexes()
         node._parent_node = self
         try:
             cur_index = self._child_nodes.index(node)
@@ -782,6 +789,7 @@ class Node(basemodel.DataObject, basemodel.Annotable):
             raise ValueError("Tried to remove an non-existing or null node")
         children = self._child_nodes
         if node in children:
+            self._invalidate_lca_indexes()
             node._parent_node = None
             node.edge.tail_node = None
             index = children.index(node)
@@ -829,6 +837,7 @@ class Node(basemodel.DataObject, basemodel.Annotable):
         """
         Removes all child nodes.
         """
+        self._invalidate_lca_indexes()
         self._child_nodes.clear()
 
     def reversible_remove_child(self, node, suppress_unifurcations=False):
@@ -852,6 +861,7 @@ class Node(basemodel.DataObject, basemodel.Annotable):
         except:
             raise ValueError("Tried to remove a node that is not listed as a child")
         removed = [(node, self, pos, [], None)]
+        self._invalidate_lca_indexes()
         node._parent_node = None
         node.edge.tail_node = None
         children.remove(node)
@@ -980,6 +990,7 @@ class Node(basemodel.DataObject, basemodel.Annotable):
         if new_edge is self._edge:
             return
         if self._parent_node is not None:
+            self._parent_node._invalidate_lca_indexes()
             try:
                 self._parent_node._child_nodes.remove(self)
             except ValueError:
@@ -1053,6 +1064,16 @@ class Node(basemodel.DataObject, basemodel.Annotable):
     def leafset_as_bitstring(self):
         return self._edge.bipartition.leafset_as_bitstring()
 
+    def _invalidate_lca_indexes(self):
+        # marks the MRCA indexes (see :meth:`Tree.lca_index`) of the trees
+        # that include this node as out of date: as the nodes on the path to
+        # the root of a tree lose their tokens only once between rebuilds of
+        # its index, this takes constant amortized time
+        node = self
+        while node is not None and node._lca_index_token is not None:
+            node._lca_index_token = None
+            node = node._parent_node
+
     def _get_parent_node(self):
         """Returns the parent node of this node."""
         return self._parent_node
@@ -1060,12 +1081,14 @@ class Node(basemodel.DataObject, basemodel.Annotable):
     def _set_parent_node(self, parent):
         """Sets the parent node of this node."""
         if self._parent_node is not None:
+            self._parent_node._invalidate_lca_indexes()
             try:
                 self._parent_node._child_nodes.remove(self)
             except ValueError:
                 pass
         self._parent_node = parent
         if self._parent_node is not None:
+            self._parent_node._invalidate_lca_indexes()
             if self not in self._parent_node._child_nodes:
                 self._parent_node._child_nodes.append(self)
 
@@ -1671,3 +1694,49 @@ class Node(basemodel.DataObject, basemodel.Annotable):
             ndl.extend(t)
             return tuple(ndl)
         return ()
+
+class SlottedNode(basemodel.SlottedAnnotable, Node):
+    """
+    A |Node| that stores its attributes in ``__slots__`` rather than in a
+    per-instance dictionary, and only creates its list of comments and set
+    of annotations when these are needed, reducing its memory footprint
+    (e.g., when holding many large trees in memory). Its edge is a
+    |SlottedEdge|.
+
+    Attributes other than the standard ones can still be set on
+    |SlottedNode| objects, but are stored in an instance dictionary, which
+    is created when the first such attribute is set.
+
+    Trees use |SlottedNode| objects if their :meth:`Tree.node_factory`
+    creates them::
+
+        class CompactTree(dendropy.Tree):
+
+            @classmethod
+            def node_factory(cls, **kwargs):
+                return dendropy.SlottedNode(**kwargs)
+
+        trees = dendropy.TreeList(tree_type=CompactTree)
+        trees.read(path="pythonidae.mcmc.nex", schema="nexus")
+
+    """
+
+    __slots__ = (
+        "_label",
+        "_annotations",
+        "_comments",
+        "taxon",
+        "age",
+        "_edge",
+        "_child_nodes",
+        "_parent_node",
+        "_lca_index_token",
+    )
+
+    @classmethod
+    def edge_factory(cls, **kwargs):
+        return _edge.SlottedEdge(**kwargs)
+
+    def __init__(self, **kwargs):
+        Node.__init__(self, **kwargs)
+        self._release_comments()
@@ -13,8 +13,8 @@ from dendropy.utility import GLOBAL_RNG
 from dendropy.utility import messaging
 from dendropy.datamodel import basemodel
 from dendropy.datamodel import taxonmodel
-from dendropy.datamodel.treemodel import _bipartition
 from dendropy.datamodel.treemodel import _node
+from dendropy.datamodel.treemodel import _lca
 from dendropy import dataio
 
 _LOG = messaging.get_logger(__name__)
@@ -266,6 +266,28 @@ class Tree(
         taxon_namespace : |TaxonNamespace| instance
             The operational taxonomic unit concept namespace to use to manage
             taxon definitions.
+        tree_offset : integer
+            Number of trees to skip at the beginning of each source (e.g., the
+            burn-in of an MCMC sample).
+        max_trees : integer
+            If given, no more than this number of trees will be read from each
+            source.
+        use_tree_index : bool
+            If |True|, then for sources in NEWICK or NEXUS format that are
+            given as paths, trees skipped due to ``tree_offset`` will not be
+            parsed: instead, the reader will seek directly to the first tree
+            to be read, using an index of the byte offsets of the tree
+            statements in the source (see `dendropy.dataio.treeindex`). The
+            index is built by scanning the source the first time that it is
+            needed, and is saved to a "sidecar" file next to the source for
+            re-use. Note that taxa only found in the skipped trees of NEWICK
+            sources are then not added to ``taxon_namespace``, and the order
+            of the taxa in ``taxon_namespace`` may differ from that obtained
+            without the index.
+        tree_index_dir : str
+            If given, the indexes used with ``use_tree_index`` are saved to
+            (and loaded from) files in this directory instead of sidecar files
+            next to the sources.
         \*\*kwargs : keyword arguments
             These will be passed directly to the schema-parser implementation.
 
@@ -312,11 +334,6 @@ class Tree(
                 )
         else:
             assert "taxon_set" not in kwargs
-        if "tree_offset" in kwargs:
-            raise TypeError(
-                "'tree_offset' is not supported: trees should be skipped/discarded on"
-                " the client code side"
-            )
         tree_yielder = dataio.get_tree_yielder(
             files, schema, taxon_namespace=taxon_namespace, tree_type=cls, **kwargs
         )
@@ -474,7 +491,7 @@ class Tree(
                     assert cecm != split_to_add
                     new_mask |= cecm
                     new_node_children.append(child)
-                    new_edge.bipartition = _bipartition.Bipartition(
+                    new_edge.bipartition = new_edge.bipartition_factory(
                         leafset_bitmask=new_mask,
                         tree_leafset_bitmask=all_taxa_bitmask,
                         is_mutable=False,
@@ -691,6 +708,7 @@ class Tree(
             self.bipartition_encoding = None
             self._split_bitmask_edge_map = None
             self._bipartition_edge_map = None
+            self._lca_index = None
             seed_node = kwargs.pop("seed_node", None)
             if seed_node is None:
                 self.seed_node = self.node_factory()
@@ -779,6 +797,12 @@ class Tree(
         return self.__deepcopy__(memo=memo)
 
     def __deepcopy__(self, memo=None):
+        if memo is None:
+            memo = {}
+        # the MRCA index is rebuilt on demand rather than copied
+        lca_index = getattr(self, "_lca_index", None)
+        if lca_index is not None:
+            memo[id(lca_index)] = None
         # ensure clone map
         return basemodel.Annotable.__deepcopy__(self, memo=memo)
         # if memo is None:
@@ -1469,12 +1493,15 @@ class Tree(
             * have the labels specified by the list of strings given by the
               keyword argument ``taxon_labels``
 
-        Returns |None| if no appropriate node is found. Assumes that
-        bipartitions have been encoded on the tree. It is possible that the
-        leafset bitmask is not compatible with the subtree that is returned!
-        (compatibility tests are not fully performed).  This function is used
-        to find the "insertion point" for a new bipartition via a root to tip
-        search.
+        Returns |None| if no appropriate node is found. If ``taxa`` or
+        ``taxon_labels`` are specified (and ``start_node`` is not), and the
+        tree has a current MRCA index (see :meth:`Tree.lca_index`), or
+        ``use_lca_index`` is |True|, the node is found in constant time using
+        the index. Otherwise, assumes that bipartitions have been encoded on
+        the tree. It is possible that the leafset bitmask is
+        not compatible with the subtree that is returned! (compatibility tests
+        are not fully performed).  This function is used to find the
+        "insertion point" for a new bipartition via a root to tip search.
 
         Parameters
         ----------
@@ -1498,6 +1525,12 @@ class Tree(
                 ``start_node`` : |Node|, optional
                     If given, specifies the node at which to start searching.
                     If not, defaults to the root or ``seed_node``.
+                ``use_lca_index`` : bool, optional
+                    If |True|, then the MRCA index of the tree is built (or
+                    rebuilt, if the tree has been restructured) if needed to
+                    find the node of ``taxa`` or ``taxon_labels``. This is
+                    faster when finding many MRCAs on a tree that is not
+                    restructured in between.
 
         Returns
         -------
@@ -1530,6 +1563,7 @@ class Tree(
                     )
             if taxa is None:
                 raise ValueError("No taxa matching criteria found")
+            taxa = list(taxa)
             leafset_bitmask = self.taxon_namespace.taxa_bitmask(taxa=taxa)
 
         if leafset_bitmask is None or leafset_bitmask == 0:
@@ -1540,6 +1574,12 @@ class Tree(
         ):
             self.encode_bipartitions(suppress_unifurcations=False)
 
+        if "leafset_bitmask" not in kwargs and "start_node" not in kwargs:
+            if kwargs.get("use_lca_index", False):
+                return self.lca_index().taxa_mrca(taxa)
+            if self._lca_index is not None and self._lca_index.is_current():
+                return self._lca_index.taxa_mrca(taxa)
+
         if (
             start_node.edge.bipartition.leafset_bitmask & leafset_bitmask
         ) != leafset_bitmask:
@@ -1576,6 +1616,32 @@ class Tree(
             #   leaves that have not been encoded with leafset_bitmasks.
             return last_match
 
+    def lca_index(self):
+        """
+        Returns an index of the current structure of the tree for most recent
+        common ancestor queries.
+
+        The index is built (in time linear in the number of nodes) when first
+        requested, and cached until the tree is restructured.
+
+        Example
+        -------
+
+        ::
+
+            lca_index = tree.lca_index()
+            mrca = lca_index.mrca(node1, node2)
+            mrca = lca_index.taxa_mrca(taxa)
+
+        Returns
+        -------
+        |LcaIndex|
+            An index of the current structure of the tree.
+        """
+        if self._lca_index is None or not self._lca_index.is_current():
+            self._lca_index = _lca.LcaIndex(self)
+        return self._lca_index
+
     def __iter__(self):
         """
         Iterate over nodes on tree in pre-order.
@@ -2629,37 +2695,44 @@ class Tree(
         operation, it will have an outdegree of one. In this case, unless
         ``suppress_unifurcations`` is False, then it will be
         removed from the tree.
-        """
-        from dendropy.calculate.phylogeneticdistance import PhylogeneticDistanceMatrix
-
-        pdm = PhylogeneticDistanceMatrix.from_tree(self)
-
-        ## ugly, ugly, ugly code to find two nodes that span the midpoint
-        maxtax1, maxtax2 = pdm.max_pairwise_distance_taxa()
-        spanning_nodes = [None, None]
-        found = 0
-        for nd in self.leaf_node_iter():
-            for tax in (maxtax1, maxtax2):
-                if nd.taxon is tax:
-                    spanning_nodes[found] = nd
-                    found += 1
-                    break
-            if found == 2:
-                break
-        if (
-            spanning_nodes[0].distance_from_root()
-            < spanning_nodes[1].distance_from_root()
-        ):
-            n1 = spanning_nodes[1]
-            n2 = spanning_nodes[0]
-        else:
-            n1 = spanning_nodes[0]
-            n2 = spanning_nodes[1]
 
-        plen = float(pdm.patristic_distance(maxtax1, maxtax2)) / 2
-        mrca_node = pdm.mrca(n1.taxon, n2.taxon)
-        # assert mrca_node is self.mrca(taxa=[n1.taxon, n2.taxon])
-        # mrca_node = self.mrca(taxa=[n1.taxon, n2.taxon])
+        The longest path between two leaves is found in a single postorder
+        traversal (as the two longest paths from some node to leaves in the
+        subtrees of different children), in time linear in the number of
+        nodes, with edges without lengths treated as having length 0.
+        """
+        # for each node, the length of the longest path to a leaf in its
+        # subtree and the leaf at the end of the path
+        subtree_max_leaf_paths = {}
+        max_path_length = None
+        for nd in self.postorder_node_iter():
+            if not nd._child_nodes:
+                subtree_max_leaf_paths[nd] = (0.0, nd)
+                continue
+            path1 = None
+            path2 = None
+            for ch in nd._child_nodes:
+                ch_path_length, ch_leaf = subtree_max_leaf_paths.pop(ch)
+                if ch.edge.length is not None:
+                    ch_path_length += ch.edge.length
+                if path1 is None or ch_path_length > path1[0]:
+                    path1, path2 = (ch_path_length, ch_leaf), path1
+                elif path2 is None or ch_path_length > path2[0]:
+                    path2 = (ch_path_length, ch_leaf)
+            subtree_max_leaf_paths[nd] = path1
+            if path2 is not None and (
+                max_path_length is None or path1[0] + path2[0] > max_path_length
+            ):
+                max_path_length = path1[0] + path2[0]
+                # n1 is the farther of the two leaves from their MRCA (and
+                # so from the root), hence the midpoint is between n1 and
+                # the MRCA
+                n1 = path1[1]
+                mrca_node = nd
+        if max_path_length is None:
+            raise ValueError("Tree has fewer than two leaves")
+
+        plen = float(max_path_length) / 2
         cur_node = n1
 
         break_on_node = None  # populated *iff* midpoint is exactly at an existing node
@@ -2694,7 +2767,7 @@ class Tree(
             old_head_node = target_edge.head_node
             old_tail_node = target_edge.tail_node
             old_tail_node.remove_child(old_head_node)
-            new_seed_node = _node.Node()
+            new_seed_node = self.node_factory()
             # new_seed_node.add_child(old_head_node, edge_length=head_node_edge_len)
             new_seed_node.add_child(old_head_node)
             old_head_node.edge.length = head_node_edge_len
@@ -2818,7 +2891,7 @@ class Tree(
                 while len(to_attach) > 0:
                     next_child = to_attach.pop()
                     next_sib = rng.choice(attachment_points)
-                    next_attachment = _node.Node()
+                    next_attachment = self.node_factory()
                     if next_sib is node:
                         cc = list(node._child_nodes)
                         node.add_child(next_attachment)
@@ -2837,7 +2910,7 @@ class Tree(
                     attachment_points.append(next_child)
             else:
                 while len(node._child_nodes) > limit:
-                    nn1 = _node.Node()
+                    nn1 = self.node_factory()
                     nn1.edge.length = 0.0
                     c1 = node._child_nodes[0]
                     c2 = node._child_nodes[1]
@@ -3658,7 +3731,7 @@ class Tree(
                     tree_edges.append(edge)
                     for child in child_nodes:
                         leafset_bitmask |= child.edge.bipartition._leafset_bitmask
-                edge.bipartition = _bipartition.Bipartition(
+                edge.bipartition = edge.bipartition_factory(
                     compile_bipartition=False, is_mutable=True
                 )
                 edge.bipartition._leafset_bitmask = leafset_bitmask
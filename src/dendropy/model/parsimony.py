@@ -22,6 +22,7 @@ Models, modeling and model-fitting of parsimony.
 """
 
 from dendropy.utility.error import TaxonNamespaceIdentityError
+from dendropy.utility import bitprocessing
 from dendropy.utility import deprecate
 
 class _NodeStateSetMap(dict):
@@ -325,6 +326,241 @@ def fitch_up_pass(
             result.append(final_ss)
         setattr(nd, state_sets_attr_name, result)
 
+class FitchParsimonyScorer(object):
+    """
+    Scores trees under Fitch's (1971) unordered parsimony algorithm, as
+    :func:`fitch_down_pass` and :func:`fitch_up_pass`, but for all sites at
+    once, with the data prepared once for any number of trees.
+
+    Identical site patterns are compressed into a single pattern, weighted by
+    the (summed weights of the) sites with that pattern. The state sets of a
+    node over all patterns are then represented by a bitmask for each state,
+    with the bit of each pattern set if the state is in the state set of the
+    node for that pattern, so that the state sets of a node are calculated
+    from those of its children for all patterns at once by a few bitwise
+    operations, and the number of patterns requiring a change are counted
+    with a bit-sliced counter (a bitmask for each binary digit of the
+    count).
+
+    Examples
+    --------
+
+    ::
+
+        taxa = dendropy.TaxonNamespace()
+        data = dendropy.StandardCharacterMatrix.get_from_path(
+                "apternodus.chars.nexus",
+                "nexus",
+                taxon_namespace=taxa)
+        trees = dendropy.TreeList.get_from_path(
+                "apternodus.tre",
+                "nexus",
+                taxon_namespace=taxa)
+        scorer = FitchParsimonyScorer(data.taxon_state_sets_map(gaps_as_missing=True))
+        for tree in trees:
+            print(scorer.score(tree))
+
+    """
+
+    def __init__(self, taxon_state_sets_map, weights=None):
+        """
+        Parameters
+        ----------
+        taxon_state_sets_map : dict[taxon] = state sets
+            A dictionary that takes a taxon object as a key and returns a state
+            set list as a value, as returned by
+            :meth:`CharacterMatrix.taxon_state_sets_map()`.
+        weights : iterable
+            A list of weights for each site. If |None| [default], all sites
+            have a weight of 1.
+        """
+        self.taxon_state_sets_map = taxon_state_sets_map
+        taxa = list(taxon_state_sets_map)
+        state_set_lists = [taxon_state_sets_map[taxon] for taxon in taxa]
+        self.num_sites = len(state_set_lists[0]) if state_set_lists else 0
+        if weights is None:
+            self.weights = None
+            weights = [1] * self.num_sites
+        else:
+            self.weights = list(weights)
+            weights = self.weights
+            if len(weights) != self.num_sites:
+                raise ValueError("Expecting {} weights, but {} specified".format(self.num_sites, len(weights)))
+        # site patterns
+        pattern_indexes = {}
+        self._site_pattern_indexes = []
+        patterns = []
+        pattern_weights = []
+        for site_state_sets, weight in zip(zip(*state_set_lists), weights):
+            pattern = tuple(frozenset(ss) for ss in site_state_sets)
+            pattern_idx = pattern_indexes.get(pattern, None)
+            if pattern_idx is None:
+                pattern_idx = len(patterns)
+                pattern_indexes[pattern] = pattern_idx
+                patterns.append(pattern)
+                pattern_weights.append(weight)
+            else:
+                pattern_weights[pattern_idx] += weight
+            self._site_pattern_indexes.append(pattern_idx)
+        self.num_patterns = len(patterns)
+        self._all_patterns_bitmask = (1 << self.num_patterns) - 1
+        # patterns with each weight
+        self._weight_pattern_bitmasks = {}
+        for pattern_idx, weight in enumerate(pattern_weights):
+            self._weight_pattern_bitmasks[weight] = self._weight_pattern_bitmasks.get(weight, 0) | (1 << pattern_idx)
+        # states, and the state bitmasks of each taxon
+        self._states = sorted(set().union(*(ss for pattern in patterns for ss in pattern)))
+        self._taxon_state_bitmasks = {}
+        taxon_patterns = list(zip(*patterns))
+        for taxon, taxon_pattern in zip(taxa, taxon_patterns):
+            reversed_taxon_pattern = taxon_pattern[::-1]
+            self._taxon_state_bitmasks[taxon] = tuple(
+                    int("0" + "".join(["1" if state in ss else "0" for ss in reversed_taxon_pattern]), 2)
+                    for state in self._states)
+
+    def _down_pass(self, tree):
+        # Returns the state bitmasks of each node from the first pass of the
+        # algorithm, and the bit-sliced counts of changes for each pattern.
+        taxon_state_bitmasks = self._taxon_state_bitmasks
+        all_patterns_bitmask = self._all_patterns_bitmask
+        node_state_bitmasks = {}
+        change_count_bitmasks = []
+        for nd in tree.postorder_node_iter():
+            child_nodes = nd._child_nodes
+            if not child_nodes:
+                node_state_bitmasks[nd] = taxon_state_bitmasks[nd.taxon]
+                continue
+            result = node_state_bitmasks[child_nodes[0]]
+            for ch in child_nodes[1:]:
+                right_state_bitmasks = node_state_bitmasks[ch]
+                intersections = [left & right for left, right in zip(result, right_state_bitmasks)]
+                non_empty_intersections = 0
+                for intersection in intersections:
+                    non_empty_intersections |= intersection
+                changes = all_patterns_bitmask & ~non_empty_intersections
+                if changes:
+                    result = tuple(intersection | ((left | right) & changes) for intersection, left, right in zip(intersections, result, right_state_bitmasks))
+                    # add to the bit-sliced counts
+                    carries = changes
+                    for digit_idx, digit_bitmask in enumerate(change_count_bitmasks):
+                        change_count_bitmasks[digit_idx] = digit_bitmask ^ carries
+                        carries &= digit_bitmask
+                        if not carries:
+                            break
+                    if carries:
+                        change_count_bitmasks.append(carries)
+                else:
+                    result = tuple(intersections)
+            node_state_bitmasks[nd] = result
+        return node_state_bitmasks, change_count_bitmasks
+
+    def _up_pass(self, tree, node_state_bitmasks):
+        # Replaces the state bitmasks of each internal node (other than the
+        # root) with those from the final pass of the algorithm.
+        all_patterns_bitmask = self._all_patterns_bitmask
+        for nd in tree.preorder_node_iter():
+            child_nodes = nd._child_nodes
+            parent_node = nd._parent_node
+            if (not child_nodes) or (parent_node is None):
+                continue
+            if len(child_nodes) != 2:
+                raise ValueError("Final state sets require a bifurcating tree")
+            parent_state_bitmasks = node_state_bitmasks[parent_node]
+            current_state_bitmasks = node_state_bitmasks[nd]
+            left_state_bitmasks = node_state_bitmasks[child_nodes[0]]
+            right_state_bitmasks = node_state_bitmasks[child_nodes[1]]
+            # patterns for which the state set of the parent is not a subset
+            # of that of the node
+            not_subsets = 0
+            # patterns for which the state sets of the children intersect
+            child_intersections = 0
+            for par, curr, left, right in zip(parent_state_bitmasks, current_state_bitmasks, left_state_bitmasks, right_state_bitmasks):
+                not_subsets |= par & ~curr
+                child_intersections |= left & right
+            subsets = all_patterns_bitmask & ~not_subsets
+            disjoint_not_subsets = not_subsets & ~child_intersections
+            intersecting_not_subsets = not_subsets & child_intersections
+            node_state_bitmasks[nd] = tuple(
+                    (par & subsets)
+                    | ((par | curr) & disjoint_not_subsets)
+                    | (((par & (left | right)) | curr) & intersecting_not_subsets)
+                    for par, curr, left, right in zip(parent_state_bitmasks, current_state_bitmasks, left_state_bitmasks, right_state_bitmasks))
+
+    def score(self, tree, score_by_character_list=None):
+        """
+        Returns the parsimony score of a tree.
+
+        Parameters
+        ----------
+        tree : |Tree|
+            The tree to be scored. Every leaf of the tree must be associated
+            with a taxon in ``taxon_state_sets_map``.
+        score_by_character_list : None or list
+            If not |None|, should be a reference to a list object.
+            This list will be populated by the scores on a character-by-character
+            basis.
+
+        Returns
+        -------
+        s : int
+            Parismony score of tree.
+        """
+        node_state_bitmasks, change_count_bitmasks = self._down_pass(tree)
+        score = 0
+        for digit_idx, digit_bitmask in enumerate(change_count_bitmasks):
+            for weight, weight_pattern_bitmask in self._weight_pattern_bitmasks.items():
+                score += weight * (1 << digit_idx) * bitprocessing.num_set_bits(digit_bitmask & weight_pattern_bitmask)
+        if score_by_character_list is not None:
+            assert len(score_by_character_list) == 0
+            pattern_change_counts = [0] * self.num_patterns
+            for digit_idx, digit_bitmask in enumerate(change_count_bitmasks):
+                digit_value = 1 << digit_idx
+                for pattern_idx, bit in enumerate(reversed(bin(digit_bitmask)[2:])):
+                    if bit == "1":
+                        pattern_change_counts[pattern_idx] += digit_value
+            if self.weights is None:
+                score_by_character_list.extend(pattern_change_counts[pattern_idx] for pattern_idx in self._site_pattern_indexes)
+            else:
+                score_by_character_list.extend(pattern_change_counts[pattern_idx] * weight for pattern_idx, weight in zip(self._site_pattern_indexes, self.weights))
+        return score
+
+    def node_state_sets(self, tree, is_final=True):
+        """
+        Returns the state sets of the nodes of a tree.
+
+        Parameters
+        ----------
+        tree : |Tree|
+            The tree. Every leaf of the tree must be associated with a taxon
+            in ``taxon_state_sets_map``.
+        is_final : bool
+            If |True| [default], then the state sets are those of the final
+            pass of the algorithm (as calculated by :func:`fitch_up_pass`),
+            which requires the tree to be bifurcating (except, possibly, at
+            the root). Otherwise, the state sets are those of the first pass of
+            the algorithm (as calculated by :func:`fitch_down_pass`).
+
+        Returns
+        -------
+        d : dict
+            A dictionary with |Node| objects as keys and a list of the state
+            sets of each site as values.
+        """
+        node_state_bitmasks, change_count_bitmasks = self._down_pass(tree)
+        if is_final:
+            self._up_pass(tree, node_state_bitmasks)
+        states = self._states
+        num_patterns = self.num_patterns
+        site_pattern_indexes = self._site_pattern_indexes
+        node_state_sets = {}
+        for nd, state_bitmasks in node_state_bitmasks.items():
+            pattern_state_sets = [[] for pattern_idx in range(num_patterns)]
+            for state, state_bitmask in zip(states, state_bitmasks):
+                for pattern_idx, bit in enumerate(reversed(bin(state_bitmask)[2:])):
+                    if bit == "1":
+                        pattern_state_sets[pattern_idx].append(state)
+            node_state_sets[nd] = [set(pattern_state_sets[pattern_idx]) for pattern_idx in site_pattern_indexes]
+        return node_state_sets
 
 def parsimony_score(
         tree,
@@ -332,6 +568,7 @@ def parsimony_score(
         gaps_as_missing=True,
         weights=None,
         score_by_character_list=None,
+        store_state_sets=False,
         ):
     """
     Calculates the score of a tree, ``tree``, given some character data,
@@ -354,6 +591,10 @@ def parsimony_score(
         If not |None|, should be a reference to a list object.
         This list will be populated by the scores on a character-by-character
         basis.
+    store_state_sets : bool
+        If |True|, then the state sets of the first pass of the algorithm are
+        stored as a "state_sets" attribute of each node of ``tree`` (a list
+        of the set of states of each character), as in previous versions.
 
     Returns
     -------
@@ -411,18 +652,26 @@ def parsimony_score(
     -----
 
     If the same data is going to be used to score multiple trees or multiple times,
-    it is probably better to generate the 'taxon_state_sets_map' once and call
-    "fitch_down_pass" directly yourself, as this function generates a new map
-    each time.
+    it is probably better to create a :class:`FitchParsimonyScorer` once and
+    call its "score" method directly yourself, as this function generates a
+    new map and compresses the site patterns each time.
+
+    Unlike in previous versions, this function does not, by default, store
+    the state sets of the first pass of the algorithm as a "state_sets"
+    attribute of each node of ``tree``, so it can no longer be followed
+    directly by :func:`fitch_up_pass` unless ``store_state_sets`` is |True|.
+    To obtain the state sets of each node, use the "node_state_sets" method
+    of a :class:`FitchParsimonyScorer`, or call :func:`fitch_down_pass`
+    directly.
 
     """
     if tree.taxon_namespace is not chars.taxon_namespace:
         raise TaxonNamespaceIdentityError(tree, chars)
     taxon_state_sets_map = chars.taxon_state_sets_map(gaps_as_missing=gaps_as_missing)
-    nodes = tree.postorder_node_iter()
-    pscore = fitch_down_pass(nodes,
-            taxon_state_sets_map=taxon_state_sets_map,
-            weights=weights,
-            score_by_character_list=score_by_character_list)
+    scorer = FitchParsimonyScorer(taxon_state_sets_map, weights=weights)
+    pscore = scorer.score(tree, score_by_character_list=score_by_character_list)
+    if store_state_sets:
+        for nd, state_sets in scorer.node_state_sets(tree, is_final=False).items():
+            nd.state_sets = state_sets
     return pscore
 
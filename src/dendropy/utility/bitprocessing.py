@@ -82,3 +82,24 @@ def set_bit_index_iter(s, fill_bitmask=-1, one_based=False, ordination_in_mask=F
         if standard_ordination or (fill_bitmask & test_bit):
             currBitIndex += 1
         test_bit <<= 1
+
+def pack_bitmasks(bitmasks):
+    """
+    Packs a sequence of non-negative integer bitmasks into a single block of
+    bytes, with each bitmask stored as a little-endian field of a common,
+    fixed width. Returns a tuple, ``(width, data)``, where ``width`` is the
+    number of bytes per bitmask and ``data`` is the packed block, which can be
+    unpacked by :func:`unpack_bitmasks`.
+    """
+    width = max((b.bit_length() for b in bitmasks), default=0)
+    width = max(1, (width + 7) // 8)
+    return width, b"".join(b.to_bytes(width, "little") for b in bitmasks)
+
+def unpack_bitmasks(width, data):
+    """
+    Returns a list of the integer bitmasks packed into the bytes-like object
+    ``data`` by :func:`pack_bitmasks`, with ``width`` bytes per bitmask.
+    """
+    data = memoryview(data)
+    from_bytes = int.from_bytes
+    return [from_bytes(data[i:i+width], "little") for i in range(0, len(data), width)]
@@ -0,0 +1,76 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Support for distributing independent units of work (e.g., tiles of the rows
+of a matrix) over a pool of processes.
+"""
+
+import multiprocessing
+
+def map_tiles(tile_fn, tiles, shared_args=(), num_processes=None):
+    """
+    Returns the list of the results of ``tile_fn(tile, *shared_args)`` for
+    each tile in ``tiles``.
+
+    If ``num_processes`` is greater than 1 and there is more than one tile,
+    then the tiles are distributed over a pool of (up to) this number of
+    processes. The ``shared_args`` are then sent to each process once, when
+    it is started, rather than with every tile. ``tile_fn``, the tiles and
+    the shared arguments must therefore be picklable (e.g., ``tile_fn`` must
+    be a module-level function). Otherwise, the tiles are processed in this
+    process.
+
+    Parameters
+    ----------
+    tile_fn : function
+        The function to be called with each tile, followed by the shared
+        arguments.
+    tiles : list
+        The tiles.
+    shared_args : tuple
+        The arguments shared by all tiles.
+    num_processes : int or None
+        The maximum number of processes.
+
+    Returns
+    -------
+    r : list
+        The results of ``tile_fn`` for the tiles, in the order of ``tiles``.
+    """
+    if num_processes is not None and num_processes > 1 and len(tiles) > 1:
+        with multiprocessing.Pool(
+                processes=min(num_processes, len(tiles)),
+                initializer=_set_worker_args,
+                initargs=(tile_fn, tuple(shared_args))) as pool:
+            return pool.map(_call_worker_tile_fn, tiles)
+    return [tile_fn(tile, *shared_args) for tile in tiles]
+
+# the function and shared arguments of the tiles, set in each worker process
+# of a pool by its initializer (and never in the process creating the pool)
+_worker_tile_fn = None
+_worker_shared_args = None
+
+def _set_worker_args(tile_fn, shared_args):
+    global _worker_tile_fn, _worker_shared_args
+    _worker_tile_fn = tile_fn
+    _worker_shared_args = shared_args
+
+def _call_worker_tile_fn(tile):
+    return _worker_tile_fn(tile, *_worker_shared_args)
@@ -0,0 +1,147 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Reports the memory used per object by the standard |Node|, |Edge|,
+|Bipartition| and |Taxon| classes and by their slotted counterparts
+(|SlottedNode|, |SlottedEdge|, |SlottedBipartition| and |SlottedTaxon|), as
+measured with ``tracemalloc``, both for objects created in isolation and for
+the objects of trees read from NEWICK strings (with their bipartitions
+encoded).
+
+This is a benchmark, not a test: the figures depend on the Python
+implementation and version. Run it with, e.g.::
+
+    $ PYTHONPATH=src python tests/benchmarks/slotted_memory.py
+
+"""
+
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+import dendropy
+
+class SlottedTree(dendropy.Tree):
+
+    @classmethod
+    def node_factory(cls, **kwargs):
+        return dendropy.SlottedNode(**kwargs)
+
+class SlottedTaxonNamespace(dendropy.TaxonNamespace):
+
+    @classmethod
+    def taxon_factory(cls, **kwargs):
+        return dendropy.SlottedTaxon(**kwargs)
+
+def random_newick(num_tips, rng):
+    subtrees = ["T{}:{}".format(i, rng.random()) for i in range(num_tips)]
+    while len(subtrees) > 1:
+        a = subtrees.pop(rng.randrange(len(subtrees)))
+        b = subtrees.pop(rng.randrange(len(subtrees)))
+        subtrees.append("({},{}):{}".format(a, b, rng.random()))
+    return subtrees[0] + ";"
+
+def measure(factory, num_objects):
+    """
+    Returns the number of bytes allocated (and still in use) per object by
+    calling ``factory(idx)`` for ``num_objects`` indexes.
+    """
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        objects = [factory(idx) for idx in range(num_objects)]
+        size = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    # the list holding the objects is not part of their footprint
+    size -= sys.getsizeof(objects)
+    del objects
+    return float(size) / num_objects
+
+def object_factories():
+    # a |Node| creates its |Edge|; bipartitions are only created when they
+    # are encoded
+    yield "Taxon", \
+            lambda idx: dendropy.Taxon(label="T{}".format(idx)), \
+            lambda idx: dendropy.SlottedTaxon(label="T{}".format(idx))
+    yield "Bipartition", \
+            lambda idx: dendropy.Bipartition(bitmask=idx, tree_leafset_bitmask=-1, is_rooted=True), \
+            lambda idx: dendropy.SlottedBipartition(bitmask=idx, tree_leafset_bitmask=-1, is_rooted=True)
+    yield "Edge", \
+            lambda idx: dendropy.Edge(length=1.0), \
+            lambda idx: dendropy.SlottedEdge(length=1.0)
+    yield "Node (with edge)", \
+            lambda idx: dendropy.Node(label="N{}".format(idx)), \
+            lambda idx: dendropy.SlottedNode(label="N{}".format(idx))
+
+def tree_factories(num_tips, rng):
+    newick = random_newick(num_tips, rng)
+    def tree_factory(tree_type, taxon_namespace_type):
+        taxon_namespace = taxon_namespace_type()
+        def factory(idx):
+            tree = tree_type.get(data=newick, schema="newick", taxon_namespace=taxon_namespace)
+            tree.encode_bipartitions()
+            return tree
+        return factory
+    yield "Tree of {} tips (per node)".format(num_tips), \
+            tree_factory(dendropy.Tree, dendropy.TaxonNamespace), \
+            tree_factory(SlottedTree, SlottedTaxonNamespace)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("-n", "--num-objects",
+            type=int,
+            default=20000,
+            help="Number of objects of each type to create (default: %(default)s).")
+    parser.add_argument("-t", "--num-tips",
+            type=int,
+            default=1000,
+            help="Number of tips of the trees (default: %(default)s).")
+    parser.add_argument("-r", "--num-trees",
+            type=int,
+            default=10,
+            help="Number of trees to read (default: %(default)s).")
+    args = parser.parse_args()
+    row_template = "{:<32} {:>10} {:>10} {:>8}"
+    print("Python {}".format(sys.version.split()[0]))
+    print(row_template.format("Bytes per object", "Standard", "Slotted", "Ratio"))
+    rows = []
+    for name, standard_factory, slotted_factory in object_factories():
+        rows.append((name,
+            measure(standard_factory, args.num_objects),
+            measure(slotted_factory, args.num_objects)))
+    num_nodes = 2 * args.num_tips - 1
+    for name, standard_factory, slotted_factory in tree_factories(args.num_tips, random.Random(1)):
+        rows.append((name,
+            measure(standard_factory, args.num_trees) / num_nodes,
+            measure(slotted_factory, args.num_trees) / num_nodes))
+    for name, standard_size, slotted_size in rows:
+        print(row_template.format(
+            name,
+            "{:.1f}".format(standard_size),
+            "{:.1f}".format(slotted_size),
+            "{:.2f}".format(slotted_size / standard_size)))
+
+if __name__ == "__main__":
+    main()
@@ -384,6 +384,34 @@ class NexusDataSetMultiTreesBlockTestCase(dendropytest.ExtendedTestCase):
             self.assertEqual(len(tt), 2)
             self.assertIs(tt.taxon_namespace, ds.taxon_namespaces[0])
 
+class DataSetNexusIgnoredBlocksTestCase(unittest.TestCase):
+
+    def test_store_ignored_blocks(self):
+        s = (
+            "#NEXUS\n"
+            "BEGIN PAUP;  \n"
+            "    set autoclose=yes;   \n"
+            "    hsearch nreps=10;\n"
+            "END;\n"
+            "BEGIN TAXA;\n"
+            "    DIMENSIONS NTAX=2;\n"
+            "    TAXLABELS\n"
+            "        a\n"
+            "        b\n"
+            "    ;\n"
+            "END;\n"
+            "BEGIN TREES;\n"
+            "    TREE t = (a,b);\n"
+            "END;\n"
+            )
+        ds = dendropy.DataSet.get(data=s, schema="nexus", store_ignored_blocks=True)
+        self.assertEqual(
+                ds.annotations.get_value("ignored_nexus_blocks"),
+                ["BEGIN PAUP ; \n set autoclose = yes ; \n hsearch nreps = 10 ; \n END ;"])
+        # line breaks are no longer tokens once the block has been read
+        self.assertEqual(ds.taxon_namespaces[0].labels(), ["a", "b"])
+        self.assertEqual(len(ds.tree_lists[0]), 1)
+
 class DataSetNexusReaderMesquiteMultipleTaxonNamespacesTest(
         standard_file_test_datasets.MultipleTaxonNamespaceDataSet,
         dendropytest.ExtendedTestCase):
@@ -157,5 +157,54 @@ class NexusTokenizerTestCase(unittest.TestCase):
         self.assertEqual(expected_comments, {})
         self.assertEqual(observed_tokens, expected_tokens)
 
+class BufferedNexusTokenizerTestCase(unittest.TestCase):
+    """
+    Unit tests for NexusTokenizer in buffered mode.
+    """
+
+    input_strs = [
+        "the    quick    brown\t\tfox \n  jumps over\t\t\n the    lazy dog",
+        "the quick 'brown fox''s friend' jumps over the 'lazy dog''s colleague'",
+        "[&R] (foo:1 [a foo object], [start of subgroup](bar:2, c:2)[end of group][][][",
+        "([the quick]apple[brown],([fox]banjo,([jumps]cucumber[over the],[really]dogwood)[lazy]eggplant)) rhubarb[dog];",
+        "(a_b:1[x[nested]y],'c_d'[z]:2)e[&x=1,y={1,2}]:3;\r\n(f,(g,h));\n",
+        "begin trees;\n  translate\n    1 'alpha beta',\n    2 gamma_delta\n  ;\n  tree t1 = [&U] (1:0.1,2:0.2);\nend;\n",
+    ]
+
+    def tokenize(self, input_str, buffer_size, capture_eol=False):
+        tk = nexusprocessing.NexusTokenizer(
+                src=StringIO(input_str),
+                buffer_size=buffer_size)
+        tk.set_capture_eol(capture_eol)
+        observed = []
+        for token in tk:
+            observed.append((
+                token,
+                tk.is_token_quoted,
+                tk.token_line_num,
+                tk.token_column_num,
+                tk.pull_captured_comments()))
+        observed.append((tk.current_line_num, tk.current_column_num))
+        return observed
+
+    def test_buffered_matches_unbuffered(self):
+        for input_str in self.input_strs:
+            for capture_eol in (False, True):
+                expected = self.tokenize(input_str, None, capture_eol)
+                for buffer_size in (1, 2, 3, 5, 64, 65536):
+                    observed = self.tokenize(input_str, buffer_size, capture_eol)
+                    self.assertEqual(observed, expected)
+
+    def test_unterminated_quote(self):
+        for buffer_size in (None, 1, 4, 65536):
+            tk = nexusprocessing.NexusTokenizer(
+                    src=StringIO("abc 'def ghi"),
+                    buffer_size=buffer_size)
+            self.assertEqual(tk.next_token(), "abc")
+            with self.assertRaises(nexusprocessing.NexusTokenizer.UnterminatedQuoteError) as cm:
+                tk.next_token()
+            self.assertEqual(cm.exception.line_num, 1)
+            self.assertEqual(cm.exception.col_num, 12)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,220 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Tests for indexing of tree statements and seeking to trees using the index.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import dendropy
+from dendropy.dataio import newickreader
+from dendropy.dataio import treeindex
+sys.path.insert(0, os.path.dirname(__file__))
+from support import pathmap
+
+class TreeIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def copy_tree_source(self, filename):
+        dest = os.path.join(self.temp_dir, filename)
+        shutil.copy(pathmap.tree_source_path(filename), dest)
+        return dest
+
+    def write_tree_source(self, filename, data):
+        dest = os.path.join(self.temp_dir, filename)
+        with open(dest, "w") as f:
+            f.write(data)
+        return dest
+
+    def tree_signatures(self, trees):
+        return [(t.label, t.as_string("newick", suppress_annotations=True).strip())
+                for t in trees]
+
+    def check_yielded_trees(self, path, schema, **kwargs):
+        expected = self.tree_signatures(dendropy.Tree.yield_from_files(
+                [path], schema=schema))
+        num_trees = len(expected)
+        self.assertTrue(num_trees > 2)
+        for tree_offset in (0, 1, num_trees // 2, num_trees - 1, num_trees, num_trees + 1):
+            for max_trees in (None, 2):
+                observed = self.tree_signatures(dendropy.Tree.yield_from_files(
+                        [path],
+                        schema=schema,
+                        tree_offset=tree_offset,
+                        max_trees=max_trees,
+                        use_tree_index=True,
+                        **kwargs))
+                if max_trees is None:
+                    self.assertEqual(observed, expected[tree_offset:])
+                else:
+                    self.assertEqual(observed, expected[tree_offset:tree_offset+max_trees])
+
+    def test_newick_index(self):
+        path = self.write_tree_source("trees.tre",
+                "[&R] (a,(b,c));\n;\n"
+                "[a comment; with a semi-colon] ('x;y',(b,c));\n"
+                "  (a[&x=';'],(b,'c''s;'));(a,b)it's;\n"
+                "[trailing comment]\n")
+        tree_index = treeindex.TreeIndex.build(path)
+        self.assertEqual(tree_index.schema, "newick")
+        self.assertEqual(len(tree_index), 4)
+        with open(path, "rb") as f:
+            data = f.read()
+        self.assertEqual(tree_index.tree_offsets, [
+            0,
+            data.index(b"[a comment"),
+            data.index(b"(a[&x"),
+            data.index(b"(a,b)it"),
+            ])
+        self.assertEqual(tree_index.tree_line_nums, [1, 3, 4, 4])
+
+    def test_nexus_index(self):
+        path = self.copy_tree_source("cetaceans.mb.no-clock.mcmc.trees")
+        tree_index = treeindex.TreeIndex.build(path)
+        trees = dendropy.TreeList.get(path=path, schema="nexus")
+        self.assertEqual(tree_index.schema, "nexus")
+        self.assertEqual(len(tree_index), len(trees))
+        self.assertEqual(len(tree_index.trees_blocks), 1)
+        self.assertEqual(tree_index.trees_blocks[0][:2], (0, len(trees)))
+        with open(path, "rb") as f:
+            data = f.read()
+        for offset in tree_index.tree_offsets:
+            self.assertEqual(data[offset:offset+5].lower(), b"tree ")
+        end_offset = tree_index.trees_blocks[0][2][0]
+        self.assertEqual(data[end_offset:end_offset+4].lower(), b"end;")
+
+    def test_nexus_yielder_with_translate_block(self):
+        path = self.copy_tree_source("cetaceans.mb.no-clock.mcmc.trees")
+        self.check_yielded_trees(path, "nexus")
+
+    def test_nexus_yielder_with_multiple_trees_blocks(self):
+        path = self.write_tree_source("trees.nex", "\n".join([
+            "#NEXUS",
+            "begin taxa; dimensions ntax=3; taxlabels a b c; end;",
+            "begin trees;",
+            "    translate 1 a, 2 b, 3 c;",
+            "    tree t1 = (1,(2,3));",
+            "    [comment] tree t2 = (2,(1,3));",
+            "end;",
+            "begin trees;",
+            "    tree t3 = (3,(1,2));",
+            "    tree 't;4' = [&R] (a,(b,c));",
+            "    tree t5 = (b,(a,c));",
+            "end;",
+            ]))
+        tree_index = treeindex.TreeIndex.build(path)
+        self.assertEqual(len(tree_index), 5)
+        self.assertEqual([b[:2] for b in tree_index.trees_blocks], [(0, 2), (2, 3)])
+        self.check_yielded_trees(path, "nexus")
+
+    def test_newick_yielder(self):
+        path = self.copy_tree_source("pythonidae.mlboots.newick.tre")
+        self.check_yielded_trees(path, "newick")
+        self.check_yielded_trees(path, "nexus/newick")
+
+    def test_newick_taxa_of_skipped_trees(self):
+        path = self.write_tree_source("taxa.tre", "((a,b),c);\n((b,d),c);\n((c,e),b);\n")
+        taxon_namespace = dendropy.TaxonNamespace()
+        trees = list(dendropy.Tree.yield_from_files([path], schema="newick",
+                taxon_namespace=taxon_namespace, tree_offset=1))
+        self.assertEqual(len(trees), 2)
+        self.assertEqual(taxon_namespace.labels(), ["a", "b", "c", "d", "e"])
+        # the trees that are seeked past are not parsed, so their taxa are not
+        # added to the namespace
+        taxon_namespace = dendropy.TaxonNamespace()
+        trees = list(dendropy.Tree.yield_from_files([path], schema="newick",
+                taxon_namespace=taxon_namespace, tree_offset=1, use_tree_index=True))
+        self.assertEqual(len(trees), 2)
+        self.assertEqual(taxon_namespace.labels(), ["b", "d", "c", "e"])
+
+    def test_split_encoding_yielder(self):
+        path = self.copy_tree_source("cetaceans.mb.no-clock.mcmc.trees")
+        expected = dendropy.TreeArray(ignore_node_ages=True)
+        expected.read_from_files([path], "nexus", tree_offset=50)
+        observed = dendropy.TreeArray(ignore_node_ages=True)
+        observed.read_from_files([path], "nexus", tree_offset=50, use_tree_index=True)
+        self.assertEqual(len(observed), len(expected))
+        for idx in range(len(expected)):
+            self.assertEqual(
+                    observed.get_split_bitmask_and_edge_tuple(idx),
+                    expected.get_split_bitmask_and_edge_tuple(idx))
+
+    def test_sidecar(self):
+        path = self.write_tree_source("trees.tre", "(a,(b,c));\n(b,(a,c));\n(c,(a,b));\n")
+        sidecar_path = path + treeindex.TreeIndex.SIDECAR_SUFFIX
+        self.assertFalse(os.path.exists(sidecar_path))
+        trees = list(dendropy.Tree.yield_from_files([path],
+                schema="newick",
+                tree_offset=2,
+                use_tree_index=True))
+        self.assertEqual(len(trees), 1)
+        self.assertTrue(os.path.exists(sidecar_path))
+        tree_index = treeindex.TreeIndex.load(sidecar_path)
+        self.assertTrue(tree_index.is_current_for(path))
+        self.assertEqual(tree_index.tree_offsets, [0, 11, 22])
+        with open(path, "a") as f:
+            f.write("((a,b),c);\n")
+        self.assertFalse(tree_index.is_current_for(path))
+        tree_index = treeindex.get_tree_index(path)
+        self.assertEqual(len(tree_index), 4)
+        self.assertTrue(treeindex.TreeIndex.load(sidecar_path).is_current_for(path))
+
+    def test_index_dir(self):
+        path = self.write_tree_source("trees.tre", "(a,(b,c));\n(b,(a,c));\n(c,(a,b));\n")
+        index_dir = os.path.join(os.path.dirname(path), "indexes")
+        os.mkdir(index_dir)
+        trees = list(dendropy.Tree.yield_from_files([path],
+                schema="newick",
+                tree_offset=2,
+                use_tree_index=True,
+                tree_index_dir=index_dir))
+        self.assertEqual(len(trees), 1)
+        self.assertFalse(os.path.exists(path + treeindex.TreeIndex.SIDECAR_SUFFIX))
+        sidecar_path = treeindex.get_sidecar_path(path, index_dir=index_dir)
+        self.assertEqual(os.path.dirname(sidecar_path), index_dir)
+        self.assertEqual(os.listdir(index_dir), [os.path.basename(sidecar_path)])
+        self.assertEqual(treeindex.TreeIndex.load(sidecar_path).tree_offsets, [0, 11, 22])
+        self.assertNotEqual(sidecar_path,
+                treeindex.get_sidecar_path(os.path.join(index_dir, "trees.tre"), index_dir=index_dir))
+        treeindex.get_tree_index(path, rebuild=True, save=False)
+        self.assertFalse(os.path.exists(path + treeindex.TreeIndex.SIDECAR_SUFFIX))
+
+    def test_error_position_after_seek(self):
+        path = self.write_tree_source("trees.tre", "(a,(b,c));\n(b,(a,c));\n\n  (c,(a,b);\n")
+        with self.assertRaises(newickreader.NewickReader.NewickReaderError) as cm1:
+            list(dendropy.Tree.yield_from_files([path], schema="newick"))
+        with self.assertRaises(newickreader.NewickReader.NewickReaderError) as cm2:
+            list(dendropy.Tree.yield_from_files([path],
+                schema="newick",
+                tree_offset=2,
+                use_tree_index=True))
+        self.assertEqual(cm1.exception.line_num, cm2.exception.line_num)
+        self.assertEqual(cm1.exception.col_num, cm2.exception.col_num)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -34,6 +34,7 @@ import sys
 sys.path.insert(0, os.path.dirname(__file__))
 from support import dendropytest
 from support import compare_and_validate
+from support import pathmap
 
 def get_taxon_namespace(ntax):
     taxon_namespace = dendropy.TaxonNamespace()
@@ -1129,5 +1130,100 @@ class TestCharacterMatrixTaxa(dendropytest.ExtendedTestCase):
         self.char_matrix.purge_taxon_namespace()
         self.assertEqual(set(self.char_matrix.taxon_namespace), self.expected_taxa)
 
+class CompactCharacterMatrixTest(dendropytest.ExtendedTestCase):
+
+    def test_compact(self):
+        for matrix_type, filename in (
+                (dendropy.DnaCharacterMatrix, "pythonidae.chars.nexus"),
+                (dendropy.ProteinCharacterMatrix, "caenophidia_mos.chars.nexus"),
+                (dendropy.StandardCharacterMatrix, "apternodus.chars.nexus"),
+                ):
+            char_matrix = matrix_type.get(
+                    path=pathmap.char_source_path(filename),
+                    schema="nexus")
+            expected_nexus = char_matrix.as_string("nexus")
+            expected_state_sets_map = char_matrix.taxon_state_sets_map()
+            self.assertFalse(char_matrix.is_compact)
+            char_matrix.compact()
+            self.assertTrue(char_matrix.is_compact)
+            value_table = char_matrix[0].value_table
+            for cv in char_matrix.values():
+                self.assertIs(type(cv), charmatrixmodel.CompactCharacterDataSequence)
+                self.assertIs(cv.value_table, value_table)
+                self.assertEqual(cv.value_indexes().itemsize, 1)
+                self.assertIs(cv._character_types, None)
+                self.assertIs(cv._character_annotations, None)
+            self.assertEqual(char_matrix.as_string("nexus"), expected_nexus)
+            self.assertEqual(char_matrix.taxon_state_sets_map(), expected_state_sets_map)
+            char_matrix2 = copy.deepcopy(char_matrix)
+            self.assertTrue(char_matrix2.is_compact)
+            self.assertEqual(char_matrix2.as_string("nexus"), expected_nexus)
+            char_matrix4 = char_matrix.clone(0)
+            self.assertTrue(char_matrix4.is_compact)
+            self.assertIs(char_matrix4[0].value_table, value_table)
+            self.assertEqual(
+                    [cv.values() for cv in char_matrix4.values()],
+                    [cv.values() for cv in char_matrix.values()])
+            values, value_indexes = char_matrix.as_value_index_array()
+            self.assertEqual(len(value_indexes), len(char_matrix) * char_matrix.sequence_size)
+            char_matrix3 = matrix_type.from_value_index_array(
+                    list(char_matrix),
+                    values,
+                    value_indexes,
+                    taxon_namespace=char_matrix.taxon_namespace)
+            self.assertTrue(char_matrix3.is_compact)
+            self.assertEqual(
+                    [cv.values() for cv in char_matrix3.values()],
+                    [cv.values() for cv in char_matrix.values()])
+        dna = dendropy.DnaCharacterMatrix.from_dict({"a": "ACGT", "b": "AC-N"}, is_compact=True)
+        self.assertTrue(dna.is_compact)
+        self.assertEqual(str(dna["b"]), "AC-N")
+        dna[dna.taxon_namespace.new_taxon("c")] = dna.coerce_values("A")
+        with self.assertRaises(ValueError):
+            dna.as_value_index_array()
+
+    def test_compact_sequence(self):
+        cv = charmatrixmodel.CompactCharacterDataSequence(["a", "b", "c"])
+        expected = ["a", "b", "c"]
+        cv.append("d")
+        expected.append("d")
+        cv.extend(["e", "a"])
+        expected.extend(["e", "a"])
+        cv.insert(1, "f")
+        expected.insert(1, "f")
+        cv[0] = "b"
+        expected[0] = "b"
+        del cv[2]
+        del expected[2]
+        self.assertEqual(list(cv), expected)
+        self.assertEqual(cv.values(), expected)
+        self.assertEqual(cv[1:3], expected[1:3])
+        self.assertEqual(cv[-1], expected[-1])
+        self.assertEqual(len(cv), len(expected))
+        self.assertEqual(list(cv.value_indexes()), [1, 5, 2, 3, 4, 0])
+        with self.assertRaises(IndexError):
+            cv[len(cv)]
+        with self.assertRaises(IndexError):
+            cv.character_type_at(len(cv))
+        # types and annotations
+        self.assertIs(cv.character_type_at(1), None)
+        self.assertFalse(cv.has_annotations_at(1))
+        self.assertIs(cv._character_types, None)
+        character_type = charmatrixmodel.CharacterType(label="x")
+        cv.set_character_type_at(1, character_type)
+        cv.annotations_at(2).add_new("y", 1)
+        cv.append("g")
+        self.assertEqual(len(cv._character_types), len(cv))
+        self.assertEqual(len(cv._character_annotations), len(cv))
+        cells = list(cv.cell_iter())
+        self.assertIs(cells[1][1], character_type)
+        self.assertEqual(cells[2][2][0].value, 1)
+        self.assertIs(cells[0][1], None)
+        # wider indexes
+        cv.extend(list(range(300)))
+        self.assertEqual(cv.value_indexes().itemsize, 2)
+        self.assertEqual(cv[-1], 299)
+        self.assertEqual(cv[:7], expected + ["g"])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,236 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Tests for the array-based FlatTree.
+"""
+
+import os
+import random
+import sys
+import unittest
+import dendropy
+from dendropy.calculate import treemeasure
+from dendropy.utility import error
+from dendropy.dataio import newickreader
+sys.path.insert(0, os.path.dirname(__file__))
+from support import pathmap
+
+def random_newick(num_tips, rng, is_ultrametric=False):
+    subtrees = [("T{}".format(i), 0.0) for i in range(num_tips)]
+    while len(subtrees) > 1:
+        a, a_age = subtrees.pop(rng.randrange(len(subtrees)))
+        b, b_age = subtrees.pop(rng.randrange(len(subtrees)))
+        if is_ultrametric:
+            age = max(a_age, b_age) + rng.random()
+            subtrees.append(("({}:{},{}:{})".format(a, age - a_age, b, age - b_age), age))
+        else:
+            subtrees.append(("({}:{},{}:{})".format(a, rng.random(), b, rng.random()), 0.0))
+    return subtrees[0][0] + ";"
+
+class FlatTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(1)
+        self.newicks = [
+                random_newick(30, self.rng),
+                random_newick(30, self.rng, is_ultrametric=True),
+                "[&R] ((a:1,(b:2,c:3)x:4)y:5,'d e''s':6,f_g)z:0.5;",
+                "[&U] (a,b,(c,d));",
+                "((a,b),(c,d,e));",
+                ]
+
+    def get_trees(self, newick):
+        taxon_namespace = dendropy.TaxonNamespace()
+        tree = dendropy.Tree.get(data=newick, schema="newick", taxon_namespace=taxon_namespace)
+        return tree, dendropy.FlatTree.get(data=newick, schema="newick", taxon_namespace=taxon_namespace)
+
+    def test_from_tree(self):
+        for newick in self.newicks:
+            tree, expected = self.get_trees(newick)
+            flat_tree = dendropy.FlatTree.from_tree(tree)
+            for attr in ("parent_indexes", "first_child_indexes", "next_sibling_indexes",
+                    "subtree_end_indexes", "taxon_indexes", "node_labels", "is_rooted"):
+                self.assertEqual(getattr(flat_tree, attr), getattr(expected, attr), attr)
+            self.assertEqual(
+                    [x for x in flat_tree.edge_lengths if x == x],
+                    [x for x in expected.edge_lengths if x == x])
+
+    def test_structure(self):
+        for newick in self.newicks:
+            tree, flat_tree = self.get_trees(newick)
+            nodes = list(tree.preorder_node_iter())
+            self.assertEqual(len(flat_tree), len(nodes))
+            self.assertEqual(flat_tree.num_leaves(), len(tree.leaf_nodes()))
+            for idx, nd in enumerate(nodes):
+                self.assertEqual(flat_tree.is_leaf(idx), nd.is_leaf())
+                self.assertEqual([nodes[i] for i in flat_tree.child_indexes(idx)], nd.child_nodes())
+                self.assertEqual([nodes[i] for i in flat_tree.ancestor_indexes(idx)], list(nd.ancestor_iter()))
+                if nd.taxon is not None:
+                    self.assertEqual(flat_tree.taxon_node_index(nd.taxon), idx)
+            self.assertEqual([nodes[i] for i in flat_tree.postorder_indexes()], list(tree.postorder_node_iter()))
+            self.assertEqual([nodes[i] for i in flat_tree.leaf_indexes()], tree.leaf_nodes())
+            self.assertEqual(list(flat_tree.node_leaf_counts()), [len(nd.leaf_nodes()) for nd in nodes])
+            self.assertEqual(list(flat_tree.node_depths()), [nd.level() for nd in nodes])
+
+    def test_to_tree(self):
+        for newick in self.newicks:
+            tree, flat_tree = self.get_trees(newick)
+            tree2 = flat_tree.to_tree()
+            self.assertIs(tree2.taxon_namespace, tree.taxon_namespace)
+            self.assertEqual(tree2.as_string("newick"), tree.as_string("newick"))
+            self.assertEqual(tree2.as_string("newick", suppress_leaf_node_labels=False),
+                    tree.as_string("newick", suppress_leaf_node_labels=False))
+
+    def test_as_string(self):
+        for newick in self.newicks:
+            tree, flat_tree = self.get_trees(newick)
+            for kwargs in (
+                    {},
+                    {"suppress_edge_lengths": True},
+                    {"suppress_rooting": True},
+                    {"suppress_leaf_taxon_labels": True},
+                    {"suppress_internal_node_labels": True},
+                    {"preserve_spaces": True},
+                    {"unquoted_underscores": True},
+                    {"real_value_format_specifier": ".3f"},
+                    ):
+                self.assertEqual(flat_tree.as_string("newick", **kwargs), tree.as_string("newick", **kwargs))
+            self.assertEqual(flat_tree.as_string("nexus"), tree.as_string("nexus"))
+
+    def test_read(self):
+        newick = "\n".join(self.newicks)
+        for tree_offset, expected_newick in enumerate(self.newicks):
+            taxon_namespace = dendropy.TaxonNamespace()
+            flat_tree = dendropy.FlatTree.get(data=newick, schema="newick", taxon_namespace=taxon_namespace, tree_offset=tree_offset)
+            tree = dendropy.Tree.get(data=expected_newick, schema="newick", taxon_namespace=taxon_namespace)
+            self.assertEqual(flat_tree.as_string("newick"), tree.as_string("newick"))
+        flat_tree = dendropy.FlatTree.get(data=self.newicks[2], schema="newick", preserve_underscores=True)
+        self.assertEqual(flat_tree.taxon_namespace.labels(), ["a", "b", "c", "d e's", "f_g"])
+        flat_tree = dendropy.FlatTree.get(data="#NEXUS\nBEGIN TREES;\nTREE 1 = ((a,b),c);\nEND;\n", schema="nexus")
+        self.assertEqual(flat_tree.as_string("newick"), "((a,b),c);\n")
+
+    def test_read_labels(self):
+        # quotes within unquoted labels, as well as constructs that are left
+        # to the full NEWICK reader (comments within labels)
+        for newick in ("(a'b:1,(c''d:2,'e''f':3)g'h:4);", "(a[x]b,c);"):
+            tree, flat_tree = self.get_trees(newick)
+            self.assertEqual(flat_tree.as_string("newick"), tree.as_string("newick"))
+        path = pathmap.tree_source_path("GEBA.tree.newick")
+        taxon_namespace = dendropy.TaxonNamespace()
+        flat_tree = dendropy.FlatTree.get(path=path, schema="newick", taxon_namespace=taxon_namespace)
+        tree = dendropy.Tree.get(path=path, schema="newick", taxon_namespace=taxon_namespace)
+        self.assertEqual(len(taxon_namespace), len(tree.leaf_nodes()))
+        self.assertEqual(flat_tree.as_string("newick"), tree.as_string("newick"))
+
+    def test_parse_errors(self):
+        for newick in ("((a,b);", "(a,b));", "(a,b)c d;", "(a:x,b);", "(a,b),c;", "(a,b):"):
+            with self.assertRaises(error.DataParseError):
+                dendropy.FlatTree.get(data=newick, schema="newick")
+
+    def test_missing_semicolon(self):
+        for newick in ("(a,b)", "(a,b)c:1 [comment]"):
+            with self.assertRaises(newickreader.NewickReader.NewickReaderIncompleteTreeStatementError):
+                dendropy.FlatTree.get(data=newick, schema="newick")
+            with self.assertRaises(error.DataParseError):
+                dendropy.Tree.get(data=newick, schema="newick")
+
+    def test_duplicate_taxa(self):
+        # including labels that only differ in case, which are matched to the
+        # same taxon by default
+        for newick, label in (("((a,a),b);", "a"), ("((A,a),(b,c));", "A")):
+            with self.assertRaises(newickreader.NewickReader.NewickReaderDuplicateTaxonError) as cm:
+                dendropy.Tree.get(data=newick, schema="newick")
+            expected_message = str(cm.exception)
+            with self.assertRaises(newickreader.NewickReader.NewickReaderDuplicateTaxonError) as cm:
+                dendropy.FlatTree.get(data=newick, schema="newick")
+            self.assertEqual(str(cm.exception), expected_message)
+            self.assertTrue(str(cm.exception).endswith(label))
+        flat_tree = dendropy.FlatTree.get(data="((A,a),(b,c));", schema="newick",
+                taxon_namespace=dendropy.TaxonNamespace(is_case_sensitive=True))
+        self.assertEqual(flat_tree.taxon_namespace.labels(), ["A", "a", "b", "c"])
+
+    def test_invalid_structure(self):
+        with self.assertRaises(ValueError):
+            dendropy.FlatTree(parent_indexes=[-1, 0, 0, 1])
+        with self.assertRaises(ValueError):
+            dendropy.FlatTree(parent_indexes=[0, 0])
+
+    def test_node_ages_and_distances(self):
+        tree, flat_tree = self.get_trees(self.newicks[1])
+        tree.calc_node_ages()
+        tree.calc_node_root_distances()
+        for idx, nd in enumerate(tree.preorder_node_iter()):
+            self.assertAlmostEqual(flat_tree.node_ages()[idx], nd.age)
+            self.assertAlmostEqual(flat_tree.node_root_distances()[idx], nd.root_distance)
+        tree, flat_tree = self.get_trees(self.newicks[0])
+        with self.assertRaises(error.UltrametricityError):
+            flat_tree.node_ages()
+        for kwargs in ({"is_force_max_age": True}, {"is_force_min_age": True}, {"ultrametricity_precision": None}):
+            tree.calc_node_ages(**kwargs)
+            self.assertEqual(list(flat_tree.node_ages(**kwargs)), [nd.age for nd in tree.preorder_node_iter()])
+
+    def test_mrca(self):
+        for newick in self.newicks:
+            tree, flat_tree = self.get_trees(newick)
+            tree.is_rooted = True
+            tree.encode_bipartitions()
+            nodes = list(tree.preorder_node_iter())
+            taxa = list(tree.taxon_namespace)
+            for i in range(20):
+                sample = self.rng.sample(taxa, self.rng.randint(1, len(taxa)))
+                self.assertIs(nodes[flat_tree.mrca(taxa=sample)], tree.mrca(taxa=sample, is_bipartitions_updated=True))
+            labels = [taxa[0].label, taxa[1].label]
+            self.assertIs(nodes[flat_tree.mrca(taxon_labels=labels)], tree.mrca(taxon_labels=labels, is_bipartitions_updated=True))
+            self.assertIs(flat_tree.mrca(taxa=[taxa[0], dendropy.Taxon("other")]), None)
+
+    def test_bitmasks(self):
+        for newick in self.newicks:
+            tree, flat_tree = self.get_trees(newick)
+            tree.encode_bipartitions(collapse_unrooted_basal_bifurcation=False)
+            nodes = list(tree.preorder_node_iter())
+            self.assertEqual(flat_tree.leafset_bitmasks(), [nd.edge.bipartition.leafset_bitmask for nd in nodes])
+            self.assertEqual(flat_tree.split_bitmasks(), [nd.edge.bipartition.split_bitmask for nd in nodes])
+
+    def test_treemeasure(self):
+        for newick in self.newicks[:2]:
+            tree, flat_tree = self.get_trees(newick)
+            for f in (treemeasure.B1, treemeasure.colless_tree_imbalance, treemeasure.N_bar,
+                    treemeasure.sackin_index, treemeasure.treeness):
+                self.assertAlmostEqual(f(flat_tree), f(tree))
+            for normalize in ("yule", "pda", None):
+                self.assertAlmostEqual(
+                        treemeasure.colless_tree_imbalance(flat_tree, normalize=normalize),
+                        treemeasure.colless_tree_imbalance(tree, normalize=normalize))
+                self.assertAlmostEqual(
+                        treemeasure.sackin_index(flat_tree, normalize=normalize),
+                        treemeasure.sackin_index(tree, normalize=normalize))
+            taxa = list(tree.taxon_namespace)
+            for taxon1, taxon2 in ((taxa[0], taxa[1]), (taxa[3], taxa[7])):
+                self.assertAlmostEqual(
+                        treemeasure.patristic_distance(flat_tree, taxon1, taxon2),
+                        treemeasure.patristic_distance(tree, taxon1, taxon2))
+        tree, flat_tree = self.get_trees(self.newicks[1])
+        self.assertAlmostEqual(treemeasure.pybus_harvey_gamma(flat_tree), treemeasure.pybus_harvey_gamma(tree))
+        tree, flat_tree = self.get_trees(self.newicks[4])
+        with self.assertRaises(TypeError):
+            treemeasure.colless_tree_imbalance(flat_tree)
+
+if __name__ == "__main__":
+    unittest.main()
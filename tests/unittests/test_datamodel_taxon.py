@@ -24,6 +24,7 @@ Tests creation, reading, update, deletion of Taxon and TaxonNamespace objects.
 import collections
 import unittest
 import copy
+import pickle
 from dendropy import Taxon, TaxonNamespace
 import os
 import sys
@@ -699,6 +700,83 @@ class TaxonNamespaceTaxonManagement(unittest.TestCase):
             x.append(t)
         self.assertEqual(len(x), 0)
 
+class TaxonNamespaceLabelIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tns = TaxonNamespace(["a", "b", "A", "c", "a"])
+        self.taxa = list(self.tns)
+        # build the index
+        self.assertIs(self.tns.get_taxon("b"), self.taxa[1])
+
+    def test_duplicate_labels(self):
+        self.assertIs(self.tns.get_taxon("a"), self.taxa[0])
+        self.assertEqual(self.tns.findall("a"), [self.taxa[0], self.taxa[2], self.taxa[4]])
+        self.assertEqual(self.tns.findall("a", is_case_sensitive=True), [self.taxa[0], self.taxa[4]])
+        self.assertIs(self.tns.get_taxon("A", is_case_sensitive=True), self.taxa[2])
+
+    def test_relabel(self):
+        self.taxa[0].label = "x"
+        self.assertIs(self.tns.get_taxon("a"), self.taxa[2])
+        self.assertIs(self.tns.get_taxon("X"), self.taxa[0])
+        self.taxa[2].label = "z"
+        self.assertEqual(self.tns.findall("a"), [self.taxa[4]])
+        self.assertFalse(self.tns.has_taxon_label("A", is_case_sensitive=True))
+
+    def test_relabel_updates_index(self):
+        other_tns = TaxonNamespace(["a", "b"])
+        shared_tns = TaxonNamespace(self.tns)
+        for tns in (other_tns, shared_tns):
+            tns.get_taxon("a")
+        label_index = self.tns._label_index
+        other_label_index = other_tns._label_index
+        self.taxa[3].label = "d"
+        self.tns.remove_taxon(self.taxa[1])
+        self.taxa[1].label = "e"
+        # indexes are updated in place rather than rebuilt
+        self.assertIs(self.tns._label_index, label_index)
+        self.assertIs(other_tns._label_index, other_label_index)
+        self.assertIs(self.tns.get_taxon("d"), self.taxa[3])
+        self.assertIs(shared_tns.get_taxon("d"), self.taxa[3])
+        self.assertIs(self.tns.get_taxon("e"), None)
+        self.assertIs(shared_tns.get_taxon("e"), self.taxa[1])
+        self.assertIs(other_tns.get_taxon("a"), other_tns[0])
+        for tns in (copy.deepcopy(shared_tns), pickle.loads(pickle.dumps(shared_tns))):
+            tns[3].label = "f"
+            self.assertIs(shared_tns.get_taxon("f"), None)
+            self.assertIs(tns.get_taxon("f"), tns[3])
+
+    def test_add_and_remove(self):
+        t = self.tns.new_taxon("d")
+        self.assertIs(self.tns.get_taxon("D"), t)
+        self.tns.remove_taxon(self.taxa[0])
+        self.assertIs(self.tns.get_taxon("a"), self.taxa[2])
+        self.tns.remove_taxon(self.taxa[2])
+        self.tns.remove_taxon(self.taxa[4])
+        self.assertIs(self.tns.get_taxon("a"), None)
+        t = Taxon("a")
+        self.tns.append(t)
+        self.assertIs(self.tns.get_taxon("a"), t)
+
+    def test_reorder(self):
+        self.tns.reverse()
+        self.assertIs(self.tns.get_taxon("a"), self.taxa[4])
+        self.tns.sort(key=lambda t: t.label)
+        self.assertIs(self.tns.get_taxon("a"), self.taxa[2])
+
+    def test_clear(self):
+        self.tns.clear()
+        self.assertIs(self.tns.get_taxon("a"), None)
+        t = self.tns.require_taxon("a")
+        self.assertEqual(list(self.tns), [t])
+        self.assertIs(self.tns.require_taxon("A"), t)
+
+    def test_copies(self):
+        for tns in (copy.deepcopy(self.tns), TaxonNamespace(self.tns)):
+            self.assertIs(tns.get_taxon("a"), tns[0])
+            self.assertEqual(tns.findall("a"), [tns[0], tns[2], tns[4]])
+            tns.new_taxon("d")
+            self.assertIs(self.tns.get_taxon("d"), None)
+
 class TaxonNamespaceIdentity(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,177 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Tests for trees composed of slotted nodes, edges, bipartitions and taxa.
+"""
+
+import copy
+import pickle
+import random
+import types
+import unittest
+import dendropy
+from dendropy.datamodel import basemodel
+
+class SlottedTree(dendropy.Tree):
+
+    @classmethod
+    def node_factory(cls, **kwargs):
+        return dendropy.SlottedNode(**kwargs)
+
+class SlottedTaxonNamespace(dendropy.TaxonNamespace):
+
+    @classmethod
+    def taxon_factory(cls, **kwargs):
+        return dendropy.SlottedTaxon(**kwargs)
+
+def random_newick(num_tips, rng):
+    subtrees = ["T{}:{}".format(i, rng.random()) for i in range(num_tips)]
+    while len(subtrees) > 1:
+        a = subtrees.pop(rng.randrange(len(subtrees)))
+        b = subtrees.pop(rng.randrange(len(subtrees)))
+        subtrees.append("({},{}):{}".format(a, b, rng.random()))
+    return subtrees[0] + ";"
+
+class SlottedTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.newick = random_newick(20, random.Random(1))
+
+    def get_tree(self, tree_type=SlottedTree, taxon_namespace_type=SlottedTaxonNamespace):
+        return tree_type.get(
+                data=self.newick,
+                schema="newick",
+                taxon_namespace=taxon_namespace_type())
+
+    def test_types(self):
+        tree = self.get_tree()
+        tree.encode_bipartitions()
+        for nd in tree:
+            self.assertIs(type(nd), dendropy.SlottedNode)
+            self.assertIs(type(nd.edge), dendropy.SlottedEdge)
+            self.assertIs(type(nd.edge.bipartition), dendropy.SlottedBipartition)
+            self.assertIsInstance(nd, dendropy.Node)
+            self.assertIsInstance(nd.edge, dendropy.Edge)
+            if nd.taxon is not None:
+                self.assertIs(type(nd.taxon), dendropy.SlottedTaxon)
+            for obj in (nd, nd.edge, nd.edge.bipartition, nd.taxon):
+                self.assertIs(basemodel.get_instance_state(obj)[0], None)
+        expected = self.get_tree(dendropy.Tree, dendropy.TaxonNamespace)
+        expected.encode_bipartitions()
+        self.assertEqual(tree.as_string("newick"), expected.as_string("newick"))
+        self.assertEqual(
+                sorted(b.split_bitmask for b in tree.bipartition_encoding),
+                sorted(b.split_bitmask for b in expected.bipartition_encoding))
+
+    def test_attributes_annotations_and_comments(self):
+        tree = self.get_tree()
+        nd = tree.seed_node
+        self.assertFalse(nd.has_annotations)
+        self.assertEqual(nd.comments, [])
+        nd.comments.append("comment")
+        nd.annotations.add_new("color", "red")
+        nd.edge.annotations.add_bound_attribute("length")
+        nd.edge.length = 2.5
+        nd.custom_attribute = 1
+        self.assertEqual(nd.comments, ["comment"])
+        self.assertTrue(nd.has_annotations)
+        self.assertEqual(nd.edge.annotations[0].value, 2.5)
+        self.assertEqual(basemodel.get_instance_state(nd)[0], {"custom_attribute": 1})
+        for tree2 in (copy.deepcopy(tree), pickle.loads(pickle.dumps(tree))):
+            self.assertEqual(tree2.as_string("newick"), tree.as_string("newick"))
+            nd2 = tree2.seed_node
+            self.assertIs(type(nd2), dendropy.SlottedNode)
+            self.assertIsNot(nd2, nd)
+            self.assertEqual(nd2.comments, ["comment"])
+            self.assertEqual(nd2.annotations[0].value, "red")
+            self.assertEqual(nd2.edge.annotations[0].value, 2.5)
+            nd2.edge.length = 3.0
+            self.assertEqual(nd2.edge.annotations[0].value, 3.0)
+            self.assertEqual(nd.edge.annotations[0].value, 2.5)
+            self.assertEqual(nd2.custom_attribute, 1)
+
+    def test_copies(self):
+        tree = self.get_tree()
+        for tree2 in (tree.clone(0), tree.clone(1), tree.clone(2), SlottedTree(tree)):
+            self.assertEqual(tree2.as_string("newick"), tree.as_string("newick"))
+            for nd1, nd2 in zip(tree, tree2):
+                self.assertIs(type(nd2), dendropy.SlottedNode)
+                self.assertIsNot(nd1, nd2)
+                self.assertIsNot(nd1.edge, nd2.edge)
+        self.assertIs(type(tree.clone(2).taxon_namespace[0]), dendropy.SlottedTaxon)
+
+    def test_taxa(self):
+        tns = SlottedTaxonNamespace(["a", "b"])
+        t1 = tns.require_taxon("c")
+        self.assertIs(type(t1), dendropy.SlottedTaxon)
+        self.assertIs(tns.get_taxon("C"), t1)
+        t1.label = "d"
+        self.assertIs(tns.get_taxon("c"), None)
+        self.assertIs(tns.get_taxon("D"), t1)
+        t1.annotations.add_new("x", 1)
+        for t2 in (copy.deepcopy(t1), dendropy.SlottedTaxon(t1)):
+            self.assertIs(type(t2), dendropy.SlottedTaxon)
+            self.assertIsNot(t2, t1)
+            self.assertEqual(t2.label, "d")
+            self.assertEqual(t2.lower_cased_label, "d")
+            self.assertEqual(t2.annotations[0].value, 1)
+
+    def test_slots(self):
+        tree = self.get_tree()
+        tree.encode_bipartitions()
+        tree.lca_index()
+        expected = self.get_tree(dendropy.Tree, dendropy.TaxonNamespace)
+        expected.encode_bipartitions()
+        expected.lca_index()
+        for nd1, nd2 in zip(tree, expected):
+            for obj1, obj2 in (
+                    (nd1, nd2),
+                    (nd1.edge, nd2.edge),
+                    (nd1.edge.bipartition, nd2.edge.bipartition),
+                    (nd1.taxon, nd2.taxon)):
+                if obj1 is None:
+                    continue
+                self.assertIs(basemodel.get_instance_state(obj1)[0], None)
+                slots = set(type(obj1).__slots__)
+                for name in slots:
+                    self.assertIsInstance(getattr(type(obj1), name), types.MemberDescriptorType)
+                # every attribute of the standard object is held in a slot
+                # (possibly as the private value of a property)
+                self.assertEqual(
+                        set(name.lstrip("_") for name in vars(obj2))
+                            - set(name.lstrip("_") for name in slots),
+                        set())
+
+    def test_restructuring(self):
+        rng = random.Random(1)
+        tree = self.get_tree()
+        tree.reroot_at_midpoint()
+        tree.reroot_at_edge(tree.leaf_nodes()[0].edge, length1=0.1, length2=0.1)
+        for nd in tree.postorder_internal_node_iter():
+            if len(nd.child_nodes()) > 1:
+                nd.add_child(dendropy.SlottedNode())
+                nd.add_child(dendropy.SlottedNode())
+        tree.resolve_polytomies(rng=rng)
+        tree.resolve_polytomies(limit=3)
+        for nd in tree:
+            self.assertIs(type(nd), dendropy.SlottedNode)
+
+if __name__ == "__main__":
+    unittest.main()
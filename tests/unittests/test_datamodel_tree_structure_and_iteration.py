@@ -24,6 +24,7 @@ Tests basic Tree structure and iteration.
 import unittest
 import dendropy
 import itertools
+import random
 import os
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
@@ -195,6 +196,98 @@ class TestTreeNodeFinders(curated_test_tree.CuratedTestTree, unittest.TestCase):
                     self.assertEqual(true_mrca_label, result_mrca_node.label)
                     splice_unifurcation_above(tree, result_mrca_node)
 
+class TestTreeLcaIndex(curated_test_tree.CuratedTestTree, unittest.TestCase):
+
+    def get_random_tree(self, num_tips, rng):
+        tree = dendropy.Tree(is_rooted=True)
+        nodes = [tree.seed_node]
+        for idx in range(num_tips - 1):
+            nd = rng.choice(nodes)
+            nodes.append(nd.new_child())
+            if nd.is_leaf() or rng.random() < 0.5:
+                nodes.append(nd.new_child())
+        for nd in tree.leaf_node_iter():
+            nd.taxon = tree.taxon_namespace.new_taxon("T{}".format(len(tree.taxon_namespace)))
+        return tree
+
+    def assert_mrca(self, lca_index, nodes):
+        expected = None
+        ancestor_sets = [set(nd.ancestor_iter(inclusive=True)) for nd in nodes]
+        for anc in nodes[0].ancestor_iter(inclusive=True):
+            if all(anc in s for s in ancestor_sets):
+                expected = anc
+                break
+        self.assertIs(lca_index.mrca(*nodes), expected)
+        leaves = [nd for nd in nodes if nd.is_leaf()]
+        if len(leaves) == len(nodes):
+            self.assertIs(lca_index.taxa_mrca([nd.taxon for nd in leaves]), expected)
+
+    def test_mrca(self):
+        rng = random.Random(1)
+        for num_tips in (2, 10, 200, 1000):
+            tree = self.get_random_tree(num_tips, rng)
+            lca_index = tree.lca_index()
+            nodes = list(tree)
+            leaves = tree.leaf_nodes()
+            for i in range(200):
+                self.assert_mrca(lca_index, rng.sample(nodes, 2))
+                self.assert_mrca(lca_index, rng.sample(leaves, min(len(leaves), rng.randint(1, 5))))
+            for nd in nodes:
+                self.assertIs(lca_index.mrca(nd, nd), nd)
+            self.assertIs(lca_index.taxa_mrca([dendropy.Taxon("x")]), None)
+
+    def test_invalidation(self):
+        tree, anodes, lnodes, inodes = self.get_tree()
+        lca_index = tree.lca_index()
+        self.assertIs(tree.lca_index(), lca_index)
+        nodes = dict((nd.label, nd) for nd in tree)
+        self.assertEqual(lca_index.mrca(nodes["i"], nodes["k"]).label, "b")
+        nodes["e"].remove_child(nodes["k"])
+        nodes["i"].add_child(nodes["k"])
+        self.assertFalse(lca_index.is_current())
+        self.assertEqual(tree.lca_index().mrca(nodes["j"], nodes["k"]).label, "b")
+        self.assertEqual(tree.lca_index().mrca(nodes["i"], nodes["k"]).label, "i")
+        lca_index = tree.lca_index()
+        tree.reseed_at(nodes["c"])
+        self.assertFalse(lca_index.is_current())
+        self.assertEqual(tree.lca_index().mrca(nodes["j"], nodes["p"]).label, "c")
+        tree2 = tree.clone(2)
+        self.assertIs(tree2._lca_index, None)
+        self.assertEqual(tree2.lca_index().mrca(*tree2.leaf_nodes()).label, "c")
+        # restructuring another tree does not affect the index
+        lca_index = tree.lca_index()
+        tree2.seed_node.new_child(label="x")
+        tree2.leaf_nodes()[0].parent_node.remove_child(tree2.leaf_nodes()[0])
+        self.assertTrue(lca_index.is_current())
+        self.assertFalse(tree2._lca_index.is_current())
+        tree.leaf_nodes()[0].new_child(label="y")
+        self.assertFalse(lca_index.is_current())
+
+    def test_tree_mrca(self):
+        rng = random.Random(2)
+        tree = self.get_random_tree(50, rng)
+        taxa = [nd.taxon for nd in tree.leaf_node_iter()]
+        expected = []
+        for i in range(20):
+            sample = rng.sample(taxa, 3)
+            expected.append((sample, tree.mrca(taxa=sample)))
+        self.assertIs(tree._lca_index, None)
+        for sample, nd in expected:
+            self.assertIs(tree.mrca(taxa=sample, use_lca_index=True), nd)
+        self.assertTrue(tree._lca_index.is_current())
+        for sample, nd in expected:
+            self.assertIs(tree.mrca(taxa=sample), nd)
+
+    def test_node_distance_matrix(self):
+        tree, anodes, lnodes, inodes = self.get_tree()
+        ndm = tree.node_distance_matrix()
+        nodes = list(tree)
+        for nd1 in nodes:
+            for nd2 in nodes:
+                self.assertIs(ndm.mrca(nd1, nd2), tree.lca_index().mrca(nd1, nd2))
+        nodes[-1].parent_node.remove_child(nodes[-1])
+        self.assertEqual(ndm.mrca(nodes[-1], nodes[1]), nodes[0])
+
 class TestTreeIterators(curated_test_tree.CuratedTestTree, unittest.TestCase):
 
     ### Default Iterator ###
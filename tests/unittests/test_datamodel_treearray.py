@@ -17,12 +17,18 @@
 ##
 ##############################################################################
 
+import math
+import pickle
+import shutil
+import tempfile
 import unittest
 import os
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
 from support import pathmap
 import dendropy
+from dendropy.calculate import treecompare
+from dendropy.dataio import newickreader
 
 class TreeArrayBasicTreeAccession(unittest.TestCase):
 
@@ -58,6 +64,401 @@ class TreeArrayBasicTreeAccession(unittest.TestCase):
             tree_array.add_tree(tree)
         self.verify_tree_array(tree_array, trees)
 
+    def test_insert_tree(self):
+        trees = self.get_trees()
+        tree_array = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace)
+        expected_trees = []
+        for tree_idx, tree in enumerate(trees):
+            index = [0, -1, len(expected_trees) // 2, 100][tree_idx % 4]
+            tree_array.insert(index, tree)
+            expected_trees.insert(index, tree)
+        self.verify_tree_array(tree_array, expected_trees)
+        self.assertEqual(len(list(tree_array)), len(expected_trees))
+
+    def test_contains(self):
+        trees = self.get_trees()
+        tree_array = dendropy.TreeArray(taxon_namespace=trees.taxon_namespace)
+        tree_array.add_trees(trees[1:])
+        for tree in trees[1:]:
+            splits = [b.split_bitmask for b in tree.encode_bipartitions()]
+            self.assertIn(splits, tree_array)
+        splits = [b.split_bitmask for b in trees[0].encode_bipartitions()]
+        self.assertNotIn(splits[:-1], tree_array)
+
+    def test_missing_edge_lengths(self):
+        tree_array = dendropy.TreeArray()
+        tree_array.default_edge_length_value = None
+        tree = dendropy.Tree.get(data="((a:1,b):2,c:3);", schema="newick",
+                taxon_namespace=tree_array.taxon_namespace)
+        tree_array.add_tree(tree)
+        splits, edge_lengths = tree_array.get_split_bitmask_and_edge_tuple(0)
+        self.assertEqual(
+                dict(zip(splits, edge_lengths)),
+                dict((nd.edge.split_bitmask, nd.edge.length) for nd in tree))
+
+    def test_split_support_scores(self):
+        trees = dendropy.TreeList.get_from_path(pathmap.tree_source_path(
+                "cetaceans.mb.no-clock.mcmc.trees"),
+                "nexus")
+        tree_array = dendropy.TreeArray.from_tree_list(trees)
+        split_frequencies = tree_array.split_distribution.split_frequencies
+        for include_external_splits in (False, True):
+            expected_log_products = []
+            expected_sums = []
+            for tree in trees:
+                leafset_bitmask = tree.seed_node.edge.bipartition.leafset_bitmask
+                log_product = 0.0
+                support_sum = 0.0
+                for split in tree.split_bitmask_edge_map:
+                    if (include_external_splits
+                            or split == leafset_bitmask
+                            or not dendropy.Bipartition.is_trivial_bitmask(split, leafset_bitmask)):
+                        log_product += math.log(split_frequencies[split])
+                        support_sum += split_frequencies[split]
+                expected_log_products.append(log_product)
+                expected_sums.append(support_sum)
+            for observed, expected in (
+                    (tree_array.calculate_log_product_of_split_supports(include_external_splits), expected_log_products),
+                    (tree_array.calculate_sum_of_split_supports(include_external_splits), expected_sums),
+                    ):
+                scores, max_score_tree_idx = observed
+                self.assertEqual(len(scores), len(expected))
+                for s1, s2 in zip(scores, expected):
+                    self.assertAlmostEqual(s1, s2)
+                self.assertEqual(max_score_tree_idx, scores.index(max(scores)))
+                self.assertAlmostEqual(scores[max_score_tree_idx], max(expected))
+
+    def test_robinson_foulds_distance_matrix(self):
+        trees = dendropy.TreeList.get_from_path(pathmap.tree_source_path(
+                "cetaceans.mb.no-clock.mcmc.trees"),
+                "nexus")
+        trees = trees[:60] + trees[-40:]
+        tree_array = dendropy.TreeArray.from_tree_list(trees)
+        for is_weighted, distance_fn in (
+                (False, treecompare.symmetric_difference),
+                (True, treecompare.weighted_robinson_foulds_distance),
+                ):
+            distances = tree_array.robinson_foulds_distance_matrix(is_weighted=is_weighted)
+            condensed_distances = tree_array.robinson_foulds_distance_matrix(
+                    is_weighted=is_weighted,
+                    is_condensed=True,
+                    num_processes=2)
+            self.assertEqual(len(distances), len(trees))
+            self.assertEqual(len(condensed_distances), len(trees) * (len(trees) - 1) // 2)
+            condensed_idx = 0
+            for idx1, tree1 in enumerate(trees):
+                self.assertEqual(len(distances[idx1]), len(trees))
+                for idx2, tree2 in enumerate(trees):
+                    expected = distance_fn(tree1, tree2, is_bipartitions_updated=True)
+                    self.assertAlmostEqual(distances[idx1][idx2], expected)
+                    if idx1 < idx2:
+                        self.assertAlmostEqual(condensed_distances[condensed_idx], expected)
+                        condensed_idx += 1
+            self.assertEqual(
+                    list(condensed_distances),
+                    list(trees.robinson_foulds_distance_matrix(is_weighted=is_weighted, is_condensed=True)))
+        with self.assertRaises(ValueError):
+            dendropy.TreeArray.from_tree_list(trees, ignore_edge_lengths=True).robinson_foulds_distance_matrix(is_weighted=True)
+
+    def test_weighted_robinson_foulds_distance_of_identical_trees(self):
+        trees = dendropy.TreeList.get_from_path(pathmap.tree_source_path(
+                "cetaceans.mb.no-clock.mcmc.trees"),
+                "nexus")
+        trees = dendropy.TreeList([trees[0], trees[0].clone(2), trees[-1]])
+        distances = trees.robinson_foulds_distance_matrix(is_weighted=True, is_condensed=True)
+        self.assertEqual(distances[0], 0.0)
+        for distance in distances:
+            self.assertGreaterEqual(distance, 0.0)
+
+class TreeArraySplitEncodedTreeAccession(unittest.TestCase):
+
+    def compare_read(self, filename, schema, **kwargs):
+        expected = dendropy.TreeArray(ignore_node_ages=True)
+        for tree in dendropy.Tree.yield_from_files(
+                [pathmap.tree_source_path(filename)],
+                schema=schema,
+                taxon_namespace=expected.taxon_namespace,
+                **kwargs):
+            expected.add_tree(tree)
+        observed = dendropy.TreeArray(ignore_node_ages=True)
+        yielder = observed.yield_from_files(
+                [pathmap.tree_source_path(filename)],
+                schema=schema,
+                **kwargs)
+        num_trees = 0
+        for item in yielder:
+            self.assertTrue(isinstance(item, newickreader.SplitEncodedTree))
+            observed.add_tree(item)
+            num_trees += 1
+        self.assertTrue(num_trees > 0)
+        self.assertEqual(
+                [t.label for t in observed.taxon_namespace],
+                [t.label for t in expected.taxon_namespace])
+        self.assertEqual(len(observed), len(expected))
+        for idx in range(len(expected)):
+            exp_splits, exp_edges = expected.get_split_bitmask_and_edge_tuple(idx)
+            obs_splits, obs_edges = observed.get_split_bitmask_and_edge_tuple(idx)
+            self.assertEqual(obs_splits, exp_splits)
+            self.assertEqual(len(obs_edges), len(exp_edges))
+            for e1, e2 in zip(obs_edges, exp_edges):
+                self.assertAlmostEqual(e1, e2)
+        self.assertEqual(observed._tree_weights, expected._tree_weights)
+        self.assertEqual(observed._split_distribution.split_counts,
+                expected._split_distribution.split_counts)
+        for split in expected._split_distribution.split_edge_lengths:
+            self.assertEqual(
+                    len(observed._split_distribution.split_edge_lengths[split]),
+                    len(expected._split_distribution.split_edge_lengths[split]))
+
+    def test_nexus_with_translate_block(self):
+        self.compare_read("cetaceans.mb.no-clock.mcmc.trees", "nexus")
+
+    def test_nexus_weighted(self):
+        self.compare_read("cetaceans.mb.no-clock.mcmc.weighted-01.trees",
+                "nexus",
+                store_tree_weights=True)
+
+    def test_newick(self):
+        self.compare_read("pythonidae.mlboots.newick.tre", "newick")
+
+    def test_newick_rooted(self):
+        self.compare_read("pythonidae.mlboots.newick.tre",
+                "newick",
+                rooting="force-rooted")
+
+    def test_fallback_to_trees(self):
+        tree_array = dendropy.TreeArray(ignore_node_ages=False)
+        yielder = tree_array.yield_from_files(
+                [pathmap.tree_source_path("pythonidae.mlboots.newick.tre")],
+                schema="newick")
+        item = next(iter(yielder))
+        self.assertTrue(isinstance(item, dendropy.Tree))
+
+class TreeArrayPackedUpdate(unittest.TestCase):
+
+    def get_tree_array(self, filename, **kwargs):
+        tree_array = dendropy.TreeArray(**kwargs)
+        tree_array.read_from_path(pathmap.tree_source_path(filename), "nexus")
+        return tree_array
+
+    def get_leafset_bitmasks(self, tree_array):
+        split_bitmask_table = tree_array._get_split_bitmask_table()
+        return [split_bitmask_table[i] for i in tree_array._tree_leafset_split_ids]
+
+    def compare_update(self, source):
+        expected = dendropy.TreeArray(taxon_namespace=source.taxon_namespace)
+        expected.update(source)
+        expected.update(source)
+        packed = pickle.loads(pickle.dumps(source.pack()))
+        self.assertEqual(len(packed), len(source))
+        observed = dendropy.TreeArray(taxon_namespace=source.taxon_namespace)
+        observed.update_from_packed(packed)
+        observed.update_from_packed(packed)
+        self.assertEqual(observed.is_rooted_trees, expected.is_rooted_trees)
+        self.assertEqual(observed.ignore_edge_lengths, expected.ignore_edge_lengths)
+        self.assertEqual(observed.ignore_node_ages, expected.ignore_node_ages)
+        self.assertEqual(list(observed), list(expected))
+        self.assertEqual(self.get_leafset_bitmasks(observed), self.get_leafset_bitmasks(expected))
+        self.assertEqual(observed._tree_weights, expected._tree_weights)
+        obs_sd = observed._split_distribution
+        exp_sd = expected._split_distribution
+        self.assertEqual(obs_sd.total_trees_counted, exp_sd.total_trees_counted)
+        self.assertEqual(obs_sd.sum_of_tree_weights, exp_sd.sum_of_tree_weights)
+        self.assertEqual(obs_sd.tree_rooting_types_counted, exp_sd.tree_rooting_types_counted)
+        self.assertEqual(obs_sd.split_counts, exp_sd.split_counts)
+        self.assertEqual(obs_sd.split_edge_lengths, exp_sd.split_edge_lengths)
+        self.assertEqual(obs_sd.split_node_ages, exp_sd.split_node_ages)
+
+    def test_edge_lengths(self):
+        self.compare_update(self.get_tree_array("cetaceans.mb.no-clock.mcmc.weighted-01.trees"))
+
+    def test_ignore_edge_lengths(self):
+        self.compare_update(self.get_tree_array("cetaceans.mb.no-clock.mcmc.trees",
+            ignore_edge_lengths=True))
+
+    def test_node_ages(self):
+        self.compare_update(self.get_tree_array("cetaceans.mb.strict-clock.mcmc.trees",
+            ignore_node_ages=False))
+
+    def test_missing_values(self):
+        tree_array = dendropy.TreeArray(ignore_node_ages=False)
+        tree = dendropy.Tree.get(data="((a:1,b:1):1,c:2);", schema="newick",
+                taxon_namespace=tree_array.taxon_namespace)
+        tree_array.add_tree(tree)
+        split = next(iter(tree_array.split_distribution.split_node_ages))
+        tree_array.split_distribution.split_node_ages[split].append(None)
+        self.compare_update(tree_array)
+
+    def test_incompatible_update(self):
+        packed = self.get_tree_array("cetaceans.mb.no-clock.mcmc.trees").pack()
+        tree_array = self.get_tree_array("cetaceans.mb.no-clock.mcmc.trees",
+                ignore_edge_lengths=True)
+        with self.assertRaises(dendropy.TreeArray.IncompatibleEdgeLengthsTreeArrayUpdate):
+            tree_array.update_from_packed(packed)
+
+class TreeArraySaveAndLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "trees.bin")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def get_trees(self, filename="cetaceans.mb.strict-clock.mcmc.trees"):
+        return dendropy.TreeList.get_from_path(pathmap.tree_source_path(filename), "nexus")
+
+    def compare_tree_arrays(self, observed, expected):
+        self.assertEqual(
+                [t.label for t in observed.taxon_namespace],
+                [t.label for t in expected.taxon_namespace])
+        self.assertEqual(observed.is_rooted_trees, expected.is_rooted_trees)
+        self.assertEqual(observed.ignore_edge_lengths, expected.ignore_edge_lengths)
+        self.assertEqual(observed.ignore_node_ages, expected.ignore_node_ages)
+        self.assertEqual(observed.use_tree_weights, expected.use_tree_weights)
+        self.assertEqual(list(observed), list(expected))
+        self.assertEqual(list(observed._tree_weights), list(expected._tree_weights))
+        self.assertEqual(
+                observed.calculate_log_product_of_split_supports(),
+                expected.calculate_log_product_of_split_supports())
+        obs_sd = observed.split_distribution
+        exp_sd = expected.split_distribution
+        self.assertEqual(obs_sd.total_trees_counted, exp_sd.total_trees_counted)
+        self.assertEqual(obs_sd.sum_of_tree_weights, exp_sd.sum_of_tree_weights)
+        self.assertEqual(obs_sd.split_counts, exp_sd.split_counts)
+        self.assertEqual(
+                dict((k, v) for k, v in obs_sd.split_edge_lengths.items() if v),
+                dict((k, v) for k, v in exp_sd.split_edge_lengths.items() if v))
+        self.assertEqual(
+                dict((k, v) for k, v in obs_sd.split_node_ages.items() if v),
+                dict((k, v) for k, v in exp_sd.split_node_ages.items() if v))
+
+    def test_save_and_load(self):
+        trees = self.get_trees()
+        expected = dendropy.TreeArray.from_tree_list(trees, ignore_node_ages=False)
+        expected.save(self.path)
+        for mmap in (True, False):
+            observed = dendropy.TreeArray.load(self.path, mmap=mmap)
+            self.compare_tree_arrays(observed, expected)
+
+    def test_metadata(self):
+        tree_array = dendropy.TreeArray.from_tree_list(self.get_trees())
+        tree_array.save(self.path)
+        self.assertIsNone(dendropy.TreeArray.load_metadata(self.path))
+        metadata = {"source": "cetaceans", "offsets": [1, 2]}
+        tree_array.save(self.path, metadata=metadata)
+        self.assertEqual(dendropy.TreeArray.load_metadata(self.path), metadata)
+
+    def test_modify_loaded(self):
+        trees = self.get_trees()
+        expected = dendropy.TreeArray.from_tree_list(trees[:50])
+        expected.save(self.path)
+        observed = dendropy.TreeArray.load(self.path,
+                mmap=True,
+                taxon_namespace=trees.taxon_namespace)
+        observed.add_trees(trees[50:])
+        self.assertEqual(len(observed), len(trees))
+        self.compare_tree_arrays(dendropy.TreeArray.load(self.path), expected)
+
+    def test_append(self):
+        trees = self.get_trees()
+        expected = dendropy.TreeArray.from_tree_list(trees)
+        tree_array = dendropy.TreeArray.from_tree_list(trees[:50])
+        tree_array.save(self.path, append=True)
+        tree_array = dendropy.TreeArray.from_tree_list(trees[50:])
+        tree_array.save(self.path, append=True)
+        self.compare_tree_arrays(dendropy.TreeArray.load(self.path), expected)
+
+    def test_append_incompatible(self):
+        dendropy.TreeArray.from_tree_list(self.get_trees()).save(self.path)
+        tree_array = dendropy.TreeArray.from_tree_list(self.get_trees("pythonidae.reference-trees.nexus"))
+        with self.assertRaises(ValueError):
+            tree_array.save(self.path, append=True)
+
+    def test_load_with_taxon_namespace(self):
+        trees = self.get_trees()
+        dendropy.TreeArray.from_tree_list(trees).save(self.path)
+        tree_array = dendropy.TreeArray.load(self.path, taxon_namespace=trees.taxon_namespace)
+        self.assertIs(tree_array.taxon_namespace, trees.taxon_namespace)
+        taxon_namespace = dendropy.TaxonNamespace(["x"])
+        with self.assertRaises(ValueError):
+            dendropy.TreeArray.load(self.path, taxon_namespace=taxon_namespace)
+
+    def test_load_invalid(self):
+        with open(self.path, "w") as f:
+            f.write("(a,(b,c));\n")
+        with self.assertRaises(ValueError):
+            dendropy.TreeArray.load(self.path)
+
+class TreeArraySummarizedSplitDistribution(unittest.TestCase):
+
+    def get_tree_array(self, trees, **kwargs):
+        return dendropy.TreeArray.from_tree_list(trees, ignore_node_ages=False, **kwargs)
+
+    def setUp(self):
+        self.trees = dendropy.TreeList.get_from_path(
+                pathmap.tree_source_path("cetaceans.mb.strict-clock.mcmc.trees"), "nexus")
+
+    def assertSummariesAlmostEqual(self, observed, expected):
+        self.assertEqual(sorted(observed.keys()), sorted(expected.keys()))
+        for split in expected:
+            for key, value in expected[split].items():
+                if isinstance(value, tuple):
+                    for v1, v2 in zip(observed[split][key], value):
+                        self.assertAlmostEqual(v1, v2)
+                elif value is None or math.isinf(value):
+                    self.assertEqual(observed[split][key], value)
+                else:
+                    self.assertAlmostEqual(observed[split][key], value)
+
+    def compare_split_distributions(self, observed, expected):
+        self.assertEqual(observed.total_trees_counted, expected.total_trees_counted)
+        self.assertEqual(observed.split_counts, expected.split_counts)
+        self.assertSummariesAlmostEqual(
+                observed.split_edge_length_summaries,
+                expected.split_edge_length_summaries)
+        self.assertSummariesAlmostEqual(
+                observed.split_node_age_summaries,
+                expected.split_node_age_summaries)
+
+    def test_summaries(self):
+        expected = self.get_tree_array(self.trees)
+        observed = self.get_tree_array(self.trees, summary_reservoir_size=len(self.trees))
+        self.compare_split_distributions(observed.split_distribution, expected.split_distribution)
+        for values in observed.split_distribution.split_node_ages.values():
+            self.assertEqual(len(values.sample), len(values))
+
+    def test_bounded_summaries(self):
+        expected = self.get_tree_array(self.trees).split_distribution
+        observed = self.get_tree_array(self.trees, summary_reservoir_size=10).split_distribution
+        for split, values in observed.split_edge_lengths.items():
+            self.assertEqual(len(values), len(expected.split_edge_lengths[split]))
+            self.assertTrue(len(values.sample) <= 10)
+        for split, summary in observed.split_edge_length_summaries.items():
+            exp_summary = expected.split_edge_length_summaries[split]
+            self.assertAlmostEqual(summary["mean"], exp_summary["mean"])
+            self.assertEqual(summary["range"], exp_summary["range"])
+
+    def test_update(self):
+        expected = self.get_tree_array(self.trees)
+        observed = self.get_tree_array(self.trees[:40], summary_reservoir_size=len(self.trees))
+        other = self.get_tree_array(self.trees[40:], summary_reservoir_size=len(self.trees))
+        observed.update_from_packed(pickle.loads(pickle.dumps(other.pack())))
+        self.compare_split_distributions(observed.split_distribution, expected.split_distribution)
+        with self.assertRaises(ValueError):
+            self.get_tree_array(self.trees).update(other)
+
+    def test_save_and_load(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "trees.bin")
+            expected = self.get_tree_array(self.trees, summary_reservoir_size=10)
+            expected.save(path)
+            observed = dendropy.TreeArray.load(path)
+            self.assertEqual(observed.split_distribution.summary_reservoir_size, 10)
+            self.compare_split_distributions(observed.split_distribution, expected.split_distribution)
+        finally:
+            shutil.rmtree(temp_dir)
 
 if __name__ == "__main__":
     unittest.main()
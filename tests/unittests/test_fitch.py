@@ -28,7 +28,10 @@ import unittest
 import math
 import sys
 import dendropy
+from dendropy.calculate import treescore
 from dendropy.calculate.treescore import fitch_down_pass
+from dendropy.calculate.treescore import fitch_up_pass
+from dendropy.calculate.treescore import FitchParsimonyScorer
 sys.path.insert(0, os.path.dirname(__file__))
 from support import pathmap
 
@@ -78,11 +81,105 @@ class FitchTest(unittest.TestCase):
         taxon_state_sets_map = char_mat.taxon_state_sets_map(gaps_as_missing=gaps_as_missing)
         tree_list = dataset.tree_lists[0]
         self.assertEqual(len(expected_scores), len(tree_list))
+        scorer = FitchParsimonyScorer(taxon_state_sets_map)
         for n, tree in enumerate(tree_list):
             node_list = tree.postorder_node_iter()
             pscore = fitch_down_pass(node_list, taxon_state_sets_map=taxon_state_sets_map)
             # print("{} vs. {}".format(expected_scores[n], pscore))
             self.assertEqual(expected_scores[n], pscore)
+            self.assertEqual(expected_scores[n], scorer.score(tree))
+
+    def test_scorer_against_fitch_passes(self):
+        dataset = dendropy.DataSet.get_from_path(
+                pathmap.char_source_path("apternodus.chars.nexus"),
+                "nexus")
+        dataset.read_from_path(
+                pathmap.tree_source_path("apternodus.tre"),
+                schema='NEXUS',
+                taxon_namespace=dataset.taxon_namespaces[0])
+        char_mat = dataset.char_matrices[0]
+        taxon_state_sets_map = char_mat.taxon_state_sets_map(gaps_as_missing=False)
+        rng = random.Random(1)
+        weights = [rng.randint(1, 3) for i in range(char_mat.vector_size)]
+        for scorer_weights in (None, weights):
+            scorer = FitchParsimonyScorer(taxon_state_sets_map, weights=scorer_weights)
+            for tree in dataset.tree_lists[0][15:]:
+                tree.resolve_polytomies(rng=rng)
+                expected_score_by_character_list = []
+                expected_score = fitch_down_pass(tree.postorder_node_iter(),
+                        taxon_state_sets_map=taxon_state_sets_map,
+                        weights=scorer_weights,
+                        score_by_character_list=expected_score_by_character_list)
+                score_by_character_list = []
+                self.assertEqual(scorer.score(tree, score_by_character_list=score_by_character_list), expected_score)
+                self.assertEqual(score_by_character_list, expected_score_by_character_list)
+                node_state_sets = scorer.node_state_sets(tree, is_final=False)
+                for nd in tree.postorder_node_iter():
+                    if nd.is_internal():
+                        self.assertEqual(node_state_sets[nd], nd.state_sets)
+                fitch_up_pass(tree.preorder_node_iter())
+                node_state_sets = scorer.node_state_sets(tree)
+                for nd in tree.postorder_node_iter():
+                    if nd.is_internal():
+                        self.assertEqual(node_state_sets[nd], nd.state_sets)
+        # repeated sites are compressed into a single pattern
+        doubled_taxon_state_sets_map = dict((t, ss + ss) for t, ss in taxon_state_sets_map.items())
+        scorer = FitchParsimonyScorer(doubled_taxon_state_sets_map)
+        self.assertEqual(scorer.num_sites, 2 * char_mat.vector_size)
+        self.assertLessEqual(scorer.num_patterns, char_mat.vector_size)
+        for tree in dataset.tree_lists[0][15:]:
+            self.assertEqual(scorer.score(tree),
+                    2 * fitch_down_pass(tree.postorder_node_iter(), taxon_state_sets_map=taxon_state_sets_map))
+
+    def test_float_weights(self):
+        dataset = dendropy.DataSet.get_from_path(
+                pathmap.char_source_path("apternodus.chars.nexus"),
+                "nexus")
+        dataset.read_from_path(
+                pathmap.tree_source_path("apternodus.tre"),
+                schema='NEXUS',
+                taxon_namespace=dataset.taxon_namespaces[0])
+        char_mat = dataset.char_matrices[0]
+        taxon_state_sets_map = char_mat.taxon_state_sets_map(gaps_as_missing=True)
+        tree = dataset.tree_lists[0][0]
+        weights = [0.5] * char_mat.vector_size
+        self.assertEqual(treescore.parsimony_score(tree, char_mat, weights=weights), 185.0)
+        rng = random.Random(1)
+        weights = [rng.uniform(0.1, 2.0) for i in range(char_mat.vector_size)]
+        scorer = FitchParsimonyScorer(taxon_state_sets_map, weights=weights)
+        for tree in dataset.tree_lists[0]:
+            expected_score = fitch_down_pass(tree.postorder_node_iter(),
+                    taxon_state_sets_map=taxon_state_sets_map,
+                    weights=weights)
+            self.assertAlmostEqual(scorer.score(tree), expected_score)
+
+    def test_store_state_sets(self):
+        dataset = dendropy.DataSet.get_from_path(
+                pathmap.char_source_path("apternodus.chars.nexus"),
+                "nexus")
+        dataset.read_from_path(
+                pathmap.tree_source_path("apternodus.tre"),
+                schema='NEXUS',
+                taxon_namespace=dataset.taxon_namespaces[0])
+        char_mat = dataset.char_matrices[0]
+        taxon_state_sets_map = char_mat.taxon_state_sets_map(gaps_as_missing=True)
+        tree = dataset.tree_lists[0][0]
+        expected_tree = tree.clone(1)
+        expected_score = fitch_down_pass(expected_tree.postorder_node_iter(),
+                taxon_state_sets_map=taxon_state_sets_map)
+        score = treescore.parsimony_score(tree, char_mat)
+        self.assertEqual(score, expected_score)
+        for nd in tree:
+            self.assertFalse(hasattr(nd, "state_sets"))
+        score = treescore.parsimony_score(tree, char_mat, store_state_sets=True)
+        self.assertEqual(score, expected_score)
+        for nd, expected_nd in zip(tree.postorder_node_iter(), expected_tree.postorder_node_iter()):
+            self.assertEqual(nd.state_sets, expected_nd.state_sets)
+        # the state sets can be followed by the final pass
+        fitch_up_pass(tree.preorder_node_iter())
+        fitch_up_pass(expected_tree.preorder_node_iter())
+        for nd, expected_nd in zip(tree.postorder_node_iter(), expected_tree.postorder_node_iter()):
+            self.assertEqual(nd.state_sets, expected_nd.state_sets)
 
 if __name__ == "__main__":
     unittest.main()
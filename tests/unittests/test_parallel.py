@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Tests for distributing tiles of work over processes.
+"""
+
+import threading
+import unittest
+from dendropy.utility import parallel
+
+def _scale_tile(tile, factor, offset):
+    start, stop = tile
+    return [idx * factor + offset for idx in range(start, stop)]
+
+class MapTilesTest(unittest.TestCase):
+
+    def test_map_tiles(self):
+        tiles = [(start, min(start + 3, 10)) for start in range(0, 10, 3)]
+        expected = [[0, 2, 4], [6, 8, 10], [12, 14, 16], [18]]
+        expected = [[v + 1 for v in row] for row in expected]
+        for num_processes in (None, 1, 2):
+            self.assertEqual(parallel.map_tiles(_scale_tile, tiles,
+                    shared_args=(2, 1),
+                    num_processes=num_processes), expected)
+        self.assertEqual(parallel.map_tiles(_scale_tile, [], shared_args=(2, 1), num_processes=2), [])
+
+    def test_concurrent_calls(self):
+        # the shared arguments of calls in different threads are independent
+        results = {}
+        def _run(factor):
+            results[factor] = [parallel.map_tiles(_scale_tile, [(0, 100)], shared_args=(factor, 0))
+                    for i in range(50)]
+        threads = [threading.Thread(target=_run, args=(factor,)) for factor in range(1, 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for factor, factor_results in results.items():
+            for result in factor_results:
+                self.assertEqual(result, [[idx * factor for idx in range(100)]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,17 +18,21 @@
 ##############################################################################
 
 from io import StringIO
+import random
 import unittest
 import dendropy
 import csv
 from dendropy.utility import container
+from dendropy.utility import error
 import os
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
 from support import pathmap
 from dendropy.calculate import treemeasure
+from dendropy.calculate import treecompare
 from dendropy.calculate import probability
 from dendropy.calculate import combinatorics
+from dendropy.simulate import treesim
 
 class PhylogeneticDistanceMatrixCloneTest(unittest.TestCase):
 
@@ -515,6 +519,193 @@ class PhylogeneticEcologyStatsTests(unittest.TestCase):
                     expected_results_data_table[expected_result_row_name, "mntd.obs.p"],
                     ))
 
+    def test_assemblage_statistics(self):
+        for is_weighted_edge_distances in (True, False):
+            for is_normalize_by_tree_size in (True, False):
+                kwargs = {
+                        "is_weighted_edge_distances": is_weighted_edge_distances,
+                        "is_normalize_by_tree_size": is_normalize_by_tree_size,
+                        }
+                results = self.pdm.assemblage_statistics(self.assemblage_membership_definitions, **kwargs)
+                self.assertEqual(list(results.keys()), list(self.assemblage_membership_definitions.keys()))
+                for row_name, assemblage_membership in self.assemblage_membership_definitions.items():
+                    result = results[row_name]
+                    filter_fn = lambda taxon: taxon in assemblage_membership
+                    self.assertEqual(result.num_taxa, len(assemblage_membership))
+                    self.assertAlmostEqual(result.mpd, self.pdm.mean_pairwise_distance(filter_fn=filter_fn, **kwargs))
+                    self.assertAlmostEqual(result.mntd, self.pdm.mean_nearest_taxon_distance(filter_fn=filter_fn, **kwargs))
+                    expected_pd = 0.0
+                    for nd in self.tree.postorder_node_iter():
+                        if nd is not self.tree.seed_node and any(filter_fn(leaf.taxon) for leaf in nd.leaf_iter()):
+                            expected_pd += nd.edge.length if is_weighted_edge_distances else 1
+                    if is_normalize_by_tree_size:
+                        if is_weighted_edge_distances:
+                            expected_pd /= self.tree.length()
+                        else:
+                            expected_pd /= self.pdm._num_edges
+                    self.assertAlmostEqual(result.pd, expected_pd)
+        taxa = list(self.assemblage_membership_definitions["C1"])
+        results = self.pdm.assemblage_statistics([taxa[:1], [], taxa[:2] + [dendropy.Taxon("x")]])
+        self.assertEqual([result.num_taxa for result in results], [1, 0, 2])
+        self.assertEqual(results[0].mpd, None)
+        self.assertEqual(results[1].mntd, None)
+        self.assertEqual(results[1].pd, 0.0)
+        self.assertAlmostEqual(results[2].mpd, self.pdm.patristic_distance(taxa[0], taxa[1]))
+
+    def test_abundance_weighted_assemblage_statistics(self):
+        assemblage_membership_definitions = self.pdm.assemblage_membership_definitions_from_csv(
+                pathmap.other_source_path("community.data.tsv"),
+                is_abundances=True,
+                delimiter="\t")
+        results = self.pdm.assemblage_statistics(assemblage_membership_definitions)
+        unweighted_results = self.pdm.assemblage_statistics(self.assemblage_membership_definitions)
+        for row_name, abundances in assemblage_membership_definitions.items():
+            self.assertEqual(set(abundances), self.assemblage_membership_definitions[row_name])
+            for taxon, abundance in abundances.items():
+                self.assertEqual(abundance, self.data_table[row_name, taxon.label])
+            total = sum(abundances.values())
+            expected_mpd = sum(abundances[t1] * abundances[t2] * self.pdm.distance(t1, t2)
+                    for t1 in abundances for t2 in abundances) / (total * total)
+            expected_mntd = sum(abundances[t1] * min(self.pdm.distance(t1, t2) for t2 in abundances if t2 is not t1)
+                    for t1 in abundances) / total
+            self.assertAlmostEqual(results[row_name].mpd, expected_mpd)
+            self.assertAlmostEqual(results[row_name].mntd, expected_mntd)
+            self.assertAlmostEqual(results[row_name].pd, unweighted_results[row_name].pd)
+
+    def test_ses_null_model_reproducibility(self):
+        for method_name, statistic_method_name in (
+                ("standardized_effect_size_mean_pairwise_distance", "mean_pairwise_distance"),
+                ("standardized_effect_size_mean_nearest_taxon_distance", "mean_nearest_taxon_distance"),
+                ):
+            results = []
+            for num_processes in (None, 1, 2):
+                results.append(getattr(self.pdm, method_name)(
+                        assemblage_memberships=self.assemblage_memberships,
+                        num_randomization_replicates=120,
+                        rng=random.Random(1),
+                        num_processes=num_processes))
+            self.assertEqual(results[0], results[1])
+            self.assertEqual(results[0], results[2])
+            for result, assemblage_membership in zip(results[0], self.assemblage_memberships):
+                self.assertAlmostEqual(result.obs, getattr(self.pdm, statistic_method_name)(
+                        filter_fn=lambda taxon: taxon in assemblage_membership))
+            self.assertNotEqual(results[0], getattr(self.pdm, method_name)(
+                    assemblage_memberships=self.assemblage_memberships,
+                    num_randomization_replicates=120,
+                    rng=random.Random(2)))
+
+class DensePhylogeneticEcologyStatsTests(PhylogeneticEcologyStatsTests):
+
+    def setUp(self):
+        PhylogeneticEcologyStatsTests.setUp(self)
+        self.pdm = dendropy.DensePhylogeneticDistanceMatrix.from_tree(self.tree)
+
+class DensePhylogeneticDistanceMatrixTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = dendropy.Tree.get(path=pathmap.tree_source_path(
+            "pythonidae.mle.nex"),
+            schema="nexus",
+            preserve_underscores=True)
+        self.pdm = dendropy.PhylogeneticDistanceMatrix.from_tree(self.tree, is_store_path_edges=True)
+        self.dense_pdm = dendropy.DensePhylogeneticDistanceMatrix.from_tree(self.tree)
+        self.taxa = list(self.tree.taxon_namespace)
+
+    def test_queries(self):
+        self.assertEqual(set(self.dense_pdm._mapped_taxa), self.pdm._mapped_taxa)
+        self.assertEqual(self.dense_pdm._tree_length, self.pdm._tree_length)
+        self.assertEqual(self.dense_pdm._num_edges, self.pdm._num_edges)
+        for t1 in self.taxa:
+            for t2 in self.taxa:
+                for is_weighted_edge_distances in (True, False):
+                    for is_normalize_by_tree_size in (True, False):
+                        self.assertAlmostEqual(
+                                self.dense_pdm.distance(t1, t2,
+                                    is_weighted_edge_distances=is_weighted_edge_distances,
+                                    is_normalize_by_tree_size=is_normalize_by_tree_size),
+                                self.pdm.distance(t1, t2,
+                                    is_weighted_edge_distances=is_weighted_edge_distances,
+                                    is_normalize_by_tree_size=is_normalize_by_tree_size))
+                self.assertIs(self.dense_pdm.mrca(t1, t2), self.pdm.mrca(t1, t2))
+                self.assertEqual(list(self.dense_pdm.path_edges(t1, t2)), list(self.pdm.path_edges(t1, t2)))
+        for is_weighted_edge_distances in (True, False):
+            for d1, d2 in zip(
+                    sorted(self.dense_pdm.distances(is_weighted_edge_distances=is_weighted_edge_distances)),
+                    sorted(self.pdm.distances(is_weighted_edge_distances=is_weighted_edge_distances))):
+                self.assertAlmostEqual(d1, d2)
+            t1, t2 = self.dense_pdm.max_pairwise_distance_taxa(is_weighted_edge_distances=is_weighted_edge_distances)
+            self.assertAlmostEqual(
+                    self.dense_pdm.distance(t1, t2, is_weighted_edge_distances=is_weighted_edge_distances),
+                    max(self.pdm.distances(is_weighted_edge_distances=is_weighted_edge_distances)))
+        self.assertEqual(
+                set(frozenset(p) for p in self.dense_pdm.distinct_taxon_pair_iter()),
+                self.pdm._all_distinct_mapped_taxa_pairs)
+
+    def test_statistics(self):
+        filter_fns = (None, lambda taxon: taxon.label < "M", lambda taxon: taxon.label.startswith("Python"))
+        for filter_fn in filter_fns:
+            for is_weighted_edge_distances in (True, False):
+                for is_normalize_by_tree_size in (True, False):
+                    kwargs = {
+                            "filter_fn": filter_fn,
+                            "is_weighted_edge_distances": is_weighted_edge_distances,
+                            "is_normalize_by_tree_size": is_normalize_by_tree_size,
+                            }
+                    self.assertAlmostEqual(
+                            self.dense_pdm.mean_pairwise_distance(**kwargs),
+                            self.pdm.mean_pairwise_distance(**kwargs))
+                    self.assertAlmostEqual(
+                            self.dense_pdm.mean_nearest_taxon_distance(**kwargs),
+                            self.pdm.mean_nearest_taxon_distance(**kwargs))
+        with self.assertRaises(error.NullAssemblageException):
+            self.dense_pdm.mean_pairwise_distance(filter_fn=lambda taxon: taxon is self.taxa[0])
+
+    def test_clone_and_shuffle(self):
+        pdm1 = self.dense_pdm.clone()
+        self.assertIsNot(pdm1, self.dense_pdm)
+        self.assertEqual(pdm1, self.dense_pdm)
+        current_to_shuffled_taxon_map = pdm1.shuffle_taxa(rng=random.Random(1))
+        self.assertNotEqual(pdm1, self.dense_pdm)
+        for t1 in self.taxa:
+            for t2 in self.taxa:
+                self.assertEqual(
+                        pdm1.patristic_distance(current_to_shuffled_taxon_map[t1], current_to_shuffled_taxon_map[t2]),
+                        self.dense_pdm.patristic_distance(t1, t2))
+                self.assertIs(
+                        pdm1.mrca(current_to_shuffled_taxon_map[t1], current_to_shuffled_taxon_map[t2]),
+                        self.dense_pdm.mrca(t1, t2))
+        pdm2 = self.dense_pdm.clone()
+        pdm2._taxon_indexes = dict(pdm1._taxon_indexes)
+        pdm2._path_steps_taxon_indexes = dict(pdm1._path_steps_taxon_indexes)
+        pdm2._taxon_nodes = dict(pdm1._taxon_nodes)
+        pdm2._distances = pdm2._distances[:]
+        self.assertEqual(pdm1, pdm2)
+
+    def test_as_data_table_and_write_csv(self):
+        for is_weighted_edge_distances in (True, False):
+            dt1 = self.dense_pdm.as_data_table(is_weighted_edge_distances=is_weighted_edge_distances)
+            dt2 = self.pdm.as_data_table(is_weighted_edge_distances=is_weighted_edge_distances)
+            for t1 in self.taxa:
+                for t2 in self.taxa:
+                    self.assertAlmostEqual(dt1[t1.label, t2.label], dt2[t1.label, t2.label])
+        for is_normalize_by_tree_size in (True, False):
+            out = StringIO()
+            self.dense_pdm.write_csv(out, is_normalize_by_tree_size=is_normalize_by_tree_size)
+            pdm = dendropy.DensePhylogeneticDistanceMatrix.from_csv(
+                    StringIO(out.getvalue()),
+                    taxon_namespace=self.tree.taxon_namespace)
+            for t1 in self.taxa:
+                for t2 in self.taxa:
+                    self.assertAlmostEqual(
+                            pdm.patristic_distance(t1, t2),
+                            self.dense_pdm.patristic_distance(t1, t2, is_normalize_by_tree_size=is_normalize_by_tree_size))
+
+    def test_nj_and_upgma_trees(self):
+        for method in ("nj_tree", "upgma_tree"):
+            tree1 = getattr(self.dense_pdm, method)()
+            tree2 = getattr(self.pdm, method)()
+            self.assertEqual(treecompare.symmetric_difference(tree1, tree2), 0)
+
 class PhylogeneticDistanceMatrixReader(unittest.TestCase):
 
     def setUp(self):
@@ -735,17 +926,18 @@ class PdmNeighborJoiningTree(PdmTreeChecker, unittest.TestCase):
                         is_first_column_row_names=True,
                         is_allow_new_taxa=True,
                         delimiter=",")
-            obs_tree = pdm.nj_tree()
-            # print(obs_tree.as_string("newick"))
-            # print(obs_tree.as_ascii_plot(plot_metric="length"))
-            expected_tree = dendropy.Tree.get(
-                    data=expected_tree_str,
-                    schema="newick",
-                    rooting="force-unrooted",
-                    taxon_namespace=pdm.taxon_namespace,
-                    preserve_underscores=True)
-            self.check_tree(obs_tree=obs_tree,
-                    expected_tree=expected_tree)
+            for is_bound_pruned_search in (False, True):
+                obs_tree = pdm.nj_tree(is_bound_pruned_search=is_bound_pruned_search)
+                # print(obs_tree.as_string("newick"))
+                # print(obs_tree.as_ascii_plot(plot_metric="length"))
+                expected_tree = dendropy.Tree.get(
+                        data=expected_tree_str,
+                        schema="newick",
+                        rooting="force-unrooted",
+                        taxon_namespace=pdm.taxon_namespace,
+                        preserve_underscores=True)
+                self.check_tree(obs_tree=obs_tree,
+                        expected_tree=expected_tree)
 
     def test_njtree_from_weighted_and_unweighted_distances(self):
 
@@ -769,6 +961,24 @@ class PdmNeighborJoiningTree(PdmTreeChecker, unittest.TestCase):
             self.check_tree(obs_tree=obs_tree,
                     expected_tree=expected_tree)
 
+    def test_njtree_search_strategies(self):
+        rng = random.Random(1)
+        taxon_namespace = dendropy.TaxonNamespace(["T{}".format(i) for i in range(100)])
+        tree = treesim.birth_death_tree(1.0, 0.0,
+                taxon_namespace=taxon_namespace,
+                num_extant_tips=len(taxon_namespace),
+                rng=rng)
+        for nd in tree.postorder_node_iter():
+            if nd.edge.length is not None:
+                nd.edge.length *= rng.uniform(0.5, 1.5)
+        for pdm in (
+                dendropy.PhylogeneticDistanceMatrix.from_tree(tree),
+                dendropy.DensePhylogeneticDistanceMatrix.from_tree(tree)):
+            expected_tree = pdm.nj_tree(is_bound_pruned_search=False)
+            obs_tree = pdm.nj_tree(is_bound_pruned_search=True)
+            self.check_tree(obs_tree=obs_tree,
+                    expected_tree=expected_tree)
+
 class PdmUpgmaTree(PdmTreeChecker, unittest.TestCase):
 
     def test_upgma_average_from_distance_matrices(self):
@@ -800,6 +1010,66 @@ class PdmUpgmaTree(PdmTreeChecker, unittest.TestCase):
             self.check_tree(obs_tree=obs_tree,
                     expected_tree=expected_tree)
 
+    def get_reference_clustering_tree(self, pdm, linkage):
+        # joins the closest pair of clusters at each step
+        cluster_distance_fns = {
+                "upgma": lambda d1, d2, n1, n2: (d1 * n1 + d2 * n2) / (n1 + n2),
+                "wpgma": lambda d1, d2, n1, n2: (d1 + d2) / 2.0,
+                "single": lambda d1, d2, n1, n2: min(d1, d2),
+                "complete": lambda d1, d2, n1, n2: max(d1, d2),
+                }
+        tree = dendropy.Tree(taxon_namespace=pdm.taxon_namespace, is_rooted=True)
+        clusters = {}
+        for taxon in pdm.taxon_iter():
+            nd = tree.node_factory(taxon=taxon)
+            clusters[nd] = (1, 0.0)
+        distances = {}
+        for nd1 in clusters:
+            for nd2 in clusters:
+                if nd1 is not nd2:
+                    distances[frozenset([nd1, nd2])] = pdm.distance(nd1.taxon, nd2.taxon)
+        while len(clusters) > 1:
+            pair, d = min(distances.items(), key=lambda x: x[1])
+            nd1, nd2 = pair
+            new_node = tree.node_factory()
+            for nd in (nd1, nd2):
+                new_node.add_child(nd)
+                nd.edge.length = d / 2.0 - clusters[nd][1]
+            size1 = clusters.pop(nd1)[0]
+            size2 = clusters.pop(nd2)[0]
+            for nd in clusters:
+                distances[frozenset([new_node, nd])] = cluster_distance_fns[linkage](
+                        distances.pop(frozenset([nd1, nd])),
+                        distances.pop(frozenset([nd2, nd])),
+                        size1,
+                        size2)
+            del distances[pair]
+            clusters[new_node] = (size1 + size2, d / 2.0)
+        tree.seed_node = list(clusters)[0]
+        return tree
+
+    def test_hierarchical_clustering_linkages(self):
+        rng = random.Random(1)
+        taxon_namespace = dendropy.TaxonNamespace(["T{}".format(i) for i in range(40)])
+        distances = {}
+        for idx1, taxon1 in enumerate(taxon_namespace):
+            distances[taxon1] = {}
+            for taxon2 in taxon_namespace[idx1+1:]:
+                distances[taxon1][taxon2] = rng.uniform(1.0, 10.0)
+        for pdm_type in (dendropy.PhylogeneticDistanceMatrix, dendropy.DensePhylogeneticDistanceMatrix):
+            pdm = pdm_type()
+            pdm.compile_from_dict(distances=distances, taxon_namespace=taxon_namespace)
+            for linkage in ("upgma", "wpgma", "single", "complete"):
+                obs_tree = pdm.hierarchical_clustering_tree(linkage=linkage)
+                self.assertTrue(obs_tree.is_rooted)
+                self.check_tree(obs_tree=obs_tree,
+                        expected_tree=self.get_reference_clustering_tree(pdm, linkage))
+                self.assertAlmostEqual(
+                        min(nd.distance_from_root() for nd in obs_tree.leaf_node_iter()),
+                        max(nd.distance_from_root() for nd in obs_tree.leaf_node_iter()))
+        with self.assertRaises(ValueError):
+            pdm.hierarchical_clustering_tree(linkage="centroid")
+
 class NodeToNodeDistancesTest(unittest.TestCase):
 
     def test_distances(self):
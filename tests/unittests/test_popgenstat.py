@@ -107,6 +107,43 @@ class SinglePopTest(dendropytest.ExtendedTestCase):
     def test_wattersons_theta(self):
         self.assertAlmostEqual(popgenstat.wattersons_theta(self.data, ignore_uncertain=True), 49.00528, 4)
 
+class UncertainStatesTest(dendropytest.ExtendedTestCase):
+
+    def test_count_differences(self):
+        data = dendropy.DnaCharacterMatrix.from_dict({
+            "s1": "ACGTN-?AAC",
+            "s2": "ACGAN??CAC",
+            "s3": "TCG-AAACRC",
+            "s4": "TCGTAN-CYC",
+            })
+        seqs = data.sequences()
+        state_alphabet = data.default_state_alphabet
+        for ignore_uncertain in (True, False):
+            if ignore_uncertain:
+                attr = "fundamental_indexes_with_gaps_as_missing"
+                ignored = set(getattr(state, attr) for state in (state_alphabet.gap_state, state_alphabet.no_data_state))
+            else:
+                attr = "fundamental_indexes"
+                ignored = set()
+            diffs = []
+            for i, s1 in enumerate(seqs):
+                for s2 in seqs[i+1:]:
+                    diffs.append(sum(1 for c1, c2 in zip(s1, s2)
+                        if getattr(c1, attr) not in ignored
+                        and getattr(c2, attr) not in ignored
+                        and getattr(c1, attr) is not getattr(c2, attr)))
+            sum_diff, mean_diff, sq_diff = popgenstat._count_differences(seqs, state_alphabet, ignore_uncertain)
+            self.assertEqual(sum_diff, sum(diffs))
+            self.assertEqual(sq_diff, sum(d ** 2 for d in diffs))
+            num_segregating_sites = sum(1 for site in zip(*seqs)
+                    if getattr(site[0], attr) not in ignored
+                    and any(getattr(c, attr) not in ignored and getattr(c, attr) is not getattr(site[0], attr) for c in site[1:]))
+            self.assertEqual(popgenstat.num_segregating_sites(data, ignore_uncertain), num_segregating_sites)
+        self.assertEqual(popgenstat.num_segregating_sites(data, True), 4)
+        pp = popgenstat.PopulationPairSummaryStatistics(seqs[:2], seqs[2:])
+        # gaps and missing data are ignored, but ambiguous states are not
+        self.assertEqual(pp._pairwise_differences_between_populations(), [4, 4, 3, 4])
+
 class PopulationPairSummaryStatisticsTests(dendropytest.ExtendedTestCase):
 
     def testPopulationPairSummaryStatistics(self):
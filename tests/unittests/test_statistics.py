@@ -23,11 +23,14 @@ Tests statistical routines.
 
 import unittest
 import os
+import pickle
+import random
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
 from support import dendropytest
 from dendropy.calculate import statistics
 from dendropy.utility import messaging
+from dendropy.utility import GLOBAL_RNG
 
 _LOG = messaging.get_logger(__name__)
 
@@ -620,6 +623,84 @@ class TestVarianceCovariance(unittest.TestCase):
             for j, y in enumerate(x):
                 self.assertAlmostEqual(cov[i][j], e[i][j])
 
+class TestStreamingSummary(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.values = [rng.lognormvariate(0, 1) for i in range(500)]
+
+    def assertSummariesAlmostEqual(self, s1, s2):
+        self.assertEqual(sorted(s1.keys()), sorted(s2.keys()))
+        for key in s1:
+            if isinstance(s1[key], tuple):
+                for v1, v2 in zip(s1[key], s2[key]):
+                    self.assertAlmostEqual(v1, v2)
+            else:
+                self.assertAlmostEqual(s1[key], s2[key])
+
+    def testExactWithinReservoirSize(self):
+        summary = statistics.StreamingSummary()
+        summary.extend(self.values)
+        self.assertEqual(len(summary), len(self.values))
+        self.assertSummariesAlmostEqual(summary.summarize(), statistics.summarize(self.values))
+
+    def testMerge(self):
+        expected = statistics.summarize(self.values)
+        for split_idx in (0, 1, 137, 499, 500):
+            s1 = statistics.StreamingSummary()
+            s1.extend(self.values[:split_idx])
+            s2 = statistics.StreamingSummary()
+            s2.extend(self.values[split_idx:])
+            s1 += s2
+            self.assertEqual(len(s1), len(self.values))
+            self.assertSummariesAlmostEqual(s1.summarize(), expected)
+
+    def testBoundedReservoir(self):
+        s1 = statistics.StreamingSummary(reservoir_size=50)
+        s1.extend(self.values[:300])
+        s2 = statistics.StreamingSummary(reservoir_size=50)
+        s2.extend(self.values[300:])
+        s1.update(s2)
+        self.assertEqual(len(s1.sample), 50)
+        self.assertTrue(set(s1.sample) <= set(self.values))
+        summary = s1.summarize()
+        expected = statistics.summarize(self.values)
+        self.assertEqual(summary["range"], expected["range"])
+        for key in ("mean", "var", "sd"):
+            self.assertAlmostEqual(summary[key], expected[key])
+        self.assertTrue(expected["range"][0] <= summary["median"] <= expected["range"][1])
+
+    def testSingleValue(self):
+        summary = statistics.StreamingSummary()
+        summary.append(2.5)
+        result = summary.summarize()
+        self.assertEqual(result["mean"], 2.5)
+        self.assertEqual(result["var"], float("inf"))
+        self.assertEqual(result["range"], (2.5, 2.5))
+
+    def testMissingValues(self):
+        summary = statistics.StreamingSummary()
+        summary.extend([1.0, None, 2.0])
+        self.assertEqual(len(summary), 3)
+        self.assertRaises(TypeError, summary.summarize)
+        self.assertRaises(ValueError, statistics.StreamingSummary().summarize)
+
+    def testPickle(self):
+        summary = statistics.StreamingSummary(reservoir_size=10)
+        summary.extend(self.values)
+        copy = pickle.loads(pickle.dumps(summary))
+        for attr in statistics.StreamingSummary.__slots__:
+            self.assertEqual(getattr(copy, attr), getattr(summary, attr))
+
+    def testRng(self):
+        samples = []
+        for idx in range(2):
+            summary = statistics.StreamingSummary(reservoir_size=10, rng=random.Random(42))
+            summary.extend(self.values)
+            samples.append(summary.sample)
+        self.assertEqual(samples[0], samples[1])
+        self.assertIs(statistics.StreamingSummary().rng, GLOBAL_RNG)
+
 class FishersExactTests(dendropytest.ExtendedTestCase):
     """
     Fisher's exact test.
@@ -0,0 +1,151 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+##############################################################################
+##  DendroPy Phylogenetic Computing Library.
+##
+##  Copyright 2010-2015 Jeet Sukumaran and Mark T. Holder.
+##  All rights reserved.
+##
+##  See "LICENSE.rst" for terms and conditions of usage.
+##
+##  If you use this work or any portion thereof in published work,
+##  please cite it as:
+##
+##     Sukumaran, J. and M. T. Holder. 2010. DendroPy: a Python library
+##     for phylogenetic computing. Bioinformatics 26: 1569-1571.
+##
+##############################################################################
+
+"""
+Tests for checkpointing and resuming SumTrees analyses.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(__file__))
+from support import pathmap
+from dendropy.application import sumtrees
+from dendropy.dataio import treeindex
+
+class AnalysisInterrupted(Exception):
+    pass
+
+class InterruptedAnalysisCheckpoint(sumtrees.AnalysisCheckpoint):
+
+    def __init__(self, *args, **kwargs):
+        self.num_work_items_to_record = kwargs.pop("num_work_items_to_record")
+        sumtrees.AnalysisCheckpoint.__init__(self, *args, **kwargs)
+
+    def record(self, work_item):
+        if self.num_work_items_to_record == 0:
+            raise AnalysisInterrupted()
+        self.num_work_items_to_record -= 1
+        sumtrees.AnalysisCheckpoint.record(self, work_item)
+
+class AnalysisCheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.checkpoint_dir = os.path.join(self.temp_dir, "checkpoints")
+        os.mkdir(self.checkpoint_dir)
+        self.checkpoint_path = os.path.join(self.checkpoint_dir, "checkpoint.bin")
+        self.tree_sources = []
+        for filename in ("cetaceans.mb.no-clock.mcmc.trees", "cetaceans.mb.no-clock.mcmc.weighted-01.trees"):
+            dest = os.path.join(self.temp_dir, filename)
+            shutil.copy(pathmap.tree_source_path(filename), dest)
+            self.tree_sources.append(dest)
+        self.settings = {"burnin": 30}
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def analyze_trees(self, checkpoint=None, resume_from_checkpoint=False):
+        tree_processor = sumtrees.TreeProcessor(
+                is_source_trees_rooted=None,
+                ignore_edge_lengths=False,
+                ignore_node_ages=True,
+                use_tree_weights=False,
+                ultrametricity_precision=None,
+                taxon_label_age_map=None,
+                num_processes=1,
+                log_frequency=0,
+                messenger=None,
+                debug_mode=False)
+        return tree_processor.analyze_trees(
+                tree_sources=self.tree_sources,
+                schema="nexus",
+                tree_offset=30,
+                checkpoint=checkpoint,
+                resume_from_checkpoint=resume_from_checkpoint)
+
+    def test_partition_tree_sources(self):
+        tree_processor = sumtrees.TreeProcessor(
+                is_source_trees_rooted=None,
+                ignore_edge_lengths=False,
+                ignore_node_ages=True,
+                use_tree_weights=False,
+                ultrametricity_precision=None,
+                taxon_label_age_map=None,
+                num_processes=4,
+                log_frequency=0,
+                messenger=None,
+                debug_mode=False)
+        tree_processor.info_message = lambda *args, **kwargs: None
+        source = self.tree_sources[0]
+        work_items = tree_processor.partition_tree_sources([source], "nexus", tree_offset=30)
+        self.assertEqual(work_items, [
+            sumtrees.TreeSourceWorkItem(source, 30, 55),
+            sumtrees.TreeSourceWorkItem(source, 85, 55),
+            sumtrees.TreeSourceWorkItem(source, 140, 55),
+            sumtrees.TreeSourceWorkItem(source, 195, 56),
+            ])
+        # indexes are not saved next to the sources
+        self.assertEqual(sorted(os.listdir(self.temp_dir)),
+                sorted([os.path.basename(f) for f in self.tree_sources] + ["checkpoints"]))
+
+    def test_pending_work_items(self):
+        checkpoint = sumtrees.AnalysisCheckpoint(self.checkpoint_path, self.settings, chunk_size=100)
+        source = self.tree_sources[0]
+        checkpoint.record(sumtrees.TreeSourceWorkItem(source, 130, 100))
+        checkpoint.record(sumtrees.TreeSourceWorkItem(self.tree_sources[1], 30, None))
+        self.assertEqual(checkpoint.pending_work_items(self.tree_sources, "nexus", 30), [
+            sumtrees.TreeSourceWorkItem(source, 30, 100),
+            sumtrees.TreeSourceWorkItem(source, 230, 21),
+            ])
+        checkpoint.record(sumtrees.TreeSourceWorkItem(source, 30, 100))
+        self.assertEqual(checkpoint.processed_tree_ranges[os.path.abspath(source)], [[30, 230]])
+
+    def test_resume(self):
+        expected = self.analyze_trees()
+        checkpoint = InterruptedAnalysisCheckpoint(self.checkpoint_path, self.settings,
+                interval=0,
+                chunk_size=50,
+                num_work_items_to_record=5)
+        with self.assertRaises(AnalysisInterrupted):
+            self.analyze_trees(checkpoint=checkpoint)
+        checkpoint = sumtrees.AnalysisCheckpoint(self.checkpoint_path, self.settings, chunk_size=50)
+        observed = self.analyze_trees(checkpoint=checkpoint, resume_from_checkpoint=True)
+        # tree indexes are saved with the checkpoint rather than next to the
+        # sources
+        for source in self.tree_sources:
+            self.assertFalse(os.path.exists(source + treeindex.TreeIndex.SIDECAR_SUFFIX))
+            self.assertTrue(os.path.exists(treeindex.get_sidecar_path(source, index_dir=self.checkpoint_dir)))
+        self.assertEqual(len(observed), len(expected))
+        self.assertEqual(observed.split_distribution.split_counts, expected.split_distribution.split_counts)
+        self.assertEqual(
+                sorted(observed.split_distribution.split_edge_lengths.items()),
+                sorted(expected.split_distribution.split_edge_lengths.items()))
+
+    def test_resume_with_different_settings(self):
+        checkpoint = sumtrees.AnalysisCheckpoint(self.checkpoint_path, self.settings)
+        self.analyze_trees(checkpoint=checkpoint)
+        checkpoint = sumtrees.AnalysisCheckpoint(self.checkpoint_path, {"burnin": 0})
+        with self.assertRaises(ValueError):
+            self.analyze_trees(checkpoint=checkpoint, resume_from_checkpoint=True)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1025,6 +1025,41 @@ class TreeCompareTests(dendropytest.ExtendedTestCase):
 #                if (i * i+j+1) % 6 == 0:
 #                    print
 
+    def test_cluster_table_symmetric_difference(self):
+        rng = random.Random(1)
+        taxon_namespace = dendropy.TaxonNamespace(["t{}".format(i) for i in range(12)])
+        def random_tree():
+            tree = dendropy.Tree(taxon_namespace=taxon_namespace)
+            nodes = [dendropy.Node(taxon=taxon) for taxon in taxon_namespace]
+            while len(nodes) > 1:
+                parent = dendropy.Node()
+                for i in range(min(len(nodes), rng.choice((2, 2, 3)))):
+                    parent.add_child(nodes.pop(rng.randrange(len(nodes))))
+                if rng.random() < 0.1:
+                    # unifurcation
+                    grandparent = dendropy.Node()
+                    grandparent.add_child(parent)
+                    parent = grandparent
+                nodes.append(parent)
+            tree.seed_node = nodes[0]
+            return tree
+        for i in range(100):
+            tree1 = random_tree()
+            tree2 = random_tree() if i % 4 else dendropy.Tree(tree1)
+            if i % 5 == 0:
+                tree2.reroot_at_node(rng.choice(tree2.internal_nodes()))
+            tree1.is_rooted = tree2.is_rooted = bool(i % 2)
+            expected = sum(treecompare.false_positives_and_negatives(
+                dendropy.Tree(tree1), dendropy.Tree(tree2)))
+            self.assertEqual(treecompare._cluster_table_symmetric_difference(tree1, tree2), expected)
+            self.assertEqual(treecompare.symmetric_difference(tree1, tree2), expected)
+            self.assertIs(tree1.bipartition_encoding, None)
+        tree1 = random_tree()
+        tree2 = random_tree()
+        tree2.prune_taxa([taxon_namespace[0]])
+        self.assertIs(treecompare._cluster_table_symmetric_difference(tree1, tree2), None)
+        self.assertEqual(treecompare.symmetric_difference(tree1, tree2), sum(treecompare.false_positives_and_negatives(tree1, tree2)))
+
     def testEuclideanDistances(self):
         expected = {
             (0,1):442.518379997, (0,2):458.269219125, (0,3):492.707662859, (0,4):457.731995932, (0,5):463.419798784, (0,6):462.181969494,
@@ -311,6 +311,28 @@ class TreeMidpointRootingTest(ExtendedTestCase):
                         expected_tree.bipartition_edge_map[bipartition].length,
                         3)
 
+    def testMidpointRootingOfRandomTrees(self):
+        rng = MockRandom()
+        for num_tips in (2, 3, 50, 300):
+            tree = dendropy.Tree(is_rooted=True)
+            nodes = [tree.seed_node]
+            while len(tree.leaf_nodes()) < num_tips:
+                nd = rng.choice(nodes)
+                for i in range(2 if nd.is_leaf() else 1):
+                    ch = nd.new_child(edge_length=rng.uniform(0.1, 10))
+                    ch.taxon = tree.taxon_namespace.new_taxon("T{}".format(len(nodes)))
+                    nodes.append(ch)
+            for nd in tree.internal_nodes():
+                nd.taxon = None
+            pdm = tree.phylogenetic_distance_matrix()
+            max_distance = pdm.patristic_distance(*pdm.max_pairwise_distance_taxa())
+            tree.reroot_at_midpoint(update_bipartitions=True)
+            tree.calc_node_root_distances()
+            root_distances = sorted(max(leaf.root_distance for leaf in ch.leaf_iter())
+                    for ch in tree.seed_node.child_node_iter())
+            self.assertAlmostEqual(root_distances[-1], root_distances[-2])
+            self.assertAlmostEqual(root_distances[-1] + root_distances[-2], max_distance)
+
 class TreeRerootingTests(dendropytest.ExtendedTestCase):
     #                  a
     #                 / \
@@ -167,6 +167,30 @@ class TreeShapeKernelBasicCalculationTest(unittest.TestCase):
             for idx2, t2 in enumerate(trees):
                 self.assertAlmostEqual(tree_shape_kernel(t1, t2), expected[idx1][idx2])
                 # print("{}, {} = {}".format(idx1+1, idx2+1, tree_shape_kernel(t1, t2)))
+        for num_processes in (None, 2):
+            gram_matrix = tree_shape_kernel.gram_matrix(trees, num_processes=num_processes)
+            self.assertEqual(len(gram_matrix), len(trees))
+            for idx1, row in enumerate(gram_matrix):
+                self.assertEqual(len(row), len(trees))
+                for idx2, k in enumerate(row):
+                    self.assertAlmostEqual(k, expected[idx1][idx2])
+
+    def test_bounded_cache(self):
+        trees = dendropy.TreeList.get(
+                data="((a:1,b:2):1,c:1);((a:1,c:2):1,b:1);(a:1,(b:1,c:2):1);((a:2,b:2):1,c:1);",
+                schema="newick")
+        tree_shape_kernel = TreeShapeKernel(max_cache_size=2)
+        expected = TreeShapeKernel()(trees[0], trees[1])
+        self.assertEqual(tree_shape_kernel(trees[0], trees[1]), expected)
+        self.assertEqual(list(tree_shape_kernel._tree_cache), [trees[0], trees[1]])
+        tree_shape_kernel(trees[2], trees[0], is_tree2_cache_updated=True)
+        self.assertEqual(list(tree_shape_kernel._tree_cache), [trees[2], trees[0]])
+        tree_shape_kernel.gram_matrix(trees, is_cache_updated=True)
+        self.assertEqual(list(tree_shape_kernel._tree_cache), [trees[2], trees[3]])
+        tree_shape_kernel.remove_from_cache(trees[0])
+        tree_shape_kernel.remove_from_cache(trees[3])
+        self.assertEqual(list(tree_shape_kernel._tree_cache), [trees[2]])
+        self.assertEqual(tree_shape_kernel(trees[0], trees[1], True, True), expected)
 
 class AssemblageInducedTreeManagerTestBase(unittest.TestCase):
 